@@ -2,6 +2,17 @@
 
 from aiops.alerting.models import AlertRule, Alert, AlertSeverity, AlertStatus
 from aiops.alerting.manager import AlertManager
+from aiops.alerting.store import AlertStore
+from aiops.alerting.conditions import CompiledCondition, compile_condition
+from aiops.alerting.evaluator import RuleEvaluator
+from aiops.alerting.scheduler import AlertScheduler, AlertTransition
+from aiops.alerting.channels import (
+    FileChannel, NotificationChannel, SMTPChannel, WebhookChannel, create_channel,
+)
+from aiops.alerting.outbox import Notification, Outbox
+from aiops.alerting.dispatcher import NotificationDispatcher
+from aiops.alerting.grouping import AlertGrouper, InhibitRule, Inhibitor
+from aiops.alerting.silences import Silence, SilenceIndex
 
 __all__ = [
     'AlertRule',
@@ -9,4 +20,23 @@ __all__ = [
     'AlertSeverity',
     'AlertStatus',
     'AlertManager',
+    'AlertStore',
+    'AlertScheduler',
+    'AlertTransition',
+    'CompiledCondition',
+    'RuleEvaluator',
+    'compile_condition',
+    'NotificationChannel',
+    'WebhookChannel',
+    'FileChannel',
+    'SMTPChannel',
+    'create_channel',
+    'Notification',
+    'Outbox',
+    'NotificationDispatcher',
+    'AlertGrouper',
+    'InhibitRule',
+    'Inhibitor',
+    'Silence',
+    'SilenceIndex',
 ]
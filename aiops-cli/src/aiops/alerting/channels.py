@@ -0,0 +1,334 @@
+"""Alert notification channels."""
+
+import asyncio
+import fcntl
+import json
+import smtplib
+import ssl
+from abc import ABC, abstractmethod
+from datetime import datetime
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+from aiops.core.exceptions import NotificationError
+
+
+class NotificationChannel(ABC):
+    """Base class of notification channels.
+
+    A channel delivers digests: every send() carries the notifications
+    batched for the channel since the last one. Sends are coroutines, so
+    slow channels never block the evaluation loop; blocking libraries run in
+    the default executor.
+    """
+
+    type = ''
+
+    def __init__(
+        self,
+        name: str,
+        rate_limit: Optional[float] = None,
+        batch_size: int = 50,
+        batch_wait: float = 10.0
+    ):
+        """Initialize notification channel.
+
+        Args:
+            name: Channel name, as listed in AlertRule.notification_channels
+            rate_limit: Maximum digests per minute (default: unlimited)
+            batch_size: Maximum notifications per digest
+            batch_wait: Seconds to collect notifications into a digest
+        """
+        if not name:
+            raise ValueError("name cannot be empty")
+        if rate_limit is not None and rate_limit <= 0:
+            raise ValueError("rate_limit must be positive")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        if batch_wait < 0:
+            raise ValueError("batch_wait cannot be negative")
+
+        self.name = name
+        self.rate_limit = rate_limit
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+    @abstractmethod
+    async def send(self, payloads: List[Dict[str, Any]]) -> None:
+        """Deliver a digest.
+
+        Args:
+            payloads: Notification payloads
+
+        Raises:
+            NotificationError: If the channel did not accept the digest
+        """
+        pass
+
+    def digest(self, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the digest document of a batch.
+
+        Args:
+            payloads: Notification payloads
+
+        Returns:
+            Digest with the channel, count, send time and notifications
+        """
+        return {
+            'channel': self.name,
+            'sent_at': datetime.now().isoformat(),
+            'count': len(payloads),
+            'notifications': payloads,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a channel definition (see create_channel())."""
+        return {
+            'name': self.name,
+            'type': self.type,
+            'rate_limit': self.rate_limit,
+            'batch_size': self.batch_size,
+            'batch_wait': self.batch_wait,
+        }
+
+
+class WebhookChannel(NotificationChannel):
+    """POST digests as JSON to an HTTP(S) endpoint.
+
+    The request is written on asyncio streams, so a slow endpoint only
+    delays its own channel. Any non-2xx response is a failed delivery.
+    """
+
+    type = 'webhook'
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10.0,
+        **options
+    ):
+        """Initialize webhook channel.
+
+        Args:
+            name: Channel name
+            url: http:// or https:// endpoint
+            headers: Extra request headers
+            timeout: Seconds to wait for the response
+            **options: rate_limit, batch_size and batch_wait
+        """
+        super().__init__(name, **options)
+        parts = urlsplit(url or '')
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Invalid webhook url: {url!r}")
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+
+    async def send(self, payloads: List[Dict[str, Any]]) -> None:
+        """POST the digest to the endpoint."""
+        parts = urlsplit(self.url)
+        https = parts.scheme == 'https'
+        port = parts.port or (443 if https else 80)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        body = json.dumps(self.digest(payloads), default=str).encode('utf-8')
+
+        headers = {
+            'Host': parts.netloc,
+            'Content-Type': 'application/json',
+            'Content-Length': str(len(body)),
+            'Connection': 'close',
+            'User-Agent': 'aiops-cli',
+            **self.headers,
+        }
+        request = f"POST {path} HTTP/1.1\r\n" + ''.join(
+            f"{key}: {value}\r\n" for key, value in headers.items()
+        ) + "\r\n"
+
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    parts.hostname, port, ssl=ssl.create_default_context() if https else None
+                ),
+                self.timeout,
+            )
+            writer.write(request.encode('latin-1') + body)
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise NotificationError(f"Webhook {self.url} failed: {str(e) or type(e).__name__}")
+        finally:
+            if writer is not None:
+                writer.close()
+
+        fields = status_line.decode('latin-1').split(None, 2)
+        if len(fields) < 2 or not fields[1].isdigit():
+            raise NotificationError(f"Webhook {self.url} sent an invalid response")
+        if not 200 <= int(fields[1]) < 300:
+            raise NotificationError(
+                f"Webhook {self.url} responded {' '.join(fields[1:]).strip()}"
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a channel definition."""
+        return {**super().to_dict(), 'url': self.url, 'headers': self.headers,
+                'timeout': self.timeout}
+
+
+class FileChannel(NotificationChannel):
+    """Append notifications to an NDJSON file, one line each.
+
+    Appends hold an fcntl lock on the file, so digests written by several
+    dispatcher processes never interleave within a line.
+    """
+
+    type = 'file'
+
+    def __init__(self, name: str, path: str, **options):
+        """Initialize file channel.
+
+        Args:
+            name: Channel name
+            path: NDJSON file to append to
+            **options: rate_limit, batch_size and batch_wait
+        """
+        super().__init__(name, **options)
+        if not path:
+            raise ValueError("path cannot be empty")
+        self.path = Path(path)
+
+    async def send(self, payloads: List[Dict[str, Any]]) -> None:
+        """Append the notifications to the file."""
+        lines = ''.join(json.dumps(payload, default=str) + '\n' for payload in payloads)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._append, lines)
+        except OSError as e:
+            raise NotificationError(f"Cannot write {self.path}: {str(e)}")
+
+    def _append(self, lines: str) -> None:
+        """Append lines to the file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.write(lines)
+                f.flush()
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a channel definition."""
+        return {**super().to_dict(), 'path': str(self.path)}
+
+
+class SMTPChannel(NotificationChannel):
+    """Mail digests through an SMTP server, by default the local one."""
+
+    type = 'smtp'
+
+    def __init__(
+        self,
+        name: str,
+        recipients: List[str],
+        host: str = 'localhost',
+        port: int = 25,
+        sender: str = 'aiops@localhost',
+        timeout: float = 10.0,
+        **options
+    ):
+        """Initialize SMTP channel.
+
+        Args:
+            name: Channel name
+            recipients: Mail addresses
+            host: SMTP server
+            port: SMTP port
+            sender: From address
+            timeout: Connection timeout in seconds
+            **options: rate_limit, batch_size and batch_wait
+        """
+        super().__init__(name, **options)
+        if not recipients:
+            raise ValueError("recipients cannot be empty")
+        self.recipients = list(recipients)
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    async def send(self, payloads: List[Dict[str, Any]]) -> None:
+        """Mail the digest."""
+        message = self.message(payloads)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._send, message)
+        except (OSError, smtplib.SMTPException) as e:
+            raise NotificationError(f"SMTP {self.host}:{self.port} failed: {str(e)}")
+
+    def message(self, payloads: List[Dict[str, Any]]) -> EmailMessage:
+        """Build the mail of a digest.
+
+        Args:
+            payloads: Notification payloads
+
+        Returns:
+            Mail with one line per notification and the digest as JSON
+        """
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message['Subject'] = f"[aiops] {len(payloads)} alert notification" + \
+            ('s' if len(payloads) != 1 else '')
+
+        lines = []
+        for payload in payloads:
+            labels = ', '.join(f"{k}={v}" for k, v in (payload.get('labels') or {}).items())
+            lines.append(
+                f"{payload.get('timestamp', '')}  {payload.get('rule_name', '')}"
+                + (f" {{{labels}}}" if labels else '')
+                + f"  {payload.get('status', '')}"
+            )
+        lines.extend(['', json.dumps(self.digest(payloads), indent=2, default=str)])
+        message.set_content('\n'.join(lines))
+        return message
+
+    def _send(self, message: EmailMessage) -> None:
+        """Send a mail."""
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a channel definition."""
+        return {**super().to_dict(), 'recipients': self.recipients, 'host': self.host,
+                'port': self.port, 'sender': self.sender, 'timeout': self.timeout}
+
+
+# Channel class per definition type
+CHANNEL_TYPES = {
+    channel.type: channel for channel in (WebhookChannel, FileChannel, SMTPChannel)
+}
+
+
+def create_channel(definition: Dict[str, Any]) -> NotificationChannel:
+    """Create a channel from its definition.
+
+    Args:
+        definition: Channel dictionary with ``name``, ``type`` and the options
+            of the type (see to_dict())
+
+    Returns:
+        Notification channel
+
+    Raises:
+        ValueError: If the type is unknown or an option is invalid
+    """
+    options = {key: value for key, value in definition.items() if value is not None}
+    channel_type = options.pop('type', None)
+    if channel_type not in CHANNEL_TYPES:
+        raise ValueError(f"Unknown channel type: {channel_type}")
+    try:
+        return CHANNEL_TYPES[channel_type](**options)
+    except TypeError as e:
+        raise ValueError(f"Invalid {channel_type} channel: {str(e)}")
@@ -0,0 +1,429 @@
+"""Alert rule condition language.
+
+Conditions are expressions over metric series named as in collector output
+(see ``aiops.correlation.series.flatten_snapshot``)::
+
+    cpu.cpu_percent > 90 and memory.mem_used_percent > 80
+    avg_over(cpu.cpu_percent, 5m) > 75 or not (memory.swap_used_percent < 50)
+    disk.*.avg_write_time_ms > 50
+    rate_over(network.eth0.errin, 1m) > 0
+
+Supported are numbers, series names, arithmetic (``+ - * /``), comparisons
+(``> >= < <= == !=``), ``and``, ``or``, ``not``, ``abs(x)`` and the window
+functions ``avg_over``, ``min_over``, ``max_over``, ``sum_over``,
+``count_over``, ``delta_over`` and ``rate_over``, which take a series and a
+duration (``30s``, ``5m``, ``1h``, ``1d``). Names containing characters
+other than letters, digits, ``_`` and ``.`` are quoted with backticks.
+
+One ``*`` segment in a name matches every instance of a metric (disk,
+interface, process); the condition then holds per instance. All wildcard
+names of a condition refer to the same instance.
+
+A missing series has no value: arithmetic with it has no value and
+comparisons with it are false.
+
+Conditions are parsed once and compiled into nested closures, so evaluating
+a rule is a handful of function calls and dictionary lookups.
+"""
+
+import operator
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+# Compiled expression: (values, windows, instance) -> value
+Evaluator = Callable[[Dict[str, float], Dict[Tuple[str, float], Any], Optional[str]], Any]
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+WINDOW_FUNCTIONS = (
+    'avg_over', 'min_over', 'max_over', 'sum_over', 'count_over', 'delta_over', 'rate_over',
+)
+
+COMPARISONS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+ARITHMETIC = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': lambda a, b: a / b if b else None,
+}
+
+KEYWORDS = ('and', 'or', 'not')
+
+# A '*' is a name only as a whole dot-separated segment; elsewhere it multiplies
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<duration>\d+(?:\.\d+)?[smhd])(?![\w.])
+      | (?P<number>\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+      | (?P<name>(?:[A-Za-z_]\w*|\*(?=\.))(?:\.(?:\w+|\*))*)
+      | `(?P<quoted>[^`]+)`
+      | (?P<op>>=|<=|==|!=|[-+*/()<>,])
+    )""", re.VERBOSE)
+
+
+@dataclass
+class WindowSpec:
+    """A series aggregated over a time window by a condition."""
+
+    name: str  # Series name, possibly with a '*' segment
+    seconds: float
+
+
+@dataclass
+class CompiledCondition:
+    """A parsed and compiled rule condition."""
+
+    source: str
+    evaluate: Evaluator
+    names: Set[str] = field(default_factory=set)  # Series read, possibly with '*'
+    windows: List[WindowSpec] = field(default_factory=list)
+
+    @property
+    def wildcards(self) -> Set[str]:
+        """Get the names with a '*' segment."""
+        return {name for name in self.names if '*' in name}
+
+    def holds(
+        self,
+        values: Dict[str, float],
+        windows: Optional[Dict[Tuple[str, float], Any]] = None,
+        instance: Optional[str] = None
+    ) -> bool:
+        """Check if the condition holds.
+
+        Args:
+            values: Latest value per series
+            windows: Window aggregates per (series, seconds)
+            instance: Instance substituted for '*'
+
+        Returns:
+            True if the condition holds
+        """
+        result = self.evaluate(values, windows or {}, instance)
+        return result is not None and result is not False and result != 0
+
+
+def parse_duration(text: str) -> float:
+    """Parse a duration such as ``30s``, ``5m``, ``1h`` or ``1d``.
+
+    Args:
+        text: Duration text
+
+    Returns:
+        Duration in seconds
+    """
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', text.strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {text!r}")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def split_wildcard(name: str) -> Tuple[str, str]:
+    """Split a wildcard name around its '*' segment.
+
+    Args:
+        name: Name with one '*' segment (``disk.*.avg_write_time_ms``)
+
+    Returns:
+        Tuple of (prefix, suffix) around the instance
+    """
+    prefix, _, suffix = name.partition('*')
+    return prefix, suffix
+
+
+def compile_condition(source: str) -> CompiledCondition:
+    """Parse and compile a rule condition.
+
+    Args:
+        source: Condition text
+
+    Returns:
+        CompiledCondition object
+
+    Raises:
+        ValueError: If the condition is invalid
+    """
+    parser = _Parser(source)
+    evaluate = parser.parse()
+    return CompiledCondition(source, evaluate, parser.names, parser.windows)
+
+
+class _Parser:
+    """Recursive descent parser compiling a condition into closures."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = self._tokenize(source)
+        self.position = 0
+        self.names: Set[str] = set()
+        self.windows: List[WindowSpec] = []
+
+    def _tokenize(self, source: str) -> List[Tuple[str, str, int]]:
+        """Split the source into (kind, text, offset) tokens."""
+        tokens = []
+        offset = 0
+        source = source.rstrip()
+        while offset < len(source):
+            match = TOKEN_PATTERN.match(source, offset)
+            if not match or match.end() == offset:
+                offset += len(source[offset:]) - len(source[offset:].lstrip())
+                raise ValueError(f"Unexpected character at {offset + 1}: {source[offset:]!r}")
+            kind = match.lastgroup
+            text = match.group(kind)
+            start = match.start(kind)
+            if kind == 'name' and text in KEYWORDS:
+                kind = 'keyword'
+            elif kind == 'quoted':
+                kind = 'name'
+            tokens.append((kind, text, start))
+            offset = match.end()
+        return tokens
+
+    def _peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.position < len(self.tokens):
+            kind, text, _ = self.tokens[self.position]
+            return kind, text
+        return None, None
+
+    def _next(self) -> Tuple[str, str]:
+        if self.position >= len(self.tokens):
+            raise ValueError(f"Unexpected end of condition: {self.source!r}")
+        kind, text, _ = self.tokens[self.position]
+        self.position += 1
+        return kind, text
+
+    def _expect(self, text: str) -> None:
+        kind, found = self._next()
+        if found != text:
+            raise self._error(f"expected {text!r}, found {found!r}")
+
+    def _error(self, message: str) -> ValueError:
+        offset = self.tokens[min(self.position, len(self.tokens)) - 1][2] + 1
+        return ValueError(f"Invalid condition at {offset}: {message}")
+
+    def parse(self) -> Evaluator:
+        if not self.tokens:
+            raise ValueError("condition cannot be empty")
+        evaluate = self._or()
+        if self.position < len(self.tokens):
+            self.position += 1
+            raise self._error(f"unexpected {self.tokens[self.position - 1][1]!r}")
+        return evaluate
+
+    def _or(self) -> Evaluator:
+        operands = [self._and()]
+        while self._peek() == ('keyword', 'or'):
+            self._next()
+            operands.append(self._and())
+        if len(operands) == 1:
+            return operands[0]
+
+        def evaluate_or(values, windows, instance):
+            for operand in operands:
+                result = operand(values, windows, instance)
+                if result is not None and result is not False and result != 0:
+                    return True
+            return False
+        return evaluate_or
+
+    def _and(self) -> Evaluator:
+        operands = [self._not()]
+        while self._peek() == ('keyword', 'and'):
+            self._next()
+            operands.append(self._not())
+        if len(operands) == 1:
+            return operands[0]
+
+        def evaluate_and(values, windows, instance):
+            for operand in operands:
+                result = operand(values, windows, instance)
+                if result is None or result is False or result == 0:
+                    return False
+            return True
+        return evaluate_and
+
+    def _not(self) -> Evaluator:
+        if self._peek() == ('keyword', 'not'):
+            self._next()
+            operand = self._not()
+
+            def evaluate_not(values, windows, instance):
+                result = operand(values, windows, instance)
+                return result is None or result is False or result == 0
+            return evaluate_not
+        return self._comparison()
+
+    def _comparison(self) -> Evaluator:
+        left = self._sum()
+        kind, text = self._peek()
+        if kind != 'op' or text not in COMPARISONS:
+            return left
+        self._next()
+        right = self._sum()
+        compare = COMPARISONS[text]
+
+        if getattr(right, 'constant', None) is not None:
+            # Common case: series compared with a number
+            constant = right.constant
+            name = getattr(left, 'series', None)
+
+            if name is not None:
+                def evaluate_series_constant(values, windows, instance):
+                    value = values.get(name)
+                    return value is not None and compare(value, constant)
+                return evaluate_series_constant
+
+            affixes = getattr(left, 'affixes', None)
+            if affixes is not None:
+                prefix, suffix = affixes
+
+                def evaluate_instance_constant(values, windows, instance):
+                    value = values.get(prefix + instance + suffix)
+                    return value is not None and compare(value, constant)
+                return evaluate_instance_constant
+
+            def evaluate_constant(values, windows, instance):
+                value = left(values, windows, instance)
+                return value is not None and compare(value, constant)
+            return evaluate_constant
+
+        def evaluate_comparison(values, windows, instance):
+            a = left(values, windows, instance)
+            if a is None:
+                return False
+            b = right(values, windows, instance)
+            return b is not None and compare(a, b)
+        return evaluate_comparison
+
+    def _sum(self) -> Evaluator:
+        return self._binary(self._term, '+-')
+
+    def _term(self) -> Evaluator:
+        return self._binary(self._unary, '*/')
+
+    def _binary(self, operand_parser: Callable[[], Evaluator], operators: str) -> Evaluator:
+        left = operand_parser()
+        while True:
+            kind, text = self._peek()
+            if kind != 'op' or text not in operators:
+                return left
+            self._next()
+            right = operand_parser()
+            left = self._arithmetic(ARITHMETIC[text], left, right)
+
+    @staticmethod
+    def _arithmetic(operation, left: Evaluator, right: Evaluator) -> Evaluator:
+        constants = (getattr(left, 'constant', None), getattr(right, 'constant', None))
+        if None not in constants:
+            return _constant(operation(*constants))
+
+        def evaluate_arithmetic(values, windows, instance):
+            a = left(values, windows, instance)
+            if a is None:
+                return None
+            b = right(values, windows, instance)
+            return None if b is None else operation(a, b)
+        return evaluate_arithmetic
+
+    def _unary(self) -> Evaluator:
+        if self._peek() == ('op', '-'):
+            self._next()
+            return self._arithmetic(ARITHMETIC['-'], _constant(0.0), self._unary())
+        return self._primary()
+
+    def _primary(self) -> Evaluator:
+        kind, text = self._next()
+        if kind == 'number':
+            return _constant(float(text))
+        if kind == 'duration':
+            raise self._error(f"duration {text!r} outside a window function")
+        if text == '(':
+            evaluate = self._or()
+            self._expect(')')
+            return evaluate
+        if kind != 'name':
+            raise self._error(f"unexpected {text!r}")
+
+        if self._peek() == ('op', '('):
+            self._next()
+            return self._function(text)
+        return self._series(text)
+
+    def _series(self, name: str) -> Evaluator:
+        if name.count('*') > 1:
+            raise self._error(f"more than one '*' in {name!r}")
+        self.names.add(name)
+
+        if '*' in name:
+            prefix, suffix = split_wildcard(name)
+
+            def evaluate_instance(values, windows, instance):
+                return values.get(prefix + instance + suffix)
+            evaluate_instance.affixes = (prefix, suffix)
+            return evaluate_instance
+
+        def evaluate_series(values, windows, instance):
+            return values.get(name)
+        evaluate_series.series = name
+        return evaluate_series
+
+    def _function(self, function: str) -> Evaluator:
+        if function == 'abs':
+            operand = self._or()
+            self._expect(')')
+
+            def evaluate_abs(values, windows, instance):
+                value = operand(values, windows, instance)
+                return None if value is None else abs(value)
+            return evaluate_abs
+
+        if function not in WINDOW_FUNCTIONS:
+            raise self._error(f"unknown function {function!r}")
+
+        kind, name = self._next()
+        if kind != 'name':
+            raise self._error(f"{function} expects a series name, found {name!r}")
+        self._expect(',')
+        kind, text = self._next()
+        if kind != 'duration':
+            raise self._error(f"{function} expects a duration such as 5m, found {text!r}")
+        self._expect(')')
+
+        seconds = parse_duration(text)
+        if name.count('*') > 1:
+            raise self._error(f"more than one '*' in {name!r}")
+        self.names.add(name)
+        self.windows.append(WindowSpec(name, seconds))
+        aggregate = function[:-len('_over')]
+
+        if '*' in name:
+            prefix, suffix = split_wildcard(name)
+
+            def evaluate_instance_window(values, windows, instance):
+                window = windows.get((prefix + instance + suffix, seconds))
+                return None if window is None else window.aggregate(aggregate)
+            return evaluate_instance_window
+
+        key = (name, seconds)
+
+        def evaluate_window(values, windows, instance):
+            window = windows.get(key)
+            return None if window is None else window.aggregate(aggregate)
+        return evaluate_window
+
+
+def _constant(value: Any) -> Evaluator:
+    """Create an evaluator returning a constant."""
+    def evaluate_constant(values, windows, instance):
+        return value
+    evaluate_constant.constant = value
+    return evaluate_constant
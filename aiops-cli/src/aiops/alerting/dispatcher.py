@@ -0,0 +1,365 @@
+"""Asynchronous delivery of alert notifications."""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+from aiops.alerting.channels import NotificationChannel
+from aiops.alerting.models import AlertStatus
+from aiops.alerting.outbox import Notification, Outbox
+
+
+# Transition statuses that are notified
+NOTIFY_STATUSES = (AlertStatus.FIRING.value, AlertStatus.RESOLVED.value)
+
+
+def should_notify(transition) -> bool:
+    """Check if an alert transition is notified.
+
+    Firing and resolved transitions are, except the resolution of a
+    silenced alert, which was never notified as firing. An alert still
+    firing when its silence ends is notified then.
+
+    Args:
+        transition: AlertTransition
+
+    Returns:
+        True if the transition is notified
+    """
+    if transition.status not in NOTIFY_STATUSES:
+        return False
+    return not (transition.status == AlertStatus.RESOLVED.value
+                and transition.previous == AlertStatus.SILENCED.value)
+
+
+class RateLimiter:
+    """Token bucket limiting the digests per minute of one channel."""
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        """Initialize rate limiter.
+
+        Args:
+            per_minute: Sustained rate
+            burst: Sends allowed at once after an idle period
+        """
+        self.interval = 60.0 / per_minute
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Wait until a send is allowed."""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) / self.interval)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * self.interval)
+
+
+class NotificationDispatcher:
+    """Deliver notifications through per-channel asyncio workers.
+
+    submit() writes notifications to the outbox and hands them to the
+    worker of their channel, so it returns at once and can be called from
+    the evaluation loop in another thread. Each worker collects the
+    notifications arriving within the channel's ``batch_wait`` (up to
+    ``batch_size``) into one digest, waits for the channel's rate limit and
+    sends it. A failed digest is retried with exponential backoff until
+    ``max_attempts``; then its notifications are marked failed in the
+    outbox. Delivered notifications are removed from the outbox, and the
+    ones left when the dispatcher stops are delivered after start().
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        channels: Iterable[NotificationChannel],
+        max_attempts: int = 8,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        jitter: float = 0.1
+    ):
+        """Initialize notification dispatcher.
+
+        Args:
+            outbox: Outbox notifications are persisted in
+            channels: Channels to deliver to
+            max_attempts: Attempts per notification before giving up
+            backoff: Delay after the first failed attempt, in seconds
+            max_backoff: Maximum delay between attempts, in seconds
+            jitter: Random extra delay, as a fraction of the delay
+        """
+        self.outbox = outbox
+        self.channels: Dict[str, NotificationChannel] = {
+            channel.name: channel for channel in channels
+        }
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.stats = {'delivered': 0, 'retried': 0, 'failed': 0, 'digests': 0}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._workers: List[asyncio.Task] = []
+        self._retries: Set[asyncio.TimerHandle] = set()
+        self._closing: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._inflight = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def backoff_delay(self, attempts: int) -> float:
+        """Get the delay before the next attempt.
+
+        Args:
+            attempts: Failed attempts so far
+
+        Returns:
+            Delay in seconds
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+        return delay * (1 + random.uniform(0, self.jitter))
+
+    # Lifecycle
+
+    async def start(self) -> None:
+        """Start the channel workers and queue the outbox backlog."""
+        self._loop = asyncio.get_running_loop()
+        self._closing = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        for name, channel in self.channels.items():
+            self._queues[name] = asyncio.Queue()
+            if channel.rate_limit:
+                self._limiters[name] = RateLimiter(channel.rate_limit)
+            self._workers.append(asyncio.ensure_future(self._worker(channel)))
+
+        now = time.time()
+        for notification in self.outbox.pending():
+            if notification.channel not in self.channels:
+                continue
+            self._schedule(notification, notification.next_attempt_at - now)
+
+    async def stop(self, timeout: float = 10.0) -> bool:
+        """Flush the queued notifications and stop the workers.
+
+        Batches being collected are sent without waiting for ``batch_wait``.
+        Notifications still queued after ``timeout`` and scheduled retries
+        stay in the outbox.
+
+        Args:
+            timeout: Seconds to wait for the queues to drain
+
+        Returns:
+            True if every queued notification was handled
+        """
+        self._closing.set()
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            drained = True
+        except asyncio.TimeoutError:
+            drained = False
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        return drained
+
+    def start_background(self) -> None:
+        """Run the dispatcher on an event loop in a daemon thread."""
+        started = threading.Event()
+        errors: List[BaseException] = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name='aiops-notifications', daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    def stop_background(self, timeout: float = 10.0) -> bool:
+        """Stop a dispatcher started with start_background().
+
+        Args:
+            timeout: Seconds to wait for the queues to drain
+
+        Returns:
+            True if every queued notification was handled
+        """
+        if self._thread is None:
+            return True
+        future = asyncio.run_coroutine_threadsafe(self.stop(timeout), self._loop)
+        drained = future.result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+        return drained
+
+    # Submission
+
+    def submit(self, channels: Iterable[str], payload: Dict[str, Any]) -> List[Notification]:
+        """Persist a notification for channels and queue it for delivery.
+
+        Thread-safe. Unknown channels are skipped. Without a running
+        dispatcher, the notifications wait in the outbox until start().
+
+        Args:
+            channels: Channel names
+            payload: Notification payload
+
+        Returns:
+            Notifications written to the outbox
+        """
+        notifications = []
+        for name in dict.fromkeys(channels):
+            if name in self.channels:
+                notifications.extend(self.outbox.add(name, [payload]))
+
+        if self._loop is not None and not self._loop.is_closed():
+            for notification in notifications:
+                self._loop.call_soon_threadsafe(self._enqueue, notification)
+        return notifications
+
+    def notify(self, transition, channels: Iterable[str]) -> List[Notification]:
+        """Submit an alert transition if it fired or resolved an alert.
+
+        Args:
+            transition: AlertTransition
+            channels: Channel names of the rule
+
+        Returns:
+            Notifications written to the outbox
+        """
+        if not should_notify(transition):
+            return []
+        return self.submit(channels, transition.to_dict())
+
+    # Workers
+
+    def _enqueue(self, notification: Notification) -> None:
+        """Queue a notification for its channel's worker (in the loop)."""
+        if not self._workers:
+            return
+        self._inflight += 1
+        self._idle.clear()
+        self._queues[notification.channel].put_nowait(notification)
+
+    def _schedule(self, notification: Notification, delay: float) -> None:
+        """Queue a notification after a delay (in the loop)."""
+        if delay <= 0:
+            self._enqueue(notification)
+            return
+
+        def fire():
+            self._retries.discard(handle)
+            self._enqueue(notification)
+
+        handle = self._loop.call_later(delay, fire)
+        self._retries.add(handle)
+
+    def _done(self, count: int) -> None:
+        """Mark queued notifications as handled."""
+        self._inflight -= count
+        if self._inflight <= 0:
+            self._inflight = 0
+            self._idle.set()
+
+    async def _worker(self, channel: NotificationChannel) -> None:
+        """Collect and send the digests of one channel."""
+        queue = self._queues[channel.name]
+        while True:
+            batch = [await queue.get()]
+            await self._collect(channel, queue, batch)
+
+            limiter = self._limiters.get(channel.name)
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                await self._deliver(channel, batch)
+            finally:
+                self._done(len(batch))
+
+    async def _collect(
+        self,
+        channel: NotificationChannel,
+        queue: asyncio.Queue,
+        batch: List[Notification]
+    ) -> None:
+        """Add the notifications arriving within the batch window to a batch."""
+        deadline = self._loop.time() + channel.batch_wait
+        while len(batch) < channel.batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - self._loop.time()
+            if remaining <= 0 or self._closing.is_set():
+                return
+
+            getter = asyncio.ensure_future(queue.get())
+            closing = asyncio.ensure_future(self._closing.wait())
+            try:
+                await asyncio.wait(
+                    {getter, closing}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                closing.cancel()
+                if not getter.done():
+                    getter.cancel()
+            if not getter.done():
+                return
+            batch.append(getter.result())
+
+    async def _deliver(self, channel: NotificationChannel, batch: List[Notification]) -> None:
+        """Send a digest and record the outcome in the outbox."""
+        try:
+            await channel.send([notification.payload for notification in batch])
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            retry, give_up = [], []
+            for notification in batch:
+                notification.attempts += 1
+                (give_up if notification.attempts >= self.max_attempts else retry).append(
+                    notification
+                )
+
+            if retry:
+                delay = self.backoff_delay(max(n.attempts for n in retry))
+                for notification in retry:
+                    notification.next_attempt_at = time.time() + delay
+                self.outbox.retry(retry, error)
+                if not self._closing.is_set():
+                    for notification in retry:
+                        self._schedule(notification, delay)
+                self.stats['retried'] += len(retry)
+            if give_up:
+                self.outbox.fail(give_up, error)
+                self.stats['failed'] += len(give_up)
+        else:
+            self.outbox.complete([notification.id for notification in batch])
+            self.stats['delivered'] += len(batch)
+            self.stats['digests'] += 1
@@ -0,0 +1,290 @@
+"""Alert rule evaluation against metric batches."""
+
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from aiops.alerting.conditions import CompiledCondition, compile_condition, split_wildcard
+from aiops.correlation.series import flatten_snapshot
+
+
+# Label of the instance matched by a '*' segment
+INSTANCE_LABEL = 'instance'
+
+
+class SeriesWindow:
+    """Samples of one series over a sliding time window.
+
+    Keeps a running sum and monotonic queues, so every aggregate is O(1)
+    and adding a sample is amortized O(1).
+    """
+
+    __slots__ = ('seconds', '_samples', '_sum', '_min', '_max')
+
+    def __init__(self, seconds: float):
+        """Initialize series window.
+
+        Args:
+            seconds: Window length in seconds
+        """
+        self.seconds = seconds
+        self._samples: deque = deque()  # (timestamp, value)
+        self._sum = 0.0
+        self._min: deque = deque()  # Increasing values
+        self._max: deque = deque()  # Decreasing values
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a sample.
+
+        Args:
+            timestamp: Sample time (epoch seconds)
+            value: Sample value
+        """
+        self._samples.append((timestamp, value))
+        self._sum += value
+        while self._min and self._min[-1][1] > value:
+            self._min.pop()
+        self._min.append((timestamp, value))
+        while self._max and self._max[-1][1] < value:
+            self._max.pop()
+        self._max.append((timestamp, value))
+        self.expire(timestamp)
+
+    def expire(self, now: float) -> None:
+        """Drop samples older than the window.
+
+        Args:
+            now: Current time (epoch seconds)
+        """
+        cutoff = now - self.seconds
+        samples = self._samples
+        while samples and samples[0][0] <= cutoff:
+            self._sum -= samples.popleft()[1]
+        while self._min and self._min[0][0] <= cutoff:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= cutoff:
+            self._max.popleft()
+        if not samples:
+            self._sum = 0.0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def aggregate(self, kind: str) -> Optional[float]:
+        """Aggregate the samples in the window.
+
+        Args:
+            kind: avg, min, max, sum, count, delta or rate
+
+        Returns:
+            Aggregate, or None without (enough) samples
+        """
+        samples = self._samples
+        if kind == 'count':
+            return float(len(samples))
+        if not samples:
+            return None
+        if kind == 'avg':
+            return self._sum / len(samples)
+        if kind == 'min':
+            return self._min[0][1]
+        if kind == 'max':
+            return self._max[0][1]
+        if kind == 'sum':
+            return self._sum
+        if len(samples) < 2:
+            return None
+        (first_time, first), (last_time, last) = samples[0], samples[-1]
+        if kind == 'delta':
+            return last - first
+        if kind == 'rate':
+            return (last - first) / (last_time - first_time) if last_time > first_time else None
+        raise ValueError(f"Unknown aggregate: {kind}")
+
+
+class RuleEvaluator:
+    """Evaluate compiled rule conditions against the latest metric batch.
+
+    A batch maps series names to values, as flattened from a collector
+    snapshot. Every batch first updates the windows the rules aggregate
+    over; then each rule is evaluated. Rules without wildcards cost one
+    closure call; wildcard rules are evaluated once per instance present in
+    the batch, with the instances of each wildcard name computed once per
+    batch and shared across rules.
+    """
+
+    def __init__(self):
+        """Initialize rule evaluator."""
+        self.conditions: Dict[str, CompiledCondition] = {}
+        self.windows: Dict[Tuple[str, float], SeriesWindow] = {}
+        self._plain: List[Tuple[str, Any]] = []
+        self._wildcard: List[Tuple[str, Any, Set[str]]] = []
+        self._window_specs: Set[Tuple[str, float]] = set()
+        self._dirty = False
+
+    def add_rule(self, name: str, condition: Union[str, CompiledCondition]) -> CompiledCondition:
+        """Add or replace a rule.
+
+        Args:
+            name: Rule name
+            condition: Condition text or compiled condition
+
+        Returns:
+            Compiled condition
+
+        Raises:
+            ValueError: If the condition is invalid
+        """
+        if isinstance(condition, str):
+            condition = compile_condition(condition)
+        self.conditions[name] = condition
+        self._dirty = True
+        return condition
+
+    def remove_rule(self, name: str) -> None:
+        """Remove a rule.
+
+        Args:
+            name: Rule name
+        """
+        if self.conditions.pop(name, None) is not None:
+            self._dirty = True
+
+    def _rebuild(self) -> None:
+        """Rebuild the evaluation lists and the window set."""
+        self._plain = []
+        self._wildcard = []
+        specs = set()
+        for name, condition in self.conditions.items():
+            wildcards = condition.wildcards
+            if wildcards:
+                self._wildcard.append((name, condition.evaluate, wildcards))
+            else:
+                self._plain.append((name, condition.evaluate))
+            specs.update((window.name, window.seconds) for window in condition.windows)
+
+        self._window_specs = specs
+        self._dirty = False
+        for key in list(self.windows):
+            if not any(self._window_matches(spec, key) for spec in specs):
+                del self.windows[key]
+
+    @staticmethod
+    def _window_matches(spec: Tuple[str, float], key: Tuple[str, float]) -> bool:
+        """Check if a window of a concrete series belongs to a window spec."""
+        name, seconds = spec
+        if seconds != key[1]:
+            return False
+        if '*' not in name:
+            return name == key[0]
+        prefix, suffix = split_wildcard(name)
+        return key[0].startswith(prefix) and key[0].endswith(suffix)
+
+    def update(self, values: Dict[str, float], timestamp: datetime) -> None:
+        """Add a batch to the windows.
+
+        Args:
+            values: Latest value per series
+            timestamp: Batch time
+        """
+        if self._dirty:
+            self._rebuild()
+
+        now = timestamp.timestamp()
+        windows = self.windows
+        for name, seconds in self._window_specs:
+            names = self._concrete(name, values) if '*' in name else (name,)
+            for series in names:
+                value = values.get(series)
+                if value is None:
+                    continue
+                window = windows.get((series, seconds))
+                if window is None:
+                    window = windows[(series, seconds)] = SeriesWindow(seconds)
+                window.add(now, value)
+
+        for window in windows.values():
+            window.expire(now)
+
+    def evaluate(
+        self,
+        values: Dict[str, float],
+        timestamp: Optional[datetime] = None
+    ) -> Dict[str, List[Dict[str, str]]]:
+        """Evaluate all rules against a batch.
+
+        Args:
+            values: Latest value per series
+            timestamp: Batch time (default: now)
+
+        Returns:
+            Label sets for which each rule holds, for the rules that hold;
+            ``[{}]`` for rules without wildcards
+        """
+        if self._dirty:
+            self._rebuild()
+        if self._window_specs:
+            self.update(values, timestamp or datetime.now())
+
+        windows = self.windows
+        results: Dict[str, List[Dict[str, str]]] = {}
+        for name, evaluate in self._plain:
+            result = evaluate(values, windows, None)
+            if result is not None and result is not False and result != 0:
+                results[name] = [{}]
+
+        if self._wildcard:
+            instances: Dict[str, Set[str]] = {}
+            for name, evaluate, wildcards in self._wildcard:
+                matched = None
+                for wildcard in wildcards:
+                    if wildcard not in instances:
+                        instances[wildcard] = set(self._instances(wildcard, values))
+                    matched = instances[wildcard] if matched is None else \
+                        matched & instances[wildcard]
+
+                labels = []
+                for instance in sorted(matched):
+                    result = evaluate(values, windows, instance)
+                    if result is not None and result is not False and result != 0:
+                        labels.append({INSTANCE_LABEL: instance})
+                if labels:
+                    results[name] = labels
+        return results
+
+    def evaluate_snapshot(self, snapshot: Dict[str, Any]) -> Dict[str, List[Dict[str, str]]]:
+        """Evaluate all rules against a collector snapshot.
+
+        Args:
+            snapshot: Snapshot with a timestamp and metric lists per type
+
+        Returns:
+            Label sets for which each rule holds (see evaluate())
+        """
+        timestamp = snapshot.get('timestamp')
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        return self.evaluate(flatten_snapshot(snapshot), timestamp)
+
+    @staticmethod
+    def _instances(name: str, values: Dict[str, float]) -> List[str]:
+        """Find the instances a wildcard name matches in a batch.
+
+        Args:
+            name: Name with a '*' segment
+            values: Latest value per series
+
+        Returns:
+            Instances
+        """
+        prefix, suffix = split_wildcard(name)
+        start, end = len(prefix), -len(suffix) if suffix else None
+        return [
+            key[start:end] for key in values
+            if key.startswith(prefix) and key.endswith(suffix) and
+            len(key) > len(prefix) + len(suffix)
+        ]
+
+    def _concrete(self, name: str, values: Dict[str, float]) -> List[str]:
+        """Expand a wildcard name to the series present in a batch."""
+        prefix, suffix = split_wildcard(name)
+        return [prefix + instance + suffix for instance in self._instances(name, values)]
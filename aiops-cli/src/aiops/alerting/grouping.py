@@ -0,0 +1,267 @@
+"""Alert inhibition and grouping."""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+# Label holding the rule name of an alert when matching and grouping
+ALERTNAME_LABEL = 'alertname'
+
+# Label holding the rule severity of an alert, unless the rule labels set it
+SEVERITY_LABEL = 'severity'
+
+
+def alert_labels(
+    rule_name: str,
+    labels: Dict[str, str],
+    severity: Optional[str] = None
+) -> Dict[str, str]:
+    """Get the labels matchers and groups see for an alert.
+
+    Args:
+        rule_name: Rule name
+        labels: Alert labels
+        severity: Rule severity
+
+    Returns:
+        Labels with ``alertname`` set to the rule name (and ``severity``)
+    """
+    if severity is None:
+        return {**labels, ALERTNAME_LABEL: rule_name}
+    return {SEVERITY_LABEL: severity, **labels, ALERTNAME_LABEL: rule_name}
+
+
+@dataclass
+class InhibitRule:
+    """Suppress target alerts while a matching source alert fires.
+
+    Example: mute ``high_cpu`` while ``io_queue_congestion`` fires on the
+    same host::
+
+        InhibitRule(source={'alertname': 'io_queue_congestion'},
+                    target={'alertname': 'high_cpu'}, equal=['host'])
+    """
+
+    source: Dict[str, str]
+    target: Dict[str, str]
+    equal: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        """Validate inhibit rule."""
+        if not self.source:
+            raise ValueError("source matchers cannot be empty")
+        if not self.target:
+            raise ValueError("target matchers cannot be empty")
+
+    @staticmethod
+    def _matches(matchers: Dict[str, str], labels: Dict[str, str]) -> bool:
+        return all(labels.get(name) == value for name, value in matchers.items())
+
+    def matches_source(self, labels: Dict[str, str]) -> bool:
+        """Check if labels match the source matchers."""
+        return self._matches(self.source, labels)
+
+    def matches_target(self, labels: Dict[str, str]) -> bool:
+        """Check if labels match the target matchers."""
+        return self._matches(self.target, labels)
+
+    def equal_values(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Get the values of the ``equal`` labels."""
+        return tuple(labels.get(name, '') for name in self.equal)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {'source': self.source, 'target': self.target, 'equal': self.equal}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'InhibitRule':
+        """Create InhibitRule from dictionary."""
+        return cls(source=dict(data.get('source') or {}), target=dict(data.get('target') or {}),
+                   equal=list(data.get('equal') or []))
+
+
+class Inhibitor:
+    """Decide which alerts are inhibited by the firing alerts.
+
+    index() hashes the ``equal`` label values of the source alerts once per
+    evaluation, so checking an alert costs one set lookup per rule it
+    matches as a target. An alert matching both sides of a rule is not
+    inhibited by alerts that also match both sides, so it never inhibits
+    itself.
+    """
+
+    def __init__(self, rules: Iterable[InhibitRule] = ()):
+        """Initialize inhibitor.
+
+        Args:
+            rules: Inhibit rules
+        """
+        self.rules = list(rules)
+        self._sources: List[Tuple[Set[Tuple[str, ...]], Set[Tuple[str, ...]]]] = [
+            (set(), set()) for _ in self.rules
+        ]
+
+    def index(self, sources: Iterable[Dict[str, str]]) -> None:
+        """Index the firing alerts that may inhibit others.
+
+        Args:
+            sources: Labels of the firing alerts (see alert_labels())
+        """
+        self._sources = [(set(), set()) for _ in self.rules]
+        for labels in sources:
+            for rule, (only_source, both) in zip(self.rules, self._sources):
+                if rule.matches_source(labels):
+                    target = both if rule.matches_target(labels) else only_source
+                    target.add(rule.equal_values(labels))
+
+    def is_inhibited(self, labels: Dict[str, str]) -> bool:
+        """Check if an alert is inhibited by the indexed alerts.
+
+        Args:
+            labels: Alert labels (see alert_labels())
+
+        Returns:
+            True if a firing source with equal label values exists
+        """
+        for rule, (only_source, both) in zip(self.rules, self._sources):
+            if not rule.matches_target(labels):
+                continue
+            values = rule.equal_values(labels)
+            if values in only_source:
+                return True
+            if values in both and not rule.matches_source(labels):
+                return True
+        return False
+
+
+@dataclass
+class AlertGroup:
+    """Alerts collected into one notification."""
+
+    key: Tuple[Any, ...]
+    labels: Dict[str, str]
+    channels: Tuple[str, ...]
+    alerts: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Dict[str, Any]] = \
+        field(default_factory=dict)
+    next_flush: Optional[datetime] = None
+    changed: bool = False
+
+
+class AlertGrouper:
+    """Collapse alert transitions into group notifications.
+
+    Transitions are grouped by the values of the ``group_by`` labels (and
+    the channels they go to); no labels put all alerts of the channels in
+    one group. A group's first notification waits ``group_wait`` for
+    related alerts to arrive; later changes are sent at most every
+    ``group_interval``. Within a group, alerts are deduplicated by rule and
+    labels and only their latest status is sent, so a burst of symptoms of
+    one incident becomes one notification listing every alert.
+    """
+
+    def __init__(
+        self,
+        group_by: Sequence[str] = (),
+        group_wait: float = 30.0,
+        group_interval: float = 300.0
+    ):
+        """Initialize alert grouper.
+
+        Args:
+            group_by: Labels to group by (``alertname`` is the rule name)
+            group_wait: Seconds to wait before the first notification of a group
+            group_interval: Minimum seconds between notifications of a group
+        """
+        if group_wait < 0 or group_interval < 0:
+            raise ValueError("group_wait and group_interval cannot be negative")
+        self.group_by = list(group_by)
+        self.group_wait = timedelta(seconds=group_wait)
+        self.group_interval = timedelta(seconds=group_interval)
+        self.groups: Dict[Tuple[Any, ...], AlertGroup] = {}
+
+    def add(self, transition, channels: Sequence[str], now: Optional[datetime] = None) -> None:
+        """Add an alert transition.
+
+        Args:
+            transition: AlertTransition of a firing or resolved alert
+            channels: Channels the rule notifies
+            now: Current time (default: the transition time)
+        """
+        if not channels:
+            return
+        now = now or transition.timestamp
+        labels = alert_labels(transition.rule_name, transition.labels)
+        group_labels = {name: labels.get(name, '') for name in self.group_by}
+        channels = tuple(sorted(set(channels)))
+        key = (channels, tuple(group_labels.values()))
+
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = AlertGroup(
+                key=key, labels=group_labels, channels=channels,
+                next_flush=now + self.group_wait,
+            )
+
+        fingerprint = (transition.rule_name, tuple(sorted(transition.labels.items())))
+        previous = group.alerts.get(fingerprint)
+        if previous is None or previous['status'] != transition.status:
+            group.changed = True
+        group.alerts[fingerprint] = transition.to_dict()
+
+    def discard(self, transition) -> None:
+        """Drop an alert from its groups without notifying, e.g. once it is silenced.
+
+        Args:
+            transition: AlertTransition of the alert
+        """
+        fingerprint = (transition.rule_name, tuple(sorted(transition.labels.items())))
+        for key, group in list(self.groups.items()):
+            if group.alerts.pop(fingerprint, None) is not None and not group.alerts:
+                del self.groups[key]
+
+    def next_flush(self) -> Optional[datetime]:
+        """Get the time the next group notification is due.
+
+        Returns:
+            Earliest flush time of a changed group, or None
+        """
+        times = [group.next_flush for group in self.groups.values() if group.changed]
+        return min(times) if times else None
+
+    def flush(self, now: datetime, force: bool = False) -> List[Tuple[Tuple[str, ...], Dict]]:
+        """Build the notifications of the groups that are due.
+
+        Args:
+            now: Current time
+            force: Flush every changed group regardless of its timers
+
+        Returns:
+            List of (channels, group notification payload)
+        """
+        notifications = []
+        for key, group in list(self.groups.items()):
+            if not group.changed or (not force and now < group.next_flush):
+                continue
+
+            alerts = sorted(group.alerts.values(), key=lambda a: (a['rule_name'], a['timestamp']))
+            firing = [a for a in alerts if a['status'] != 'resolved']
+            notifications.append((group.channels, {
+                'group_labels': group.labels,
+                'status': 'firing' if firing else 'resolved',
+                'firing': len(firing),
+                'resolved': len(alerts) - len(firing),
+                'timestamp': now.isoformat(),
+                'alerts': alerts,
+            }))
+
+            # Resolved alerts are sent once
+            group.alerts = {
+                fingerprint: alert for fingerprint, alert in group.alerts.items()
+                if alert['status'] != 'resolved'
+            }
+            group.changed = False
+            group.next_flush = now + self.group_interval
+            if not group.alerts:
+                del self.groups[key]
+        return notifications
@@ -2,14 +2,24 @@
 
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-import json
-import os
 from pathlib import Path
 from aiops.alerting.models import AlertRule, Alert, AlertStatus
+from aiops.alerting.channels import create_channel
+from aiops.alerting.conditions import compile_condition
+from aiops.alerting.dispatcher import NotificationDispatcher
+from aiops.alerting.grouping import InhibitRule, Inhibitor
+from aiops.alerting.outbox import Outbox
+from aiops.alerting.silences import Silence
+from aiops.alerting.store import ACTIVE_STATUSES, AlertStore
 
 
 class AlertManager:
-    """Manage alert rules and alerts."""
+    """Manage alert rules and alerts.
+
+    Rules and alerts are kept in an indexed SQLite store (see AlertStore)
+    under ``storage_path``. The ``rules.json`` and ``alerts.json`` files of
+    earlier versions are imported on first use.
+    """
 
     def __init__(self, storage_path: str = "/tmp/aiops/alerts"):
         """Initialize alert manager.
@@ -21,28 +31,28 @@ class AlertManager:
         self.storage_path.mkdir(parents=True, exist_ok=True)
         self.rules_file = self.storage_path / "rules.json"
         self.alerts_file = self.storage_path / "alerts.json"
+        self.outbox_file = self.storage_path / "outbox.db"
+        self.store = AlertStore(str(self.storage_path / "alerts.db"))
+
+        if self.rules_file.exists() or self.alerts_file.exists():
+            self.store.migrate_json(self.rules_file, self.alerts_file)
 
     def create_rule(self, rule: AlertRule) -> None:
         """Create alert rule.
 
         Args:
             rule: AlertRule to create
-        """
-        rules = self.list_rules()
 
-        # Check if rule already exists
-        if any(r['name'] == rule.name for r in rules):
-            raise ValueError(f"Rule '{rule.name}' already exists")
+        Raises:
+            ValueError: If the rule exists or its condition is invalid
+        """
+        compile_condition(rule.condition)
 
         # Set timestamps
         rule.created_at = datetime.now()
         rule.updated_at = datetime.now()
 
-        # Add rule
-        rules.append(rule.to_dict())
-
-        # Save
-        self._save_rules(rules)
+        self.store.create_rule(rule.to_dict())
 
     def list_rules(self) -> List[Dict[str, Any]]:
         """List all alert rules.
@@ -50,11 +60,7 @@ class AlertManager:
         Returns:
             List of alert rules
         """
-        if not self.rules_file.exists():
-            return []
-
-        with open(self.rules_file, 'r') as f:
-            return json.load(f)
+        return self.store.list_rules()
 
     def get_rule(self, name: str) -> Optional[Dict[str, Any]]:
         """Get alert rule by name.
@@ -65,11 +71,7 @@ class AlertManager:
         Returns:
             Rule dict or None
         """
-        rules = self.list_rules()
-        for rule in rules:
-            if rule['name'] == name:
-                return rule
-        return None
+        return self.store.get_rule(name)
 
     def delete_rule(self, name: str) -> None:
         """Delete alert rule.
@@ -77,9 +79,7 @@ class AlertManager:
         Args:
             name: Rule name
         """
-        rules = self.list_rules()
-        rules = [r for r in rules if r['name'] != name]
-        self._save_rules(rules)
+        self.store.delete_rule(name)
 
     def enable_rule(self, name: str) -> None:
         """Enable alert rule.
@@ -87,7 +87,7 @@ class AlertManager:
         Args:
             name: Rule name
         """
-        self._update_rule_status(name, True)
+        self.store.set_rule_enabled(name, True)
 
     def disable_rule(self, name: str) -> None:
         """Disable alert rule.
@@ -95,60 +95,50 @@ class AlertManager:
         Args:
             name: Rule name
         """
-        self._update_rule_status(name, False)
+        self.store.set_rule_enabled(name, False)
 
-    def _update_rule_status(self, name: str, enabled: bool) -> None:
-        """Update rule enabled status.
+    def create_alert(self, alert: Alert) -> None:
+        """Create alert.
 
         Args:
-            name: Rule name
-            enabled: Enabled status
+            alert: Alert to create
         """
-        rules = self.list_rules()
-        for rule in rules:
-            if rule['name'] == name:
-                rule['enabled'] = enabled
-                rule['updated_at'] = datetime.now().isoformat()
-                break
-        self._save_rules(rules)
+        self.store.insert_alerts([alert.to_dict()])
 
-    def create_alert(self, alert: Alert) -> None:
-        """Create alert.
+    def create_alerts(self, alerts: List[Alert]) -> int:
+        """Create alerts in one batch.
 
         Args:
-            alert: Alert to create
+            alerts: Alerts to create
+
+        Returns:
+            Number of alerts created
         """
-        alerts = self.list_alerts()
-        alerts.append(alert.to_dict())
-        self._save_alerts(alerts)
+        return self.store.insert_alerts(alert.to_dict() for alert in alerts)
 
     def list_alerts(
         self,
         status: Optional[str] = None,
-        severity: Optional[str] = None
+        severity: Optional[str] = None,
+        rule_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """List alerts.
 
         Args:
             status: Filter by status
             severity: Filter by severity
+            rule_name: Filter by rule name
+            since: Only alerts started at or after this time
+            limit: Only the most recent alerts
 
         Returns:
             List of alerts
         """
-        if not self.alerts_file.exists():
-            return []
-
-        with open(self.alerts_file, 'r') as f:
-            alerts = json.load(f)
-
-        # Filter
-        if status:
-            alerts = [a for a in alerts if a['status'] == status]
-        if severity:
-            alerts = [a for a in alerts if a['severity'] == severity]
-
-        return alerts
+        return self.store.list_alerts(
+            status=status, severity=severity, rule_name=rule_name, since=since, limit=limit
+        )
 
     def acknowledge_alert(self, rule_name: str, user: str) -> None:
         """Acknowledge alert.
@@ -157,14 +147,11 @@ class AlertManager:
             rule_name: Rule name
             user: User who acknowledged
         """
-        alerts = self.list_alerts()
-        for alert in alerts:
-            if alert['rule_name'] == rule_name and alert['status'] == AlertStatus.FIRING.value:
-                alert['status'] = AlertStatus.ACKNOWLEDGED.value
-                alert['acknowledged_at'] = datetime.now().isoformat()
-                alert['acknowledged_by'] = user
-                break
-        self._save_alerts(alerts)
+        self.store.transition(rule_name, [AlertStatus.FIRING.value], {
+            'status': AlertStatus.ACKNOWLEDGED.value,
+            'acknowledged_at': datetime.now(),
+            'acknowledged_by': user,
+        })
 
     def resolve_alert(self, rule_name: str) -> None:
         """Resolve alert.
@@ -172,31 +159,129 @@ class AlertManager:
         Args:
             rule_name: Rule name
         """
-        alerts = self.list_alerts()
-        for alert in alerts:
-            if alert['rule_name'] == rule_name and alert['status'] in [
-                AlertStatus.FIRING.value,
-                AlertStatus.ACKNOWLEDGED.value
-            ]:
-                alert['status'] = AlertStatus.RESOLVED.value
-                alert['ended_at'] = datetime.now().isoformat()
-                break
-        self._save_alerts(alerts)
+        self.store.transition(rule_name, ACTIVE_STATUSES, {
+            'status': AlertStatus.RESOLVED.value,
+            'ended_at': datetime.now(),
+        })
+
+    def create_inhibit_rule(self, rule: InhibitRule) -> int:
+        """Create inhibit rule.
+
+        Args:
+            rule: InhibitRule to create
+
+        Returns:
+            Rule id
+        """
+        return self.store.create_inhibit_rule(rule.to_dict())
+
+    def list_inhibit_rules(self) -> List[Dict[str, Any]]:
+        """List inhibit rules.
+
+        Returns:
+            List of inhibit rules with their ids
+        """
+        return self.store.list_inhibit_rules()
+
+    def delete_inhibit_rule(self, rule_id: int) -> bool:
+        """Delete inhibit rule.
+
+        Args:
+            rule_id: Rule id
+
+        Returns:
+            True if the rule existed
+        """
+        return self.store.delete_inhibit_rule(rule_id)
 
-    def _save_rules(self, rules: List[Dict[str, Any]]) -> None:
-        """Save rules to file.
+    def create_inhibitor(self) -> Optional[Inhibitor]:
+        """Create an inhibitor for the inhibit rules.
+
+        Returns:
+            Inhibitor, or None without inhibit rules
+        """
+        rules = [InhibitRule.from_dict(rule) for rule in self.list_inhibit_rules()]
+        return Inhibitor(rules) if rules else None
+
+    def create_silence(self, silence: Silence) -> int:
+        """Create silence.
+
+        Args:
+            silence: Silence to create
+
+        Returns:
+            Silence id
+        """
+        silence.created_at = datetime.now()
+        silence.id = self.store.create_silence(silence.to_dict())
+        return silence.id
+
+    def list_silences(self, include_expired: bool = False) -> List[Dict[str, Any]]:
+        """List silences.
+
+        Args:
+            include_expired: Also list the silences that have ended
+
+        Returns:
+            List of silences with their ids
+        """
+        return self.store.list_silences(None if include_expired else datetime.now())
+
+    def expire_silence(self, silence_id: int) -> bool:
+        """Expire silence now.
+
+        Args:
+            silence_id: Silence id
+
+        Returns:
+            True if the silence had not expired yet
+        """
+        return self.store.expire_silence(silence_id, datetime.now())
+
+    def create_channel(self, definition: Dict[str, Any]) -> None:
+        """Create notification channel.
 
         Args:
-            rules: List of rules
+            definition: Channel name, type and options (see create_channel())
+
+        Raises:
+            ValueError: If the channel exists or its definition is invalid
         """
-        with open(self.rules_file, 'w') as f:
-            json.dump(rules, f, indent=2)
+        self.store.create_channel(create_channel(definition).to_dict())
+
+    def list_channels(self) -> List[Dict[str, Any]]:
+        """List notification channels.
 
-    def _save_alerts(self, alerts: List[Dict[str, Any]]) -> None:
-        """Save alerts to file.
+        Returns:
+            List of channel definitions
+        """
+        return self.store.list_channels()
+
+    def delete_channel(self, name: str) -> None:
+        """Delete notification channel.
+
+        Args:
+            name: Channel name
+        """
+        self.store.delete_channel(name)
+
+    def create_dispatcher(self, **options) -> NotificationDispatcher:
+        """Create a dispatcher for the notification channels.
+
+        Notifications are persisted in ``outbox_file``.
 
         Args:
-            alerts: List of alerts
+            **options: NotificationDispatcher options
+
+        Returns:
+            Notification dispatcher (not started)
         """
-        with open(self.alerts_file, 'w') as f:
-            json.dump(alerts, f, indent=2)
+        return NotificationDispatcher(
+            Outbox(str(self.outbox_file)),
+            [create_channel(definition) for definition in self.list_channels()],
+            **options
+        )
+
+    def close(self) -> None:
+        """Close the alert store."""
+        self.store.close()
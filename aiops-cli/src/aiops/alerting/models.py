@@ -61,6 +61,9 @@ class AlertRule:
         if self.evaluation_interval <= 0:
             raise ValueError("evaluation_interval must be positive")
 
+        if self.for_duration < 0:
+            raise ValueError("for_duration cannot be negative")
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
         return {
@@ -78,6 +81,15 @@ class AlertRule:
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AlertRule':
+        """Create AlertRule from dictionary (to_dict() output)."""
+        rule = dict(data)
+        for key in ('created_at', 'updated_at'):
+            if rule.get(key):
+                rule[key] = datetime.fromisoformat(rule[key])
+        return cls(**{key: value for key, value in rule.items() if key in cls.__dataclass_fields__})
+
 
 @dataclass
 class Alert:
@@ -0,0 +1,216 @@
+"""Persisted outbox of alert notifications."""
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from aiops.core.exceptions import StorageError
+
+
+# Outbox statuses
+PENDING = 'pending'
+FAILED = 'failed'
+
+
+@dataclass
+class Notification:
+    """A notification waiting in the outbox."""
+
+    id: int
+    channel: str
+    payload: Dict[str, Any]
+    created_at: float
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    last_error: Optional[str] = None
+
+
+class Outbox:
+    """SQLite outbox of notifications not yet delivered.
+
+    A notification is written before it is queued for delivery and deleted
+    once its channel accepted it, so notifications queued when the process
+    stops are delivered after the next start. Notifications that failed
+    every attempt are kept with the ``failed`` status.
+
+    The connection is shared by the thread that submits notifications and
+    the dispatcher thread, so every operation holds a lock.
+    """
+
+    def __init__(self, db_path: str):
+        """Initialize outbox.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        """Open (and create if needed) the database."""
+        with self._lock:
+            if self._conn is not None:
+                return
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(
+                    str(self.db_path), timeout=30.0, check_same_thread=False
+                )
+                self._conn.executescript("""
+                    PRAGMA journal_mode=WAL;
+                    PRAGMA synchronous=NORMAL;
+                    CREATE TABLE IF NOT EXISTS outbox (
+                        id INTEGER PRIMARY KEY,
+                        channel TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        next_attempt_at REAL NOT NULL DEFAULT 0,
+                        last_error TEXT
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox(status, channel);
+                """)
+            except sqlite3.Error as e:
+                self._conn = None
+                raise StorageError(f"Cannot open outbox {self.db_path}: {str(e)}")
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self) -> 'Outbox':
+        self.open()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _execute(self, query: str, params: Iterable[Any] = (), many: bool = False) -> List[tuple]:
+        """Run a statement in its own transaction.
+
+        Args:
+            query: SQL statement
+            params: Parameters, or parameter sequences with ``many``
+            many: Run the statement once per parameter sequence
+
+        Returns:
+            Result rows
+        """
+        self.open()
+        with self._lock, self._conn:
+            if many:
+                return self._conn.executemany(query, params).fetchall()
+            return self._conn.execute(query, params).fetchall()
+
+    def add(self, channel: str, payloads: List[Dict[str, Any]]) -> List[Notification]:
+        """Write notifications for a channel.
+
+        Args:
+            channel: Channel name
+            payloads: Notification payloads
+
+        Returns:
+            Notifications with their ids
+        """
+        self.open()
+        now = time.time()
+        notifications = []
+        with self._lock, self._conn:
+            for payload in payloads:
+                cursor = self._conn.execute(
+                    "INSERT INTO outbox (channel, status, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (channel, PENDING, json.dumps(payload, default=str), now),
+                )
+                notifications.append(Notification(
+                    id=cursor.lastrowid, channel=channel, payload=payload, created_at=now,
+                ))
+        return notifications
+
+    def pending(self, channel: Optional[str] = None) -> List[Notification]:
+        """List the notifications waiting for delivery, oldest first.
+
+        Args:
+            channel: Only notifications for this channel
+
+        Returns:
+            Notifications
+        """
+        return self._list(PENDING, channel)
+
+    def failed(self, channel: Optional[str] = None) -> List[Notification]:
+        """List the notifications whose delivery was given up.
+
+        Args:
+            channel: Only notifications for this channel
+
+        Returns:
+            Notifications
+        """
+        return self._list(FAILED, channel)
+
+    def _list(self, status: str, channel: Optional[str]) -> List[Notification]:
+        """List notifications by status (and channel)."""
+        query = "SELECT * FROM outbox WHERE status = ?"
+        params: List[Any] = [status]
+        if channel:
+            query += " AND channel = ?"
+            params.append(channel)
+        rows = self._execute(query + " ORDER BY id", params)
+        return [
+            Notification(
+                id=row[0], channel=row[1], payload=json.loads(row[3]), created_at=row[4],
+                attempts=row[5], next_attempt_at=row[6], last_error=row[7],
+            )
+            for row in rows
+        ]
+
+    def complete(self, ids: List[int]) -> None:
+        """Remove delivered notifications.
+
+        Args:
+            ids: Notification ids
+        """
+        self._execute("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids], many=True)
+
+    def retry(self, notifications: List[Notification], error: str) -> None:
+        """Record a failed attempt and the time of the next one.
+
+        Args:
+            notifications: Notifications with updated attempts and next_attempt_at
+            error: Error of the failed attempt
+        """
+        self._execute(
+            "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            [(n.attempts, n.next_attempt_at, error, n.id) for n in notifications], many=True,
+        )
+
+    def fail(self, notifications: List[Notification], error: str) -> None:
+        """Give up delivering notifications.
+
+        Args:
+            notifications: Notifications
+            error: Error of the last attempt
+        """
+        self._execute(
+            "UPDATE outbox SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+            [(FAILED, n.attempts, error, n.id) for n in notifications], many=True,
+        )
+
+    def count(self, status: str = PENDING) -> int:
+        """Count notifications.
+
+        Args:
+            status: pending or failed
+
+        Returns:
+            Number of notifications
+        """
+        return self._execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (status,))[0][0]
@@ -0,0 +1,602 @@
+"""Alert rule scheduling and the pending/firing/resolved lifecycle."""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from aiops.alerting.conditions import compile_condition, split_wildcard
+from aiops.alerting.evaluator import INSTANCE_LABEL, RuleEvaluator
+from aiops.alerting.grouping import Inhibitor, alert_labels
+from aiops.alerting.models import AlertRule, AlertStatus
+from aiops.alerting.silences import Silence, SilenceIndex
+from aiops.alerting.store import AlertStore
+from aiops.correlation.series import flatten_snapshot
+
+
+# Status of a label set whose condition does not hold
+INACTIVE = 'inactive'
+
+# Status of a label set that would fire but is inhibited; kept in memory only
+INHIBITED = 'inhibited'
+
+# Statuses of a label set that fired and silences switch between
+SILENCEABLE_STATUSES = (AlertStatus.FIRING.value, AlertStatus.SILENCED.value)
+
+# Statuses of a label set that fired
+FIRED_STATUSES = SILENCEABLE_STATUSES + (AlertStatus.ACKNOWLEDGED.value,)
+
+StateKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+@dataclass
+class AlertState:
+    """In-memory state of one (rule, label set)."""
+
+    rule_name: str
+    labels: Dict[str, str]
+    status: str
+    active_since: datetime
+    alert_id: Optional[int] = None
+
+
+@dataclass
+class AlertTransition:
+    """A change of status of one (rule, label set)."""
+
+    rule_name: str
+    labels: Dict[str, str]
+    previous: str
+    status: str
+    timestamp: datetime
+    alert: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            'rule_name': self.rule_name,
+            'labels': self.labels,
+            'previous': self.previous,
+            'status': self.status,
+            'timestamp': self.timestamp.isoformat(),
+            'alert': {
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in self.alert.items()
+            },
+        }
+
+
+class RuleGroup:
+    """Rules sharing an evaluation interval.
+
+    Each group has its own evaluator, so window functions aggregate the
+    batches of the group's interval, and its own alert states.
+    """
+
+    def __init__(self, interval: int):
+        """Initialize rule group.
+
+        Args:
+            interval: Evaluation interval in seconds
+        """
+        self.interval = interval
+        self.rules: Dict[str, AlertRule] = {}
+        self.evaluator = RuleEvaluator()
+        self.states: Dict[StateKey, AlertState] = {}
+        self.next_run: Optional[datetime] = None
+
+    def is_due(self, now: datetime) -> bool:
+        """Check if the group should be evaluated.
+
+        Args:
+            now: Current time
+
+        Returns:
+            True if the group has not run yet or its next run has passed
+        """
+        return self.next_run is None or now >= self.next_run
+
+    def schedule(self, now: datetime) -> None:
+        """Schedule the run after ``now``, keeping the group's cadence.
+
+        Args:
+            now: Time of the current run
+        """
+        step = timedelta(seconds=self.interval)
+        if self.next_run is None or now - self.next_run >= step:
+            self.next_run = now + step
+        else:
+            self.next_run += step
+
+
+def state_key(rule_name: str, labels: Dict[str, str]) -> StateKey:
+    """Build the key of a (rule, label set).
+
+    Args:
+        rule_name: Rule name
+        labels: Alert labels
+
+    Returns:
+        Hashable key
+    """
+    return rule_name, tuple(sorted(labels.items()))
+
+
+class AlertScheduler:
+    """Evaluate rules on their intervals and track the alert lifecycle.
+
+    Rules are grouped by ``evaluation_interval``; on each tick the groups
+    that are due evaluate the latest batch. Every (rule, label set) for
+    which a condition holds becomes pending, then firing once it held for
+    the rule's ``for_duration`` (at once without one), and resolved when it
+    no longer holds; a pending label set that stops holding is dropped.
+
+    States are kept in memory and only the transitions are written to the
+    alert store: an alert row is inserted when a label set becomes pending
+    (or fires at once), updated when it fires or resolves and deleted when
+    it is dropped while pending. A label set due to fire while an inhibit
+    rule matches a firing alert is held back as inhibited instead: nothing
+    is written for it until the inhibition ends and it still holds, so
+    store writes follow the causes of an incident rather than every
+    symptom. Alerts already firing are not inhibited after the fact.
+
+    Alerts matching a silence in effect are written as silenced instead of
+    firing, and switch between firing and silenced as silences start and
+    end. The silences are loaded into a SilenceIndex, reloaded when the
+    store's silences version changes (e.g. ``aiops alert silence add`` in
+    another process) or the earliest silence expires; expired silences
+    older than ``silence_retention`` are then purged from the store.
+
+    After a restart, recover() rebuilds the states from the open alerts, so
+    pending label sets keep their start time and firing alerts are resolved
+    instead of fired again. Window functions refill from the batches after
+    the restart, and inhibited label sets are inhibited again when due.
+    """
+
+    def __init__(
+        self,
+        store: AlertStore,
+        rules: Iterable[Union[AlertRule, Dict[str, Any]]] = (),
+        inhibitor: Optional[Inhibitor] = None,
+        silence_retention: float = 86400.0
+    ):
+        """Initialize alert scheduler.
+
+        Args:
+            store: Store the transitions are written to
+            rules: Rules (or rule dictionaries) to schedule; disabled rules are
+                skipped, and so are invalid ones (see ``skipped``)
+            inhibitor: Inhibit rules holding back symptoms of firing alerts
+            silence_retention: Seconds expired silences are kept in the store
+        """
+        self.store = store
+        self.inhibitor = inhibitor
+        self.silence_retention = timedelta(seconds=silence_retention)
+        self.silences = SilenceIndex()
+        self._silences_version: Optional[int] = None
+        self.groups: Dict[int, RuleGroup] = {}
+        self._group_of: Dict[str, RuleGroup] = {}
+        # Invalid rules by name, with the reason; one bad rule (e.g. stored
+        # before conditions were validated) does not stop the others
+        self.skipped: Dict[str, str] = {}
+        for rule in rules:
+            try:
+                self.add_rule(rule)
+            except ValueError as e:
+                name = rule.get('name') if isinstance(rule, dict) else rule.name
+                self.skipped[str(name)] = str(e)
+
+    def add_rule(self, rule: Union[AlertRule, Dict[str, Any]]) -> None:
+        """Add or replace a rule.
+
+        Args:
+            rule: Rule or rule dictionary
+
+        Raises:
+            ValueError: If the rule or its condition is invalid; a rule it
+                replaces keeps running
+        """
+        if isinstance(rule, dict):
+            rule = AlertRule.from_dict(rule)
+        condition = compile_condition(rule.condition) if rule.enabled else None
+        self.remove_rule(rule.name)
+        self.skipped.pop(rule.name, None)
+        if condition is None:
+            return
+
+        group = self.groups.get(rule.evaluation_interval)
+        if group is None:
+            group = self.groups[rule.evaluation_interval] = RuleGroup(rule.evaluation_interval)
+        group.evaluator.add_rule(rule.name, condition)
+        group.rules[rule.name] = rule
+        self._group_of[rule.name] = group
+
+    def remove_rule(self, name: str) -> None:
+        """Stop evaluating a rule and forget its states.
+
+        Its open alerts stay in the store as they are.
+
+        Args:
+            name: Rule name
+        """
+        group = self._group_of.pop(name, None)
+        if group is None:
+            return
+
+        group.evaluator.remove_rule(name)
+        del group.rules[name]
+        for key in [key for key in group.states if key[0] == name]:
+            del group.states[key]
+        if not group.rules:
+            del self.groups[group.interval]
+
+    @property
+    def states(self) -> List[AlertState]:
+        """Get the pending, firing, silenced and inhibited states of all rules."""
+        return [state for group in self.groups.values() for state in group.states.values()]
+
+    def next_run(self) -> Optional[datetime]:
+        """Get the time the next group is due.
+
+        Returns:
+            Earliest next run, or None if a group has not run yet or there are no rules
+        """
+        runs = [group.next_run for group in self.groups.values()]
+        if not runs or None in runs:
+            return None
+        return min(runs)
+
+    def recover(self) -> int:
+        """Rebuild the states of the scheduled rules from the open alerts.
+
+        Only pending, firing, acknowledged and silenced alerts are read
+        (through the status index), not the alert history.
+
+        Returns:
+            Number of states recovered
+        """
+        recovered = 0
+        for alert in self.store.list_open_alerts():
+            group = self._group_of.get(alert['rule_name'])
+            if group is None:
+                continue
+            labels = alert['labels'] or {}
+            key = state_key(alert['rule_name'], labels)
+            if key in group.states:
+                continue
+            status = alert['status']
+            if status != AlertStatus.PENDING.value and status not in FIRED_STATUSES:
+                status = AlertStatus.FIRING.value
+            group.states[key] = AlertState(
+                rule_name=alert['rule_name'],
+                labels=labels,
+                status=status,
+                active_since=datetime.fromisoformat(alert['started_at']),
+                alert_id=alert['id'],
+            )
+            recovered += 1
+        return recovered
+
+    def tick(self, values: Dict[str, float], now: datetime) -> List[AlertTransition]:
+        """Evaluate the groups that are due against a batch.
+
+        Args:
+            values: Latest value per series
+            now: Batch time
+
+        Returns:
+            Transitions, after they were written to the store
+        """
+        transitions: List[AlertTransition] = []
+        inserts: List[Tuple[AlertState, AlertTransition]] = []
+        updates: List[Tuple[int, Dict[str, Any]]] = []
+        deletes: List[int] = []
+        candidates: List[Tuple[RuleGroup, AlertState, str, Optional[str]]] = []
+
+        self._refresh_silences(now)
+        for group in self.groups.values():
+            if not group.is_due(now):
+                continue
+            group.schedule(now)
+            self._evaluate_group(group, values, now, transitions, inserts, updates, deletes,
+                                 candidates)
+        self._apply_silences(now, transitions, updates)
+        if candidates:
+            self._fire(candidates, values, now, transitions, inserts, updates, deletes)
+
+        if inserts or updates or deletes:
+            ids = self.store.record_transitions(
+                [transition.alert for _, transition in inserts], updates, deletes
+            )
+            for (state, transition), alert_id in zip(inserts, ids):
+                state.alert_id = alert_id
+                transition.alert['id'] = alert_id
+        return transitions
+
+    def tick_snapshot(self, snapshot: Dict[str, Any]) -> List[AlertTransition]:
+        """Evaluate the groups that are due against a collector snapshot.
+
+        Args:
+            snapshot: Snapshot with a timestamp and metric lists per type
+
+        Returns:
+            Transitions (see tick())
+        """
+        timestamp = snapshot.get('timestamp')
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        return self.tick(flatten_snapshot(snapshot), timestamp or datetime.now())
+
+    def run(
+        self,
+        collect: Callable[[], Dict[str, Any]],
+        duration: Optional[float] = None,
+        on_transition: Optional[Callable[[AlertTransition], None]] = None,
+        on_tick: Optional[Callable[[datetime], None]] = None,
+        wakeup: Optional[Callable[[], Optional[datetime]]] = None
+    ) -> None:
+        """Collect and evaluate whenever a group is due.
+
+        Args:
+            collect: Returns the latest collector snapshot
+            duration: Seconds to run for (default: until interrupted)
+            on_transition: Called with every transition
+            on_tick: Called with the current time after every wakeup
+            wakeup: Returns an extra time to wake up at (e.g. for on_tick)
+        """
+        deadline = time.time() + duration if duration is not None else None
+        while deadline is None or time.time() < deadline:
+            next_run = self.next_run()
+            if next_run is not None:
+                extra = wakeup() if wakeup else None
+                wait = (min(next_run, extra or next_run) - datetime.now()).total_seconds()
+                if deadline is not None:
+                    wait = min(wait, deadline - time.time())
+                if wait > 0:
+                    time.sleep(wait)
+                    continue
+
+            if next_run is None or next_run <= datetime.now():
+                for transition in self.tick_snapshot(collect()):
+                    if on_transition:
+                        on_transition(transition)
+            if on_tick:
+                on_tick(datetime.now())
+
+    def _evaluate_group(
+        self,
+        group: RuleGroup,
+        values: Dict[str, float],
+        now: datetime,
+        transitions: List[AlertTransition],
+        inserts: List[Tuple[AlertState, AlertTransition]],
+        updates: List[Tuple[int, Dict[str, Any]]],
+        deletes: List[int],
+        candidates: List[Tuple[RuleGroup, AlertState, str, Optional[str]]]
+    ) -> None:
+        """Evaluate one group, collecting its transitions and the states due to fire."""
+        states = group.states
+        holding = set()
+
+        for rule_name, label_sets in group.evaluator.evaluate(values, now).items():
+            rule = group.rules[rule_name]
+            for instance_labels in label_sets:
+                labels = {**rule.labels, **instance_labels}
+                key = state_key(rule_name, labels)
+                holding.add(key)
+                state = states.get(key)
+                instance = instance_labels.get(INSTANCE_LABEL)
+
+                if state is None:
+                    state = states[key] = AlertState(
+                        rule_name=rule_name,
+                        labels=labels,
+                        status=AlertStatus.PENDING.value,
+                        active_since=now,
+                    )
+                    if rule.for_duration <= 0:
+                        candidates.append((group, state, INACTIVE, instance))
+                        continue
+                    transition = self._transition(state, INACTIVE, now, self._alert(
+                        rule, state, values, instance
+                    ))
+                    inserts.append((state, transition))
+                    transitions.append(transition)
+
+                elif state.status == INHIBITED or (
+                        state.status == AlertStatus.PENDING.value and
+                        (now - state.active_since).total_seconds() >= rule.for_duration):
+                    candidates.append((group, state, state.status, instance))
+
+        for key in [key for key in states if key not in holding]:
+            state = states.pop(key)
+            previous = state.status
+            if previous == INHIBITED:
+                state.status = INACTIVE
+                transitions.append(self._transition(state, previous, now, {}))
+            elif previous == AlertStatus.PENDING.value:
+                deletes.append(state.alert_id)
+                state.status = INACTIVE
+                transitions.append(self._transition(state, previous, now, {'id': state.alert_id}))
+            else:
+                changes = {'status': AlertStatus.RESOLVED.value, 'ended_at': now}
+                updates.append((state.alert_id, changes))
+                state.status = AlertStatus.RESOLVED.value
+                transitions.append(self._transition(
+                    state, previous, now, {'id': state.alert_id, **changes}
+                ))
+
+    def _refresh_silences(self, now: datetime) -> None:
+        """Reload the silence index if silences changed or one expired."""
+        next_expiry = self.silences.next_expiry
+        expired = next_expiry is not None and now >= next_expiry
+        if expired:
+            self.store.purge_silences(now - self.silence_retention)
+
+        version = self.store.silences_version()
+        if version == self._silences_version and not expired:
+            return
+        self.silences = SilenceIndex([
+            Silence.from_dict(silence) for silence in self.store.list_silences(now)
+        ])
+        self._silences_version = version
+
+    def _apply_silences(
+        self,
+        now: datetime,
+        transitions: List[AlertTransition],
+        updates: List[Tuple[int, Dict[str, Any]]]
+    ) -> None:
+        """Switch fired states between firing and silenced as silences start and end.
+
+        Acknowledged alerts keep their status. An alert acknowledged through
+        ``aiops alert acknowledge`` is still firing in memory, so the stored
+        status of the states about to switch is read back first.
+        """
+        switches = []
+        for state in self.states:
+            if state.status not in SILENCEABLE_STATUSES:
+                continue
+            status = self._fired_status(state, now)
+            if status != state.status:
+                switches.append((state, status))
+        if not switches:
+            return
+
+        stored = self.store.get_alert_statuses([state.alert_id for state, _ in switches])
+        for state, status in switches:
+            if stored.get(state.alert_id) == AlertStatus.ACKNOWLEDGED.value:
+                state.status = AlertStatus.ACKNOWLEDGED.value
+                continue
+            previous = state.status
+            state.status = status
+            changes = {'status': status}
+            updates.append((state.alert_id, changes))
+            transitions.append(self._transition(state, previous, now,
+                                                {'id': state.alert_id, **changes}))
+
+    def _fire(
+        self,
+        candidates: List[Tuple[RuleGroup, AlertState, str, Optional[str]]],
+        values: Dict[str, float],
+        now: datetime,
+        transitions: List[AlertTransition],
+        inserts: List[Tuple[AlertState, AlertTransition]],
+        updates: List[Tuple[int, Dict[str, Any]]],
+        deletes: List[int]
+    ) -> None:
+        """Fire the states due to fire, or hold back the inhibited ones.
+
+        The fired alerts and every state due to fire in this tick are the
+        inhibition sources, so the outcome does not depend on the order the
+        groups were evaluated in. States that are not inhibited fire, or
+        are silenced if a silence in effect matches them.
+        """
+        inhibitor = self.inhibitor
+        if inhibitor is not None:
+            inhibitor.index([
+                self._match_labels(state) for state in self.states
+                if state.status in FIRED_STATUSES
+            ] + [self._match_labels(state) for _, state, _, _ in candidates])
+
+        for group, state, previous, instance in candidates:
+            if inhibitor is not None and inhibitor.is_inhibited(self._match_labels(state)):
+                if previous == INHIBITED:
+                    continue
+                if state.alert_id is not None:
+                    deletes.append(state.alert_id)
+                    state.alert_id = None
+                state.status = INHIBITED
+                transitions.append(self._transition(state, previous, now, {}))
+                continue
+
+            state.status = self._fired_status(state, now)
+            if state.alert_id is None:
+                transition = self._transition(state, previous, now, self._alert(
+                    group.rules[state.rule_name], state, values, instance
+                ))
+                inserts.append((state, transition))
+            else:
+                changes = {
+                    'status': state.status,
+                    'metrics': self._metrics(group, state.rule_name, values, instance),
+                }
+                updates.append((state.alert_id, changes))
+                transition = self._transition(state, previous, now,
+                                              {'id': state.alert_id, **changes})
+            transitions.append(transition)
+
+    def _fired_status(self, state: AlertState, now: datetime) -> str:
+        """Get the status of a fired state: silenced or firing."""
+        if self.silences.silenced_by(self._match_labels(state), now) is not None:
+            return AlertStatus.SILENCED.value
+        return AlertStatus.FIRING.value
+
+    def _match_labels(self, state: AlertState) -> Dict[str, str]:
+        """Get the labels inhibit rules and silences match a state against."""
+        rule = self._group_of[state.rule_name].rules[state.rule_name]
+        return alert_labels(state.rule_name, state.labels, rule.severity)
+
+    @staticmethod
+    def _transition(
+        state: AlertState,
+        previous: str,
+        now: datetime,
+        alert: Dict[str, Any]
+    ) -> AlertTransition:
+        """Build the transition of a state to its current status."""
+        return AlertTransition(
+            rule_name=state.rule_name,
+            labels=state.labels,
+            previous=previous,
+            status=state.status,
+            timestamp=now,
+            alert=alert,
+        )
+
+    def _alert(
+        self,
+        rule: AlertRule,
+        state: AlertState,
+        values: Dict[str, float],
+        instance: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build the alert dictionary of a new state."""
+        return {
+            'rule_name': rule.name,
+            'status': state.status,
+            'severity': rule.severity,
+            'message': rule.description or f"{rule.name}: {rule.condition}",
+            'started_at': state.active_since,
+            'labels': state.labels,
+            'annotations': rule.annotations,
+            'metrics': self._metrics(self._group_of[rule.name], rule.name, values, instance),
+        }
+
+    @staticmethod
+    def _metrics(
+        group: RuleGroup,
+        rule_name: str,
+        values: Dict[str, float],
+        instance: Optional[str]
+    ) -> Dict[str, float]:
+        """Get the latest values of the series a rule's condition reads.
+
+        Args:
+            group: Group of the rule
+            rule_name: Rule name
+            values: Latest value per series
+            instance: Instance matched by the wildcards, if any
+
+        Returns:
+            Value per concrete series name
+        """
+        metrics = {}
+        for name in group.evaluator.conditions[rule_name].names:
+            if '*' in name:
+                if instance is None:
+                    continue
+                prefix, suffix = split_wildcard(name)
+                name = prefix + instance + suffix
+            if name in values:
+                metrics[name] = values[name]
+        return metrics
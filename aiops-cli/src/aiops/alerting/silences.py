@@ -0,0 +1,244 @@
+"""Alert silences and their interval index."""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# name, operator and value of a matcher; '=~' and '!~' come before '=' and '!='
+MATCHER_PATTERN = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_.]*)\s*(=~|!~|!=|=)\s*(.*?)\s*$')
+
+
+@dataclass(frozen=True)
+class Matcher:
+    """Label matcher such as ``alertname=high_cpu`` or ``instance=~sd.*``."""
+
+    name: str
+    operator: str
+    value: str
+
+    @classmethod
+    def parse(cls, text: str) -> 'Matcher':
+        """Parse a matcher.
+
+        Args:
+            text: ``name<op>value`` with op one of =, !=, =~ and !~
+
+        Returns:
+            Matcher
+
+        Raises:
+            ValueError: If the text or its regular expression is invalid
+        """
+        match = MATCHER_PATTERN.match(text or '')
+        if not match:
+            raise ValueError(f"Invalid matcher: {text!r}")
+        matcher = cls(*match.groups())
+        if matcher.operator in ('=~', '!~'):
+            try:
+                re.compile(matcher.value)
+            except re.error as e:
+                raise ValueError(f"Invalid matcher regex {matcher.value!r}: {str(e)}")
+        return matcher
+
+    def matches(self, labels: Dict[str, str]) -> bool:
+        """Check a label set; a missing label has the empty value.
+
+        Args:
+            labels: Alert labels
+
+        Returns:
+            True if the label matches
+        """
+        value = labels.get(self.name, '')
+        if self.operator == '=':
+            return value == self.value
+        if self.operator == '!=':
+            return value != self.value
+        found = re.fullmatch(self.value, value) is not None
+        return found if self.operator == '=~' else not found
+
+    def __str__(self) -> str:
+        return f"{self.name}{self.operator}{self.value}"
+
+
+@dataclass
+class Silence:
+    """Mute the alerts matching all matchers during [starts_at, ends_at)."""
+
+    matchers: List[str]
+    starts_at: datetime
+    ends_at: datetime
+    created_by: str = ''
+    comment: str = ''
+    id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    _compiled: Tuple[Matcher, ...] = field(default=(), init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        """Validate silence."""
+        if not self.matchers:
+            raise ValueError("matchers cannot be empty")
+        if self.ends_at <= self.starts_at:
+            raise ValueError("ends_at must be after starts_at")
+        self._compiled = tuple(Matcher.parse(matcher) for matcher in self.matchers)
+
+    def matches(self, labels: Dict[str, str]) -> bool:
+        """Check if a label set matches every matcher.
+
+        Args:
+            labels: Alert labels
+
+        Returns:
+            True if the silence applies to the labels
+        """
+        return all(matcher.matches(labels) for matcher in self._compiled)
+
+    def is_active(self, now: datetime) -> bool:
+        """Check if the silence is in effect at a time.
+
+        Args:
+            now: Time
+
+        Returns:
+            True if starts_at <= now < ends_at
+        """
+        return self.starts_at <= now < self.ends_at
+
+    def state(self, now: datetime) -> str:
+        """Get the state of the silence at a time.
+
+        Args:
+            now: Time
+
+        Returns:
+            pending, active or expired
+        """
+        if now < self.starts_at:
+            return 'pending'
+        return 'active' if now < self.ends_at else 'expired'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            'id': self.id,
+            'matchers': self.matchers,
+            'starts_at': self.starts_at.isoformat(),
+            'ends_at': self.ends_at.isoformat(),
+            'created_by': self.created_by,
+            'comment': self.comment,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Silence':
+        """Create Silence from dictionary (to_dict() output)."""
+        return cls(
+            matchers=list(data['matchers']),
+            starts_at=datetime.fromisoformat(data['starts_at']),
+            ends_at=datetime.fromisoformat(data['ends_at']),
+            created_by=data.get('created_by') or '',
+            comment=data.get('comment') or '',
+            id=data.get('id'),
+            created_at=datetime.fromisoformat(data['created_at'])
+            if data.get('created_at') else None,
+        )
+
+
+Interval = Tuple[float, float, Silence]
+
+
+class _Node:
+    """Node of a centered interval tree."""
+
+    __slots__ = ('center', 'by_start', 'by_end', 'left', 'right')
+
+    def __init__(self, intervals: List[Interval]):
+        starts = sorted(start for start, _, _ in intervals)
+        self.center = starts[len(starts) // 2]
+
+        here, left, right = [], [], []
+        for interval in intervals:
+            start, end, _ = interval
+            if end <= self.center:
+                left.append(interval)
+            elif start > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+
+        self.by_start = sorted(here, key=lambda i: i[0])
+        self.by_end = sorted(here, key=lambda i: i[1], reverse=True)
+        self.left = _Node(left) if left else None
+        self.right = _Node(right) if right else None
+
+
+class SilenceIndex:
+    """Centered interval tree of silences.
+
+    Finding the silences in effect at a time visits one node per tree level
+    and only the intervals of a node that contain the time, so a lookup is
+    O(log n + k) for n silences of which k are in effect, however many
+    maintenance windows are scheduled. The tree is static: build a new
+    index when silences change.
+    """
+
+    def __init__(self, silences: Sequence[Silence] = ()):
+        """Build silence index.
+
+        Args:
+            silences: Silences to index
+        """
+        intervals = [
+            (silence.starts_at.timestamp(), silence.ends_at.timestamp(), silence)
+            for silence in silences
+        ]
+        self._size = len(intervals)
+        self._root = _Node(intervals) if intervals else None
+        self.next_expiry: Optional[datetime] = min(
+            (silence.ends_at for silence in silences), default=None
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    def active(self, now: datetime) -> Iterator[Silence]:
+        """Iterate over the silences in effect at a time.
+
+        Args:
+            now: Time
+
+        Yields:
+            Silences with starts_at <= now < ends_at
+        """
+        t = now.timestamp()
+        node = self._root
+        while node is not None:
+            if t < node.center:
+                for start, _, silence in node.by_start:
+                    if start > t:
+                        break
+                    yield silence
+                node = node.left
+            else:
+                for _, end, silence in node.by_end:
+                    if end <= t:
+                        break
+                    yield silence
+                node = node.right
+
+    def silenced_by(self, labels: Dict[str, str], now: datetime) -> Optional[Silence]:
+        """Find a silence muting an alert.
+
+        Args:
+            labels: Alert labels
+            now: Time
+
+        Returns:
+            A silence in effect whose matchers match, or None
+        """
+        for silence in self.active(now):
+            if silence.matches(labels):
+                return silence
+        return None
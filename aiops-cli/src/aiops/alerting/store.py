@@ -0,0 +1,850 @@
+"""SQLite storage for alert rules and alerts."""
+
+import copy
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from aiops.alerting.models import AlertStatus
+from aiops.core.exceptions import StorageError
+from aiops.core.utils import file_lock
+
+
+STORE_VERSION = 1
+
+# Alert columns besides the id, in Alert.to_dict() order
+ALERT_COLUMNS = (
+    'rule_name', 'status', 'severity', 'message', 'started_at', 'ended_at',
+    'acknowledged_at', 'acknowledged_by', 'labels', 'annotations', 'metrics',
+)
+
+# Alert columns holding JSON documents
+JSON_COLUMNS = ('labels', 'annotations', 'metrics')
+
+# Statuses of alerts that are still open
+ACTIVE_STATUSES = (
+    AlertStatus.FIRING.value, AlertStatus.ACKNOWLEDGED.value, AlertStatus.SILENCED.value,
+)
+
+# Statuses of alerts whose rule condition may still hold
+OPEN_STATUSES = (AlertStatus.PENDING.value,) + ACTIVE_STATUSES
+
+
+class AlertStore:
+    """Indexed alert rule and alert storage.
+
+    Rules and alerts live in one SQLite database in WAL mode, so readers do
+    not block the writer and a crash never leaves a half-written file.
+    Alerts are indexed by rule name, status, severity and start time: status
+    transitions update one row found through the ``(rule_name, status)``
+    index instead of rewriting the history, and history queries filter in
+    SQL.
+
+    Timestamps are stored as ISO strings, which sort chronologically for the
+    naive local times the alert models use.
+
+    Several processes may share the database (a daemon running rules next
+    to ad-hoc commands and cron jobs): every write is one SQLite
+    transaction, read-modify-write updates take the write lock before
+    reading, and the one-time JSON import runs under a file lock. Parsed
+    rules are cached in-process until the database changes, which SQLite's
+    ``data_version`` reports for commits of other processes too.
+    """
+
+    def __init__(self, db_path: str):
+        """Initialize alert store.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._rules: Optional[Tuple[Tuple[int, int], Dict[str, Dict[str, Any]]]] = None
+
+    def open(self) -> None:
+        """Open (and create if needed) the database."""
+        if self._conn is not None:
+            return
+
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                CREATE TABLE IF NOT EXISTS rules (
+                    name TEXT PRIMARY KEY,
+                    enabled INTEGER NOT NULL,
+                    created_at TEXT,
+                    updated_at TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS channels (
+                    name TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS inhibit_rules (
+                    id INTEGER PRIMARY KEY,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS silences (
+                    id INTEGER PRIMARY KEY,
+                    starts_at TEXT NOT NULL,
+                    ends_at TEXT NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS alerts (
+                    id INTEGER PRIMARY KEY,
+                    rule_name TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    severity TEXT NOT NULL,
+                    message TEXT,
+                    started_at TEXT NOT NULL,
+                    ended_at TEXT,
+                    acknowledged_at TEXT,
+                    acknowledged_by TEXT,
+                    labels TEXT,
+                    annotations TEXT,
+                    metrics TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_alerts_rule_status ON alerts(rule_name, status);
+                CREATE INDEX IF NOT EXISTS idx_alerts_status ON alerts(status);
+                CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity);
+                CREATE INDEX IF NOT EXISTS idx_alerts_started_at ON alerts(started_at);
+                CREATE INDEX IF NOT EXISTS idx_silences_ends_at ON silences(ends_at);
+            """)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('version', ?)",
+                (str(STORE_VERSION),),
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            self._conn = None
+            raise StorageError(f"Cannot open alert store {self.db_path}: {str(e)}")
+
+    def close(self) -> None:
+        """Close the database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self._rules = None
+
+    def __enter__(self) -> 'AlertStore':
+        self.open()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Get the open database connection."""
+        self.open()
+        return self._conn
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run reads and writes in one transaction holding the write lock.
+
+        ``BEGIN IMMEDIATE`` takes the lock before the first read, so another
+        process cannot change the rows read before they are updated.
+
+        Yields:
+            Database connection
+        """
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            yield self.conn
+
+    def _version(self) -> Tuple[int, int]:
+        """Get a token that changes whenever the database changes.
+
+        Returns:
+            Tuple of (commits of other connections, changes of this one)
+        """
+        return self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes
+
+    # Rules
+
+    def create_rule(self, rule: Dict[str, Any]) -> None:
+        """Insert a rule.
+
+        Args:
+            rule: Rule dictionary (AlertRule.to_dict())
+
+        Raises:
+            ValueError: If a rule with the same name exists
+        """
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO rules (name, enabled, created_at, updated_at, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    self._rule_row(rule),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Rule '{rule['name']}' already exists")
+
+    def list_rules(self) -> List[Dict[str, Any]]:
+        """List all rules in creation order.
+
+        Returns:
+            List of rule dictionaries
+        """
+        return [copy.deepcopy(rule) for rule in self._cached_rules().values()]
+
+    def get_rule(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get a rule by name.
+
+        Args:
+            name: Rule name
+
+        Returns:
+            Rule dictionary or None
+        """
+        rule = self._cached_rules().get(name)
+        return copy.deepcopy(rule) if rule is not None else None
+
+    def _cached_rules(self) -> Dict[str, Dict[str, Any]]:
+        """Get the parsed rules by name, reading them again only after a change.
+
+        Returns:
+            Rule dictionaries by name in creation order (not to be modified)
+        """
+        version = self._version()
+        if self._rules is None or self._rules[0] != version:
+            rows = self.conn.execute("SELECT name, data FROM rules ORDER BY rowid")
+            self._rules = version, {row['name']: json.loads(row['data']) for row in rows}
+        return self._rules[1]
+
+    def delete_rule(self, name: str) -> bool:
+        """Delete a rule.
+
+        Args:
+            name: Rule name
+
+        Returns:
+            True if the rule existed
+        """
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM rules WHERE name = ?", (name,))
+        return cursor.rowcount > 0
+
+    def set_rule_enabled(self, name: str, enabled: bool) -> bool:
+        """Enable or disable a rule.
+
+        Args:
+            name: Rule name
+            enabled: Enabled status
+
+        Returns:
+            True if the rule exists
+        """
+        with self._write_transaction() as conn:
+            row = conn.execute("SELECT data FROM rules WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return False
+
+            rule = json.loads(row['data'])
+            rule['enabled'] = enabled
+            rule['updated_at'] = datetime.now().isoformat()
+            conn.execute(
+                "UPDATE rules SET enabled = ?, created_at = ?, updated_at = ?, data = ? "
+                "WHERE name = ?",
+                self._rule_row(rule)[1:] + (name,),
+            )
+        return True
+
+    @staticmethod
+    def _rule_row(rule: Dict[str, Any]) -> tuple:
+        """Convert a rule dictionary to a row.
+
+        Args:
+            rule: Rule dictionary
+
+        Returns:
+            Row values in column order
+        """
+        return (
+            rule['name'], int(bool(rule.get('enabled', True))), rule.get('created_at'),
+            rule.get('updated_at'), json.dumps(rule),
+        )
+
+    # Notification channels
+
+    def create_channel(self, channel: Dict[str, Any]) -> None:
+        """Insert a notification channel definition.
+
+        Args:
+            channel: Channel dictionary (NotificationChannel.to_dict())
+
+        Raises:
+            ValueError: If a channel with the same name exists
+        """
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO channels (name, type, data) VALUES (?, ?, ?)",
+                    (channel['name'], channel['type'], json.dumps(channel)),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Channel '{channel['name']}' already exists")
+
+    def list_channels(self) -> List[Dict[str, Any]]:
+        """List all notification channel definitions in creation order.
+
+        Returns:
+            List of channel dictionaries
+        """
+        rows = self.conn.execute("SELECT data FROM channels ORDER BY rowid")
+        return [json.loads(row['data']) for row in rows]
+
+    def delete_channel(self, name: str) -> bool:
+        """Delete a notification channel definition.
+
+        Args:
+            name: Channel name
+
+        Returns:
+            True if the channel existed
+        """
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM channels WHERE name = ?", (name,))
+        return cursor.rowcount > 0
+
+    # Inhibit rules
+
+    def create_inhibit_rule(self, rule: Dict[str, Any]) -> int:
+        """Insert an inhibit rule.
+
+        Args:
+            rule: Inhibit rule dictionary (InhibitRule.to_dict())
+
+        Returns:
+            Rule id
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO inhibit_rules (data) VALUES (?)", (json.dumps(rule),)
+            )
+        return cursor.lastrowid
+
+    def list_inhibit_rules(self) -> List[Dict[str, Any]]:
+        """List all inhibit rules in creation order.
+
+        Returns:
+            List of inhibit rule dictionaries with their ``id``
+        """
+        rows = self.conn.execute("SELECT id, data FROM inhibit_rules ORDER BY id")
+        return [{'id': row['id'], **json.loads(row['data'])} for row in rows]
+
+    def delete_inhibit_rule(self, rule_id: int) -> bool:
+        """Delete an inhibit rule.
+
+        Args:
+            rule_id: Rule id
+
+        Returns:
+            True if the rule existed
+        """
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM inhibit_rules WHERE id = ?", (rule_id,))
+        return cursor.rowcount > 0
+
+    # Silences
+
+    def create_silence(self, silence: Dict[str, Any]) -> int:
+        """Insert a silence.
+
+        Args:
+            silence: Silence dictionary (Silence.to_dict())
+
+        Returns:
+            Silence id
+        """
+        data = {key: value for key, value in silence.items()
+                if key not in ('id', 'starts_at', 'ends_at')}
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO silences (starts_at, ends_at, data) VALUES (?, ?, ?)",
+                (self._timestamp(silence['starts_at']), self._timestamp(silence['ends_at']),
+                 json.dumps(data)),
+            )
+            self._bump_silences_version()
+        return cursor.lastrowid
+
+    def list_silences(self, ending_after: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """List silences in creation order.
+
+        Args:
+            ending_after: Only silences ending after this time (through the
+                ``ends_at`` index), i.e. the ones not expired yet
+
+        Returns:
+            List of silence dictionaries with their ``id``
+        """
+        if ending_after is not None:
+            rows = self.conn.execute(
+                "SELECT * FROM silences WHERE ends_at > ? ORDER BY id",
+                (ending_after.isoformat(),),
+            )
+        else:
+            rows = self.conn.execute("SELECT * FROM silences ORDER BY id")
+        return [self._silence_dict(row) for row in rows]
+
+    def get_silence(self, silence_id: int) -> Optional[Dict[str, Any]]:
+        """Get a silence.
+
+        Args:
+            silence_id: Silence id
+
+        Returns:
+            Silence dictionary or None
+        """
+        row = self.conn.execute(
+            "SELECT * FROM silences WHERE id = ?", (silence_id,)
+        ).fetchone()
+        return self._silence_dict(row) if row is not None else None
+
+    def expire_silence(self, silence_id: int, now: datetime) -> bool:
+        """End a silence now; a silence that has not started is deleted.
+
+        Args:
+            silence_id: Silence id
+            now: Current time
+
+        Returns:
+            True if the silence was in effect or pending
+        """
+        now = now.isoformat()
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM silences WHERE id = ? AND starts_at > ?", (silence_id, now)
+            )
+            if cursor.rowcount == 0:
+                cursor = self.conn.execute(
+                    "UPDATE silences SET ends_at = ? WHERE id = ? AND ends_at > ?",
+                    (now, silence_id, now),
+                )
+            if cursor.rowcount > 0:
+                self._bump_silences_version()
+        return cursor.rowcount > 0
+
+    def purge_silences(self, ended_before: datetime) -> int:
+        """Delete the silences that ended before a time.
+
+        Args:
+            ended_before: Time
+
+        Returns:
+            Number of silences deleted
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM silences WHERE ends_at < ?", (ended_before.isoformat(),)
+            )
+            if cursor.rowcount > 0:
+                self._bump_silences_version()
+        return cursor.rowcount
+
+    def silences_version(self) -> int:
+        """Get a counter that changes whenever silences are written.
+
+        Processes holding an index of the silences poll it to notice the
+        silences other processes add or expire.
+
+        Returns:
+            Silences version
+        """
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'silences_version'"
+        ).fetchone()
+        return int(row['value']) if row is not None else 0
+
+    def _bump_silences_version(self) -> None:
+        """Increment the silences version (inside the writing transaction)."""
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('silences_version', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    @staticmethod
+    def _timestamp(value: Any) -> str:
+        """Convert a datetime (or ISO string) to its stored form."""
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    @staticmethod
+    def _silence_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a silence row to a silence dictionary."""
+        return {
+            'id': row['id'], 'starts_at': row['starts_at'], 'ends_at': row['ends_at'],
+            **json.loads(row['data']),
+        }
+
+    # Alerts
+
+    def insert_alerts(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        """Insert alerts in one transaction.
+
+        Args:
+            alerts: Alert dictionaries (Alert.to_dict())
+
+        Returns:
+            Number of alerts inserted
+        """
+        rows = [self._alert_row(alert) for alert in alerts]
+        if rows:
+            placeholders = ', '.join('?' * len(ALERT_COLUMNS))
+            with self.conn:
+                self.conn.executemany(
+                    f"INSERT INTO alerts ({', '.join(ALERT_COLUMNS)}) VALUES ({placeholders})",
+                    rows,
+                )
+        return len(rows)
+
+    def list_alerts(
+        self,
+        status: Optional[str] = None,
+        severity: Optional[str] = None,
+        rule_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """List alerts in creation order.
+
+        Args:
+            status: Filter by status
+            severity: Filter by severity
+            rule_name: Filter by rule name
+            since: Only alerts started at or after this time
+            limit: Only the most recent alerts
+
+        Returns:
+            List of alert dictionaries with their ``id``
+        """
+        clauses = []
+        params: List[Any] = []
+        for column, value in (('status', status), ('severity', severity),
+                              ('rule_name', rule_name)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since.isoformat())
+
+        query = "SELECT * FROM alerts"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        if limit is not None:
+            query = f"SELECT * FROM ({query} ORDER BY id DESC LIMIT ?)"
+            params.append(limit)
+        query += " ORDER BY id"
+
+        return [self._alert_dict(row) for row in self.conn.execute(query, params)]
+
+    def count_alerts(self, status: Optional[str] = None) -> int:
+        """Count alerts.
+
+        Args:
+            status: Only alerts with this status
+
+        Returns:
+            Number of alerts
+        """
+        if status:
+            row = self.conn.execute("SELECT COUNT(*) FROM alerts WHERE status = ?", (status,))
+        else:
+            row = self.conn.execute("SELECT COUNT(*) FROM alerts")
+        return row.fetchone()[0]
+
+    def transition(
+        self,
+        rule_name: str,
+        from_statuses: Sequence[str],
+        changes: Dict[str, Any]
+    ) -> Optional[int]:
+        """Update the oldest alert of a rule in one of the given statuses.
+
+        The alert is found through the ``(rule_name, status)`` index, so the
+        cost does not grow with the alert history. It is found and updated
+        in one transaction, so concurrent processes (e.g. two ``aiops alert
+        acknowledge``) never update the same alert twice.
+
+        Args:
+            rule_name: Rule name
+            from_statuses: Statuses the alert may be in
+            changes: Column values to set
+
+        Returns:
+            Id of the updated alert, or None if no alert matched
+        """
+        self._check_columns(changes)
+        values = [self._column_value(column, value) for column, value in changes.items()]
+
+        with self._write_transaction() as conn:
+            candidates = []
+            for status in from_statuses:
+                row = conn.execute(
+                    "SELECT id FROM alerts WHERE rule_name = ? AND status = ? "
+                    "ORDER BY id LIMIT 1",
+                    (rule_name, status),
+                ).fetchone()
+                if row is not None:
+                    candidates.append(row['id'])
+            if not candidates:
+                return None
+
+            alert_id = min(candidates)
+            conn.execute(
+                f"UPDATE alerts SET {', '.join(f'{column} = ?' for column in changes)} "
+                f"WHERE id = ?",
+                values + [alert_id],
+            )
+        return alert_id
+
+    def list_open_alerts(self) -> List[Dict[str, Any]]:
+        """List pending, firing, acknowledged and silenced alerts in creation order.
+
+        Returns:
+            List of alert dictionaries with their ``id``
+        """
+        placeholders = ', '.join('?' * len(OPEN_STATUSES))
+        rows = self.conn.execute(
+            f"SELECT * FROM alerts WHERE status IN ({placeholders}) ORDER BY id", OPEN_STATUSES
+        )
+        return [self._alert_dict(row) for row in rows]
+
+    def get_alert_statuses(self, alert_ids: Sequence[int]) -> Dict[int, str]:
+        """Get the current status of alerts.
+
+        Args:
+            alert_ids: Alert ids
+
+        Returns:
+            Status per alert id; ids of deleted alerts are missing
+        """
+        if not alert_ids:
+            return {}
+        placeholders = ', '.join('?' * len(alert_ids))
+        rows = self.conn.execute(
+            f"SELECT id, status FROM alerts WHERE id IN ({placeholders})", list(alert_ids)
+        )
+        return {row['id']: row['status'] for row in rows}
+
+    def record_transitions(
+        self,
+        inserts: Sequence[Dict[str, Any]] = (),
+        updates: Sequence[Tuple[int, Dict[str, Any]]] = (),
+        deletes: Sequence[int] = ()
+    ) -> List[int]:
+        """Write a batch of alert transitions in one transaction.
+
+        Updates and deletes only apply to alerts that are still open, so an
+        alert resolved by hand is not changed again.
+
+        Args:
+            inserts: New alert dictionaries
+            updates: Tuples of (alert id, column values to set)
+            deletes: Ids of alerts to delete
+
+        Returns:
+            Ids of the inserted alerts, in order
+        """
+        for _, changes in updates:
+            self._check_columns(changes)
+
+        ids = []
+        statuses = ', '.join('?' * len(OPEN_STATUSES))
+        placeholders = ', '.join('?' * len(ALERT_COLUMNS))
+        with self.conn:
+            for alert in inserts:
+                cursor = self.conn.execute(
+                    f"INSERT INTO alerts ({', '.join(ALERT_COLUMNS)}) VALUES ({placeholders})",
+                    self._alert_row(alert),
+                )
+                ids.append(cursor.lastrowid)
+            for alert_id, changes in updates:
+                values = [self._column_value(column, value) for column, value in changes.items()]
+                self.conn.execute(
+                    f"UPDATE alerts SET {', '.join(f'{column} = ?' for column in changes)} "
+                    f"WHERE id = ? AND status IN ({statuses})",
+                    values + [alert_id] + list(OPEN_STATUSES),
+                )
+            if deletes:
+                self.conn.executemany(
+                    f"DELETE FROM alerts WHERE id = ? AND status IN ({statuses})",
+                    [(alert_id,) + OPEN_STATUSES for alert_id in deletes],
+                )
+        return ids
+
+    @staticmethod
+    def _check_columns(changes: Dict[str, Any]) -> None:
+        """Check that changes only set alert columns.
+
+        Args:
+            changes: Column values to set
+
+        Raises:
+            ValueError: If a field is not an alert column
+        """
+        unknown = set(changes) - set(ALERT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown alert fields: {', '.join(sorted(unknown))}")
+
+    @classmethod
+    def _alert_row(cls, alert: Dict[str, Any]) -> tuple:
+        """Convert an alert dictionary to a row.
+
+        Args:
+            alert: Alert dictionary
+
+        Returns:
+            Row values in ALERT_COLUMNS order
+        """
+        return tuple(cls._column_value(column, alert.get(column)) for column in ALERT_COLUMNS)
+
+    @staticmethod
+    def _column_value(column: str, value: Any) -> Any:
+        """Convert a field value to its column value.
+
+        Args:
+            column: Column name
+            value: Field value
+
+        Returns:
+            Value to store
+        """
+        if column in JSON_COLUMNS:
+            return json.dumps(value or {})
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _alert_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a row to an alert dictionary.
+
+        Args:
+            row: Alert row
+
+        Returns:
+            Alert dictionary with its ``id``
+        """
+        alert = {'id': row['id']}
+        for column in ALERT_COLUMNS:
+            value = row[column]
+            alert[column] = json.loads(value) if column in JSON_COLUMNS and value else value
+        return alert
+
+    # Migration
+
+    def migrate_json(self, rules_file: Path, alerts_file: Path) -> Dict[str, int]:
+        """Import rules and alerts from the JSON files of earlier versions.
+
+        Each imported file is renamed to ``<name>.migrated``, so the import
+        runs once and the original data is kept. Processes starting at the
+        same time import under a lock file next to the database, and the
+        import of each file is recorded in the same transaction as its rows,
+        so a file is never imported twice, even after a crash before the
+        rename.
+
+        Args:
+            rules_file: rules.json path
+            alerts_file: alerts.json path
+
+        Returns:
+            Number of rules and alerts imported
+        """
+        counts = {'rules': 0, 'alerts': 0}
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(str(self.db_path) + '.lock'):
+            if rules_file.exists():
+                rules = self._read_json(rules_file)
+                if self._begin_import(rules_file):
+                    with self.conn:
+                        self.conn.executemany(
+                            "INSERT OR IGNORE INTO rules "
+                            "(name, enabled, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+                            [self._rule_row(rule) for rule in rules],
+                        )
+                        self._end_import(rules_file)
+                    counts['rules'] = len(rules)
+                os.replace(rules_file, rules_file.with_name(rules_file.name + '.migrated'))
+
+            if alerts_file.exists():
+                alerts = self._read_json(alerts_file)
+                if self._begin_import(alerts_file):
+                    placeholders = ', '.join('?' * len(ALERT_COLUMNS))
+                    with self.conn:
+                        self.conn.executemany(
+                            f"INSERT INTO alerts ({', '.join(ALERT_COLUMNS)}) "
+                            f"VALUES ({placeholders})",
+                            [self._alert_row(alert) for alert in alerts],
+                        )
+                        self._end_import(alerts_file)
+                    counts['alerts'] = len(alerts)
+                os.replace(alerts_file, alerts_file.with_name(alerts_file.name + '.migrated'))
+
+        return counts
+
+    def _begin_import(self, path: Path) -> bool:
+        """Check that a JSON file was not imported yet.
+
+        Args:
+            path: JSON file
+
+        Returns:
+            True if the file still has to be imported
+        """
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (f"imported:{path.name}",)
+        ).fetchone()
+        return row is None or row['value'] != self._file_signature(path)
+
+    def _end_import(self, path: Path) -> None:
+        """Record the import of a JSON file (inside the importing transaction).
+
+        Args:
+            path: JSON file
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (f"imported:{path.name}", self._file_signature(path)),
+        )
+
+    @staticmethod
+    def _file_signature(path: Path) -> str:
+        """Identify the contents of a file by its size and modification time."""
+        stat = path.stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    @staticmethod
+    def _read_json(path: Path) -> List[Dict[str, Any]]:
+        """Read a JSON list of rules or alerts.
+
+        Args:
+            path: JSON file
+
+        Returns:
+            List of dictionaries
+        """
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise StorageError(f"Cannot migrate {path}: {str(e)}")
+        if not isinstance(data, list):
+            raise StorageError(f"Cannot migrate {path}: expected a JSON list")
+        return data
+
@@ -4,8 +4,21 @@ Alert command - Alert management
 import sys
 import json
 import click
-from datetime import datetime
-from aiops.alerting import AlertManager, AlertRule, Alert, AlertSeverity
+from datetime import datetime, timedelta
+from aiops.alerting import (
+    AlertGrouper, AlertManager, AlertRule, Alert, AlertScheduler, AlertSeverity, AlertStatus,
+    InhibitRule, RuleEvaluator, Silence,
+)
+from aiops.alerting.channels import CHANNEL_TYPES
+from aiops.alerting.dispatcher import should_notify
+from aiops.alerting.outbox import Outbox
+from aiops.alerting.conditions import parse_duration
+from aiops.cpu.collectors import SystemCPUCollector
+from aiops.memory.collectors import SystemMemoryCollector
+from aiops.diskio.collectors import DiskStatsCollector
+from aiops.network.collectors import NetworkStatsCollector
+from aiops.process.collectors import ProcessStatusCollector
+from aiops.correlation.series import is_collection
 
 
 @click.group()
@@ -16,17 +29,40 @@ def alert():
 
 @alert.command()
 @click.option('--name', required=True, help='Alert rule name')
-@click.option('--condition', required=True, help='Alert condition')
+@click.option('--condition', required=True,
+              help='Alert condition, e.g. "cpu.cpu_percent > 90 and memory.mem_used_percent > 80"')
 @click.option('--severity', type=click.Choice(['info', 'warning', 'critical', 'emergency']), default='warning')
 @click.option('--description', help='Rule description')
-def create(name, condition, severity, description):
+@click.option('--for', 'for_duration', default='0s',
+              help='How long the condition must hold before the alert fires, e.g. 5m')
+@click.option('--interval', default='60s', help='Evaluation interval, e.g. 30s')
+@click.option('--channel', 'channels', multiple=True,
+              help='Notification channel (see "aiops alert channel add"); repeatable')
+def create(name, condition, severity, description, for_duration, interval, channels):
     """Create alert rule
 
     Examples:
 
         \b
         # Create CPU alert
-        aiops alert create --name high_cpu --condition "cpu>90" --severity critical
+        aiops alert create --name high_cpu --condition "cpu.cpu_percent > 90" --severity critical
+
+        \b
+        # Sustained load, averaged over 5 minutes
+        aiops alert create --name busy --condition "avg_over(cpu.cpu_percent, 5m) > 75"
+
+        \b
+        # Any disk with slow writes
+        aiops alert create --name slow_disk --condition "disk.*.avg_write_time_ms > 50"
+
+        \b
+        # Fire only after 5 minutes, evaluating every 30 seconds
+        aiops alert create --name high_cpu --condition "cpu.cpu_percent > 90" \\
+            --for 5m --interval 30s
+
+        \b
+        # Notify a channel when it fires and resolves
+        aiops alert create --name high_cpu --condition "cpu.cpu_percent > 90" --channel ops-hook
     """
     try:
         manager = AlertManager()
@@ -36,6 +72,9 @@ def create(name, condition, severity, description):
             condition=condition,
             severity=severity,
             description=description,
+            evaluation_interval=max(1, int(parse_duration(interval))),
+            for_duration=int(parse_duration(for_duration)),
+            notification_channels=[channel for channel in channels],
         )
 
         manager.create_rule(rule)
@@ -175,8 +214,10 @@ def disable(name):
 @alert.command()
 @click.option('--status', help='Filter by status')
 @click.option('--severity', help='Filter by severity')
+@click.option('--rule', 'rule_name', help='Filter by rule name')
+@click.option('--limit', type=int, help='Show only the most recent alerts')
 @click.option('--output', type=click.Choice(['table', 'json']), default='table')
-def history(status, severity, output):
+def history(status, severity, rule_name, limit, output):
     """Show alert history
 
     Examples:
@@ -188,10 +229,16 @@ def history(status, severity, output):
         \b
         # Show firing alerts
         aiops alert history --status firing
+
+        \b
+        # Show the last 20 alerts of a rule
+        aiops alert history --rule high_cpu --limit 20
     """
     try:
         manager = AlertManager()
-        alerts = manager.list_alerts(status=status, severity=severity)
+        alerts = manager.list_alerts(
+            status=status, severity=severity, rule_name=rule_name, limit=limit
+        )
 
         if output == 'json':
             click.echo(json.dumps(alerts, indent=2))
@@ -235,3 +282,571 @@ def acknowledge(name, user):
     except Exception as e:
         click.echo(f"Error: {str(e)}", err=True)
         sys.exit(1)
+
+
+@alert.command()
+@click.option('--name', help='Alert rule name')
+@click.option('--condition', help='Condition to evaluate instead of a rule')
+@click.option('--data', type=click.Path(exists=True), required=True,
+              help='Collector output (aiops collector run --output) to evaluate against')
+@click.option('--output', type=click.Choice(['table', 'json']), default='table')
+def evaluate(name, condition, data, output):
+    """Evaluate a rule condition against collected metrics
+
+    Examples:
+
+        \b
+        # When would a rule have held?
+        aiops collector run --duration 600 --output metrics.json
+        aiops alert evaluate --name high_cpu --data metrics.json
+
+        \b
+        # Try a condition before creating a rule
+        aiops alert evaluate --condition "disk.*.avg_write_time_ms > 50" --data metrics.json
+    """
+    try:
+        if bool(name) == bool(condition):
+            raise click.UsageError("Specify either --name or --condition")
+
+        if name:
+            rule = AlertManager().get_rule(name)
+            if not rule:
+                click.echo(f"Rule '{name}' not found", err=True)
+                sys.exit(1)
+            condition = rule['condition']
+
+        with open(data, 'r') as f:
+            document = json.load(f)
+        if not is_collection(document):
+            raise ValueError(f"{data} is not collector output")
+
+        evaluator = RuleEvaluator()
+        evaluator.add_rule(name or 'condition', condition)
+
+        matches = []
+        for snapshot in document['data']:
+            for labels in evaluator.evaluate_snapshot(snapshot).get(name or 'condition', []):
+                matches.append({'timestamp': snapshot['timestamp'], 'labels': labels})
+
+        if output == 'json':
+            click.echo(json.dumps(matches, indent=2))
+        else:
+            click.echo(f"\nCondition: {condition}")
+            click.echo(f"Held in {len({m['timestamp'] for m in matches})} of "
+                       f"{len(document['data'])} snapshots")
+            for match in matches:
+                labels = ', '.join(f"{k}={v}" for k, v in match['labels'].items())
+                click.echo(f"  {match['timestamp']}" + (f"  {labels}" if labels else ""))
+
+    except click.UsageError:
+        raise
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+
+# Collector per metric type, as named by the first segment of a series
+COLLECTORS = {
+    'cpu': SystemCPUCollector,
+    'memory': SystemMemoryCollector,
+    'disk': DiskStatsCollector,
+    'network': NetworkStatsCollector,
+    'process': ProcessStatusCollector,
+}
+
+
+@alert.command()
+@click.option('--duration', type=float, help='Run for this many seconds (default: until Ctrl+C)')
+@click.option('--group-by', multiple=True,
+              help='Label to group notifications by (alertname is the rule name); repeatable. '
+                   'Default: one group per channel set')
+@click.option('--group-wait', default='30s', help='Wait before the first notification of a group')
+@click.option('--group-interval', default='5m', help='Minimum time between group notifications')
+@click.option('--output', type=click.Choice(['table', 'json']), default='table')
+def run(duration, group_by, group_wait, group_interval, output):
+    """Evaluate the enabled rules on their intervals
+
+    Collects the metric types the rules read, evaluates each group of rules
+    when its interval is due and records pending, firing and resolved
+    transitions. Open alerts from an earlier run are picked up on start.
+    Rules due to fire while an inhibit rule matches a firing alert are held
+    back. Firing and resolved alerts are grouped and sent to the rules'
+    notification channels in the background.
+
+    Examples:
+
+        \b
+        # Run the alert rules until interrupted
+        aiops alert run
+
+        \b
+        # Run for ten minutes, printing transitions as JSON lines
+        aiops alert run --duration 600 --output json
+
+        \b
+        # One notification per rule, sent at most every 10 minutes
+        aiops alert run --group-by alertname --group-interval 10m
+    """
+    manager = AlertManager()
+    collectors = {}
+    dispatcher = None
+    grouper = None
+    try:
+        rules = [rule for rule in manager.list_rules() if rule.get('enabled', True)]
+        if not rules:
+            click.echo("No enabled alert rules", err=True)
+            sys.exit(1)
+
+        scheduler = AlertScheduler(manager.store, rules, inhibitor=manager.create_inhibitor())
+        for name, reason in scheduler.skipped.items():
+            click.echo(f"Skipping rule {name}: {reason}", err=True)
+        rules = [rule for rule in rules if rule['name'] not in scheduler.skipped]
+        if not rules:
+            click.echo("No valid alert rules", err=True)
+            sys.exit(1)
+        recovered = scheduler.recover()
+
+        metric_types = {
+            name.split('.', 1)[0] for group in scheduler.groups.values()
+            for condition in group.evaluator.conditions.values() for name in condition.names
+        }
+        for metric_type in sorted(metric_types & set(COLLECTORS)):
+            collectors[metric_type] = COLLECTORS[metric_type]()
+            collectors[metric_type].initialize()
+
+        def collect():
+            snapshot = {'timestamp': datetime.now().isoformat()}
+            for metric_type, collector in collectors.items():
+                try:
+                    snapshot[metric_type] = [m.to_dict() for m in collector.collect()]
+                except Exception as e:
+                    click.echo(f"Error collecting {metric_type}: {e}", err=True)
+            return snapshot
+
+        def report(transition):
+            if output == 'json':
+                click.echo(json.dumps(transition.to_dict(), default=str))
+            else:
+                labels = ', '.join(f"{k}={v}" for k, v in transition.labels.items())
+                click.echo(f"{transition.timestamp.isoformat()}  {transition.rule_name}"
+                           + (f" {{{labels}}}" if labels else "")
+                           + f"  {transition.previous} -> {transition.status}")
+
+        channels = {rule['name']: rule.get('notification_channels') or [] for rule in rules}
+        if any(channels.values()):
+            grouper = AlertGrouper(group_by, parse_duration(group_wait),
+                                   parse_duration(group_interval))
+            dispatcher = manager.create_dispatcher()
+            dispatcher.start_background()
+
+        def on_transition(transition):
+            report(transition)
+            if grouper is None:
+                return
+            if should_notify(transition):
+                grouper.add(transition, channels.get(transition.rule_name, []))
+            elif transition.status == AlertStatus.SILENCED.value:
+                grouper.discard(transition)
+
+        def on_tick(now):
+            if grouper is not None:
+                for group_channels, payload in grouper.flush(now):
+                    dispatcher.submit(group_channels, payload)
+
+        click.echo(f"Evaluating {len(rules)} rules in {len(scheduler.groups)} interval groups "
+                   f"({recovered} open alerts recovered)...", err=True)
+        scheduler.run(collect, duration=duration, on_transition=on_transition, on_tick=on_tick,
+                      wakeup=grouper.next_flush if grouper else None)
+
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+    finally:
+        if dispatcher is not None:
+            for group_channels, payload in grouper.flush(datetime.now(), force=True):
+                dispatcher.submit(group_channels, payload)
+            if not dispatcher.stop_background():
+                click.echo(f"{dispatcher.outbox.count()} notifications left in the outbox",
+                           err=True)
+            dispatcher.outbox.close()
+        for collector in collectors.values():
+            collector.cleanup()
+        manager.close()
+
+
+@alert.group()
+def channel():
+    """Notification channel commands"""
+    pass
+
+
+@channel.command('add')
+@click.option('--name', required=True, help='Channel name')
+@click.option('--type', 'channel_type', type=click.Choice(sorted(CHANNEL_TYPES)), required=True,
+              help='Channel type')
+@click.option('--url', help='Webhook URL (webhook)')
+@click.option('--header', 'headers', multiple=True, help='Request header KEY=VALUE (webhook)')
+@click.option('--path', help='NDJSON file to append to (file)')
+@click.option('--to', 'recipients', multiple=True, help='Mail recipient (smtp); repeatable')
+@click.option('--smtp-host', default='localhost', help='SMTP server (smtp)')
+@click.option('--smtp-port', type=int, default=25, help='SMTP port (smtp)')
+@click.option('--sender', default='aiops@localhost', help='From address (smtp)')
+@click.option('--rate-limit', type=float, help='Maximum digests per minute')
+@click.option('--batch-wait', default='10s', help='Time to collect notifications into a digest')
+@click.option('--batch-size', type=int, default=50, help='Maximum notifications per digest')
+def channel_add(name, channel_type, url, headers, path, recipients, smtp_host, smtp_port, sender,
+                rate_limit, batch_wait, batch_size):
+    """Add a notification channel
+
+    Examples:
+
+        \b
+        # POST digests to a webhook, at most 6 per minute
+        aiops alert channel add --name ops-hook --type webhook \\
+            --url http://localhost:9000/alerts --rate-limit 6
+
+        \b
+        # Append notifications to an NDJSON file
+        aiops alert channel add --name audit --type file --path /var/log/aiops/alerts.ndjson
+
+        \b
+        # Mail through the local SMTP server
+        aiops alert channel add --name oncall --type smtp --to oncall@example.com
+    """
+    try:
+        definition = {
+            'name': name,
+            'type': channel_type,
+            'rate_limit': rate_limit,
+            'batch_wait': parse_duration(batch_wait),
+            'batch_size': batch_size,
+        }
+        if channel_type == 'webhook':
+            definition['url'] = url
+            definition['headers'] = dict(header.split('=', 1) for header in headers)
+        elif channel_type == 'file':
+            definition['path'] = path
+        else:
+            definition.update(recipients=[r for r in recipients], host=smtp_host,
+                              port=smtp_port, sender=sender)
+
+        manager = AlertManager()
+        manager.create_channel(definition)
+        click.echo(f"Channel '{name}' created successfully")
+
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@channel.command('list')
+@click.option('--output', type=click.Choice(['table', 'json']), default='table')
+def channel_list(output):
+    """List notification channels and their outbox
+
+    Examples:
+
+        \b
+        # List channels
+        aiops alert channel list
+    """
+    try:
+        manager = AlertManager()
+        channels = manager.list_channels()
+        outbox = Outbox(str(manager.outbox_file))
+
+        if output == 'json':
+            click.echo(json.dumps(channels, indent=2))
+            return
+        if not channels:
+            click.echo("No notification channels found")
+            return
+
+        click.echo("\nNotification Channels:")
+        click.echo("=" * 80)
+        for definition in channels:
+            target = definition.get('url') or definition.get('path') or \
+                ', '.join(definition.get('recipients') or [])
+            click.echo(f"\n{definition['name']} [{definition['type']}]  {target}")
+            click.echo(f"  Pending: {len(outbox.pending(definition['name']))}  "
+                       f"Failed: {len(outbox.failed(definition['name']))}")
+        outbox.close()
+
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@channel.command('delete')
+@click.option('--name', required=True, help='Channel name')
+def channel_delete(name):
+    """Delete a notification channel
+
+    Examples:
+
+        \b
+        # Delete channel
+        aiops alert channel delete --name ops-hook
+    """
+    try:
+        manager = AlertManager()
+        manager.delete_channel(name)
+        click.echo(f"Channel '{name}' deleted")
+
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+def parse_matchers(values, option):
+    """Parse repeated KEY=VALUE options into a dictionary."""
+    matchers = {}
+    for value in values:
+        key, sep, label_value = value.partition('=')
+        if not sep or not key:
+            raise click.BadParameter(f"expected KEY=VALUE, got {value!r}", param_hint=option)
+        matchers[key] = label_value
+    return matchers
+
+
+@alert.group()
+def inhibit():
+    """Inhibit rule commands"""
+    pass
+
+
+@inhibit.command('add')
+@click.option('--source', 'source', multiple=True, required=True,
+              help='Label KEY=VALUE the inhibiting alert must have; repeatable')
+@click.option('--target', 'target', multiple=True, required=True,
+              help='Label KEY=VALUE the inhibited alert must have; repeatable')
+@click.option('--equal', multiple=True, help='Label both alerts must share; repeatable')
+def inhibit_add(source, target, equal):
+    """Add an inhibit rule
+
+    Labels are the rule labels, the wildcard instance and alertname (the
+    rule name).
+
+    Examples:
+
+        \b
+        # Hold back high_cpu while the disk queue is congested on the same host
+        aiops alert inhibit add --source alertname=io_queue_congestion \\
+            --target alertname=high_cpu --equal host
+
+        \b
+        # Critical alerts hold back warnings
+        aiops alert inhibit add --source severity=critical --target severity=warning
+    """
+    try:
+        rule = InhibitRule(
+            source=parse_matchers(source, '--source'),
+            target=parse_matchers(target, '--target'),
+            equal=[label for label in equal],
+        )
+        rule_id = AlertManager().create_inhibit_rule(rule)
+        click.echo(f"Inhibit rule {rule_id} created successfully")
+
+    except click.BadParameter:
+        raise
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@inhibit.command('list')
+@click.option('--output', type=click.Choice(['table', 'json']), default='table')
+def inhibit_list(output):
+    """List inhibit rules
+
+    Examples:
+
+        \b
+        # List inhibit rules
+        aiops alert inhibit list
+    """
+    try:
+        rules = AlertManager().list_inhibit_rules()
+
+        if output == 'json':
+            click.echo(json.dumps(rules, indent=2))
+            return
+        if not rules:
+            click.echo("No inhibit rules found")
+            return
+
+        def matchers(labels):
+            return ', '.join(f"{k}={v}" for k, v in labels.items())
+
+        click.echo("\nInhibit Rules:")
+        click.echo("=" * 80)
+        for rule in rules:
+            click.echo(f"\n[{rule['id']}] {matchers(rule['source'])} inhibits "
+                       f"{matchers(rule['target'])}")
+            if rule['equal']:
+                click.echo(f"  Equal: {', '.join(rule['equal'])}")
+
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@inhibit.command('delete')
+@click.option('--id', 'rule_id', type=int, required=True, help='Inhibit rule id')
+def inhibit_delete(rule_id):
+    """Delete an inhibit rule
+
+    Examples:
+
+        \b
+        # Delete inhibit rule 1
+        aiops alert inhibit delete --id 1
+    """
+    try:
+        if not AlertManager().delete_inhibit_rule(rule_id):
+            click.echo(f"Inhibit rule {rule_id} not found", err=True)
+            sys.exit(1)
+        click.echo(f"Inhibit rule {rule_id} deleted")
+
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+def parse_time(value, option):
+    """Parse an ISO time option, or 'now'."""
+    if value == 'now':
+        return datetime.now()
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise click.BadParameter(f"expected an ISO time such as 2024-01-15T22:00, got {value!r}",
+                                 param_hint=option)
+
+
+@alert.group()
+def silence():
+    """Silence commands"""
+    pass
+
+
+@silence.command('add')
+@click.option('--matcher', 'matchers', multiple=True, required=True,
+              help='Label matcher NAME=VALUE, NAME!=VALUE, NAME=~REGEX or NAME!~REGEX; repeatable')
+@click.option('--start', default='now', help='Start time (ISO), default now')
+@click.option('--end', help='End time (ISO)')
+@click.option('--duration', help='Duration from the start, e.g. 2h (instead of --end)')
+@click.option('--author', default='admin', help='Who created the silence')
+@click.option('--comment', default='', help='Reason for the silence')
+def silence_add(matchers, start, end, duration, author, comment):
+    """Add a silence
+
+    Alerts matching every matcher are stored as silenced instead of firing
+    and not notified while the silence is in effect. Labels are the rule
+    labels, the wildcard instance, alertname (the rule name) and severity.
+
+    Examples:
+
+        \b
+        # Silence web-1 during a two hour deploy
+        aiops alert silence add --matcher host=web-1 --duration 2h --comment deploy
+
+        \b
+        # Nightly maintenance window for the disk alerts of sdb
+        aiops alert silence add --matcher 'alertname=~io_.*' --matcher instance=sdb \\
+            --start 2024-01-15T22:00 --end 2024-01-16T02:00
+    """
+    if (end is None) == (duration is None):
+        raise click.UsageError("Specify exactly one of --end and --duration")
+    starts_at = parse_time(start, '--start')
+    if end is not None:
+        ends_at = parse_time(end, '--end')
+    else:
+        try:
+            ends_at = starts_at + timedelta(seconds=parse_duration(duration))
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--duration')
+
+    try:
+        silence_id = AlertManager().create_silence(Silence(
+            matchers=[matcher for matcher in matchers],
+            starts_at=starts_at,
+            ends_at=ends_at,
+            created_by=author,
+            comment=comment,
+        ))
+        click.echo(f"Silence {silence_id} created until {ends_at.isoformat(timespec='seconds')}")
+
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@silence.command('list')
+@click.option('--all', 'include_expired', is_flag=True, help='Include expired silences')
+@click.option('--output', type=click.Choice(['table', 'json']), default='table')
+def silence_list(include_expired, output):
+    """List silences
+
+    Examples:
+
+        \b
+        # List active and pending silences
+        aiops alert silence list
+
+        \b
+        # Include the expired ones kept for a day
+        aiops alert silence list --all
+    """
+    try:
+        silences = [Silence.from_dict(data)
+                    for data in AlertManager().list_silences(include_expired=include_expired)]
+
+        if output == 'json':
+            click.echo(json.dumps([item.to_dict() for item in silences], indent=2))
+            return
+        if not silences:
+            click.echo("No silences found")
+            return
+
+        now = datetime.now()
+        click.echo("\nSilences:")
+        click.echo("=" * 80)
+        for item in silences:
+            click.echo(f"\n[{item.id}] {', '.join(item.matchers)}  ({item.state(now)})")
+            click.echo(f"  From: {item.starts_at.isoformat(timespec='seconds')}  "
+                       f"To: {item.ends_at.isoformat(timespec='seconds')}")
+            click.echo(f"  By: {item.created_by}")
+            if item.comment:
+                click.echo(f"  Comment: {item.comment}")
+
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@silence.command('expire')
+@click.option('--id', 'silence_id', type=int, required=True, help='Silence id')
+def silence_expire(silence_id):
+    """Expire a silence now
+
+    A running "aiops alert run" fires the alerts it silenced that still hold.
+
+    Examples:
+
+        \b
+        # End silence 3 after the deploy
+        aiops alert silence expire --id 3
+    """
+    try:
+        if not AlertManager().expire_silence(silence_id):
+            click.echo(f"Silence {silence_id} not found or already expired", err=True)
+            sys.exit(1)
+        click.echo(f"Silence {silence_id} expired")
+
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
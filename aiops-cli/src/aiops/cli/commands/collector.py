@@ -12,6 +12,8 @@ from aiops.memory.collectors import SystemMemoryCollector
 from aiops.diskio.collectors import DiskStatsCollector
 from aiops.network.collectors import NetworkStatsCollector
 from aiops.process.collectors import ProcessStatusCollector
+from aiops.correlation import CorrelationMonitor
+from aiops.correlation.series import NDJSON_SUFFIXES
 from aiops.core.exceptions import CollectionError
 
 
@@ -37,7 +39,8 @@ def collector():
 @click.option(
     '--output',
     type=click.Path(),
-    help='Output file path (JSON format)'
+    help='Output file path (JSON format, or NDJSON with a snapshot per line for .ndjson '
+         'and .jsonl)'
 )
 @click.option(
     '--metrics',
@@ -45,13 +48,28 @@ def collector():
     default='cpu,memory,disk,network',
     help='Metrics to collect (comma-separated: cpu,memory,disk,network,process)'
 )
+@click.option(
+    '--correlate',
+    'correlation_groups',
+    multiple=True,
+    help='Series whose correlation to monitor (comma-separated, e.g. '
+         'cpu.cpu_percent,network.eth0.bytes_sent); every pair of a group is monitored; '
+         'repeatable'
+)
+@click.option(
+    '--correlation-window',
+    type=click.IntRange(min=4),
+    default=60,
+    help='Snapshots per rolling correlation (default: 60)'
+)
 @click.option(
     '--config',
     type=click.Path(exists=True),
     help='Path to custom config file'
 )
 @click.pass_context
-def run(ctx, duration, interval, output, metrics, config):
+def run(ctx, duration, interval, output, metrics, correlation_groups, correlation_window,
+        config):
     """Run unified data collection
 
     Examples:
@@ -67,7 +85,17 @@ def run(ctx, duration, interval, output, metrics, config):
         \b
         # Save to file
         aiops collector run --output metrics.json --duration 60
+
+        \b
+        # Stream snapshots to a file as they are collected
+        aiops collector run --output metrics.ndjson --duration 86400
+
+        \b
+        # Report when network traffic stops following CPU usage
+        aiops collector run --duration 3600 \\
+            --correlate cpu.cpu_percent,network.eth0.bytes_sent
     """
+    stream = None
     try:
         # Load configuration
         cfg = load_config(config)
@@ -103,10 +131,23 @@ def run(ctx, duration, interval, output, metrics, config):
             proc_collector.initialize()
             collectors_map['process'] = proc_collector
 
+        monitor = None
+        if correlation_groups:
+            monitor = CorrelationMonitor(
+                [[name.strip() for name in group.split(',')] for group in correlation_groups],
+                window=correlation_window,
+            )
+
         # Collect data
         click.echo(f"Starting collection for {duration}s (interval={interval}s)...", err=True)
 
+        # NDJSON output is written as it is collected instead of kept in memory
+        if output and output.lower().endswith(NDJSON_SUFFIXES):
+            stream = open(output, 'w')
+
         all_data = []
+        anomalies = []
+        count = 0
         start_time = time.time()
 
         while time.time() - start_time < duration:
@@ -122,7 +163,21 @@ def run(ctx, duration, interval, output, metrics, config):
                 except Exception as e:
                     click.echo(f"Error collecting {metric_type}: {e}", err=True)
 
-            all_data.append(snapshot)
+            if stream:
+                stream.write(json.dumps(snapshot) + '\n')
+            else:
+                all_data.append(snapshot)
+            count += 1
+
+            if monitor:
+                for event in monitor.update_snapshot(snapshot):
+                    anomalies.append(event.to_dict())
+                    click.echo(
+                        f"Correlation break: {event.metadata['metric1']} <-> "
+                        f"{event.metadata['metric2']} r={event.metrics['correlation']:.2f} "
+                        f"(baseline {event.baseline:.2f})",
+                        err=True
+                    )
 
             # Wait for next interval
             time.sleep(interval)
@@ -139,12 +194,19 @@ def run(ctx, duration, interval, output, metrics, config):
                 'duration_seconds': duration,
                 'interval_seconds': interval,
                 'metrics_collected': list(collectors_map.keys()),
-                'total_snapshots': len(all_data),
+                'total_snapshots': count,
             },
             'data': all_data,
         }
+        if monitor:
+            output_data['anomalies'] = anomalies
 
-        if output:
+        if stream:
+            # The collection info follows the snapshots, once the totals are known
+            del output_data['data']
+            stream.write(json.dumps(output_data) + '\n')
+            click.echo(f"Data saved to {output}")
+        elif output:
             with open(output, 'w') as f:
                 json.dump(output_data, f, indent=2)
             click.echo(f"Data saved to {output}")
@@ -157,6 +219,9 @@ def run(ctx, duration, interval, output, metrics, config):
     except Exception as e:
         click.echo(f"Unexpected error: {str(e)}", err=True)
         sys.exit(1)
+    finally:
+        if stream:
+            stream.close()
 
 
 @collector.command()
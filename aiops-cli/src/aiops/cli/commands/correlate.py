@@ -4,27 +4,65 @@ Correlate command - Correlation analysis
 import sys
 import json
 import click
-from aiops.correlation import CorrelationAnalyzer
+from aiops.correlation import CorrelationAnalyzer, load_series
+from aiops.correlation.resample import AGGREGATIONS, FILL_METHODS
 
 
 @click.command()
 @click.option(
     '--metrics',
     type=str,
-    required=True,
-    help='Metrics to correlate (comma-separated)'
+    help='Metrics to correlate (comma-separated); with --target, the metrics to search '
+         '(default: all)'
+)
+@click.option(
+    '--target',
+    type=str,
+    help='Find the metrics most correlated with this metric'
+)
+@click.option(
+    '--top',
+    type=click.IntRange(min=1),
+    default=20,
+    help='Number of metrics found with --target (default: 20)'
 )
 @click.option(
     '--data',
     type=click.Path(exists=True),
+    multiple=True,
     required=True,
-    help='JSON file with metrics data'
+    help='JSON file with metrics data or collector output (aiops collector run, '
+         'aiops logs metrics), or NDJSON snapshots; repeatable, collector outputs are '
+         'joined by timestamp'
 )
 @click.option(
     '--threshold',
     type=float,
-    default=0.7,
-    help='Correlation threshold (default: 0.7)'
+    help='Correlation threshold (default: 0.7, or 0 with --target)'
+)
+@click.option(
+    '--resample',
+    'resample_interval',
+    type=click.FloatRange(min=0, min_open=True),
+    help='Resample collector outputs onto a common grid of this interval in seconds '
+         'instead of joining them by timestamp'
+)
+@click.option(
+    '--agg',
+    type=click.Choice(AGGREGATIONS),
+    default='mean',
+    help='Aggregation of the samples per resampling interval (default: mean)'
+)
+@click.option(
+    '--fill',
+    type=click.Choice(FILL_METHODS),
+    default='nan',
+    help='Resampling intervals without samples: nan (skipped) or ffill (default: nan)'
+)
+@click.option(
+    '--fill-limit',
+    type=click.IntRange(min=0),
+    help='Forward-fill at most this many consecutive intervals'
 )
 @click.option(
     '--output',
@@ -32,7 +70,8 @@ from aiops.correlation import CorrelationAnalyzer
     default='table',
     help='Output format'
 )
-def correlate(metrics, data, threshold, output):
+def correlate(metrics, target, top, data, threshold, resample_interval, agg, fill, fill_limit,
+              output):
     """Analyze metric correlations
 
     Examples:
@@ -40,17 +79,31 @@ def correlate(metrics, data, threshold, output):
         \b
         # Analyze correlations
         aiops correlate --metrics cpu,memory --data metrics.json
-    """
-    try:
-        # Load data
-        with open(data, 'r') as f:
-            metrics_data = json.load(f)
 
-        # Parse metrics
-        metric_names = [m.strip() for m in metrics.split(',')]
+        \b
+        # Correlate log error counts with CPU usage
+        aiops correlate --metrics cpu.cpu_percent,logs.level.ERROR \\
+            --data metrics.json --data log_metrics.json
+
+        \b
+        # Find the 20 series most correlated with CPU usage
+        aiops correlate --target cpu.cpu_percent --top 20 --data fleet.json
+
+        \b
+        # Align collections of different cadence on a 10 second grid
+        aiops correlate --metrics cpu.cpu_percent,disk.sda.read_bytes \\
+            --data cpu.json --data disk.json --resample 10 --agg max --fill ffill
+    """
+    if not metrics and not target:
+        raise click.UsageError("Specify --metrics or --target")
 
-        # Filter data
-        filtered_data = {k: v for k, v in metrics_data.items() if k in metric_names}
+    try:
+        # Load only the requested metrics (all of them to search for --target)
+        metric_names = None
+        if metrics:
+            metric_names = [m.strip() for m in metrics.split(',')] + ([target] if target else [])
+        filtered_data = load_series(data, resample_interval, agg, fill, fill_limit,
+                                    names=metric_names)
 
         if not filtered_data:
             click.echo("No matching metrics found in data")
@@ -58,7 +111,17 @@ def correlate(metrics, data, threshold, output):
 
         # Analyze correlations
         analyzer = CorrelationAnalyzer()
-        results = analyzer.find_correlations(filtered_data, threshold)
+        if target:
+            if target not in filtered_data:
+                click.echo(f"Target metric not found in data: {target}")
+                sys.exit(1)
+            results = analyzer.find_top_correlations(
+                target, filtered_data, top, threshold if threshold is not None else 0.0
+            )
+        else:
+            results = analyzer.find_correlations(
+                filtered_data, threshold if threshold is not None else 0.7
+            )
 
         if output == 'json':
             click.echo(json.dumps(results, indent=2))
@@ -2,13 +2,56 @@
 Logs command group - Log analysis and query commands
 """
 import sys
+import json
 import click
-from typing import List
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
 from aiops.config import load_config
-from aiops.logs.collectors import LogCollector
-from aiops.logs.models import LogEntry
+from aiops.correlation.series import is_collection
+from aiops.logs.collectors import KernelLogCollector, LogCollector
+from aiops.logs.collectors.kmsg_collector import DEFAULT_KMSG_SOURCE
+from aiops.logs.detectors import KernelEventDetector
+from aiops.logs.models import LogMetric
+from aiops.logs.stats import LogMetricDeriver, LogStatistics
+from aiops.logs.stats.log_metrics import DEFAULT_MAX_GAP
 from aiops.cli.formatters.base import get_formatter
-from aiops.core.exceptions import CollectionError
+from aiops.core.exceptions import CollectionError, StorageError
+from aiops.core.utils import parse_time_range
+
+
+def _parse_time_option(ctx, param, value: Optional[str]) -> Optional[datetime]:
+    """Parse --since/--until as an ISO timestamp or a relative range (e.g. 30m)."""
+    if value is None:
+        return None
+
+    try:
+        return datetime.now() - parse_time_range(value)
+    except ValueError:
+        pass
+
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise click.BadParameter(
+            f"Invalid time: {value}. Use ISO format (2024-01-15T10:00:00) "
+            f"or a relative range (30m, 2h, 1d)"
+        )
+
+
+def _parse_json_fields(ctx, param, values) -> Optional[Dict[str, str]]:
+    """Parse repeated --json-field FIELD=KEY options into a field mapping."""
+    if not values:
+        return None
+
+    fields = {}
+    for value in values:
+        field_name, sep, key = value.partition('=')
+        if not sep or not field_name or not key:
+            raise click.BadParameter(
+                f"Invalid JSON field mapping: {value}. Use FIELD=KEY (e.g. ts=time)"
+            )
+        fields[field_name.strip()] = key.strip()
+    return fields
 
 
 @click.group()
@@ -20,16 +63,47 @@ def logs():
 @logs.command()
 @click.option(
     '--path',
-    type=click.Path(exists=True),
+    type=click.Path(),
     multiple=True,
     required=True,
-    help='Log file path(s) to analyze'
+    help='Log file path(s) or glob pattern(s) to analyze'
+)
+@click.option(
+    '--rotated',
+    is_flag=True,
+    help='Also read rotated files (app.log.1, app.log.2.gz, ...)'
+)
+@click.option(
+    '--since',
+    callback=_parse_time_option,
+    help='Only entries at or after this time (ISO timestamp or relative, e.g. 30m)'
+)
+@click.option(
+    '--until',
+    callback=_parse_time_option,
+    help='Only entries at or before this time (ISO timestamp or relative, e.g. 5m)'
 )
 @click.option(
     '--level',
     type=click.Choice(['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL', 'FATAL'], case_sensitive=False),
     help='Filter by log level'
 )
+@click.option(
+    '--contains',
+    help='Only entries whose message contains this text (case-insensitive)'
+)
+@click.option(
+    '--index',
+    'use_index',
+    is_flag=True,
+    help='Use (and incrementally update) an on-disk token index; --contains then matches '
+         'whole words'
+)
+@click.option(
+    '--index-dir',
+    type=click.Path(file_okay=False),
+    help='Directory for index files (default: ~/.cache/aiops/log-index)'
+)
 @click.option(
     '--tail',
     type=int,
@@ -40,6 +114,24 @@ def logs():
     is_flag=True,
     help='Follow mode (like tail -f)'
 )
+@click.option(
+    '--json-field',
+    'json_fields',
+    multiple=True,
+    callback=_parse_json_fields,
+    help='JSON key for an entry field in JSON-lines logs, as FIELD=KEY '
+         '(fields: ts, level, msg, process, pid, host)'
+)
+@click.option(
+    '--multiline-start',
+    help='Regex matching the first line of each record; other lines are merged into '
+         'the previous entry (default: merge indented and stack trace lines)'
+)
+@click.option(
+    '--no-multiline',
+    is_flag=True,
+    help='Treat every line as a separate entry'
+)
 @click.option(
     '--output',
     type=click.Choice(['table', 'json', 'yaml'], case_sensitive=False),
@@ -57,7 +149,8 @@ def logs():
     help='Path to custom config file'
 )
 @click.pass_context
-def query(ctx, path, level, tail, follow, output, output_file, config):
+def query(ctx, path, rotated, since, until, level, contains, use_index, index_dir, tail, follow,
+          json_fields, multiline_start, no_multiline, output, output_file, config):
     """Query and filter log entries
 
     Examples:
@@ -77,6 +170,26 @@ def query(ctx, path, level, tail, follow, output, output_file, config):
         \b
         # Query multiple log files
         aiops logs query --path /var/log/app.log --path /var/log/error.log
+
+        \b
+        # Query a whole rotation set, including compressed files
+        aiops logs query --path /var/log/app.log --rotated --since 2024-01-15T10:00:00
+
+        \b
+        # Query files matching a glob pattern
+        aiops logs query --path '/var/log/nginx/access.log*' --since 2h
+
+        \b
+        # Repeated searches over a large file, answered from an index
+        aiops logs query --path /var/log/app.log --index --level ERROR --contains timeout
+
+        \b
+        # JSON-lines logs with non-standard field names
+        aiops logs query --path /var/log/api.jsonl --json-field ts=time --json-field msg=text
+
+        \b
+        # Records that start with a bracketed date; everything else is a continuation
+        aiops logs query --path /var/log/app.log --multiline-start '^\\[\\d{4}-'
     """
     try:
         # Load configuration
@@ -87,7 +200,16 @@ def query(ctx, path, level, tail, follow, output, output_file, config):
             log_paths=list(path),
             level_filter=level,
             tail=tail,
-            follow=follow
+            follow=follow,
+            since=since,
+            until=until,
+            rotated=rotated,
+            contains=contains,
+            use_index=use_index,
+            index_dir=index_dir,
+            json_fields=json_fields,
+            multiline=not no_multiline,
+            multiline_patterns={'*': multiline_start} if multiline_start else None
         )
         collector.initialize()
 
@@ -123,7 +245,7 @@ def query(ctx, path, level, tail, follow, output, output_file, config):
 
         collector.cleanup()
 
-    except CollectionError as e:
+    except (CollectionError, StorageError) as e:
         click.echo(f"Collection error: {str(e)}", err=True)
         sys.exit(1)
     except Exception as e:
@@ -134,10 +256,43 @@ def query(ctx, path, level, tail, follow, output, output_file, config):
 @logs.command()
 @click.option(
     '--path',
-    type=click.Path(exists=True),
+    type=click.Path(),
     multiple=True,
     required=True,
-    help='Log file path(s) to analyze'
+    help='Log file path(s) or glob pattern(s) to analyze'
+)
+@click.option(
+    '--rotated',
+    is_flag=True,
+    help='Also read rotated files (app.log.1, app.log.2.gz, ...)'
+)
+@click.option(
+    '--since',
+    callback=_parse_time_option,
+    help='Only entries at or after this time (ISO timestamp or relative, e.g. 30m)'
+)
+@click.option(
+    '--until',
+    callback=_parse_time_option,
+    help='Only entries at or before this time (ISO timestamp or relative, e.g. 5m)'
+)
+@click.option(
+    '--json-field',
+    'json_fields',
+    multiple=True,
+    callback=_parse_json_fields,
+    help='JSON key for an entry field in JSON-lines logs, as FIELD=KEY '
+         '(fields: ts, level, msg, process, pid, host)'
+)
+@click.option(
+    '--multiline-start',
+    help='Regex matching the first line of each record; other lines are merged into '
+         'the previous entry (default: merge indented and stack trace lines)'
+)
+@click.option(
+    '--no-multiline',
+    is_flag=True,
+    help='Treat every line as a separate entry'
 )
 @click.option(
     '--output',
@@ -151,7 +306,8 @@ def query(ctx, path, level, tail, follow, output, output_file, config):
     help='Path to custom config file'
 )
 @click.pass_context
-def stats(ctx, path, output, config):
+def stats(ctx, path, rotated, since, until, json_fields, multiline_start, no_multiline, output,
+          config):
     """Generate log statistics
 
     Examples:
@@ -163,24 +319,35 @@ def stats(ctx, path, output, config):
         \b
         # Statistics for multiple files
         aiops logs stats --path /var/log/app.log --path /var/log/error.log
+
+        \b
+        # Statistics for a rotation set
+        aiops logs stats --path /var/log/app.log --rotated
     """
     try:
         # Load configuration
         cfg = load_config(config)
 
         # Create collector
-        collector = LogCollector(log_paths=list(path))
+        collector = LogCollector(
+            log_paths=list(path),
+            since=since,
+            until=until,
+            rotated=rotated,
+            json_fields=json_fields,
+            multiline=not no_multiline,
+            multiline_patterns={'*': multiline_start} if multiline_start else None
+        )
         collector.initialize()
 
-        # Collect all entries
-        entries = collector.collect()
+        # Aggregate entries as they are read
+        statistics = LogStatistics().update(collector.iter_entries())
 
-        if not entries:
+        if not statistics.total:
             click.echo("No log entries found")
             return
 
-        # Calculate statistics
-        stats_data = _calculate_statistics(entries)
+        stats_data = statistics.to_dict()
 
         # Format and output
         formatter = get_formatter(output.lower())
@@ -197,35 +364,296 @@ def stats(ctx, path, output, config):
         sys.exit(1)
 
 
-def _calculate_statistics(entries: List[LogEntry]) -> dict:
-    """Calculate statistics from log entries.
+@logs.command()
+@click.option(
+    '--path',
+    type=click.Path(),
+    multiple=True,
+    required=True,
+    help='Log file path(s) or glob pattern(s) to derive metrics from'
+)
+@click.option(
+    '--rotated',
+    is_flag=True,
+    help='Also read rotated files (app.log.1, app.log.2.gz, ...)'
+)
+@click.option(
+    '--since',
+    callback=_parse_time_option,
+    help='Start time (ISO format or relative, e.g. 1h)'
+)
+@click.option(
+    '--until',
+    callback=_parse_time_option,
+    help='End time (ISO format or relative, e.g. 30m)'
+)
+@click.option(
+    '--json-field',
+    'json_fields',
+    multiple=True,
+    callback=_parse_json_fields,
+    help='Map a JSON-lines key to an entry field (FIELD=KEY, e.g. ts=time); repeatable'
+)
+@click.option(
+    '--interval',
+    type=float,
+    default=1.0,
+    help='Interval in seconds (default: 1.0)'
+)
+@click.option(
+    '--align-to',
+    type=click.Path(exists=True),
+    help='Collector output (aiops collector run --output) whose time grid and interval to use'
+)
+@click.option(
+    '--no-templates',
+    is_flag=True,
+    help='Do not derive per-template series'
+)
+@click.option(
+    '--max-series',
+    type=int,
+    default=50,
+    help='Maximum template and process series; the rest count as "other" (default: 50)'
+)
+@click.option(
+    '--max-gap',
+    type=int,
+    default=DEFAULT_MAX_GAP,
+    help=f'Maximum empty intervals written between two entries (default: {DEFAULT_MAX_GAP})'
+)
+@click.option(
+    '--output-file',
+    type=click.Path(),
+    help='Write the series to a file instead of stdout'
+)
+def metrics(path, rotated, since, until, json_fields, interval, align_to, no_templates, max_series,
+            max_gap, output_file):
+    """Derive metric series from logs
+
+    Counts entries per interval by level, message template and process and
+    writes them in the collector output format, so they can be passed to
+    correlate and rca together with collected metrics.
+
+    Examples:
+
+        \b
+        # Error counts on the grid of collected metrics
+        aiops collector run --duration 600 --output metrics.json
+        aiops logs metrics --path /var/log/app.log --align-to metrics.json \\
+            --output-file log_metrics.json
+        aiops correlate --metrics cpu.cpu_percent,logs.level.ERROR \\
+            --data metrics.json --data log_metrics.json
+    """
+    try:
+        grid_start = None
+        if align_to:
+            grid_start, interval = _read_grid(align_to)
+
+        collector = LogCollector(
+            log_paths=list(path),
+            since=since,
+            until=until,
+            rotated=rotated,
+            json_fields=json_fields
+        )
+        collector.initialize()
+
+        deriver = LogMetricDeriver(
+            interval_seconds=interval,
+            grid_start=grid_start,
+            templates=not no_templates,
+            max_series=max_series,
+            max_gap=max_gap
+        )
+        log_metrics = deriver.feed(collector.iter_entries())
+
+        if output_file:
+            with open(output_file, 'w') as f:
+                count = _write_log_metrics(f, log_metrics, deriver, list(path))
+            click.echo(f"{count} intervals saved to {output_file}")
+        else:
+            _write_log_metrics(sys.stdout, log_metrics, deriver, list(path))
+
+        collector.cleanup()
+
+    except (CollectionError, ValueError) as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+    except Exception as e:
+        click.echo(f"Unexpected error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@logs.command()
+@click.option(
+    '--source',
+    type=click.Path(),
+    default=DEFAULT_KMSG_SOURCE,
+    help=f'/dev/kmsg or a dmesg text file (default: {DEFAULT_KMSG_SOURCE})'
+)
+@click.option(
+    '--boot-time',
+    callback=_parse_time_option,
+    help='Boot time for converting kernel timestamps (default: system boot time for '
+         '/dev/kmsg, the epoch for files)'
+)
+@click.option(
+    '--state-file',
+    type=click.Path(),
+    help='Save the last sequence number read and resume after it on the next run'
+)
+@click.option(
+    '--follow',
+    '-f',
+    is_flag=True,
+    help='Wait for new kernel messages'
+)
+@click.option(
+    '--events',
+    is_flag=True,
+    help='Report OOM kills, hung tasks and disk I/O errors instead of messages'
+)
+@click.option(
+    '--output',
+    type=click.Choice(['table', 'json', 'yaml'], case_sensitive=False),
+    default='table',
+    help='Output format (default: table)'
+)
+@click.option(
+    '--output-file',
+    type=click.Path(),
+    help='Save output to file'
+)
+def kernel(source, boot_time, state_file, follow, events, output, output_file):
+    """Read kernel messages and OOM-killer events
+
+    Reads /dev/kmsg without blocking, or dmesg output saved to a file.
+
+    Examples:
+
+        \b
+        # OOM kills and disk errors since the last run, for rca
+        aiops logs kernel --events --state-file ~/.cache/aiops/kmsg.json \\
+            --output json --output-file kernel_events.json
+        aiops rca --events kernel_events.json
+
+        \b
+        # Kernel messages of a saved dmesg output
+        aiops logs kernel --source dmesg.txt
+
+        \b
+        # Follow kernel events
+        aiops logs kernel --events --follow
+    """
+    try:
+        collector = KernelLogCollector(
+            source=source,
+            state_file=state_file,
+            boot_time=boot_time,
+            follow=follow
+        )
+        collector.initialize()
+
+        detector = KernelEventDetector() if events else None
+        if detector is not None:
+            detector.initialize()
+
+        formatter = get_formatter(output.lower())
+
+        if follow:
+            click.echo("Following kernel messages... (Press Ctrl+C to stop)", err=True)
+            try:
+                for entry in collector.stream():
+                    items = detector.update(entry) if detector is not None else [entry]
+                    for item in items:
+                        click.echo(formatter.format(item))
+            except KeyboardInterrupt:
+                click.echo("\nStopped following kernel messages", err=True)
+        else:
+            if detector is not None:
+                results = detector.detect(collector.iter_entries())
+            else:
+                results = collector.collect()
+
+            if collector.lost:
+                click.echo(f"{collector.lost} kernel messages were overwritten before they "
+                           f"were read", err=True)
+
+            if not results and output.lower() == 'table':
+                click.echo("No kernel events found" if events else "No kernel messages found")
+            else:
+                formatted_output = formatter.format(results)
+                if output_file:
+                    with open(output_file, 'w') as f:
+                        f.write(formatted_output)
+                    click.echo(f"Output saved to {output_file}")
+                else:
+                    click.echo(formatted_output)
+
+        collector.cleanup()
+
+    except CollectionError as e:
+        click.echo(f"Collection error: {str(e)}", err=True)
+        sys.exit(1)
+    except Exception as e:
+        click.echo(f"Unexpected error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+def _read_grid(path: str) -> Tuple[datetime, float]:
+    """Read the time grid of collector output.
+
+    Args:
+        path: Collector output file
+
+    Returns:
+        Tuple of (first snapshot time, interval in seconds)
+    """
+    with open(path, 'r') as f:
+        document = json.load(f)
+
+    if not is_collection(document) or not document['data']:
+        raise ValueError(f"{path} is not collector output with snapshots")
+
+    interval = float(document['collection_info'].get('interval_seconds') or 1.0)
+    return datetime.fromisoformat(document['data'][0]['timestamp']), interval
+
+
+def _write_log_metrics(f: TextIO, log_metrics: Iterator[LogMetric], deriver: LogMetricDeriver,
+                       sources: List[str]) -> int:
+    """Stream log metrics as collector output.
+
+    Snapshots are written one per line as they are derived; the collection
+    info follows them, once the totals are known.
 
     Args:
-        entries: List of LogEntry objects
+        f: Output stream
+        log_metrics: Derived metrics
+        deriver: Deriver producing the metrics (for the template texts)
+        sources: Log paths
 
     Returns:
-        Dictionary with statistics
+        Number of snapshots written
     """
-    from collections import Counter
-
-    total = len(entries)
-    level_counts = Counter(entry.level for entry in entries)
-    source_counts = Counter(entry.source for entry in entries)
-    process_counts = Counter(entry.process for entry in entries if entry.process)
-
-    # Calculate error rate
-    error_count = sum(count for level, count in level_counts.items()
-                     if level in ['ERROR', 'CRITICAL', 'FATAL'])
-    error_rate = (error_count / total * 100) if total > 0 else 0
-
-    return {
-        'total_entries': total,
-        'level_distribution': dict(level_counts),
-        'error_rate': error_rate,
-        'top_sources': dict(source_counts.most_common(10)),
-        'top_processes': dict(process_counts.most_common(10)),
-        'time_range': {
-            'start': min(entry.timestamp for entry in entries).isoformat(),
-            'end': max(entry.timestamp for entry in entries).isoformat(),
-        }
+    count = 0
+    first = last = None
+    f.write('{"data": [')
+    for metric in log_metrics:
+        snapshot = {'timestamp': metric.timestamp.isoformat(), 'logs': [metric.to_dict()]}
+        f.write(('\n' if count == 0 else ',\n') + json.dumps(snapshot))
+        first = first or metric.timestamp
+        last = metric.timestamp
+        count += 1
+
+    info = {
+        'start_time': first.isoformat() if first else None,
+        'end_time': last.isoformat() if last else None,
+        'interval_seconds': deriver.interval_seconds,
+        'metrics_collected': ['logs'],
+        'total_snapshots': count,
+        'sources': sources,
+        'templates': deriver.templates,
     }
+    f.write(f'\n], "collection_info": {json.dumps(info, indent=2)}}}\n')
+    return count
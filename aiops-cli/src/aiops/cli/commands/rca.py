@@ -4,7 +4,8 @@ RCA command - Root cause analysis
 import sys
 import json
 import click
-from aiops.rca import RootCauseAnalyzer
+from aiops.correlation import load_series
+from aiops.rca import RootCauseAnalyzer, load_events
 
 
 @click.command()
@@ -12,12 +13,25 @@ from aiops.rca import RootCauseAnalyzer
     '--events',
     type=click.Path(exists=True),
     required=True,
-    help='JSON file with anomaly events'
+    help='JSON or NDJSON file with anomaly events, or a report listing them under anomalies'
 )
 @click.option(
     '--metrics',
     type=click.Path(exists=True),
-    help='Optional JSON file with metrics data'
+    multiple=True,
+    help='Optional JSON file with metrics data or collector output, or NDJSON snapshots; '
+         'repeatable'
+)
+@click.option(
+    '--series',
+    type=str,
+    help='Series of the metrics files to analyze (comma-separated; default: all)'
+)
+@click.option(
+    '--resample',
+    'resample_interval',
+    type=click.FloatRange(min=0, min_open=True),
+    help='Resample metric collector outputs onto a common grid of this interval in seconds'
 )
 @click.option(
     '--output',
@@ -25,7 +39,7 @@ from aiops.rca import RootCauseAnalyzer
     default='table',
     help='Output format'
 )
-def rca(events, metrics, output):
+def rca(events, metrics, series, resample_interval, output):
     """Root cause analysis
 
     Examples:
@@ -33,29 +47,21 @@ def rca(events, metrics, output):
         \b
         # Analyze root cause
         aiops rca --events anomalies.json
+
+        \b
+        # With the CPU and network series of collector output
+        aiops rca --events anomalies.json --metrics metrics.ndjson \\
+            --series cpu.cpu_percent,network.eth0.bytes_sent
     """
     try:
         # Load events
-        with open(events, 'r') as f:
-            events_data = json.load(f)
+        anomaly_events = load_events(events)
 
         # Load metrics if provided
         metrics_data = None
         if metrics:
-            with open(metrics, 'r') as f:
-                metrics_data = json.load(f)
-
-        # Convert to simple objects for analysis
-        class SimpleEvent:
-            def __init__(self, data):
-                self.type = data.get('type', 'unknown')
-                self.severity = data.get('severity', 'warning')
-                self.confidence = data.get('confidence', 0.5)
-                self.metrics = data.get('metrics', {})
-                from datetime import datetime
-                self.timestamp = datetime.fromisoformat(data.get('timestamp', datetime.now().isoformat()))
-
-        anomaly_events = [SimpleEvent(e) for e in events_data]
+            names = [name.strip() for name in series.split(',')] if series else None
+            metrics_data = load_series(metrics, resample_interval, names=names)
 
         # Analyze
         analyzer = RootCauseAnalyzer()
@@ -35,3 +35,9 @@ class AnalysisError(AIOpsError):
     """Error during analysis."""
 
     pass
+
+
+class NotificationError(AIOpsError):
+    """Error during notification delivery."""
+
+    pass
@@ -0,0 +1,181 @@
+"""Incremental reading of large JSON and NDJSON files."""
+
+import json
+from typing import Any, Iterator, TextIO
+
+
+# Characters read from the file at once
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = ' \t\n\r'
+
+
+class JsonStream:
+    """Read a JSON document one value at a time.
+
+    Only the value being decoded is held in memory, so the members of a
+    large top-level object, or the items of a large array, can be processed
+    one by one. Values are decoded with json.JSONDecoder.raw_decode() from a
+    buffer that is refilled when a value runs past its end.
+
+    Example:
+        for key in stream.members():
+            if key == 'data':
+                for item in stream.items():
+                    ...
+            else:
+                value = stream.value()
+
+    Every member yielded by members() must be consumed with value() or
+    items() before the next one.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = CHUNK_SIZE):
+        """Initialize stream.
+
+        Args:
+            file: Text file positioned at the document
+            chunk_size: Characters read at once
+        """
+        self.file = file
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        """Read more of the file into the buffer.
+
+        Args:
+            size: Characters to read
+
+        Returns:
+            False at the end of the file
+        """
+        if self._eof:
+            return False
+        chunk = self.file.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop what was consumed, so the buffer holds about one value
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Get the next character that is not whitespace.
+
+        Returns:
+            The character ('' at the end of the document)
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill(self.chunk_size):
+                return self._buffer[self._pos:self._pos + 1]
+
+    def _expect(self, characters: str) -> str:
+        """Consume the next character, which must be one of ``characters``.
+
+        Args:
+            characters: Allowed characters
+
+        Returns:
+            The character
+
+        Raises:
+            ValueError: If another character (or the end) comes next
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Invalid JSON: expected {' or '.join(characters)}, "
+                             f"got {character or 'end of file'!r}")
+        self._pos += 1
+        return character
+
+    def value(self) -> Any:
+        """Decode the next value.
+
+        Returns:
+            The value
+
+        Raises:
+            ValueError: If the document is invalid
+        """
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+            else:
+                # A number at the end of the buffer may continue in the file
+                if end < len(self._buffer) or not self._fill(size):
+                    self._pos = end
+                    return value
+            # Values longer than a chunk grow the reads, keeping retries linear
+            size = max(size, len(self._buffer))
+
+    def members(self) -> Iterator[str]:
+        """Iterate over the keys of the next value, which must be an object.
+
+        Yields:
+            Member keys; the caller consumes each member's value
+
+        Raises:
+            ValueError: If the document is invalid
+        """
+        self._expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Invalid JSON: object key {key!r} is not a string")
+            self._expect(':')
+            yield key
+            if self._expect(',}') == '}':
+                return
+
+    def items(self) -> Iterator[Any]:
+        """Iterate over the items of the next value, which must be an array.
+
+        Yields:
+            Decoded items
+
+        Raises:
+            ValueError: If the document is invalid
+        """
+        self._expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self._expect(',]') == ']':
+                return
+
+
+def iter_ndjson(file: TextIO) -> Iterator[Any]:
+    """Iterate over the values of an NDJSON (JSON lines) file.
+
+    Args:
+        file: Text file with one JSON value per line; blank lines are skipped
+
+    Yields:
+        Decoded values
+
+    Raises:
+        ValueError: If a line is not valid JSON
+    """
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {number}: {e}") from e
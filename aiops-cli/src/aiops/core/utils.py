@@ -1,8 +1,10 @@
 """Utility functions for AIOps CLI."""
 
+import fcntl
 import re
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import Iterator, Tuple
 
 
 def parse_time_range(time_str: str) -> timedelta:
@@ -125,3 +127,27 @@ def get_time_range(start_str: str, end_str: str) -> Tuple[datetime, datetime]:
         start_dt = end_dt - offset
 
     return start_dt, end_dt
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False) -> Iterator[None]:
+    """
+    Hold an advisory fcntl lock on a lock file.
+
+    The lock coordinates processes sharing files (e.g. several aiops
+    commands on one storage path); it is released when the block exits or
+    the process dies.
+
+    Args:
+        path: Lock file, created if missing
+        shared: Take a shared (read) lock instead of an exclusive one
+
+    Yields:
+        None while the lock is held
+    """
+    with open(path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -1,7 +1,18 @@
 """Correlation analysis module."""
 
 from aiops.correlation.analyzer import CorrelationAnalyzer
+from aiops.correlation.monitor import CorrelationMonitor, RollingCorrelation
+from aiops.correlation.resample import align_series, resample
+from aiops.correlation.series import load_collection_series, load_series
+from aiops.correlation.sketch import CorrelationIndex
 
 __all__ = [
     'CorrelationAnalyzer',
+    'CorrelationIndex',
+    'CorrelationMonitor',
+    'RollingCorrelation',
+    'align_series',
+    'load_collection_series',
+    'load_series',
+    'resample',
 ]
@@ -1,9 +1,167 @@
 """Correlation analysis module."""
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Union
 import numpy as np
 from datetime import datetime
-from scipy import stats
+from scipy import fft, stats
+
+
+# Rows of the correlation matrix computed at once; bounds memory to
+# CORRELATION_BLOCK x series values however many series are compared
+CORRELATION_BLOCK = 1024
+
+
+def standardize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Center each row and scale it to unit norm.
+
+    The dot product of two standardized rows is their Pearson correlation.
+    Constant rows (and rows holding NaN) become NaN, so they correlate with
+    nothing.
+
+    Args:
+        matrix: 2-D array with one series per row
+
+    Returns:
+        Standardized float array of the same shape
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    centered = matrix - matrix.mean(axis=1, keepdims=True)
+    norms = np.sqrt(np.einsum('ij,ij->i', centered, centered))
+    norms[np.ptp(matrix, axis=1) == 0] = np.nan
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return centered / norms[:, None]
+
+
+def pearson_p_values(correlations: np.ndarray, n: Union[int, np.ndarray]) -> np.ndarray:
+    """Get two-sided p-values of Pearson correlations of n observations.
+
+    Uses the t-distribution of r * sqrt((n - 2) / (1 - r^2)) with n - 2
+    degrees of freedom, which gives the p-values of scipy.stats.pearsonr.
+
+    Args:
+        correlations: Correlation coefficients
+        n: Number of observations, or the number per correlation
+
+    Returns:
+        p-values (1.0 for fewer than 3 observations)
+    """
+    r = np.clip(np.asarray(correlations, dtype=float), -1.0, 1.0)
+    n = np.asarray(n)
+    if not np.any(n > 2):
+        return np.ones_like(r)
+    df = np.maximum(n - 2, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.abs(r) * np.sqrt(df / ((1.0 - r) * (1.0 + r)))
+    return np.where(n > 2, np.minimum(2.0 * stats.t.sf(t, df), 1.0), 1.0)
+
+
+def masked_correlations(block: np.ndarray, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get Pearson correlations of rows with NaN gaps.
+
+    Each pair is compared over the positions where both rows have a value
+    (pairwise complete observations), as for series resampled onto a common
+    grid. The counts and sums over those positions come from matrix products
+    of the value and presence masks, so the cost stays that of a few
+    correlation matrices.
+
+    Args:
+        block: Rows to correlate, with NaN gaps
+        matrix: Rows to correlate them with, with NaN gaps
+
+    Returns:
+        Tuple of (correlations of block x matrix rows, NaN where the pair
+        shares fewer than 2 values or one of them is constant there; number
+        of values each pair shares)
+    """
+    def columns(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        rows = np.asarray(rows, dtype=float)
+        present = ~np.isnan(rows)
+        values = np.where(present, rows, 0.0)
+        # Centering keeps the sums small, which the variance differences need
+        counts = np.maximum(present.sum(axis=1, keepdims=True), 1)
+        means = values.sum(axis=1, keepdims=True) / counts
+        centered = np.where(present, values - means, 0.0)
+        return present.astype(float), centered, centered * centered
+
+    mask_a, x_a, xx_a = columns(block)
+    mask_b, x_b, xx_b = columns(matrix)
+
+    count = mask_a @ mask_b.T
+    sx, sy = x_a @ mask_b.T, mask_a @ x_b.T
+    sxx, syy = xx_a @ mask_b.T, mask_a @ xx_b.T
+    covariance = count * (x_a @ x_b.T) - sx * sy
+    var_x = count * sxx - sx * sx
+    var_y = count * syy - sy * sy
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlations = np.clip(covariance / np.sqrt(var_x * var_y), -1.0, 1.0)
+
+    # Constant overlaps only leave rounding noise in the variances
+    correlations[(count < 2) | (var_x <= 1e-10 * count * sxx) | (var_y <= 1e-10 * count * syy)] = \
+        np.nan
+    return correlations, count.astype(int)
+
+
+def lagged_correlations(
+    matrix: np.ndarray,
+    target: np.ndarray,
+    max_lag: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the Pearson correlation of each row with a target at every lag.
+
+    At lag k, ``row[t + k]`` is paired with ``target[t]`` over the values
+    both have, and the correlation is the Pearson coefficient of that
+    overlap (a negative lag means the row leads the target). The sums of
+    products for all lags come from one FFT cross-correlation and the
+    overlap means and variances from prefix sums, so the whole lag profile
+    costs O(n log n) per row instead of O(n) per lag.
+
+    Args:
+        matrix: Series of equal length, one per row (or a single series)
+        target: Target series
+        max_lag: Largest lag in steps, both ways
+
+    Returns:
+        Tuple of (lags from -max_lag to max_lag, correlations with one row
+        per series and one column per lag; NaN where the overlap has fewer
+        than 2 values or is constant)
+    """
+    x = np.atleast_2d(np.asarray(matrix, dtype=float))
+    y = np.asarray(target, dtype=float)
+    nx, ny = x.shape[1], len(y)
+    lags = np.arange(-max_lag, max_lag + 1)
+
+    # Centering keeps the sums small, which the variance differences need
+    x = x - x.mean(axis=1, keepdims=True)
+    y = y - y.mean()
+
+    # Circular cross-correlation without wrap-around; lag k sits at index k mod size
+    size = fft.next_fast_len(nx + ny - 1, real=True)
+    cross = fft.irfft(fft.rfft(x, size, axis=1) * np.conj(fft.rfft(y, size)), size, axis=1)
+    sxy = cross[:, lags % size]
+
+    # Overlap of each lag
+    x_start = np.clip(lags, 0, nx)
+    y_start = np.clip(-lags, 0, ny)
+    count = np.maximum(np.minimum(nx - x_start, ny - y_start), 0)
+
+    def window_sums(values: np.ndarray, start: np.ndarray) -> np.ndarray:
+        prefix = np.zeros(values.shape[:-1] + (values.shape[-1] + 1,))
+        np.cumsum(values, axis=-1, out=prefix[..., 1:])
+        return prefix[..., start + count] - prefix[..., start]
+
+    sx, sxx = window_sums(x, x_start), window_sums(x * x, x_start)
+    sy, syy = window_sums(y, y_start), window_sums(y * y, y_start)
+
+    covariance = count * sxy - sx * sy
+    var_x = count * sxx - sx * sx
+    var_y = count * syy - sy * sy
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlations = np.clip(covariance / np.sqrt(var_x * var_y), -1.0, 1.0)
+
+    # Constant overlaps only leave rounding noise in the variances
+    invalid = (count < 2) | (var_x <= 1e-10 * count * sxx) | (var_y <= 1e-10 * count * syy)
+    correlations[np.broadcast_to(invalid, correlations.shape)] = np.nan
+    return lags, correlations
 
 
 class CorrelationAnalyzer:
@@ -43,6 +201,14 @@ class CorrelationAnalyzer:
     ) -> List[Dict[str, Any]]:
         """Find correlated metric pairs.
 
+        Each pair is compared over the first values both series have. The
+        series are stacked into one array per distinct length and their
+        correlation matrix is computed with matrix products, a block of rows
+        at a time; only the pairs of the upper triangle reaching the
+        threshold are extracted and get p-values. Constant series correlate
+        with nothing. Series with NaN gaps (resampled series, see
+        align_series()) are compared over the values both have.
+
         Args:
             metrics_data: Dictionary of metric name to values
             threshold: Correlation threshold (default: 0.7)
@@ -50,39 +216,112 @@ class CorrelationAnalyzer:
         Returns:
             List of correlation results
         """
-        results = []
         metric_names = list(metrics_data.keys())
+        lengths = np.array([len(metrics_data[name]) for name in metric_names])
+        pairs: List[Tuple[float, int, int, float]] = []
 
-        for i in range(len(metric_names)):
-            for j in range(i + 1, len(metric_names)):
-                name1 = metric_names[i]
-                name2 = metric_names[j]
-
-                series1 = metrics_data[name1]
-                series2 = metrics_data[name2]
+        for length in np.unique(lengths):
+            if length < 2:
+                continue
 
-                # Ensure same length
-                min_len = min(len(series1), len(series2))
-                series1 = series1[:min_len]
-                series2 = series2[:min_len]
+            # Series of this length against every series at least as long,
+            # truncated to this length
+            rows = np.flatnonzero(lengths == length)
+            columns = np.flatnonzero(lengths >= length)
+            if len(columns) < 2:
+                continue
+            matrix = np.array(
+                [metrics_data[metric_names[k]][:length] for k in columns], dtype=float
+            )
+            gaps = bool(np.isnan(matrix).any())
+            if not gaps:
+                standardized = standardize_rows(matrix)
+            positions = np.searchsorted(columns, rows)
+            longer = lengths[columns] > length
+
+            for start in range(0, len(rows), CORRELATION_BLOCK):
+                block = positions[start:start + CORRELATION_BLOCK]
+                if gaps:
+                    correlations, counts = masked_correlations(matrix[block], matrix)
+                else:
+                    correlations = np.clip(standardized[block] @ standardized.T, -1.0, 1.0)
+
+                # Pairs with a longer series, or the upper triangle among equals
+                with np.errstate(invalid='ignore'):
+                    strong = np.abs(correlations) >= threshold
+                selected = (longer | (columns > rows[start:start + CORRELATION_BLOCK, None])) & \
+                    strong
+                block_rows, block_columns = np.nonzero(selected)
+                values = correlations[block_rows, block_columns]
+                p_values = pearson_p_values(
+                    values, counts[block_rows, block_columns] if gaps else int(length)
+                )
+
+                for i, j, corr, p_value in zip(rows[start + block_rows],
+                                               columns[block_columns], values, p_values):
+                    i, j = sorted((int(i), int(j)))
+                    pairs.append((float(corr), i, j, float(p_value)))
+
+        # Sort by absolute correlation, then in pair order
+        pairs.sort(key=lambda pair: (-abs(pair[0]), pair[1], pair[2]))
+        return [
+            {
+                'metric1': metric_names[i],
+                'metric2': metric_names[j],
+                'correlation': corr,
+                'p_value': p_value,
+                'strength': self._get_correlation_strength(abs(corr)),
+            }
+            for corr, i, j, p_value in pairs
+        ]
+
+    def find_top_correlations(
+        self,
+        target: str,
+        metrics_data: Dict[str, List[float]],
+        top: int = 20,
+        threshold: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """Find the metrics most correlated with a target metric.
 
-                if min_len < 2:
-                    continue
+        Compares the target with every other metric over the target's
+        length without the all-pairs matrix of find_correlations(). Beyond
+        a few thousand metrics the candidates are found approximately with
+        random projection sketches (see CorrelationIndex), and only those
+        get their exact correlation computed.
 
-                corr, p_value = self.calculate_pearson(series1, series2)
+        Args:
+            target: Name of the target metric
+            metrics_data: Dictionary of metric name to values
+            top: Number of metrics returned
+            threshold: Minimum absolute correlation
 
-                if abs(corr) >= threshold:
-                    results.append({
-                        'metric1': name1,
-                        'metric2': name2,
-                        'correlation': corr,
-                        'p_value': p_value,
-                        'strength': self._get_correlation_strength(abs(corr)),
-                    })
+        Returns:
+            List of correlation results, by absolute correlation
 
-        # Sort by absolute correlation
-        results.sort(key=lambda x: abs(x['correlation']), reverse=True)
-        return results
+        Raises:
+            ValueError: If the target metric is missing
+        """
+        from aiops.correlation.sketch import CorrelationIndex
+
+        if target not in metrics_data:
+            raise ValueError(f"Unknown metric: {target}")
+
+        index = CorrelationIndex(metrics_data, length=len(metrics_data[target]))
+        if target not in index.names:
+            return []
+
+        return [
+            {
+                'metric1': target,
+                'metric2': result['metric'],
+                'correlation': result['correlation'],
+                'p_value': result['p_value'],
+                'strength': self._get_correlation_strength(abs(result['correlation'])),
+            }
+            for result in index.query(target, top)
+            if abs(result['correlation']) >= threshold
+        ]
 
     def _get_correlation_strength(self, abs_corr: float) -> str:
         """Get correlation strength label.
@@ -112,60 +351,118 @@ class CorrelationAnalyzer:
     ) -> Dict[str, Any]:
         """Calculate lagged correlation.
 
+        Every lag in [-max_lag, max_lag] is scored at once with an FFT
+        cross-correlation (see lagged_correlations()).
+
         Args:
             series1: First time series
             series2: Second time series
             max_lag: Maximum lag to test
 
         Returns:
-            Dictionary with best lag and correlation
+            Dictionary with best lag and correlation, and the correlation
+            per lag in ``profile``
         """
         if len(series1) < max_lag or len(series2) < max_lag:
             return {'lag': 0, 'correlation': 0.0}
 
-        best_lag = 0
-        best_corr = 0.0
-
-        for lag in range(-max_lag, max_lag + 1):
-            if lag < 0:
-                # series1 leads series2
-                s1 = series1[:lag]
-                s2 = series2[-lag:]
-            elif lag > 0:
-                # series2 leads series1
-                s1 = series1[lag:]
-                s2 = series2[:-lag]
-            else:
-                s1 = series1
-                s2 = series2
-
-            if len(s1) < 2:
-                continue
-
-            corr, _ = self.calculate_pearson(s1, s2)
-
-            if abs(corr) > abs(best_corr):
-                best_corr = corr
-                best_lag = lag
+        lags, correlations = lagged_correlations(series1, series2, max_lag)
+        best_lag, best_corr = self._best_lag(lags, correlations[0])
 
         return {
             'lag': best_lag,
             'correlation': best_corr,
             'interpretation': self._interpret_lag(best_lag),
+            'profile': {
+                int(lag): float(corr) for lag, corr in zip(lags, correlations[0])
+                if not np.isnan(corr)
+            },
         }
 
-    def _interpret_lag(self, lag: int) -> str:
+    def calculate_lag_correlations(
+        self,
+        target: List[float],
+        metrics_data: Dict[str, List[float]],
+        max_lag: int = 10,
+        threshold: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """Find the lag of every metric against a target series.
+
+        Answers "which of these metrics leads this one?": metrics of the
+        same length are stacked and scored against the target in one
+        batched FFT. A negative lag means the metric leads the target.
+
+        Args:
+            target: Target time series
+            metrics_data: Dictionary of metric name to values
+            max_lag: Maximum lag to test
+            threshold: Minimum absolute correlation at the best lag
+
+        Returns:
+            List of results with ``metric``, ``lag``, ``correlation`` and
+            ``interpretation``, by absolute correlation
+        """
+        results = []
+        if len(target) < max_lag:
+            return results
+
+        by_length: Dict[int, List[str]] = {}
+        for name, values in metrics_data.items():
+            if len(values) >= max_lag:
+                by_length.setdefault(len(values), []).append(name)
+
+        for names in by_length.values():
+            for start in range(0, len(names), CORRELATION_BLOCK):
+                block = names[start:start + CORRELATION_BLOCK]
+                lags, correlations = lagged_correlations(
+                    [metrics_data[name] for name in block], target, max_lag
+                )
+                for name, profile in zip(block, correlations):
+                    if np.isnan(profile).all():
+                        continue
+                    lag, corr = self._best_lag(lags, profile)
+                    if abs(corr) >= threshold:
+                        results.append({
+                            'metric': name,
+                            'lag': lag,
+                            'correlation': corr,
+                            'interpretation': self._interpret_lag(lag, name, 'target'),
+                        })
+
+        results.sort(key=lambda x: abs(x['correlation']), reverse=True)
+        return results
+
+    @staticmethod
+    def _best_lag(lags: np.ndarray, correlations: np.ndarray) -> Tuple[int, float]:
+        """Get the (first) lag of the largest absolute correlation.
+
+        Args:
+            lags: Lags
+            correlations: Correlation per lag (NaN where undefined)
+
+        Returns:
+            Tuple of (lag, correlation), or (0, 0.0) if none is defined
+        """
+        strength = np.abs(correlations)
+        if np.isnan(strength).all():
+            return 0, 0.0
+        best = int(np.nanargmax(strength))
+        return int(lags[best]), float(correlations[best])
+
+    def _interpret_lag(self, lag: int, name1: str = 'metric1', name2: str = 'metric2') -> str:
         """Interpret lag value.
 
         Args:
             lag: Lag value
+            name1: Name of the first series
+            name2: Name of the second series
 
         Returns:
             Interpretation string
         """
         if lag < 0:
-            return f"metric1 leads metric2 by {abs(lag)} steps"
+            return f"{name1} leads {name2} by {abs(lag)} steps"
         elif lag > 0:
-            return f"metric2 leads metric1 by {lag} steps"
+            return f"{name2} leads {name1} by {lag} steps"
         else:
             return "no lag (simultaneous)"
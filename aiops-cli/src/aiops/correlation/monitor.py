@@ -0,0 +1,331 @@
+"""Streaming correlation monitoring of metric pairs."""
+
+import math
+import uuid
+from collections import deque
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+from aiops.core import BaseDetector
+from aiops.correlation.series import flatten_snapshot
+from aiops.cpu.models.anomaly_event import AnomalyEvent
+
+
+# Largest |r| passed to the Fisher transform, which is infinite at +-1
+_MAX_CORRELATION = 0.999999
+
+
+class RollingCorrelation:
+    """Pearson correlation of the last ``window`` pairs of values.
+
+    The sums of x, y, xy, x^2 and y^2 are kept incrementally, so adding a
+    pair and reading the correlation are O(1). The sums are kept of values
+    shifted by a recent mean and rebuilt from the window once per
+    ``window`` additions, which keeps large values (byte counters) from
+    losing the variance to rounding and stops drift from the subtractions.
+    """
+
+    def __init__(self, window: int):
+        """Initialize rolling correlation.
+
+        Args:
+            window: Number of pairs kept
+
+        Raises:
+            ValueError: If the window is shorter than 2
+        """
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.window = window
+        self._pairs: Deque[Tuple[float, float]] = deque()
+        self._shift = (0.0, 0.0)
+        self._sums = (0.0, 0.0, 0.0, 0.0, 0.0)
+        self._added = 0
+
+    @property
+    def count(self) -> int:
+        """Number of pairs in the window."""
+        return len(self._pairs)
+
+    def add(self, x: float, y: float) -> None:
+        """Add a pair of values, dropping the oldest from a full window.
+
+        Args:
+            x: Value of the first series
+            y: Value of the second series
+        """
+        if not self._pairs:
+            self._shift = (x, y)
+        self._pairs.append((x, y))
+        sx, sy, sxy, sxx, syy = self._sums
+        dx, dy = x - self._shift[0], y - self._shift[1]
+        sx, sy, sxy, sxx, syy = sx + dx, sy + dy, sxy + dx * dy, sxx + dx * dx, syy + dy * dy
+
+        if len(self._pairs) > self.window:
+            old_x, old_y = self._pairs.popleft()
+            dx, dy = old_x - self._shift[0], old_y - self._shift[1]
+            sx, sy, sxy, sxx, syy = sx - dx, sy - dy, sxy - dx * dy, sxx - dx * dx, syy - dy * dy
+        self._sums = (sx, sy, sxy, sxx, syy)
+
+        self._added += 1
+        if self._added % self.window == 0:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Recompute the sums around the mean of the window."""
+        n = len(self._pairs)
+        self._shift = (sum(x for x, _ in self._pairs) / n, sum(y for _, y in self._pairs) / n)
+        sums = [0.0] * 5
+        for x, y in self._pairs:
+            dx, dy = x - self._shift[0], y - self._shift[1]
+            sums[0] += dx
+            sums[1] += dy
+            sums[2] += dx * dy
+            sums[3] += dx * dx
+            sums[4] += dy * dy
+        self._sums = tuple(sums)
+
+    @property
+    def correlation(self) -> Optional[float]:
+        """Correlation of the window, or None if undefined.
+
+        None with fewer than 2 pairs or if a series is constant.
+        """
+        n = len(self._pairs)
+        if n < 2:
+            return None
+        sx, sy, sxy, sxx, syy = self._sums
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        # Constant windows only leave rounding noise in the variances
+        if var_x <= 1e-10 * n * sxx or var_y <= 1e-10 * n * syy:
+            return None
+        return max(-1.0, min(1.0, (n * sxy - sx * sy) / math.sqrt(var_x * var_y)))
+
+
+class CorrelationMonitor(BaseDetector):
+    """Detect metric pairs that stop moving together.
+
+    Each configured pair keeps a RollingCorrelation over its last ``window``
+    samples and a baseline of that correlation: an exponentially weighted
+    mean and variance of its Fisher transform z = atanh(r), adapting over
+    about ``history`` samples. A sample breaks the correlation when z
+    deviates from the baseline by ``threshold`` standard deviations (the
+    baseline's spread plus the sampling error 1/sqrt(window - 3) of z) and
+    r moved by at least ``min_change``. An event is emitted when a pair
+    enters a break; the pair recovers after a window of samples within half
+    of these limits, as the correlation returns or the baseline mean adapts
+    to the new level.
+    """
+
+    def __init__(
+        self,
+        groups: Iterable[Sequence[str]],
+        window: int = 60,
+        history: int = 600,
+        threshold: float = 3.0,
+        min_change: float = 0.3,
+        min_history: Optional[int] = None,
+        severity: str = 'warning'
+    ):
+        """Initialize correlation monitor.
+
+        Args:
+            groups: Metric pairs, or groups of metrics whose every pair is
+                monitored, as series names (see flatten_snapshot())
+            window: Samples per rolling correlation
+            history: Samples the baseline adapts over
+            threshold: Deviation from the baseline in standard deviations
+            min_change: Smallest change of the correlation reported
+            min_history: Correlations in the baseline before breaks are
+                detected (default: window)
+            severity: Severity of the events
+
+        Raises:
+            ValueError: If a group has fewer than 2 metrics or the window
+                is shorter than 4
+        """
+        if window < 4:
+            raise ValueError("window must be at least 4")
+        self.window = window
+        self.alpha = 1.0 / max(history, 1)
+        self.threshold = threshold
+        self.min_change = min_change
+        self.min_history = window if min_history is None else min_history
+        self.severity = severity
+
+        self.trackers: Dict[Tuple[str, str], RollingCorrelation] = {}
+        for group in groups:
+            if len(group) < 2:
+                raise ValueError(f"Correlation group needs 2 or more metrics: {list(group)}")
+            for pair in combinations(group, 2):
+                if pair not in self.trackers and pair[::-1] not in self.trackers:
+                    self.trackers[pair] = RollingCorrelation(window)
+
+        # Per pair: (baseline mean of z, baseline variance of z, correlations seen)
+        self._baselines: Dict[Tuple[str, str], Tuple[float, float, int]] = {}
+        # Broken pairs: consecutive samples back inside the limits
+        self._breaks: Dict[Tuple[str, str], int] = {}
+
+    @property
+    def metrics(self) -> List[str]:
+        """Names of the monitored metrics."""
+        return list(dict.fromkeys(name for pair in self.trackers for name in pair))
+
+    def update(self, values: Dict[str, float], timestamp: datetime) -> List[AnomalyEvent]:
+        """Add one sample of the metrics.
+
+        Pairs advance only when both of their values are present.
+
+        Args:
+            values: Dictionary of metric name to value
+            timestamp: Sample time
+
+        Returns:
+            Events of the pairs whose correlation broke at this sample
+        """
+        events = []
+        for pair, tracker in self.trackers.items():
+            x, y = values.get(pair[0]), values.get(pair[1])
+            if x is None or y is None or math.isnan(x) or math.isnan(y):
+                continue
+            tracker.add(x, y)
+            if tracker.count < self.window:
+                continue
+            correlation = tracker.correlation
+            if correlation is None:
+                continue
+
+            event = self._check(pair, correlation, timestamp, x, y)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def update_snapshot(self, snapshot: Dict[str, Any]) -> List[AnomalyEvent]:
+        """Add one collector snapshot.
+
+        Args:
+            snapshot: Snapshot of ``aiops collector run``
+
+        Returns:
+            Events of the pairs whose correlation broke at this snapshot
+        """
+        return self.update(flatten_snapshot(snapshot),
+                           datetime.fromisoformat(snapshot['timestamp']))
+
+    def detect(self, metrics: List[Dict[str, Any]]) -> List[AnomalyEvent]:
+        """Monitor a sequence of collector snapshots.
+
+        Args:
+            metrics: Snapshots in time order
+
+        Returns:
+            List of correlation break events
+        """
+        events = []
+        for snapshot in metrics:
+            events.extend(self.update_snapshot(snapshot))
+        return events
+
+    def get_name(self) -> str:
+        """Get the detector name."""
+        return "rolling_correlation"
+
+    def _check(
+        self,
+        pair: Tuple[str, str],
+        correlation: float,
+        timestamp: datetime,
+        x: float,
+        y: float
+    ) -> Optional[AnomalyEvent]:
+        """Compare a correlation with the baseline of its pair, then update it.
+
+        Args:
+            pair: Metric names
+            correlation: Rolling correlation
+            timestamp: Sample time
+            x: Value of the first metric
+            y: Value of the second metric
+
+        Returns:
+            AnomalyEvent if the pair entered a break
+        """
+        z = math.atanh(max(-_MAX_CORRELATION, min(_MAX_CORRELATION, correlation)))
+        mean, variance, seen = self._baselines.get(pair, (z, 0.0, 0))
+
+        event = None
+        if seen >= self.min_history:
+            spread = math.sqrt(variance + 1.0 / (self.window - 3))
+            score = abs(z - mean) / spread
+            baseline = math.tanh(mean)
+            # A broken pair recovers after a window well inside the limits,
+            # so a noisy correlation does not flap around them
+            scale = 0.5 if pair in self._breaks else 1.0
+            outside = score >= scale * self.threshold and \
+                abs(correlation - baseline) >= scale * self.min_change
+
+            if pair not in self._breaks:
+                if outside:
+                    event = self._create_event(pair, correlation, baseline, score, timestamp,
+                                               x, y)
+                    self._breaks[pair] = 0
+            elif outside:
+                self._breaks[pair] = 0
+            elif self._breaks[pair] + 1 >= self.window:
+                del self._breaks[pair]
+            else:
+                self._breaks[pair] += 1
+
+        # Exponentially weighted mean and variance of z; a break moves only the
+        # mean, so the baseline adapts to a lasting change without widening
+        delta = z - mean
+        mean += self.alpha * delta
+        if pair not in self._breaks:
+            variance = (1.0 - self.alpha) * (variance + self.alpha * delta * delta)
+        self._baselines[pair] = (mean, variance, seen + 1)
+        return event
+
+    def _create_event(
+        self,
+        pair: Tuple[str, str],
+        correlation: float,
+        baseline: float,
+        score: float,
+        timestamp: datetime,
+        x: float,
+        y: float
+    ) -> AnomalyEvent:
+        """Create a correlation break event.
+
+        Args:
+            pair: Metric names
+            correlation: Rolling correlation
+            baseline: Baseline correlation
+            score: Deviation in standard deviations
+            timestamp: Sample time
+            x: Value of the first metric
+            y: Value of the second metric
+
+        Returns:
+            AnomalyEvent object
+        """
+        return AnomalyEvent(
+            id=str(uuid.uuid4()),
+            timestamp=timestamp,
+            end_time=None,
+            severity=self.severity,
+            type='correlation_break',
+            confidence=min(1.0, 0.5 + score / 10.0),
+            metrics={
+                'correlation': correlation,
+                'baseline_correlation': baseline,
+                'z_score': score,
+                pair[0]: x,
+                pair[1]: y,
+            },
+            baseline=baseline,
+            top_processes=[],
+            algorithm=self.get_name(),
+            metadata={'metric1': pair[0], 'metric2': pair[1], 'window': self.window},
+        )
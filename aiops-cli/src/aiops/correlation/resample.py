@@ -0,0 +1,197 @@
+"""Resample timestamped series onto a common time grid."""
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+import numpy as np
+
+
+# Aggregations of the samples falling into one grid interval
+AGGREGATIONS = ('mean', 'max', 'last', 'rate')
+
+# Ways to fill grid intervals without samples
+FILL_METHODS = ('nan', 'ffill')
+
+Column = Tuple[Sequence, Sequence[float]]
+
+
+def to_seconds(timestamps: Iterable) -> np.ndarray:
+    """Convert timestamps to POSIX seconds.
+
+    Args:
+        timestamps: Numbers (already seconds), datetimes or ISO strings
+
+    Returns:
+        Float array of seconds
+    """
+    array = np.asarray(timestamps)
+    if array.dtype.kind in 'iuf':
+        return array.astype(float)
+    return np.array([
+        (datetime.fromisoformat(t) if isinstance(t, str) else t).timestamp() for t in array
+    ], dtype=float)
+
+
+def forward_fill(values: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+    """Carry the last value forward over NaN.
+
+    Args:
+        values: Values with NaN gaps
+        limit: Fill at most this many consecutive gaps (default: all)
+
+    Returns:
+        Filled copy; leading NaN stay NaN
+    """
+    values = np.asarray(values, dtype=float)
+    positions = np.arange(len(values))
+    last = np.where(np.isnan(values), -1, positions)
+    np.maximum.accumulate(last, out=last)
+
+    filled = values[np.maximum(last, 0)]
+    filled[last < 0] = np.nan
+    if limit is not None:
+        filled[positions - last > limit] = np.nan
+    return filled
+
+
+def resample(
+    timestamps: Sequence,
+    values: Sequence[float],
+    start: float,
+    interval: float,
+    size: int,
+    how: str = 'mean',
+    fill: str = 'nan',
+    limit: Optional[int] = None
+) -> np.ndarray:
+    """Resample one series onto a grid.
+
+    Grid interval i covers [start + i * interval, start + (i + 1) * interval).
+    The samples are binned with one np.searchsorted over the grid edges and
+    aggregated per interval with ufunc reductions, so millions of samples
+    resample in milliseconds. NaN samples count as missing.
+
+    Aggregations:
+        mean: Mean of the samples
+        max: Largest sample
+        last: Latest sample
+        rate: Per-second increase of a counter over the intervals between
+            samples ending in the grid interval; a decrease is a counter
+            reset, after which the new value counts as the increase
+
+    Args:
+        timestamps: Sample times (seconds, datetimes or ISO strings)
+        values: Sample values
+        start: Start of the grid in seconds
+        interval: Grid interval in seconds
+        size: Number of grid intervals
+        how: Aggregation (mean, max, last or rate)
+        fill: Gap handling: nan leaves intervals without samples NaN, ffill
+            carries the previous value forward
+        limit: Forward-fill at most this many consecutive intervals
+
+    Returns:
+        Array of ``size`` values
+
+    Raises:
+        ValueError: If the arguments are invalid
+    """
+    if how not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation: {how}")
+    if fill not in FILL_METHODS:
+        raise ValueError(f"Unknown fill method: {fill}")
+    if interval <= 0:
+        raise ValueError("interval must be positive")
+    if limit is not None and limit < 0:
+        raise ValueError("limit cannot be negative")
+
+    t = to_seconds(timestamps)
+    v = np.asarray(values, dtype=float)
+    if t.shape != v.shape:
+        raise ValueError("timestamps and values must have the same length")
+
+    present = ~np.isnan(v)
+    t, v = t[present], v[present]
+    if len(t) > 1 and np.any(t[1:] < t[:-1]):
+        order = np.argsort(t, kind='stable')
+        t, v = t[order], v[order]
+
+    if how == 'rate':
+        # Increase and elapsed time from the previous sample, per sample
+        increase = np.zeros_like(v)
+        elapsed = np.zeros_like(t)
+        if len(v) > 1:
+            delta = np.diff(v)
+            increase[1:] = np.where(delta < 0, v[1:], delta)
+            elapsed[1:] = np.diff(t)
+
+    edges = start + interval * np.arange(size + 1)
+    bounds = np.searchsorted(t, edges, side='left')
+    low, high = bounds[0], bounds[-1]
+    first, stop = bounds[:-1] - low, bounds[1:] - low
+    sampled = stop > first
+
+    result = np.full(size, np.nan)
+    if sampled.any():
+        starts = first[sampled]
+        if how == 'mean':
+            result[sampled] = np.add.reduceat(v[low:high], starts) / (stop - first)[sampled]
+        elif how == 'max':
+            result[sampled] = np.maximum.reduceat(v[low:high], starts)
+        elif how == 'last':
+            result[sampled] = v[low:high][stop[sampled] - 1]
+        else:
+            increases = np.add.reduceat(increase[low:high], starts)
+            durations = np.add.reduceat(elapsed[low:high], starts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[sampled] = np.where(durations > 0, increases / durations, np.nan)
+
+    if fill == 'ffill':
+        result = forward_fill(result, limit)
+    return result
+
+
+def align_series(
+    series: Dict[str, Column],
+    interval: float,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    how: Union[str, Dict[str, str]] = 'mean',
+    fill: str = 'nan',
+    limit: Optional[int] = None
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Resample series of arbitrary cadence onto one grid.
+
+    Args:
+        series: Dictionary of series name to (timestamps, values)
+        interval: Grid interval in seconds
+        start: Grid start in seconds (default: the earliest sample)
+        end: Time of the last grid interval (default: the latest sample)
+        how: Aggregation, or aggregation per series name (default mean)
+        fill: Gap handling (see resample())
+        limit: Forward-fill limit in intervals
+
+    Returns:
+        Tuple of (grid interval starts in seconds, aligned values per series)
+
+    Raises:
+        ValueError: If the arguments are invalid
+    """
+    if interval <= 0:
+        raise ValueError("interval must be positive")
+
+    columns = {name: (to_seconds(t), values) for name, (t, values) in series.items()}
+    times = [t for t, _ in columns.values() if len(t)]
+    if not times:
+        return np.array([]), {name: np.array([]) for name in columns}
+
+    if start is None:
+        start = min(float(t.min()) for t in times)
+    if end is None:
+        end = max(float(t.max()) for t in times)
+    size = max(int(np.floor((end - start) / interval)) + 1, 0)
+
+    aligned = {}
+    for name, (t, values) in columns.items():
+        method = how.get(name, 'mean') if isinstance(how, dict) else how
+        aligned[name] = resample(t, values, start, interval, size, method, fill, limit)
+    return start + interval * np.arange(size), aligned
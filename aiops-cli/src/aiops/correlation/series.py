@@ -0,0 +1,461 @@
+"""Load metric time series from collection files."""
+
+import itertools
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+import numpy as np
+from aiops.core.jsonstream import JsonStream, iter_ndjson
+from aiops.correlation.resample import align_series
+
+
+# Fields naming one of several metrics of the same type (disks, interfaces, processes)
+IDENTITY_FIELDS = ('device', 'interface', 'name')
+
+# Fields that are not series
+SKIPPED_FIELDS = ('timestamp', 'interval_seconds', 'pid')
+
+# Suffixes of files holding one snapshot per line
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+# Prefixes of series counting events, which appear when first seen
+COUNT_PREFIXES = ('logs.',)
+
+
+def is_collection(document: Any) -> bool:
+    """Check if a document is collector output.
+
+    Collector output (``aiops collector run --output`` or
+    ``aiops logs metrics``) holds ``collection_info`` and a list of
+    timestamped snapshots under ``data``.
+
+    Args:
+        document: Parsed JSON document
+
+    Returns:
+        True for collector output
+    """
+    return isinstance(document, dict) and 'collection_info' in document and \
+        isinstance(document.get('data'), list)
+
+
+def flatten_snapshot(
+    snapshot: Dict[str, Any],
+    prefixes: Optional[Set[str]] = None
+) -> Dict[str, float]:
+    """Flatten one collector snapshot into named values.
+
+    Values are named ``<type>.<field>``, or ``<type>.<identity>.<field>``
+    for metrics naming a device, interface or process.
+
+    Args:
+        snapshot: Snapshot with a timestamp and metric lists per type
+        prefixes: Only flatten the metric types and metrics named by one of
+            these prefixes (see name_prefixes(); default: all)
+
+    Returns:
+        Dictionary of series name to value
+    """
+    values: Dict[str, float] = {}
+    for metric_type, metrics in snapshot.items():
+        if not isinstance(metrics, list):
+            continue
+        if prefixes is not None and metric_type not in prefixes:
+            continue
+
+        for metric in metrics:
+            if not isinstance(metric, dict):
+                continue
+
+            identity = next((metric[key] for key in IDENTITY_FIELDS if key in metric), None)
+            prefix = f"{metric_type}.{identity}" if identity is not None else metric_type
+            if prefixes is not None and prefix not in prefixes:
+                continue
+            for key, value in metric.items():
+                if key in SKIPPED_FIELDS or key in IDENTITY_FIELDS:
+                    continue
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values.setdefault(f"{prefix}.{key}", float(value))
+    return values
+
+
+def name_prefixes(names: Iterable[str]) -> Set[str]:
+    """Get every dotted prefix of series names.
+
+    A series ``disk.sda.read_bytes`` can only come from the metric type
+    ``disk`` and the metric prefix ``disk.sda``, so snapshots flattened with
+    these prefixes skip the metrics of other series.
+
+    Args:
+        names: Series names
+
+    Returns:
+        Set of prefixes
+    """
+    prefixes = set()
+    for name in names:
+        parts = name.split('.')
+        prefixes.update('.'.join(parts[:end]) for end in range(1, len(parts)))
+    return prefixes
+
+
+class SnapshotColumns:
+    """Selected series of collector snapshots, in NumPy arrays.
+
+    Snapshots are added one at a time, as they are read, and only the
+    requested series are kept: one float array of values per series (NaN
+    where a snapshot lacks it) beside an array of timestamps. The arrays are
+    preallocated and double when full, so memory follows the selected
+    series rather than the snapshots.
+    """
+
+    def __init__(self, names: Optional[Iterable[str]] = None, capacity: int = 0):
+        """Initialize snapshot columns.
+
+        Args:
+            names: Series kept (default: all)
+            capacity: Snapshots expected (the arrays grow beyond it)
+        """
+        self.names = None if names is None else set(names)
+        self._prefixes = None if names is None else name_prefixes(self.names)
+        self.info: Dict[str, Any] = {}
+        self._size = 0
+        self._timestamps = np.empty(capacity)
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        """Number of snapshots added."""
+        return self._size
+
+    @property
+    def interval(self) -> float:
+        """Collection interval in seconds (1 if unknown)."""
+        return float(self.info.get('interval_seconds') or 1.0)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Snapshot times in POSIX seconds."""
+        return self._timestamps[:self._size]
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Dictionary of series name to values, one per snapshot."""
+        return {name: column[:self._size] for name, column in self._columns.items()}
+
+    def reserve(self, capacity: int) -> None:
+        """Grow the arrays to hold ``capacity`` snapshots.
+
+        Args:
+            capacity: Snapshots held
+        """
+        if capacity <= len(self._timestamps):
+            return
+        self._timestamps = np.resize(self._timestamps, capacity)
+        for name, column in self._columns.items():
+            grown = np.full(capacity, np.nan)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def add(self, snapshot: Dict[str, Any]) -> None:
+        """Add one snapshot.
+
+        Args:
+            snapshot: Snapshot with a timestamp and metric lists per type
+        """
+        if self._size == len(self._timestamps):
+            self.reserve(max(2 * self._size, 64))
+        row = self._size
+        self._timestamps[row] = datetime.fromisoformat(snapshot['timestamp']).timestamp()
+        for name, value in flatten_snapshot(snapshot, self._prefixes).items():
+            if self.names is not None and name not in self.names:
+                continue
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = np.full(len(self._timestamps), np.nan)
+            column[row] = value
+        self._size += 1
+
+    @classmethod
+    def from_document(
+        cls,
+        document: Dict[str, Any],
+        names: Optional[Iterable[str]] = None
+    ) -> 'SnapshotColumns':
+        """Get the columns of a parsed collector output document.
+
+        Args:
+            document: Collector output
+            names: Series kept (default: all)
+
+        Returns:
+            SnapshotColumns object
+        """
+        frame = cls(names, len(document['data']))
+        frame.info = document['collection_info']
+        for snapshot in document['data']:
+            frame.add(snapshot)
+        return frame
+
+
+def _to_array(name: str, values: Any) -> np.ndarray:
+    """Convert the values of a plain series to an array.
+
+    Args:
+        name: Series name
+        values: Decoded JSON value
+
+    Returns:
+        Float array (NaN for nulls)
+
+    Raises:
+        ValueError: If the values are not a list of numbers
+    """
+    try:
+        array = np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        array = None
+    if array is None or array.ndim != 1:
+        raise ValueError(f"Series {name} is not a list of numbers")
+    return array
+
+
+def _read_json(
+    f: TextIO,
+    names: Optional[Iterable[str]] = None
+) -> Tuple[Optional[SnapshotColumns], Dict[str, np.ndarray]]:
+    """Stream a JSON file of collector output or of series.
+
+    Args:
+        f: Open file
+        names: Series kept (default: all)
+
+    Returns:
+        Tuple of (snapshot columns, or None for a plain mapping, plain series)
+    """
+    stream = JsonStream(f)
+    if stream.peek() != '{':
+        raise ValueError("Expected a JSON object of series or collector output")
+
+    frame = SnapshotColumns(names)
+    collection = False
+    plain: Dict[str, np.ndarray] = {}
+    for key in stream.members():
+        if key == 'collection_info' and stream.peek() == '{':
+            frame.info = stream.value()
+            # Collector output states the snapshot count before the snapshots
+            frame.reserve(int(frame.info.get('total_snapshots') or 0))
+            collection = True
+        elif key == 'data' and stream.peek() == '[':
+            items = stream.items()
+            first = next(items, None)
+            if first is None or isinstance(first, dict):
+                for snapshot in itertools.chain([] if first is None else [first], items):
+                    frame.add(snapshot)
+                collection = True
+            elif frame.names is None or key in frame.names:
+                plain[key] = _to_array(key, [first, *items])
+            else:
+                for _ in items:
+                    pass
+        elif not collection and (frame.names is None or key in frame.names):
+            plain[key] = _to_array(key, stream.value())
+        else:
+            stream.value()
+    if collection:
+        return frame, {}
+    return None, plain
+
+
+def _read_ndjson(f: TextIO, names: Optional[Iterable[str]] = None) -> SnapshotColumns:
+    """Stream an NDJSON file of collector snapshots.
+
+    Each line holds a snapshot; a line with ``collection_info`` (written
+    last by ``aiops collector run --output *.ndjson``) describes them.
+
+    Args:
+        f: Open file
+        names: Series kept (default: all)
+
+    Returns:
+        SnapshotColumns object
+    """
+    frame = SnapshotColumns(names)
+    for line in iter_ndjson(f):
+        if 'collection_info' in line:
+            frame.info = line['collection_info']
+        else:
+            frame.add(line)
+    return frame
+
+
+def read_file(
+    path: str,
+    names: Optional[Iterable[str]] = None
+) -> Tuple[Optional[SnapshotColumns], Dict[str, np.ndarray]]:
+    """Stream the selected series of a metrics file.
+
+    JSON files hold collector output or a plain mapping of series name to
+    values; ``.ndjson`` and ``.jsonl`` files hold one snapshot per line.
+    Only the selected series are decoded into arrays, so a large file is
+    read in about the memory of those series.
+
+    Args:
+        path: File path
+        names: Series kept (default: all)
+
+    Returns:
+        Tuple of (snapshot columns, or None for a plain mapping, plain series)
+
+    Raises:
+        ValueError: If the file is not valid JSON
+    """
+    with open(path, 'r') as f:
+        if path.lower().endswith(NDJSON_SUFFIXES):
+            return _read_ndjson(f, names), {}
+        return _read_json(f, names)
+
+
+def _join_frames(frames: List[SnapshotColumns]) -> Dict[str, np.ndarray]:
+    """Join snapshot columns on their common grid points.
+
+    Args:
+        frames: Snapshot columns, each with its own timestamps
+
+    Returns:
+        Dictionary of series name to aligned values
+    """
+    first = next((frame for frame in frames if len(frame)), None)
+    if first is None:
+        return {}
+    origin, interval = first.timestamps[0], first.interval
+
+    indexes = [np.rint((frame.timestamps - origin) / interval).astype(np.int64)
+               for frame in frames]
+    common = indexes[0]
+    for frame_indexes in indexes[1:]:
+        common = np.intersect1d(common, frame_indexes)
+    common = np.unique(common)
+
+    series: Dict[str, np.ndarray] = {}
+    for frame, frame_indexes in zip(frames, indexes):
+        for name, values in frame.columns.items():
+            if name in series:
+                continue
+            # Later snapshots on the same grid point overwrite earlier ones
+            present = np.flatnonzero(~np.isnan(values))[::-1]
+            points, last = np.unique(frame_indexes[present], return_index=True)
+            positions = np.searchsorted(points, common)
+            found = positions < len(points)
+            found[found] = points[positions[found]] == common[found]
+            if not found.any():
+                continue
+            # The first collection with the series at a common point provides
+            # it; counts are 0 where missing, other series NaN
+            aligned = np.full(len(common), 0.0 if name.startswith(COUNT_PREFIXES) else np.nan)
+            aligned[found] = values[present[last[positions[found]]]]
+            series[name] = aligned
+    return series
+
+
+def load_collection_series(collections: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """Join collections on their common timestamps.
+
+    Snapshot timestamps are rounded onto the grid of the first collection
+    (its first snapshot and interval), so logs derived with the same grid
+    (``aiops logs metrics --align-to``) join with the collected metrics.
+    Only grid points present in every collection are kept. A log series
+    missing from a snapshot is 0 there, since log series appear when first
+    seen; other series are NaN there.
+
+    Args:
+        collections: Collector output documents
+
+    Returns:
+        Dictionary of series name to aligned values
+    """
+    frames = [SnapshotColumns.from_document(collection) for collection in collections]
+    return {name: values.tolist() for name, values in _join_frames(frames).items()}
+
+
+def collection_columns(
+    collections: List[Dict[str, Any]]
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Get the samples of every series in collections.
+
+    Args:
+        collections: Collector output documents
+
+    Returns:
+        Dictionary of series name to (timestamps in seconds, values)
+    """
+    return _frame_samples([SnapshotColumns.from_document(c) for c in collections])
+
+
+def _frame_samples(frames: List[SnapshotColumns]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Get the samples of every series in snapshot columns.
+
+    Args:
+        frames: Snapshot columns
+
+    Returns:
+        Dictionary of series name to (timestamps in seconds, values)
+    """
+    parts: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+    for frame in frames:
+        for name, values in frame.columns.items():
+            present = ~np.isnan(values)
+            parts.setdefault(name, []).append((frame.timestamps[present], values[present]))
+    return {
+        name: (np.concatenate([t for t, _ in samples]), np.concatenate([v for _, v in samples]))
+        for name, samples in parts.items()
+    }
+
+
+def load_series(
+    paths: Iterable[str],
+    interval: Optional[float] = None,
+    how: str = 'mean',
+    fill: str = 'nan',
+    limit: Optional[int] = None,
+    names: Optional[Iterable[str]] = None
+) -> Dict[str, np.ndarray]:
+    """Load metric series from JSON and NDJSON files.
+
+    Each file is either collector output (JSON, or NDJSON with a snapshot
+    per line) or a plain mapping of series name to values. Files are
+    streamed and only the series in ``names`` are kept, in NumPy arrays.
+    Collector outputs are joined on their common timestamps, or with
+    ``interval`` resampled onto one grid spanning all of them, which keeps
+    collections of different cadence or with gaps aligned (see
+    align_series()); intervals without samples are NaN unless filled.
+    Plain mappings are added as they are.
+
+    Args:
+        paths: JSON or NDJSON file paths
+        interval: Resampling interval in seconds (default: join on timestamps)
+        how: Resampling aggregation (mean, max, last or rate)
+        fill: Resampling gap handling (nan or ffill)
+        limit: Forward-fill at most this many consecutive intervals
+        names: Series loaded (default: all)
+
+    Returns:
+        Dictionary of series name to values
+
+    Raises:
+        ValueError: If a file is not valid JSON
+    """
+    names = None if names is None else set(names)
+    frames = []
+    plain: Dict[str, np.ndarray] = {}
+    for path in paths:
+        frame, series = read_file(path, names)
+        if frame is not None:
+            frames.append(frame)
+        plain.update(series)
+
+    if interval is None:
+        series = _join_frames(frames)
+    else:
+        _, series = align_series(_frame_samples(frames), interval,
+                                 how=how, fill=fill, limit=limit)
+    series.update(plain)
+    return series
@@ -0,0 +1,281 @@
+"""Approximate correlation search over many series."""
+
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
+from aiops.correlation.analyzer import masked_correlations, pearson_p_values
+
+
+# Indexes of at most this many series compare a target with every series exactly
+EXACT_LIMIT = 2000
+
+# Series sketched at once; bounds the memory of the projections
+SKETCH_BLOCK = 4096
+
+# Number of set bits of every byte
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint16)
+
+
+def _center(rows: np.ndarray) -> np.ndarray:
+    """Center rows over their values and scale them to unit norm.
+
+    NaN gaps become 0 after centering. Rows with fewer than 2 values or a
+    constant value become NaN.
+
+    Args:
+        rows: 2-D array with one series per row
+
+    Returns:
+        Normalized rows
+    """
+    present = ~np.isnan(rows)
+    if present.all():
+        counts = np.full(len(rows), rows.shape[1])
+        centered = rows - rows.mean(axis=1, keepdims=True)
+        varying = np.ptp(rows, axis=1) > 0
+    else:
+        counts = present.sum(axis=1)
+        values = np.where(present, rows, 0.0)
+        means = values.sum(axis=1) / np.maximum(counts, 1)
+        centered = np.where(present, values - means[:, None], 0.0)
+        varying = np.where(present, rows, -np.inf).max(axis=1) > \
+            np.where(present, rows, np.inf).min(axis=1)
+
+    norms = np.sqrt(np.einsum('ij,ij->i', centered, centered))
+    norms[~varying | (counts < 2)] = np.nan
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return centered / norms[:, None]
+
+
+class CorrelationIndex:
+    """Find the series most correlated with a target among many.
+
+    Series are centered and scaled to unit norm, so the correlation of two
+    series is the cosine of the angle between them. Each is sketched into a
+    SimHash signature, the signs of ``bits`` random projections; two series
+    agree on a bit with probability 1 - angle / pi. Signatures are cut into
+    bands of ``band_bits`` bits, and every band is bucketed by sorting the
+    series on its key, so a bucket is one np.searchsorted range. Series
+    sharing a bucket with the target in any band are candidates; they are
+    ranked by the Hamming distance of their signatures, and only the closest
+    get their exact correlation computed. A negative correlation flips the
+    bits, so those are found through the complemented signature.
+
+    Memory grows linearly with the series instead of with the pairs, and a
+    query costs one projection, a bucket lookup per band and the exact
+    correlation of the candidates.
+    """
+
+    def __init__(
+        self,
+        metrics_data: Dict[str, Sequence[float]],
+        length: Optional[int] = None,
+        bits: int = 256,
+        band_bits: int = 8,
+        seed: int = 0
+    ):
+        """Build correlation index.
+
+        Args:
+            metrics_data: Dictionary of series name to values (NaN for gaps)
+            length: Values compared per series; longer series are compared
+                over their first values and shorter ones are not indexed
+                (default: the most common length)
+            bits: Signature bits
+            band_bits: Bits per LSH band (must divide ``bits``, at most 32)
+            seed: Seed of the random projections
+
+        Raises:
+            ValueError: If the signature layout is invalid
+        """
+        if not 1 <= band_bits <= 32 or bits % band_bits or bits % 8:
+            raise ValueError("bits must be a multiple of 8 and of band_bits (1 to 32)")
+        if length is None:
+            lengths, counts = np.unique([len(values) for values in metrics_data.values()],
+                                        return_counts=True)
+            length = int(lengths[np.argmax(counts)]) if len(lengths) else 0
+
+        self.length = length
+        self.bits = bits
+        self.band_bits = band_bits
+        self._projection = np.random.default_rng(seed).standard_normal(
+            (length, bits)
+        ).astype(np.float32)
+
+        names = [name for name, values in metrics_data.items() if len(values) >= length]
+        matrix = np.array([
+            metrics_data[name] if len(metrics_data[name]) == length
+            else metrics_data[name][:length] for name in names
+        ], dtype=float)
+        matrix = matrix.reshape(len(names), length)
+
+        # Sketch a block at a time and keep only the series with a correlation
+        kept, signatures = [], []
+        for start in range(0, len(names), SKETCH_BLOCK):
+            normalized = _center(matrix[start:start + SKETCH_BLOCK])
+            valid = ~np.isnan(normalized[:, 0]) if length else np.zeros(len(normalized), bool)
+            kept.append(start + np.flatnonzero(valid))
+            signatures.append(self._sign(normalized[valid]))
+
+        kept = np.concatenate(kept) if kept else np.array([], dtype=int)
+        self.names: List[str] = [names[k] for k in kept]
+        self._positions = {name: k for k, name in enumerate(self.names)}
+        self._matrix = matrix[kept]
+        signs = np.concatenate(signatures) if signatures else np.zeros((0, bits), bool)
+        self._signatures = np.packbits(signs, axis=1)
+
+        # Bucket keys per band, sorted so each bucket is a contiguous range
+        keys = self._band_keys(signs)
+        self._order = np.argsort(keys, axis=1, kind='stable')
+        self._sorted_keys = np.take_along_axis(keys, self._order, axis=1)
+
+    def __len__(self) -> int:
+        """Number of indexed series."""
+        return len(self.names)
+
+    def _sign(self, normalized: np.ndarray) -> np.ndarray:
+        """Get the signature bits of normalized rows.
+
+        Args:
+            normalized: Rows scaled to unit norm
+
+        Returns:
+            Boolean array with ``bits`` columns
+        """
+        return normalized.astype(np.float32) @ self._projection > 0
+
+    def _band_keys(self, signs: np.ndarray) -> np.ndarray:
+        """Get the bucket key of every band of signatures.
+
+        Args:
+            signs: Signature bits, one row per series
+
+        Returns:
+            Unsigned array with one row per band; small keys sort fastest
+        """
+        dtype = np.min_scalar_type((1 << self.band_bits) - 1)
+        keys = np.zeros((signs.shape[1] // self.band_bits, len(signs)), dtype=dtype)
+        for bit in range(self.band_bits):
+            keys |= signs[:, bit::self.band_bits].T.astype(dtype) << dtype.type(bit)
+        return keys
+
+    def _bucketed(self, keys: np.ndarray) -> np.ndarray:
+        """Get the series sharing a bucket with the given band keys.
+
+        Args:
+            keys: Bucket key per band
+
+        Returns:
+            Boolean mask over the indexed series
+        """
+        found = np.zeros(len(self), dtype=bool)
+        for band, key in enumerate(keys):
+            row = self._sorted_keys[band]
+            low, high = np.searchsorted(row, key), np.searchsorted(row, key, side='right')
+            found[self._order[band, low:high]] = True
+        return found
+
+    def query(
+        self,
+        target: Union[str, Sequence[float]],
+        top: int = 20,
+        absolute: bool = True,
+        candidates: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Find the series most correlated with a target.
+
+        Args:
+            target: Name of an indexed series, or values (at least ``length``)
+            top: Number of series returned
+            absolute: Rank by absolute correlation, so strongly negative
+                correlations are found too (default: True)
+            candidates: Candidates whose exact correlation is computed
+                (default: max(50 * top, 1000))
+
+        Returns:
+            List of results with ``metric``, ``correlation`` and ``p_value``,
+            best first
+
+        Raises:
+            ValueError: If the target is unknown or too short
+        """
+        exclude = None
+        if isinstance(target, str):
+            if target not in self._positions:
+                raise ValueError(f"Series not indexed: {target}")
+            exclude = self._positions[target]
+            values = self._matrix[exclude]
+        else:
+            values = np.asarray(target, dtype=float)
+            if len(values) < self.length:
+                raise ValueError(f"Target needs {self.length} values, got {len(values)}")
+            values = values[:self.length]
+
+        if len(self) == 0:
+            return []
+        normalized = _center(values[None, :])
+        if np.isnan(normalized).any():
+            return []
+
+        if len(self) <= EXACT_LIMIT:
+            selected = np.arange(len(self))
+        else:
+            selected = self._candidates(normalized, top, absolute, candidates)
+        if exclude is not None:
+            selected = selected[selected != exclude]
+
+        correlations, counts = masked_correlations(values[None, :], self._matrix[selected])
+        correlations, counts = correlations[0], counts[0]
+        defined = ~np.isnan(correlations)
+        selected, correlations, counts = \
+            selected[defined], correlations[defined], counts[defined]
+
+        order = np.argsort(-np.abs(correlations) if absolute else -correlations,
+                           kind='stable')[:top]
+        p_values = pearson_p_values(correlations[order], counts[order])
+        return [
+            {
+                'metric': self.names[selected[k]],
+                'correlation': float(correlations[k]),
+                'p_value': float(p_value),
+            }
+            for k, p_value in zip(order, p_values)
+        ]
+
+    def _candidates(
+        self,
+        normalized: np.ndarray,
+        top: int,
+        absolute: bool,
+        limit: Optional[int]
+    ) -> np.ndarray:
+        """Select the series whose exact correlation with a target is computed.
+
+        Args:
+            normalized: Normalized target as a single row
+            top: Number of series the query returns
+            absolute: Also look for negative correlations
+            limit: Most candidates (default: max(50 * top, 1000))
+
+        Returns:
+            Indexes of the candidates
+        """
+        limit = limit or max(50 * top, 1000)
+        signs = self._sign(normalized)
+        keys = self._band_keys(signs)[:, 0]
+        found = self._bucketed(keys)
+        if absolute:
+            found |= self._bucketed(keys ^ ((1 << self.band_bits) - 1))
+
+        # Hamming distance of the signatures estimates the angle
+        distances = _POPCOUNT[self._signatures ^ np.packbits(signs, axis=1)].sum(axis=1)
+        if absolute:
+            distances = np.minimum(distances, self.bits - distances)
+
+        selected = np.flatnonzero(found)
+        if len(selected) < top:
+            # Too few collisions: take the closest signatures of all series
+            selected = np.arange(len(self))
+        if len(selected) > limit:
+            closest = np.argpartition(distances[selected], limit - 1)[:limit]
+            selected = selected[closest]
+        return np.sort(selected)
@@ -1,5 +1,6 @@
 """Anomaly event data model."""
 
+import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Dict, List, Optional
@@ -60,6 +61,30 @@ class AnomalyEvent:
             algorithm="static_threshold",
         )
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AnomalyEvent":
+        """
+        Create AnomalyEvent from its dictionary form (see to_dict()).
+
+        Missing fields get defaults, so hand-written events need little more
+        than a type and a timestamp. Top processes are kept as dictionaries.
+        """
+        end_time = data.get("end_time")
+        timestamp = data.get("timestamp")
+        return cls(
+            id=data.get("id") or str(uuid.uuid4()),
+            timestamp=datetime.fromisoformat(timestamp) if timestamp else datetime.now(),
+            end_time=datetime.fromisoformat(end_time) if end_time else None,
+            severity=data.get("severity", "warning"),
+            type=data.get("type", "unknown"),
+            confidence=data.get("confidence", 0.5),
+            metrics=data.get("metrics") or {},
+            baseline=data.get("baseline"),
+            top_processes=list(data.get("top_processes") or []),
+            algorithm=data.get("algorithm", "unknown"),
+            metadata=data.get("metadata") or {},
+        )
+
     @property
     def start_time(self) -> datetime:
         """Get start time (alias for timestamp for backward compatibility)."""
@@ -89,7 +114,7 @@ class AnomalyEvent:
             "metrics": self.metrics,
             "baseline": self.baseline,
             "top_processes": [
-                {
+                p if isinstance(p, dict) else {
                     "pid": p.pid,
                     "name": p.name,
                     "cpu_percent": p.cpu_percent,
@@ -2,7 +2,7 @@
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List
 
 
 @dataclass
@@ -33,3 +33,16 @@ class CPUMetric:
         ]:
             if not 0 <= value <= 100:
                 raise ValueError(f"{component_name} must be between 0 and 100, got {value}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            'timestamp': self.timestamp.isoformat(),
+            'cpu_percent': self.cpu_percent,
+            'cpu_user': self.cpu_user,
+            'cpu_system': self.cpu_system,
+            'cpu_idle': self.cpu_idle,
+            'cpu_iowait': self.cpu_iowait,
+            'cpu_steal': self.cpu_steal,
+            'per_cpu_percent': self.per_cpu_percent,
+        }
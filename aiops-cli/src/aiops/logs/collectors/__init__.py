@@ -1,7 +1,9 @@
 """Log collectors."""
 
 from aiops.logs.collectors.log_collector import LogCollector
+from aiops.logs.collectors.kmsg_collector import KernelLogCollector
 
 __all__ = [
+    'KernelLogCollector',
     'LogCollector',
 ]
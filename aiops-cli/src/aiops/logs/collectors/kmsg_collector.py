@@ -0,0 +1,312 @@
+"""Kernel log collector for /dev/kmsg and dmesg output."""
+
+import json
+import os
+import select
+import stat
+import time
+from datetime import datetime
+from typing import Dict, Generator, Iterator, List, Optional
+from aiops.core import BaseCollector
+from aiops.logs.models import LogEntry
+from aiops.logs.parsers import KmsgParser
+from aiops.core.exceptions import CollectionError
+
+
+DEFAULT_KMSG_SOURCE = '/dev/kmsg'
+
+# Identifies the current boot; sequence numbers restart with every boot
+BOOT_ID_PATH = '/proc/sys/kernel/random/boot_id'
+
+# Largest /dev/kmsg record (the kernel limits records to 1024 bytes of text
+# plus the header and device properties)
+MAX_RECORD_BYTES = 8192
+
+
+class KernelLogCollector(BaseCollector):
+    """Collects kernel messages from /dev/kmsg or a dmesg text file.
+
+    /dev/kmsg is read without blocking: each read returns one record, and
+    the end of the ring buffer is reached when no record is ready. Records
+    overwritten before they were read are counted in ``lost``. Any other
+    source is read as dmesg text output (``dmesg`` or ``dmesg -r``), with
+    line numbers as sequence numbers, which makes captured output usable
+    for testing and offline analysis.
+
+    With a ``state_file``, the last sequence number read from each source
+    is saved and records up to it are skipped on the next run. The saved
+    position of /dev/kmsg is only used within the same boot.
+    """
+
+    def __init__(
+        self,
+        source: str = DEFAULT_KMSG_SOURCE,
+        state_file: Optional[str] = None,
+        boot_time: Optional[datetime] = None,
+        follow: bool = False
+    ):
+        """Initialize the kernel log collector.
+
+        Args:
+            source: /dev/kmsg or a dmesg text file
+            state_file: JSON file holding the last sequence number per source
+            boot_time: Wall-clock boot time (default: the system boot time)
+            follow: Wait for new messages in stream()
+        """
+        self.source = source
+        self.state_file = state_file
+        self.boot_time = boot_time
+        self.follow = follow
+        self.parser: Optional[KmsgParser] = None
+        self.is_device = False
+        self.boot_id: Optional[str] = None
+
+        # Last sequence number read (or skipped) and records lost to overwrites
+        self.last_sequence: Optional[int] = None
+        self.lost = 0
+        self._line_number = 0  # Lines read from a text source
+        self._initialized = False
+
+    def initialize(self) -> None:
+        """Initialize the collector."""
+        try:
+            mode = os.stat(self.source).st_mode
+        except FileNotFoundError:
+            raise CollectionError(f"Kernel log source not found: {self.source}")
+        if not os.access(self.source, os.R_OK):
+            raise CollectionError(f"Cannot read kernel log source: {self.source}")
+
+        self.is_device = stat.S_ISCHR(mode)
+        if self.is_device:
+            self.boot_id = self._read_boot_id()
+
+        boot_time = self.boot_time
+        if boot_time is None:
+            if not self.is_device:
+                # Saved output may come from another host or boot
+                boot_time = datetime(1970, 1, 1)
+            else:
+                import psutil
+                boot_time = datetime.fromtimestamp(psutil.boot_time())
+        self.parser = KmsgParser(boot_time=boot_time)
+
+        self.last_sequence = self._load_state()
+        self.lost = 0
+        self._line_number = 0
+        self._initialized = True
+
+    def collect(self) -> List[LogEntry]:
+        """Collect the kernel messages not read yet.
+
+        Returns:
+            List of LogEntry objects
+        """
+        return list(self.iter_entries())
+
+    def iter_entries(self) -> Iterator[LogEntry]:
+        """Stream the kernel messages not read yet.
+
+        The position is saved to the state file once the source is
+        exhausted.
+
+        Yields:
+            LogEntry objects in sequence order
+        """
+        if not self._initialized:
+            raise CollectionError("Collector not initialized")
+
+        if self.is_device:
+            fd = self._open_device()
+            try:
+                yield from self._read_device(fd)
+            finally:
+                os.close(fd)
+        else:
+            with open(self.source, 'r', encoding='utf-8', errors='replace') as f:
+                yield from self._read_lines(f)
+        self.save_state()
+
+    def stream(self) -> Generator[LogEntry, None, None]:
+        """Stream kernel messages in real-time (follow mode).
+
+        The position is saved whenever the source is exhausted.
+
+        Yields:
+            LogEntry objects as they are logged
+        """
+        if not self._initialized:
+            raise CollectionError("Collector not initialized")
+
+        if not self.follow:
+            raise CollectionError("Stream mode requires follow=True")
+
+        try:
+            if self.is_device:
+                fd = self._open_device()
+                try:
+                    poller = select.poll()
+                    poller.register(fd, select.POLLIN)
+                    while True:
+                        yield from self._read_device(fd)
+                        self.save_state()
+                        poller.poll(1000)
+                finally:
+                    os.close(fd)
+            else:
+                with open(self.source, 'r', encoding='utf-8', errors='replace') as f:
+                    while True:
+                        yield from self._read_lines(f)
+                        self.save_state()
+                        time.sleep(0.1)
+        except KeyboardInterrupt:
+            self.save_state()
+            return
+
+    def _open_device(self) -> int:
+        """Open /dev/kmsg for non-blocking reads.
+
+        Returns:
+            File descriptor positioned at the oldest record in the buffer
+        """
+        try:
+            return os.open(self.source, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError as e:
+            raise CollectionError(f"Cannot open {self.source}: {e}")
+
+    def _read_device(self, fd: int) -> Iterator[LogEntry]:
+        """Read the records available on /dev/kmsg.
+
+        Args:
+            fd: Non-blocking /dev/kmsg file descriptor
+
+        Yields:
+            LogEntry objects of records after the last sequence number
+        """
+        while True:
+            try:
+                data = os.read(fd, MAX_RECORD_BYTES)
+            except BlockingIOError:
+                return
+            except BrokenPipeError:
+                # The record was overwritten; the next read returns the oldest one left
+                continue
+            if not data:
+                return
+
+            entry = self.parser.parse_record(data.decode('utf-8', errors='replace'), self.source)
+            if entry is not None and self._advance(entry.parameters['sequence']):
+                yield entry
+
+    def _read_lines(self, f) -> Iterator[LogEntry]:
+        """Read the complete lines available in a dmesg text file.
+
+        Args:
+            f: Text file positioned after the lines already read
+
+        Yields:
+            LogEntry objects of lines after the last sequence number
+        """
+        line_number = self._line_number
+        while True:
+            position = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if not line.endswith('\n') and self.follow:
+                # Partial line still being written
+                f.seek(position)
+                break
+
+            line_number += 1
+            self._line_number = line_number
+            if self.last_sequence is not None and line_number <= self.last_sequence:
+                continue
+
+            self.last_sequence = line_number
+            entry = self.parser.parse_line(line, self.source, line_number)
+            if entry is not None:
+                yield entry
+
+    def _advance(self, sequence: int) -> bool:
+        """Move past a record, counting records lost before it.
+
+        Args:
+            sequence: Record sequence number
+
+        Returns:
+            True if the record was not read before
+        """
+        last = self.last_sequence
+        if last is not None:
+            if sequence <= last:
+                return False
+            self.lost += sequence - last - 1
+        self.last_sequence = sequence
+        return True
+
+    def _read_boot_id(self) -> Optional[str]:
+        """Read the id of the current boot.
+
+        Returns:
+            Boot id, or None if unavailable
+        """
+        try:
+            with open(BOOT_ID_PATH, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _read_state(self) -> Dict[str, Dict[str, object]]:
+        """Read the state file.
+
+        Returns:
+            Saved position per source
+        """
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CollectionError(f"Cannot read state file {self.state_file}: {e}")
+        return state if isinstance(state, dict) else {}
+
+    def _load_state(self) -> Optional[int]:
+        """Load the saved position of the source.
+
+        Returns:
+            Last sequence number read, or None to read from the start
+        """
+        saved = self._read_state().get(self.source)
+        if not isinstance(saved, dict) or not isinstance(saved.get('sequence'), int):
+            return None
+        if saved.get('boot_id') != self.boot_id:
+            # Sequence numbers restarted with the reboot
+            return None
+        return saved['sequence']
+
+    def save_state(self) -> None:
+        """Save the last sequence number read to the state file."""
+        if not self.state_file or self.last_sequence is None:
+            return
+
+        state = self._read_state()
+        state[self.source] = {
+            'sequence': self.last_sequence,
+            'boot_id': self.boot_id,
+            'updated': datetime.now().isoformat(),
+        }
+
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.state_file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(temp_path, self.state_file)
+        except OSError as e:
+            raise CollectionError(f"Cannot write state file {self.state_file}: {e}")
+
+    def cleanup(self) -> None:
+        """Cleanup resources."""
+        self._initialized = False
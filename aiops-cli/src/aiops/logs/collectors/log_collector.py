@@ -1,44 +1,126 @@
 """Log collector for reading and parsing log files."""
 
+import glob
+import mmap
 import os
-from typing import List, Optional, Generator
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Generator, Tuple
 from pathlib import Path
 from aiops.core import BaseCollector
 from aiops.logs.models import LogEntry
-from aiops.logs.parsers import LogParser
+from aiops.logs.parsers import LogParser, MultilineAssembler
+from aiops.logs.parsers.timestamp_parser import to_naive
+from aiops.logs.index import LogIndex
+from aiops.logs.collectors.prefilter import iter_candidate_lines
+from aiops.logs.collectors.log_files import (
+    DECOMPRESSION_ERRORS,
+    bisect_time_offset,
+    expand_log_paths,
+    is_compressed,
+    is_glob,
+    open_log_file,
+)
 from aiops.core.exceptions import CollectionError
 
 
+# Bytes read from the end of a plain file to find its last timestamp
+TAIL_PROBE_BYTES = 64 * 1024
+
+# Lines read from the start of a file to find its first timestamp
+HEAD_PROBE_LINES = 100
+
+# Lines searched backwards for the timestamp a pre-filtered line inherits
+CONTEXT_PROBE_LINES = 1000
+
+
 class LogCollector(BaseCollector):
-    """Collects and parses log entries from files."""
+    """Collects and parses log entries from files.
+
+    Paths may be glob patterns. Files are grouped into rotation sets
+    (app.log.2.gz, app.log.1, app.log) and read oldest first, with gzip, bzip2
+    and xz files decompressed on the fly.
+
+    Files are assumed to be written in time order. With ``since``, plain files
+    are bisected by byte offset to the first matching entry (line numbers are
+    then unknown and left unset); with ``until``, reading stops at the first
+    entry after it.
+
+    With a level filter, plain files are pre-filtered on raw bytes: only
+    lines containing one of the level's keywords are decoded and parsed.
+
+    Stack traces and other continuation lines are merged into the entry they
+    follow (see MultilineAssembler), also in indexed queries.
+    """
 
     def __init__(
         self,
         log_paths: List[str],
         level_filter: Optional[str] = None,
         tail: Optional[int] = None,
-        follow: bool = False
+        follow: bool = False,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        rotated: bool = False,
+        contains: Optional[str] = None,
+        use_index: bool = False,
+        index_dir: Optional[str] = None,
+        json_fields: Optional[Dict[str, str]] = None,
+        multiline: bool = True,
+        multiline_patterns: Optional[Dict[str, str]] = None
     ):
         """
         Initialize the log collector.
 
         Args:
-            log_paths: List of log file paths to collect from
+            log_paths: List of log file paths or glob patterns to collect from
             level_filter: Filter by log level (e.g., 'ERROR', 'WARNING')
-            tail: Number of lines to read from end of file (like tail -n)
+            tail: Number of lines to read from end of each rotation set (like tail -n)
             follow: Follow mode (like tail -f)
+            since: Only collect entries at or after this time
+            until: Only collect entries at or before this time
+            rotated: Also read rotated siblings of each path (app.log.1, app.log.2.gz, ...)
+            contains: Only collect entries whose message contains this text (case-insensitive)
+            use_index: Answer queries from an incrementally updated token index
+                (plain files only; ``contains`` then matches whole words)
+            index_dir: Directory holding index files
+            json_fields: JSON key per entry field for JSON-lines logs
+                (e.g. ``{'ts': 'time', 'msg': 'text'}``)
+            multiline: Merge stack traces and other continuation lines into
+                the entry they belong to
+            multiline_patterns: Start-of-record regex per source glob pattern,
+                replacing the default continuation rule (see MultilineAssembler)
         """
         self.log_paths = log_paths
         self.level_filter = level_filter.upper() if level_filter else None
         self.tail = tail
         self.follow = follow
-        self.parser = LogParser()
+        self.since = to_naive(since) if since else None
+        self.until = to_naive(until) if until else None
+        self.rotated = rotated
+        self.contains = contains.lower() if contains else None
+        self.use_index = use_index
+        self.index_dir = index_dir
+        self.parser = LogParser(json_fields=json_fields)
+        self.assembler = MultilineAssembler(multiline_patterns) if multiline else None
+        self._level_keywords = (
+            self.parser.level_keywords(self.level_filter) if self.level_filter else None
+        )
+        self._file_groups: List[List[str]] = []
         self._initialized = False
 
     def initialize(self) -> None:
         """Initialize the collector."""
-        # Verify log files exist
+        # Verify glob patterns match something
         for log_path in self.log_paths:
+            if is_glob(log_path) and not glob.glob(log_path):
+                raise CollectionError(f"No log files match: {log_path}")
+
+        groups = expand_log_paths(self.log_paths, rotated=self.rotated)
+        matched = [path for files in groups for path in files]
+
+        # Verify log files exist
+        for log_path in matched:
             path = Path(log_path)
             if not path.exists():
                 raise CollectionError(f"Log file not found: {log_path}")
@@ -47,56 +129,529 @@ class LogCollector(BaseCollector):
             if not os.access(log_path, os.R_OK):
                 raise CollectionError(f"Cannot read file: {log_path}")
 
+        self._file_groups = groups
         self._initialized = True
 
+    @property
+    def files(self) -> List[str]:
+        """Get the expanded list of files in reading order."""
+        return [path for files in self._file_groups for path in files]
+
     def collect(self) -> List[LogEntry]:
         """Collect log entries from all configured log files.
 
         Returns:
             List of LogEntry objects
         """
+        return list(self.iter_entries())
+
+    def iter_entries(self) -> Iterator[LogEntry]:
+        """Stream log entries from all configured log files.
+
+        Only the lines being parsed (or the last ``tail`` lines of a rotation
+        set) are held in memory.
+
+        Yields:
+            LogEntry objects in file order
+        """
         if not self._initialized:
             raise CollectionError("Collector not initialized")
 
-        entries = []
-        for log_path in self.log_paths:
-            entries.extend(self._collect_from_file(log_path))
+        for files in self._file_groups:
+            if self.use_index and not self.tail:
+                lines = self._iter_indexed_group(files)
+            else:
+                lines = self._iter_group_lines(files)
+
+            # Apply tail if specified
+            if self.tail:
+                lines = iter(deque(lines, maxlen=self.tail))
+
+            if self.assembler is not None:
+                records = self.assembler.assemble(lines)
+            else:
+                records = ((log_path, line_number, [line]) for log_path, line_number, line in lines)
+
+            # Parse each record
+            for log_path, line_number, record in records:
+                entry = self.parser.parse_record(record, log_path, line_number)
+                if entry is None:
+                    continue
+                if not self.tail and self._past_until(entry, record[0]):
+                    # Time-ordered set: nothing later can match
+                    break
+                if self._matches_filter(entry):
+                    yield entry
+
+    def _past_until(self, entry: LogEntry, line: str) -> bool:
+        """Check if an entry's own timestamp lies after ``until``.
+
+        Lines without a timestamp inherit one and never end a query.
+
+        Args:
+            entry: Parsed entry
+            line: Raw line the entry was parsed from
+
+        Returns:
+            True if the line carries a timestamp after ``until``
+        """
+        if self.until is None or to_naive(entry.timestamp) <= self.until:
+            return False
+        return self.parser.extract_timestamp(line, entry.source) is not None
+
+    def _iter_indexed_group(self, files: List[str]) -> Iterator[Tuple[str, Optional[int], str]]:
+        """Stream the lines of a rotation set that can match, using the token index.
 
-        return entries
+        Compressed files cannot be seeked and are scanned instead. Bytes
+        appended after the last complete indexed line are scanned as well.
 
-    def _collect_from_file(self, log_path: str) -> List[LogEntry]:
-        """Collect log entries from a single file.
+        Args:
+            files: Chronologically ordered file paths
+
+        Yields:
+            (file path, line number, line) tuples
+        """
+        for index, log_path in enumerate(files):
+            if self._outside_time_range(files, index):
+                continue
+
+            if is_compressed(log_path):
+                yield from self._iter_file_lines(log_path)
+                continue
+
+            with LogIndex(log_path, self.index_dir) as log_index:
+                log_index.update()
+                matches = log_index.search(
+                    level=self.level_filter,
+                    contains=self.contains,
+                    since=self.since,
+                    until=self.until,
+                )
+                stats = log_index.stats()
+            yield from self._iter_indexed_lines(
+                log_path, matches, stats['indexed_bytes'], stats['indexed_lines']
+            )
+
+    def _iter_file_lines(
+        self,
+        log_path: str,
+        start_offset: int = 0,
+        first_line: Optional[int] = 1
+    ) -> Iterator[Tuple[str, Optional[int], str]]:
+        """Stream raw lines of one file.
 
         Args:
             log_path: Path to log file
+            start_offset: Byte offset to start from (plain files only)
+            first_line: Line number of the first line read, or None if unknown
 
-        Returns:
-            List of LogEntry objects
+        Yields:
+            (file path, line number, line) tuples
         """
-        entries = []
+        try:
+            if start_offset:
+                with open(log_path, 'rb') as f:
+                    f.seek(start_offset)
+                    if first_line is None:
+                        for raw in f:
+                            yield log_path, None, raw.decode('utf-8', errors='ignore')
+                    else:
+                        for line_number, raw in enumerate(f, start=first_line):
+                            yield log_path, line_number, raw.decode('utf-8', errors='ignore')
+                return
+
+            with open_log_file(log_path) as f:
+                for line_number, line in enumerate(f, start=first_line):
+                    yield log_path, line_number, line
+        except DECOMPRESSION_ERRORS as e:
+            raise CollectionError(f"Failed to read log file {log_path}: {str(e)}")
+        except UnicodeError as e:
+            raise CollectionError(f"Failed to decode log file {log_path}: {str(e)}")
+
+    def _iter_group_lines(self, files: List[str]) -> Iterator[Tuple[str, Optional[int], str]]:
+        """Stream raw lines of a rotation set, skipping files outside the time range.
+
+        Args:
+            files: Chronologically ordered file paths
+
+        Yields:
+            (file path, line number, line) tuples
+        """
+        for index, log_path in enumerate(files):
+            if self._outside_time_range(files, index):
+                continue
+
+            start_offset = 0
+            if self.since is not None and not self.tail:
+                start_offset = self.find_offset(log_path, self.since)
+            first_line = 1 if start_offset == 0 else None
+
+            if self._level_keywords and not self.tail and not is_compressed(log_path):
+                yield from self._iter_candidate_lines(log_path, start_offset, first_line)
+            else:
+                yield from self._iter_file_lines(log_path, start_offset, first_line)
+
+    def _iter_candidate_lines(
+        self,
+        log_path: str,
+        start_offset: int,
+        first_line: Optional[int]
+    ) -> Iterator[Tuple[str, Optional[int], str]]:
+        """Stream only the lines that can match the level filter.
+
+        Args:
+            log_path: Path to a plain log file
+            start_offset: Byte offset of the first line start
+            first_line: Line number at ``start_offset``, or None if unknown
+
+        Yields:
+            (file path, line number, line) tuples (see _iter_candidate_records())
+        """
+        try:
+            with open(log_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size <= start_offset:
+                    return
+
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+                    # JSON levels may be numeric (pino/bunyan), so JSON lines
+                    # are always parsed
+                    candidates = iter_candidate_lines(
+                        data, self._level_keywords, start_offset, size, line_prefix=b'{'
+                    )
+                    yield from self._iter_candidate_records(
+                        data, log_path, candidates, start_offset, first_line
+                    )
+        except (OSError, ValueError) as e:
+            raise CollectionError(f"Failed to read log file {log_path}: {str(e)}")
+
+    def _iter_indexed_lines(
+        self,
+        log_path: str,
+        matches: List[Tuple[int, int]],
+        indexed_bytes: int,
+        indexed_lines: int
+    ) -> Iterator[Tuple[str, Optional[int], str]]:
+        """Stream the lines of the records holding index matches.
+
+        The records are read as by the level pre-filter, so entries get the
+        same timestamps and continuation lines as in a full scan. Bytes
+        appended after the last indexed line are streamed in full.
+
+        Args:
+            log_path: Path to a plain log file
+            matches: (byte offset, line number) tuples from LogIndex.search()
+            indexed_bytes: Bytes of the file covered by the index
+            indexed_lines: Lines of the file covered by the index
 
+        Yields:
+            (file path, line number, line) tuples
+        """
+        consumed, next_line = indexed_bytes, indexed_lines + 1
         try:
-            with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
+            with open(log_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size and matches:
+                    with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+                        candidates = (
+                            (offset, self._line_end(data, offset, size), line_number - 1)
+                            for offset, line_number in matches
+                        )
+                        # A match on a continuation line stands for its record
+                        # when the message is searched
+                        end, last_index = yield from self._iter_candidate_records(
+                            data, log_path, candidates, 0, 1, whole_records=bool(self.contains)
+                        )
+                    if end > consumed:
+                        consumed, next_line = end, last_index + 2
+        except (OSError, ValueError) as e:
+            raise CollectionError(f"Failed to read log file {log_path}: {str(e)}")
+
+        yield from self._iter_file_lines(log_path, consumed, next_line)
+
+    def _iter_candidate_records(
+        self,
+        data: mmap.mmap,
+        log_path: str,
+        candidates: Iterable[Tuple[int, int, int]],
+        start_offset: int,
+        first_line: Optional[int],
+        whole_records: bool = False
+    ) -> Generator[Tuple[str, Optional[int], str], None, Tuple[int, int]]:
+        """Stream candidate lines with the lines they need to parse as in a full scan.
+
+        A candidate without its own timestamp is preceded by the nearest
+        earlier timestamped line, so it inherits the same timestamp as in a
+        full scan. That line cannot match the filter itself. With multiline
+        assembly, candidates that continue a record are skipped (the record
+        level comes from its first line), or with ``whole_records`` replaced
+        by the record's first line, and the continuation lines of a candidate
+        record are read along with it.
+
+        Args:
+            data: Memory-mapped log file
+            log_path: Path to log file
+            candidates: (line start, line end, line index) tuples in file order
+            start_offset: Byte offset of the first line start
+            first_line: Line number at ``start_offset``, or None if unknown
+            whole_records: Read the records of candidates that continue a record
+
+        Yields:
+            (file path, line number, line) tuples
 
-                # Apply tail if specified
-                if self.tail:
-                    lines = lines[-self.tail:]
+        Returns:
+            Offset after the last line read and index of that line
+        """
+        consumed = start_offset
+        last_index = -1
+        is_continuation = self.assembler.continuation_rule(log_path) if self.assembler else None
+        for line_start, line_end, index in candidates:
+            if line_start < consumed:
+                # Already read as part of a record
+                continue
+
+            line = data[line_start:line_end].decode('utf-8', errors='ignore')
+            if is_continuation is not None and is_continuation(line):
+                if not whole_records:
+                    continue
+                record_start = self._find_record_start(data, consumed, line_start, is_continuation)
+                if record_start is None:
+                    continue
+                line_start, lines_back = record_start
+                index -= lines_back
+                line_end = self._line_end(data, line_start, len(data))
+                line = data[line_start:line_end].decode('utf-8', errors='ignore')
+
+            if (line_start > consumed
+                    and self.parser.extract_timestamp(line, log_path) is None):
+                context = self._find_context_line(data, log_path, consumed, line_start)
+                if context is not None:
+                    context_line, lines_back = context
+                    context_number = (None if first_line is None
+                                      else first_line + index - lines_back)
+                    yield log_path, context_number, context_line
+
+            yield log_path, None if first_line is None else first_line + index, line
+            consumed = line_end
+
+            if is_continuation is not None:
+                for line, consumed in self._iter_continuation(
+                    data, consumed, len(data), is_continuation
+                ):
+                    index += 1
+                    yield log_path, None if first_line is None else first_line + index, line
+            last_index = index
+        return consumed, last_index
+
+    @staticmethod
+    def _line_end(data: mmap.mmap, offset: int, size: int) -> int:
+        """Get the offset just after the line starting at ``offset``."""
+        newline = data.find(b'\n', offset)
+        return size if newline == -1 else newline + 1
+
+    @staticmethod
+    def _find_record_start(
+        data: mmap.mmap,
+        consumed: int,
+        line_start: int,
+        is_continuation
+    ) -> Optional[Tuple[int, int]]:
+        """Find the first line of the record a continuation line belongs to.
 
-                # Parse each line
-                for line_number, line in enumerate(lines, start=1):
-                    entry = self.parser.parse(line, log_path, line_number)
-                    if entry and self._matches_filter(entry):
-                        entries.append(entry)
+        Args:
+            data: Memory-mapped log file
+            consumed: Offset up to which lines were already read
+            line_start: Offset of the continuation line
+            is_continuation: Continuation test of the source
+
+        Returns:
+            (offset, number of lines before the continuation line) or None if
+            the record starts before ``consumed``
+        """
+        end = line_start
+        lines_back = 0
+        while end > consumed:
+            newline = data.rfind(b'\n', consumed, end - 1)
+            start = consumed if newline == -1 else newline + 1
+            lines_back += 1
+            if not is_continuation(data[start:end].decode('utf-8', errors='ignore')):
+                return start, lines_back
+            end = start
+        return None
+
+    @staticmethod
+    def _iter_continuation(
+        data: mmap.mmap,
+        offset: int,
+        size: int,
+        is_continuation
+    ) -> Iterator[Tuple[str, int]]:
+        """Read the continuation lines following a record's first line.
 
-        except Exception as e:
+        Args:
+            data: Memory-mapped log file
+            offset: Offset just after the first line
+            size: File size
+            is_continuation: Continuation test of the source
+
+        Yields:
+            (line, offset after the line) tuples
+        """
+        while offset < size:
+            newline = data.find(b'\n', offset)
+            end = size if newline == -1 else newline + 1
+            line = data[offset:end].decode('utf-8', errors='ignore')
+            if not is_continuation(line):
+                return
+            yield line, end
+            offset = end
+
+    def _find_context_line(
+        self,
+        data: mmap.mmap,
+        log_path: str,
+        consumed: int,
+        line_start: int
+    ) -> Optional[Tuple[str, int]]:
+        """Find the nearest timestamped line between two offsets, searching backwards.
+
+        Args:
+            data: Memory-mapped log file
+            log_path: Path to log file
+            consumed: Offset up to which lines were already parsed
+            line_start: Offset of the candidate line
+
+        Returns:
+            (line, number of lines before the candidate) or None if not found
+        """
+        end = line_start
+        for lines_back in range(1, CONTEXT_PROBE_LINES + 1):
+            if end <= consumed:
+                return None
+            newline = data.rfind(b'\n', consumed, end - 1)
+            start = consumed if newline == -1 else newline + 1
+            line = data[start:end].decode('utf-8', errors='ignore')
+            if self.parser.extract_timestamp(line, log_path) is not None:
+                return line, lines_back
+            end = start
+        return None
+
+    def find_offset(self, log_path: str, since: datetime) -> int:
+        """Find the byte offset of the first entry at or after a time.
+
+        Args:
+            log_path: Path to a time-ordered log file
+            since: Time to search for
+
+        Returns:
+            Byte offset of a line start (0 for compressed files)
+        """
+        if is_compressed(log_path):
+            return 0
+
+        def get_timestamp(raw: bytes) -> Optional[datetime]:
+            timestamp = self.parser.extract_timestamp(
+                raw.decode('utf-8', errors='ignore'), log_path
+            )
+            return to_naive(timestamp) if timestamp is not None else None
+
+        try:
+            with open(log_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                return bisect_time_offset(f, size, to_naive(since), get_timestamp)
+        except OSError as e:
             raise CollectionError(f"Failed to read log file {log_path}: {str(e)}")
 
-        return entries
+    def _outside_time_range(self, files: List[str], index: int) -> bool:
+        """Check if a file can be skipped based on its first and last timestamps.
+
+        The last timestamp of a compressed file is not read directly; the first
+        timestamp of the next (newer) file in the rotation set bounds it instead.
+
+        Args:
+            files: Chronologically ordered file paths
+            index: Index of the file to check
+
+        Returns:
+            True if every entry of the file lies outside [since, until]
+        """
+        if self.since is None and self.until is None:
+            return False
+
+        log_path = files[index]
+
+        if self.until is not None:
+            first = self.get_first_timestamp(log_path)
+            if first is not None and to_naive(first) > self.until:
+                return True
+
+        if self.since is not None:
+            last = self.get_last_timestamp(log_path)
+            if last is None and index + 1 < len(files):
+                last = self.get_first_timestamp(files[index + 1])
+            if last is not None and to_naive(last) < self.since:
+                return True
+
+        return False
+
+    def get_first_timestamp(self, log_path: str) -> Optional[datetime]:
+        """Get the first parseable timestamp of a file.
+
+        Args:
+            log_path: Path to log file
+
+        Returns:
+            datetime object or None if none is found near the start of the file
+        """
+        try:
+            with open_log_file(log_path) as f:
+                for line_number, line in enumerate(f):
+                    if line_number >= HEAD_PROBE_LINES:
+                        break
+                    timestamp = self.parser.extract_timestamp(line, log_path)
+                    if timestamp is not None:
+                        return timestamp
+        except DECOMPRESSION_ERRORS:
+            return None
+        return None
+
+    def get_last_timestamp(self, log_path: str) -> Optional[datetime]:
+        """Get the last parseable timestamp of a plain (uncompressed) file.
+
+        Args:
+            log_path: Path to log file
+
+        Returns:
+            datetime object or None for compressed files or if none is found
+        """
+        try:
+            if is_compressed(log_path):
+                return None
+
+            with open(log_path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - TAIL_PROBE_BYTES))
+                block = f.read()
+        except OSError:
+            return None
+
+        lines = block.decode('utf-8', errors='ignore').splitlines()
+        if size > TAIL_PROBE_BYTES:
+            # First line is probably cut in half
+            lines = lines[1:]
+
+        for line in reversed(lines):
+            timestamp = self.parser.extract_timestamp(line, log_path)
+            if timestamp is not None:
+                return timestamp
+        return None
 
     def stream(self) -> Generator[LogEntry, None, None]:
         """Stream log entries in real-time (follow mode).
 
+        Only the live (uncompressed) file of each rotation set is followed.
+
         Yields:
             LogEntry objects as they are read
         """
@@ -110,11 +665,12 @@ class LogCollector(BaseCollector):
         # In production, you'd use inotify or similar for efficient tailing
         import time
 
-        file_positions = {path: 0 for path in self.log_paths}
+        follow_paths = [files[-1] for files in self._file_groups]
+        file_positions = {path: 0 for path in follow_paths}
 
         try:
             while True:
-                for log_path in self.log_paths:
+                for log_path in follow_paths:
                     try:
                         with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
                             # Seek to last position
@@ -122,9 +678,15 @@ class LogCollector(BaseCollector):
 
                             # Read new lines
                             for line in f:
-                                entry = self.parser.parse(line, log_path)
-                                if entry and self._matches_filter(entry):
-                                    yield entry
+                                if self.assembler is None:
+                                    entry = self.parser.parse(line, log_path)
+                                    if entry and self._matches_filter(entry):
+                                        yield entry
+                                    continue
+
+                                record = self.assembler.feed(log_path, None, line)
+                                if record is not None:
+                                    yield from self._filter_records([record])
 
                             # Update position
                             file_positions[log_path] = f.tell()
@@ -136,25 +698,56 @@ class LogCollector(BaseCollector):
                         # Continue with other files
                         continue
 
+                # Emit records whose continuation lines stopped arriving
+                if self.assembler is not None:
+                    yield from self._filter_records(self.assembler.flush_expired())
+
                 # Sleep briefly before next check
                 time.sleep(0.1)
 
         except KeyboardInterrupt:
             return
 
+    def _filter_records(
+        self,
+        records: List[Tuple[str, Optional[int], List[str]]]
+    ) -> Iterator[LogEntry]:
+        """Parse assembled records and apply the filters.
+
+        Args:
+            records: (source, line number, lines) tuples
+
+        Yields:
+            Matching LogEntry objects
+        """
+        for log_path, line_number, lines in records:
+            entry = self.parser.parse_record(lines, log_path, line_number)
+            if entry and self._matches_filter(entry):
+                yield entry
+
     def _matches_filter(self, entry: LogEntry) -> bool:
-        """Check if log entry matches the level filter.
+        """Check if log entry matches the level, text and time range filters.
 
         Args:
             entry: LogEntry to check
 
         Returns:
-            True if entry matches filter or no filter is set
+            True if entry matches all filters or no filter is set
         """
-        if not self.level_filter:
-            return True
+        if self.level_filter and entry.level != self.level_filter:
+            return False
+
+        if self.contains and self.contains not in entry.message.lower():
+            return False
+
+        if self.since is not None or self.until is not None:
+            timestamp = to_naive(entry.timestamp)
+            if self.since is not None and timestamp < self.since:
+                return False
+            if self.until is not None and timestamp > self.until:
+                return False
 
-        return entry.level == self.level_filter
+        return True
 
     def cleanup(self) -> None:
         """Cleanup resources."""
@@ -0,0 +1,218 @@
+"""Helpers for reading rotated and compressed log files."""
+
+import bz2
+import glob
+import gzip
+import lzma
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import IO, Callable, List, Optional, Tuple
+
+
+# Magic bytes of the stdlib-supported compression formats
+COMPRESSION_MAGIC: List[Tuple[bytes, Callable[..., IO[str]]]] = [
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+]
+
+# Errors raised by the decompressors on corrupt or truncated input
+DECOMPRESSION_ERRORS = (OSError, EOFError, lzma.LZMAError)
+
+# Lines scanned from one probe point while looking for a parseable timestamp
+MAX_PROBE_LINES = 1000
+
+# app.log, app.log.1, app.log.2.gz, app.log-20240115.gz, ...
+ROTATION_PATTERN = re.compile(
+    r'^(?P<base>.+?)'
+    r'(?:\.(?P<index>\d+)|-(?P<date>\d{8}(?:\d{2})?))?'
+    r'(?P<compression>\.gz|\.bz2|\.xz)?$'
+)
+
+
+def is_glob(path: str) -> bool:
+    """Check if a path contains glob wildcards.
+
+    Args:
+        path: File path or pattern
+
+    Returns:
+        True if the path is a glob pattern
+    """
+    return glob.has_magic(path)
+
+
+def is_compressed(path: str) -> bool:
+    """Check if a file is gzip, bzip2 or xz compressed.
+
+    Args:
+        path: File path
+
+    Returns:
+        True if the file starts with a known compression magic number
+    """
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    return any(head.startswith(magic) for magic, _ in COMPRESSION_MAGIC)
+
+
+def open_log_file(path: str) -> IO[str]:
+    """Open a log file for streaming text reads, decompressing transparently.
+
+    The compression format is detected from the file's magic bytes, so rotated
+    files are handled regardless of their extension.
+
+    Args:
+        path: File path
+
+    Returns:
+        Text file object
+    """
+    with open(path, 'rb') as f:
+        head = f.read(6)
+
+    for magic, opener in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return opener(path, 'rt', encoding='utf-8', errors='ignore')
+
+    return open(path, 'r', encoding='utf-8', errors='ignore')
+
+
+def rotation_base(path: str) -> str:
+    """Get the live log path a rotated file belongs to.
+
+    Args:
+        path: File path (e.g. /var/log/app.log.2.gz)
+
+    Returns:
+        Base path (e.g. /var/log/app.log)
+    """
+    directory, name = os.path.split(path)
+    match = ROTATION_PATTERN.match(name)
+    return os.path.join(directory, match.group('base'))
+
+
+def rotation_order(path: str) -> Tuple[int, int, str, float]:
+    """Sort key placing the files of a rotation set in chronological order.
+
+    Numbered rotations run from the highest (oldest) index down, date-stamped
+    rotations in date order, and the live file comes last. File modification
+    time breaks ties.
+
+    Args:
+        path: File path
+
+    Returns:
+        Sort key tuple
+    """
+    match = ROTATION_PATTERN.match(os.path.basename(path))
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = 0.0
+
+    if match.group('index') is not None:
+        return 0, -int(match.group('index')), '', mtime
+    if match.group('date') is not None:
+        return 1, 0, match.group('date'), mtime
+    return 2, 0, '', mtime
+
+
+def expand_log_paths(paths: List[str], rotated: bool = False) -> List[List[str]]:
+    """Expand log paths into rotation sets ordered oldest to newest.
+
+    Args:
+        paths: File paths or glob patterns
+        rotated: Also include rotated siblings of plain paths (app.log.1, app.log.2.gz, ...)
+
+    Returns:
+        List of rotation sets, each a chronologically ordered list of file paths
+    """
+    groups: 'OrderedDict[str, List[str]]' = OrderedDict()
+    seen = set()
+
+    for path in paths:
+        if is_glob(path):
+            candidates = sorted(glob.glob(path))
+        else:
+            candidates = [path]
+            if rotated:
+                escaped = glob.escape(path)
+                candidates += sorted(
+                    candidate
+                    for candidate in glob.glob(escaped + '.*') + glob.glob(escaped + '-*')
+                    if rotation_base(candidate) == path
+                )
+
+        for candidate in candidates:
+            if candidate in seen:
+                continue
+            seen.add(candidate)
+            groups.setdefault(rotation_base(candidate), []).append(candidate)
+
+    return [sorted(files, key=rotation_order) for files in groups.values()]
+
+
+def bisect_time_offset(
+    f: IO[bytes],
+    size: int,
+    target: datetime,
+    get_timestamp: Callable[[bytes], Optional[datetime]]
+) -> int:
+    """Find where entries at or after a time start in a time-ordered file.
+
+    Bisects by byte offset: each step seeks to the middle of the remaining
+    range, moves to the next line start and reads forward to the first line
+    with a parseable timestamp. Lines without one (stack traces, wrapped
+    messages) are treated as part of the preceding entry.
+
+    The result is the start of the last timestamped line found before
+    ``target`` (or 0), so streaming forward from it and filtering yields every
+    matching entry, and lines without a timestamp that follow it still
+    inherit a real one.
+
+    Args:
+        f: File opened in binary mode
+        size: File size in bytes
+        target: Time to search for (naive, comparable with ``get_timestamp``)
+        get_timestamp: Returns the timestamp of a raw line, or None
+
+    Returns:
+        Byte offset of a line start
+    """
+    low, high = 0, size
+    anchor = 0
+
+    while low < high:
+        middle = (low + high) // 2
+
+        if middle > 0:
+            # Align to the first line starting at or after middle
+            f.seek(middle - 1)
+            f.readline()
+        else:
+            f.seek(0)
+
+        position = f.tell()
+        timestamp = None
+        for _ in range(MAX_PROBE_LINES):
+            if position >= high:
+                break
+            line = f.readline()
+            if not line:
+                break
+            timestamp = get_timestamp(line)
+            if timestamp is not None:
+                break
+            position += len(line)
+
+        if timestamp is not None and timestamp < target:
+            # Everything up to and including this line is too early
+            anchor = position
+            low = position + len(line)
+        else:
+            high = middle
+
+    return anchor
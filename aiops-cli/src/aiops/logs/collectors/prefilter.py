@@ -0,0 +1,103 @@
+"""Byte-level pre-filtering of log lines before parsing."""
+
+import mmap
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+# Bytes lowercased and searched at a time
+CHUNK_SIZE = 1024 * 1024
+
+
+def iter_candidate_lines(
+    data: mmap.mmap,
+    needles: Iterable[str],
+    start: int = 0,
+    end: int = -1,
+    chunk_size: int = CHUNK_SIZE,
+    line_prefix: Optional[bytes] = None
+) -> Iterator[Tuple[int, int, int]]:
+    """Find lines containing any of the needles, case-insensitively.
+
+    The data is lowercased one chunk at a time and searched with
+    ``bytes.find``, so lines without a needle are never decoded. Chunks end on
+    a line boundary, so a needle cannot be split between chunks.
+
+    Args:
+        data: Memory-mapped file (or any bytes-like object)
+        needles: Lowercase ASCII substrings to look for
+        start: Offset of the first line start to search from
+        end: Offset to stop at (default: end of data)
+        chunk_size: Bytes lowercased and searched at a time
+        line_prefix: Lines starting with this are always candidates
+
+    Yields:
+        (line start, line end, line index) tuples; line end includes the
+        newline and the line index counts lines from ``start``
+    """
+    patterns = [needle.encode('ascii') for needle in needles]
+    if end < 0:
+        end = len(data)
+
+    chunk_start = start
+    lines_before = 0
+    while chunk_start < end:
+        chunk_end = min(chunk_start + chunk_size, end)
+        if chunk_end < end:
+            newline = data.rfind(b'\n', chunk_start, chunk_end)
+            if newline == -1:
+                # A single line longer than the chunk
+                newline = data.find(b'\n', chunk_end, end)
+                chunk_end = end if newline == -1 else newline + 1
+            else:
+                chunk_end = newline + 1
+
+        chunk = data[chunk_start:chunk_end].lower()
+        counted = 0
+        for line_start, line_end in _chunk_candidates(chunk, patterns, line_prefix):
+            lines_before += chunk.count(b'\n', counted, line_start)
+            counted = line_start
+            yield chunk_start + line_start, chunk_start + line_end, lines_before
+
+        lines_before += chunk.count(b'\n', counted)
+        chunk_start = chunk_end
+
+
+def _chunk_candidates(
+    chunk: bytes,
+    patterns: List[bytes],
+    line_prefix: Optional[bytes] = None
+) -> List[Tuple[int, int]]:
+    """Find candidate lines within one lowercased chunk.
+
+    Args:
+        chunk: Lowercased chunk ending on a line boundary
+        patterns: Needles to look for
+        line_prefix: Lines starting with this are always candidates
+
+    Returns:
+        Sorted (line start, line end) offsets relative to the chunk
+    """
+    length = len(chunk)
+    lines = {}
+    for pattern in patterns:
+        position = chunk.find(pattern)
+        while position != -1:
+            line_start = chunk.rfind(b'\n', 0, position) + 1
+            line_end = chunk.find(b'\n', position)
+            line_end = length if line_end == -1 else line_end + 1
+            lines[line_start] = line_end
+            position = chunk.find(pattern, line_end)
+
+    if line_prefix:
+        if chunk.startswith(line_prefix):
+            line_end = chunk.find(b'\n')
+            lines[0] = length if line_end == -1 else line_end + 1
+        marker = b'\n' + line_prefix
+        position = chunk.find(marker)
+        while position != -1:
+            line_start = position + 1
+            line_end = chunk.find(b'\n', line_start)
+            line_end = length if line_end == -1 else line_end + 1
+            lines[line_start] = line_end
+            position = chunk.find(marker, line_end - 1)
+    return sorted(lines.items())
@@ -1,9 +1,14 @@
 """Log detectors."""
 
+from aiops.logs.detectors.windowed_detector import WindowBaseline, WindowedLogDetector
 from aiops.logs.detectors.log_level_detector import LogLevelAnomalyDetector
 from aiops.logs.detectors.log_volume_detector import LogVolumeAnomalyDetector
+from aiops.logs.detectors.kernel_event_detector import KernelEventDetector
 
 __all__ = [
+    'KernelEventDetector',
     'LogLevelAnomalyDetector',
     'LogVolumeAnomalyDetector',
+    'WindowBaseline',
+    'WindowedLogDetector',
 ]
@@ -0,0 +1,295 @@
+"""Kernel event detector (OOM kills, hung tasks, disk I/O errors)."""
+
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from aiops.core.base import BaseDetector
+from aiops.core.exceptions import DetectionError
+from aiops.logs.models import LogEntry, OOMKill
+from aiops.cpu.models.anomaly_event import AnomalyEvent
+
+
+class KernelEventDetector(BaseDetector):
+    """Detects OOM kills, hung tasks and disk I/O errors in kernel messages.
+
+    An OOM kill spans several kernel messages, so the messages of a kill
+    are assembled into one OOMKill: the trigger from ``invoked oom-killer``,
+    the memory cgroup usage and limit, the cgroups from the ``oom-kill:``
+    summary and the victim's memory from ``Killed process``. Every kill is
+    an event.
+
+    Hung task and I/O error messages repeat while the problem lasts; they
+    are reported once per task or device every ``cooldown_seconds`` of log
+    time.
+    """
+
+    INVOKED_PATTERN = re.compile(r'(.+?) invoked oom-killer:')
+    MEMCG_PATTERN = re.compile(r'memory: usage (\d+)kB, limit (\d+)kB')
+    SUMMARY_PATTERN = re.compile(r'oom-kill:(.*)')
+    KILLED_PATTERN = re.compile(r'(?:.*: )?Killed process (\d+) \((.*?)\),?(.*)')
+    FIELD_PATTERN = re.compile(r'([\w-]+):(-?\d+)(?:kB)?')
+    HUNG_TASK_PATTERN = re.compile(r'INFO: task (.+):(\d+) blocked for more than (\d+) seconds')
+    IO_ERROR_PATTERNS = (
+        re.compile(r'I/O error,? (?:on )?dev (\w+)'),
+        re.compile(r'EXT4-fs error \(device (\w+)\)'),
+        re.compile(r'XFS \((\w+)\): metadata I/O error'),
+    )
+
+    # Killed process fields to OOMKill fields
+    KILLED_FIELDS = {
+        'total-vm': 'total_vm_kb',
+        'anon-rss': 'anon_rss_kb',
+        'file-rss': 'file_rss_kb',
+        'shmem-rss': 'shmem_rss_kb',
+        'UID': 'uid',
+        'oom_score_adj': 'oom_score_adj',
+    }
+
+    def __init__(self, cooldown_seconds: float = 300.0):
+        """Initialize kernel event detector.
+
+        Args:
+            cooldown_seconds: Log time before a hung task or I/O error of the
+                same task or device is reported again
+        """
+        if cooldown_seconds < 0:
+            raise DetectionError("cooldown_seconds must be non-negative")
+
+        self.cooldown = timedelta(seconds=cooldown_seconds)
+        self._initialized = False
+        self._reset()
+
+    def _reset(self) -> None:
+        """Reset the detection state."""
+        # OOM kill being assembled
+        self._oom: Optional[Dict[str, Any]] = None
+        # Last report per (event type, task or device)
+        self._reported: Dict[Tuple[str, str], datetime] = {}
+
+    def initialize(self) -> None:
+        """Initialize the detector."""
+        self._initialized = True
+
+    def detect(self, logs: Iterable[LogEntry]) -> List[AnomalyEvent]:
+        """Detect kernel events in a batch of log entries.
+
+        Args:
+            logs: Kernel LogEntry objects in order (any iterable)
+
+        Returns:
+            List of AnomalyEvent objects
+        """
+        if not self._initialized:
+            raise DetectionError("Detector not initialized")
+
+        events = []
+        for entry in logs:
+            events.extend(self.update(entry))
+        events.extend(self.flush())
+        return events
+
+    def update(self, entry: LogEntry) -> List[AnomalyEvent]:
+        """Add one kernel log entry.
+
+        Args:
+            entry: Log entry
+
+        Returns:
+            Events completed by this entry
+        """
+        message = entry.message
+        if 'oom' in message or 'memory' in message or 'Killed process' in message:
+            event = self._update_oom(entry, message)
+            if event is not None:
+                return [event]
+
+        match = self.HUNG_TASK_PATTERN.search(message)
+        if match:
+            task, pid, blocked = match.groups()
+            return self._report('hung_task', 'warning', task, entry, {
+                'pid': int(pid),
+                'blocked_seconds': int(blocked),
+            }, {'task': task})
+
+        if 'error' in message:
+            for pattern in self.IO_ERROR_PATTERNS:
+                match = pattern.search(message)
+                if match:
+                    device = match.group(1)
+                    return self._report('disk_io_error', 'critical', device, entry, {},
+                                        {'device': device, 'message': message})
+        return []
+
+    def flush(self) -> List[AnomalyEvent]:
+        """Report an OOM kill whose ``Killed process`` message is missing.
+
+        Returns:
+            Event of the pending OOM kill, if its victim is known
+        """
+        oom, self._oom = self._oom, None
+        if oom is None or 'pid' not in oom:
+            return []
+        event = self._oom_event(oom)
+        return [event] if event is not None else []
+
+    def _update_oom(self, entry: LogEntry, message: str) -> Optional[AnomalyEvent]:
+        """Add a message that may be part of an OOM kill.
+
+        Args:
+            entry: Log entry
+            message: Entry message
+
+        Returns:
+            Event of an OOM kill completed by this entry
+        """
+        match = self.INVOKED_PATTERN.match(message)
+        if match:
+            event = self.flush()
+            self._oom = {'trigger_process': match.group(1)}
+            return event[0] if event else None
+
+        match = self.KILLED_PATTERN.match(message)
+        if match:
+            oom = self._oom or {}
+            self._oom = None
+            oom['pid'] = int(match.group(1))
+            oom['process_name'] = match.group(2) or 'unknown'
+            for key, value in self.FIELD_PATTERN.findall(match.group(3)):
+                if key in self.KILLED_FIELDS:
+                    oom[self.KILLED_FIELDS[key]] = int(value)
+            oom['timestamp'] = entry.timestamp
+            oom['source'] = entry.source
+            oom['sequence'] = (entry.parameters or {}).get('sequence')
+            return self._oom_event(oom)
+
+        if self._oom is None:
+            return None
+
+        match = self.MEMCG_PATTERN.match(message)
+        if match:
+            self._oom['memcg_usage_kb'] = int(match.group(1))
+            self._oom['memcg_limit_kb'] = int(match.group(2))
+            return None
+
+        match = self.SUMMARY_PATTERN.match(message)
+        if match:
+            fields = dict(
+                item.split('=', 1) for item in match.group(1).split(',') if '=' in item
+            )
+            self._oom.update(
+                constraint=fields.get('constraint'),
+                oom_memcg=fields.get('oom_memcg'),
+                cgroup=fields.get('task_memcg'),
+                timestamp=entry.timestamp,
+                source=entry.source,
+            )
+            if fields.get('pid', '').isdigit():
+                self._oom['pid'] = int(fields['pid'])
+                self._oom['process_name'] = fields.get('task') or 'unknown'
+            if fields.get('uid', '').isdigit():
+                self._oom['uid'] = int(fields['uid'])
+        return None
+
+    def _oom_event(self, oom: Dict[str, Any]) -> Optional[AnomalyEvent]:
+        """Create an event for an OOM kill.
+
+        Args:
+            oom: Assembled OOMKill fields
+
+        Returns:
+            AnomalyEvent object, or None if the fields do not form a valid
+            OOMKill (the record is skipped rather than stopping the detector)
+        """
+        try:
+            kill = OOMKill(**oom)
+        except ValueError:
+            return None
+        metrics = {
+            key: value for key, value in (
+                ('pid', kill.pid),
+                ('rss_kb', kill.rss_kb),
+                ('anon_rss_kb', kill.anon_rss_kb),
+                ('total_vm_kb', kill.total_vm_kb),
+                ('memcg_usage_kb', kill.memcg_usage_kb),
+                ('memcg_limit_kb', kill.memcg_limit_kb),
+            ) if value is not None
+        }
+        return self._create_event('oom_kill', 'critical', kill.timestamp, metrics, {
+            'oom_kill': kill.to_dict(),
+            'source': kill.source,
+            'sequence': kill.sequence,
+        })
+
+    def _report(
+        self,
+        event_type: str,
+        severity: str,
+        key: str,
+        entry: LogEntry,
+        metrics: Dict[str, Any],
+        metadata: Dict[str, Any]
+    ) -> List[AnomalyEvent]:
+        """Create an event unless one was reported for the key recently.
+
+        Args:
+            event_type: Event type
+            severity: Event severity
+            key: Task or device
+            entry: Log entry
+            metrics: Event metrics
+            metadata: Event metadata
+
+        Returns:
+            The event, or nothing during the cooldown
+        """
+        last = self._reported.get((event_type, key))
+        if last is not None and entry.timestamp - last < self.cooldown:
+            return []
+        self._reported[(event_type, key)] = entry.timestamp
+
+        metadata.update(source=entry.source, sequence=(entry.parameters or {}).get('sequence'))
+        return [self._create_event(event_type, severity, entry.timestamp, metrics, metadata)]
+
+    def _create_event(
+        self,
+        event_type: str,
+        severity: str,
+        timestamp: datetime,
+        metrics: Dict[str, Any],
+        metadata: Dict[str, Any]
+    ) -> AnomalyEvent:
+        """Create a kernel event.
+
+        Args:
+            event_type: Event type
+            severity: Event severity
+            timestamp: Time of the kernel message
+            metrics: Event metrics
+            metadata: Event metadata
+
+        Returns:
+            AnomalyEvent object
+        """
+        return AnomalyEvent(
+            id=str(uuid.uuid4()),
+            timestamp=timestamp,
+            end_time=timestamp,
+            type=event_type,
+            severity=severity,
+            confidence=1.0,
+            algorithm=self.get_name(),
+            metrics=metrics,
+            baseline=None,
+            top_processes=[],
+            metadata=metadata,
+        )
+
+    def cleanup(self) -> None:
+        """Clean up detector resources."""
+        self._reset()
+        self._initialized = False
+
+    def get_name(self) -> str:
+        """Get detector name."""
+        return 'kernel_event_detector'
@@ -1,103 +1,101 @@
 """Log level anomaly detector."""
 
-from typing import List
 from datetime import datetime
-from collections import Counter
-from aiops.core import BaseDetector
+from typing import Dict, List, Optional
+from aiops.logs.detectors.windowed_detector import WindowedLogDetector
 from aiops.logs.models import LogEntry
 from aiops.cpu.models.anomaly_event import AnomalyEvent
-from aiops.core.exceptions import DetectionError
 
 
-class LogLevelAnomalyDetector(BaseDetector):
-    """Detects anomalies in log level distribution."""
+ERROR_LEVELS = ('ERROR', 'CRITICAL', 'FATAL')
 
-    def __init__(self, error_threshold: int = 10, warning_threshold: int = 50):
+
+class LogLevelAnomalyDetector(WindowedLogDetector):
+    """Detects anomalies in log level distribution.
+
+    Counts error and warning entries per log-time window and compares each
+    window with a rolling (or seasonal) baseline of previous windows.
+    """
+
+    SERIES = ('error', 'warning')
+
+    def __init__(
+        self,
+        error_threshold: Optional[int] = 10,
+        warning_threshold: Optional[int] = 50,
+        window_seconds: int = 60,
+        history: int = 60,
+        seasonality_seconds: Optional[int] = None,
+        std_multiplier: float = 3.0,
+        min_history: int = 10
+    ):
         """Initialize log level anomaly detector.
 
         Args:
-            error_threshold: Threshold for error log count
-            warning_threshold: Threshold for warning log count
+            error_threshold: Error entries per window that are anomalous until
+                the baseline is ready (None to wait for the baseline)
+            warning_threshold: Warning entries per window that are anomalous
+                until the baseline is ready (None to wait for the baseline)
+            window_seconds: Window length in seconds
+            history: Past windows per baseline (past periods when seasonal)
+            seasonality_seconds: Season length, a multiple of the window
+            std_multiplier: Standard deviations above the baseline mean that
+                are anomalous
+            min_history: Windows needed before the baseline is used
         """
+        super().__init__(window_seconds, history, seasonality_seconds, std_multiplier, min_history)
         self.error_threshold = error_threshold
         self.warning_threshold = warning_threshold
-        self._initialized = False
 
-    def initialize(self) -> None:
-        """Initialize the detector."""
-        self._initialized = True
+    def _count(self, entry: LogEntry) -> None:
+        """Count an entry by level.
 
-    def detect(self, logs: List[LogEntry]) -> List[AnomalyEvent]:
-        """Detect log level anomalies.
+        Args:
+            entry: Log entry
+        """
+        counts = self._counts
+        counts[entry.level] = counts.get(entry.level, 0) + 1
+
+    def _evaluate(
+        self,
+        start: datetime,
+        end: datetime,
+        total: int,
+        counts: Dict[str, int]
+    ) -> List[AnomalyEvent]:
+        """Evaluate the level counts of a closed window.
 
         Args:
-            logs: List of LogEntry objects
+            start: Window start
+            end: Window end
+            total: Number of entries
+            counts: Entries per level
 
         Returns:
-            List of AnomalyEvent objects
+            High error and warning rate events
         """
-        if not self._initialized:
-            raise DetectionError("Detector not initialized")
-
         events = []
-        timestamp = datetime.now()
-
-        # Count by level
-        level_counts = Counter(log.level for log in logs)
-
-        # Check error count
-        error_count = sum(count for level, count in level_counts.items()
-                         if level in ['ERROR', 'CRITICAL', 'FATAL'])
-
-        if error_count > self.error_threshold:
-            import uuid
-            event = AnomalyEvent(
-                id=str(uuid.uuid4()),
-                timestamp=timestamp,
-                end_time=None,
-                type='high_error_rate',
-                severity='critical',
-                confidence=0.9,
-                algorithm='log_level_anomaly_detector',
-                metrics={
-                    'error_count': error_count,
-                    'total_logs': len(logs),
-                    'error_rate': error_count / len(logs) if logs else 0,
-                    'level_distribution': dict(level_counts),
-                },
-                baseline=self.error_threshold,
-                top_processes=[],
-            )
-            events.append(event)
-
-        # Check warning count
-        warning_count = level_counts.get('WARNING', 0)
-
-        if warning_count > self.warning_threshold:
-            import uuid
-            event = AnomalyEvent(
-                id=str(uuid.uuid4()),
-                timestamp=timestamp,
-                end_time=None,
-                type='high_warning_rate',
-                severity='warning',
-                confidence=0.85,
-                algorithm='log_level_anomaly_detector',
-                metrics={
-                    'warning_count': warning_count,
-                    'total_logs': len(logs),
-                    'warning_rate': warning_count / len(logs) if logs else 0,
-                },
-                baseline=self.warning_threshold,
-                top_processes=[],
-            )
-            events.append(event)
 
-        return events
+        error_count = sum(counts.get(level, 0) for level in ERROR_LEVELS)
+        check = self._check('error', error_count, self.error_threshold)
+        if check is not None:
+            events.append(self._create_event('high_error_rate', 'critical', start, end, check, {
+                'error_count': error_count,
+                'total_logs': total,
+                'error_rate': error_count / total if total else 0,
+                'level_distribution': dict(counts),
+            }))
+
+        warning_count = counts.get('WARNING', 0)
+        check = self._check('warning', warning_count, self.warning_threshold)
+        if check is not None:
+            events.append(self._create_event('high_warning_rate', 'warning', start, end, check, {
+                'warning_count': warning_count,
+                'total_logs': total,
+                'warning_rate': warning_count / total if total else 0,
+            }, static_confidence=0.85))
 
-    def cleanup(self) -> None:
-        """Cleanup resources."""
-        self._initialized = False
+        return events
 
     def get_name(self) -> str:
         """Get detector name."""
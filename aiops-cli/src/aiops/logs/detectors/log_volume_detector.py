@@ -1,74 +1,71 @@
 """Log volume anomaly detector."""
 
-from typing import List
 from datetime import datetime
-from aiops.core import BaseDetector
-from aiops.logs.models import LogEntry
+from typing import Dict, List, Optional
+from aiops.logs.detectors.windowed_detector import WindowedLogDetector
 from aiops.cpu.models.anomaly_event import AnomalyEvent
-from aiops.core.exceptions import DetectionError
 
 
-class LogVolumeAnomalyDetector(BaseDetector):
-    """Detects log volume anomalies (log storms)."""
+class LogVolumeAnomalyDetector(WindowedLogDetector):
+    """Detects log volume anomalies (log storms).
 
-    def __init__(self, volume_threshold: int = 1000):
+    Counts entries per log-time window and compares each window with a
+    rolling (or seasonal) baseline of previous windows.
+    """
+
+    SERIES = ('volume',)
+
+    def __init__(
+        self,
+        volume_threshold: Optional[int] = 1000,
+        window_seconds: int = 60,
+        history: int = 60,
+        seasonality_seconds: Optional[int] = None,
+        std_multiplier: float = 3.0,
+        min_history: int = 10
+    ):
         """Initialize log volume anomaly detector.
 
         Args:
-            volume_threshold: Threshold for log volume per time window
+            volume_threshold: Entries per window that are a storm until the
+                baseline is ready (None to wait for the baseline)
+            window_seconds: Window length in seconds
+            history: Past windows per baseline (past periods when seasonal)
+            seasonality_seconds: Season length, a multiple of the window
+            std_multiplier: Standard deviations above the baseline mean that
+                are anomalous
+            min_history: Windows needed before the baseline is used
         """
+        super().__init__(window_seconds, history, seasonality_seconds, std_multiplier, min_history)
         self.volume_threshold = volume_threshold
-        self._initialized = False
-        self._history = []
 
-    def initialize(self) -> None:
-        """Initialize the detector."""
-        self._initialized = True
-
-    def detect(self, logs: List[LogEntry]) -> List[AnomalyEvent]:
-        """Detect log volume anomalies.
+    def _evaluate(
+        self,
+        start: datetime,
+        end: datetime,
+        total: int,
+        counts: Dict[str, int]
+    ) -> List[AnomalyEvent]:
+        """Evaluate the volume of a closed window.
 
         Args:
-            logs: List of LogEntry objects
+            start: Window start
+            end: Window end
+            total: Number of entries
+            counts: Unused
 
         Returns:
-            List of AnomalyEvent objects
+            Log storm events
         """
-        if not self._initialized:
-            raise DetectionError("Detector not initialized")
-
-        events = []
-        timestamp = datetime.now()
-
-        # Check current volume
-        current_volume = len(logs)
-
-        if current_volume > self.volume_threshold:
-            import uuid
-            event = AnomalyEvent(
-                id=str(uuid.uuid4()),
-                timestamp=timestamp,
-                end_time=None,
-                type='log_storm',
-                severity='warning',
-                confidence=0.9,
-                algorithm='log_volume_anomaly_detector',
-                metrics={
-                    'log_volume': current_volume,
-                    'threshold': self.volume_threshold,
-                    'excess_ratio': current_volume / self.volume_threshold,
-                },
-                baseline=self.volume_threshold,
-                top_processes=[],
-            )
-            events.append(event)
-
-        return events
+        check = self._check('volume', total, self.volume_threshold)
+        if check is None:
+            return []
 
-    def cleanup(self) -> None:
-        """Cleanup resources."""
-        self._initialized = False
-        self._history.clear()
+        return [self._create_event('log_storm', 'warning', start, end, check, {
+            'log_volume': total,
+            'threshold': check['threshold'],
+            'excess_ratio': total / check['threshold'] if check['threshold'] else 0.0,
+        })]
 
     def get_name(self) -> str:
         """Get detector name."""
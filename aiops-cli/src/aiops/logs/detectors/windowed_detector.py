@@ -0,0 +1,397 @@
+"""Base class for detectors over fixed log-time windows."""
+
+import math
+import uuid
+from abc import abstractmethod
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from aiops.core import BaseDetector
+from aiops.logs.models import LogEntry
+from aiops.logs.parsers.timestamp_parser import to_naive
+from aiops.cpu.models.anomaly_event import AnomalyEvent
+from aiops.core.exceptions import DetectionError
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class WindowBaseline:
+    """Rolling statistics of per-window values, optionally per seasonal slot.
+
+    Without seasonality all windows share one slot holding the last
+    ``history`` values. With ``slots`` > 1 a window is compared only with the
+    same slot of previous periods (e.g. the same minute of previous days).
+    Sums are kept incrementally, so adding a value and reading the baseline
+    are O(1).
+    """
+
+    def __init__(self, history: int, slots: int = 1, min_history: int = 10):
+        """Initialize baseline.
+
+        Args:
+            history: Values kept per slot
+            slots: Number of seasonal slots
+            min_history: Values needed in a slot before it has a baseline
+        """
+        self.history = history
+        self.slots = slots
+        self.min_history = min(min_history, history)
+        self._values: Dict[int, Deque[int]] = {}
+        self._sums: Dict[int, Tuple[int, int]] = {}
+
+    def add(self, window_index: int, value: int) -> None:
+        """Add the value of a closed window.
+
+        Args:
+            window_index: Window number since the epoch
+            value: Window value
+        """
+        slot = window_index % self.slots
+        values = self._values.get(slot)
+        if values is None:
+            values = self._values[slot] = deque()
+            self._sums[slot] = (0, 0)
+
+        total, squares = self._sums[slot]
+        if len(values) == self.history:
+            old = values.popleft()
+            total -= old
+            squares -= old * old
+        values.append(value)
+        self._sums[slot] = (total + value, squares + value * value)
+
+    def stats(self, window_index: int) -> Optional[Tuple[float, float]]:
+        """Get the baseline for a window.
+
+        Args:
+            window_index: Window number since the epoch
+
+        Returns:
+            (mean, standard deviation), or None while history is too short
+        """
+        slot = window_index % self.slots
+        values = self._values.get(slot)
+        if values is None or len(values) < self.min_history:
+            return None
+
+        count = len(values)
+        total, squares = self._sums[slot]
+        mean = total / count
+        return mean, math.sqrt(max(squares / count - mean * mean, 0.0))
+
+
+class WindowedLogDetector(BaseDetector):
+    """Detector comparing per-window log counts with a baseline.
+
+    Entries are bucketed by their own timestamps into fixed windows; each
+    entry costs O(1) and only the counts of the open window are kept. When a
+    window closes, every series of the subclass is compared with its
+    baseline: the mean plus ``std_multiplier`` standard deviations (at least
+    the Poisson deviation ``sqrt(mean)``) of previous windows. Until a
+    baseline has ``min_history`` windows, the subclass's static threshold
+    applies instead.
+
+    Windows above the baseline threshold enter the baseline clipped to it, so
+    a storm does not mask the next one while lasting level shifts are still
+    learned.
+    Timezone-aware timestamps (ISO offsets, apache) are converted to naive
+    local time, so they share windows with naive ones. Entries older than the
+    open window (late or interleaved sources) are counted in the open window.
+    """
+
+    # Series compared with a baseline
+    SERIES: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        window_seconds: int = 60,
+        history: int = 60,
+        seasonality_seconds: Optional[int] = None,
+        std_multiplier: float = 3.0,
+        min_history: int = 10
+    ):
+        """Initialize windowed detector.
+
+        Args:
+            window_seconds: Window length in seconds
+            history: Past windows per baseline (past periods per slot when
+                seasonal)
+            seasonality_seconds: Season length (e.g. 86400 to compare with
+                the same time of previous days), a multiple of the window
+            std_multiplier: Standard deviations above the mean that are
+                anomalous
+            min_history: Windows needed before the baseline replaces the
+                static threshold
+        """
+        if window_seconds <= 0:
+            raise DetectionError("window_seconds must be positive")
+        if history <= 0 or min_history <= 0:
+            raise DetectionError("history and min_history must be positive")
+        if seasonality_seconds is not None and (
+                seasonality_seconds <= 0 or seasonality_seconds % window_seconds):
+            raise DetectionError(
+                "seasonality_seconds must be a positive multiple of window_seconds"
+            )
+
+        self.window_seconds = window_seconds
+        self.history = history
+        self.seasonality_seconds = seasonality_seconds
+        self.std_multiplier = std_multiplier
+        self.min_history = min_history
+        self._window = timedelta(seconds=window_seconds)
+        self._initialized = False
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget the open window and all baselines."""
+        self._slots = 1
+        if self.seasonality_seconds:
+            self._slots = self.seasonality_seconds // self.window_seconds
+        self._baselines = {
+            series: WindowBaseline(self.history, self._slots, self.min_history)
+            for series in self.SERIES
+        }
+        self._window_index: Optional[int] = None
+        self._window_start: Optional[datetime] = None
+        self._window_end: Optional[datetime] = None
+        self._total = 0
+        self._counts: Dict[str, int] = {}
+
+    def initialize(self) -> None:
+        """Initialize the detector."""
+        self._initialized = True
+
+    def detect(self, logs: Iterable[LogEntry]) -> List[AnomalyEvent]:
+        """Detect anomalies in a batch of log entries.
+
+        The batch is treated as complete: its last window is closed and
+        evaluated. For continuous input use update() and flush() instead.
+
+        Args:
+            logs: LogEntry objects in time order (any iterable)
+
+        Returns:
+            List of AnomalyEvent objects
+        """
+        if not self._initialized:
+            raise DetectionError("Detector not initialized")
+
+        events = self.feed(logs)
+        events.extend(self.flush())
+        return events
+
+    def feed(self, logs: Iterable[LogEntry]) -> List[AnomalyEvent]:
+        """Add log entries, evaluating the windows they close.
+
+        Args:
+            logs: LogEntry objects in time order (any iterable)
+
+        Returns:
+            Events of the closed windows
+        """
+        events = []
+        count = self._count
+        for entry in logs:
+            start = self._window_start
+            timestamp = entry.timestamp
+            if timestamp.tzinfo is not None:
+                timestamp = to_naive(timestamp)
+            if start is not None and start <= timestamp < self._window_end:
+                self._total += 1
+                count(entry)
+            else:
+                events.extend(self.update(entry))
+        return events
+
+    def update(self, entry: LogEntry) -> List[AnomalyEvent]:
+        """Add one log entry.
+
+        Args:
+            entry: Log entry
+
+        Returns:
+            Events of the windows closed by this entry
+        """
+        timestamp = to_naive(entry.timestamp)
+        events = []
+        if self._window_start is None or timestamp >= self._window_end:
+            window_index = (timestamp - _EPOCH) // self._window
+            if self._window_start is not None:
+                events = self._close()
+                self._fill_gap(window_index)
+            self._open(window_index)
+
+        self._total += 1
+        self._count(entry)
+        return events
+
+    def flush(self) -> List[AnomalyEvent]:
+        """Close and evaluate the open window.
+
+        Returns:
+            Events of the closed window
+        """
+        if self._window_start is None:
+            return []
+        events = self._close()
+        self._window_start = self._window_end = None
+        return events
+
+    def _open(self, window_index: int) -> None:
+        """Start a new window.
+
+        Args:
+            window_index: Window number since the epoch
+        """
+        self._window_index = window_index
+        self._window_start = _EPOCH + window_index * self._window
+        self._window_end = self._window_start + self._window
+        self._total = 0
+        self._counts = {}
+
+    def _close(self) -> List[AnomalyEvent]:
+        """Evaluate the open window and add it to the baselines.
+
+        Returns:
+            Events of the window
+        """
+        return self._evaluate(self._window_start, self._window_end, self._total, self._counts)
+
+    def _fill_gap(self, window_index: int) -> None:
+        """Add empty windows between the closed window and a new one.
+
+        Args:
+            window_index: Index of the window being opened
+        """
+        first = max(self._window_index + 1, window_index - self.history * self._slots)
+        for index in range(first, window_index):
+            for baseline in self._baselines.values():
+                baseline.add(index, 0)
+
+    def _check(
+        self,
+        series: str,
+        value: int,
+        static_threshold: Optional[float]
+    ) -> Optional[Dict[str, Any]]:
+        """Compare a series value of the open window with its baseline.
+
+        The value is added to the baseline afterwards.
+
+        Args:
+            series: Series name
+            value: Value of the open window
+            static_threshold: Threshold used until the baseline is ready
+
+        Returns:
+            Threshold details if the value is anomalous, else None
+        """
+        baseline = self._baselines[series]
+        stats = baseline.stats(self._window_index)
+        result = None
+
+        if stats is None:
+            threshold = static_threshold
+            if threshold is not None and value > threshold:
+                result = {'threshold': threshold, 'method': 'static'}
+        else:
+            mean, std = stats
+            spread = max(std, math.sqrt(max(mean, 1.0)))
+            threshold = mean + self.std_multiplier * spread
+            if value > threshold:
+                result = {
+                    'threshold': threshold,
+                    'method': 'seasonal' if baseline.slots > 1 else 'rolling',
+                    'baseline_mean': mean,
+                    'baseline_std': std,
+                    'z_score': (value - mean) / spread,
+                }
+
+        if result is not None and stats is not None:
+            value = min(value, int(threshold))
+        baseline.add(self._window_index, value)
+        return result
+
+    def _create_event(
+        self,
+        event_type: str,
+        severity: str,
+        start: datetime,
+        end: datetime,
+        check: Dict[str, Any],
+        metrics: Dict[str, Any],
+        static_confidence: float = 0.9
+    ) -> AnomalyEvent:
+        """Create an event for an anomalous window.
+
+        Args:
+            event_type: Event type
+            severity: Event severity
+            start: Window start
+            end: Window end
+            check: Result of _check()
+            metrics: Event metrics
+            static_confidence: Confidence of static threshold alerts
+
+        Returns:
+            AnomalyEvent object
+        """
+        if check['method'] == 'static':
+            confidence = static_confidence
+        else:
+            confidence = min(1.0, 0.5 + check['z_score'] / 10.0)
+            metrics.update(
+                baseline_mean=check['baseline_mean'],
+                baseline_std=check['baseline_std'],
+                z_score=check['z_score'],
+            )
+
+        return AnomalyEvent(
+            id=str(uuid.uuid4()),
+            timestamp=start,
+            end_time=end,
+            type=event_type,
+            severity=severity,
+            confidence=confidence,
+            algorithm=self.get_name(),
+            metrics=metrics,
+            baseline=check['threshold'],
+            top_processes=[],
+            metadata={'baseline_method': check['method'], 'window_seconds': self.window_seconds},
+        )
+
+    def _count(self, entry: LogEntry) -> None:
+        """Count an entry of the open window beyond the total.
+
+        Args:
+            entry: Log entry
+        """
+
+    @abstractmethod
+    def _evaluate(
+        self,
+        start: datetime,
+        end: datetime,
+        total: int,
+        counts: Dict[str, int]
+    ) -> List[AnomalyEvent]:
+        """Evaluate a closed window.
+
+        Subclasses call _check() once per series.
+
+        Args:
+            start: Window start
+            end: Window end
+            total: Number of entries
+            counts: Counts collected by _count()
+
+        Returns:
+            Events of the window
+        """
+        pass
+
+    def cleanup(self) -> None:
+        """Cleanup resources."""
+        self._initialized = False
+        self._reset()
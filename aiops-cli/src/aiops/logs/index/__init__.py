@@ -0,0 +1,7 @@
+"""Log indexes."""
+
+from aiops.logs.index.log_index import LogIndex
+
+__all__ = [
+    'LogIndex',
+]
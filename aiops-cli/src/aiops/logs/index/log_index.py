@@ -0,0 +1,488 @@
+"""Inverted token index over plain-text log files."""
+
+import hashlib
+import os
+import sqlite3
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from aiops.logs.models import LogEntry
+from aiops.logs.parsers import LogParser, TemplateExtractor
+from aiops.logs.parsers.timestamp_parser import to_naive
+from aiops.core.exceptions import StorageError
+
+
+INDEX_VERSION = 1
+
+# Default directory for index files
+DEFAULT_INDEX_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'aiops', 'log-index',
+)
+
+# Bytes of log text covered by one index block
+BLOCK_SIZE = 1024 * 1024
+
+# Bytes at the start of the file used to detect rotation and truncation
+HEAD_FINGERPRINT_BYTES = 4096
+
+
+class LogIndex:
+    """On-disk inverted index for one log file.
+
+    The index lives in a SQLite file outside the log directory. The log is
+    split into blocks of about ``BLOCK_SIZE`` bytes. For each block it stores:
+
+    - posting lists (block-relative byte offsets) for ``level:<LEVEL>``,
+      ``tpl:<template id>`` and every word token of the message;
+    - the byte offset of every line, used to recover line numbers;
+    - the minimum and maximum timestamp, so that time ranges select blocks
+      without reading the log.
+
+    ``update`` indexes only the bytes appended since the last run. If the file
+    was rotated (different inode) or truncated (smaller, or its first bytes
+    changed), the index is dropped and rebuilt.
+    """
+
+    def __init__(self, log_path: str, index_dir: Optional[str] = None):
+        """Initialize log index.
+
+        Args:
+            log_path: Path to the (uncompressed) log file
+            index_dir: Directory holding index files (default: ~/.cache/aiops/log-index)
+        """
+        self.log_path = os.path.realpath(log_path)
+        self.index_dir = Path(index_dir or DEFAULT_INDEX_DIR)
+        digest = hashlib.sha1(self.log_path.encode('utf-8')).hexdigest()[:16]
+        self.index_path = self.index_dir / f"{os.path.basename(self.log_path)}.{digest}.idx"
+        self.extractor = TemplateExtractor()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def indexed_size(self) -> int:
+        """Get the number of bytes of the log file covered by the index."""
+        self.open()
+        return int(self._get_meta().get('indexed_size', 0))
+
+    def open(self) -> None:
+        """Open (and create if needed) the index database."""
+        if self._conn is not None:
+            return
+
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.index_path))
+            self._conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                CREATE TABLE IF NOT EXISTS blocks (
+                    block INTEGER PRIMARY KEY,
+                    start_offset INTEGER NOT NULL,
+                    end_offset INTEGER NOT NULL,
+                    first_line INTEGER NOT NULL,
+                    min_ts REAL,
+                    max_ts REAL,
+                    line_offsets BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    block INTEGER NOT NULL,
+                    offsets BLOB NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_postings_term ON postings(term, block);
+            """)
+        except sqlite3.Error as e:
+            raise StorageError(f"Cannot open log index {self.index_path}: {str(e)}")
+
+    def close(self) -> None:
+        """Close the index database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> 'LogIndex':
+        self.open()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _get_meta(self) -> Dict[str, str]:
+        """Read index metadata."""
+        return dict(self._conn.execute("SELECT key, value FROM meta"))
+
+    def _set_meta(self, values: Dict[str, object]) -> None:
+        """Write index metadata.
+
+        Args:
+            values: Metadata to store
+        """
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()],
+        )
+
+    def _fingerprint(self, length: int) -> str:
+        """Hash the first bytes of the log file.
+
+        Args:
+            length: Number of bytes to hash
+
+        Returns:
+            Hex digest
+        """
+        with open(self.log_path, 'rb') as f:
+            return hashlib.sha1(f.read(length)).hexdigest()
+
+    def _is_stale(self, meta: Dict[str, str], stat: os.stat_result) -> bool:
+        """Check if the index belongs to a previous incarnation of the file.
+
+        Args:
+            meta: Index metadata
+            stat: Current stat of the log file
+
+        Returns:
+            True if the index must be rebuilt
+        """
+        if not meta:
+            return False
+        if int(meta.get('version', 0)) != INDEX_VERSION:
+            return True
+        if int(meta['inode']) != stat.st_ino or int(meta['device']) != stat.st_dev:
+            return True
+        if stat.st_size < int(meta['indexed_size']):
+            return True
+        head_length = int(meta['head_length'])
+        return self._fingerprint(head_length) != meta['head_hash']
+
+    def clear(self) -> None:
+        """Drop all indexed data."""
+        self._conn.execute("DELETE FROM postings")
+        self._conn.execute("DELETE FROM blocks")
+        self._conn.execute("DELETE FROM meta")
+        self._conn.commit()
+
+    def update(self) -> int:
+        """Bring the index up to date with the log file.
+
+        Only complete lines are indexed; a trailing partial line is picked up
+        by the next update.
+
+        Returns:
+            Number of newly indexed lines
+        """
+        self.open()
+
+        try:
+            stat = os.stat(self.log_path)
+        except OSError as e:
+            raise StorageError(f"Cannot stat log file {self.log_path}: {str(e)}")
+
+        meta = self._get_meta()
+        if self._is_stale(meta, stat):
+            self.clear()
+            meta = {}
+
+        indexed_size = int(meta.get('indexed_size', 0))
+        if stat.st_size == indexed_size:
+            return 0
+
+        line_count = int(meta.get('line_count', 0))
+        next_block = int(meta.get('next_block', 0))
+
+        parser = LogParser()
+        block = _BlockBuilder(next_block, indexed_size, line_count + 1)
+        new_lines = 0
+        offset = indexed_size
+
+        with open(self.log_path, 'rb') as f:
+            f.seek(indexed_size)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+
+                entry = parser.parse(raw.decode('utf-8', errors='ignore'), self.log_path)
+                block.add_line(offset, entry, self.extractor)
+                offset += len(raw)
+                new_lines += 1
+
+                if offset - block.start_offset >= BLOCK_SIZE:
+                    block.end_offset = offset
+                    self._write_block(block)
+                    block = _BlockBuilder(block.block + 1, offset, block.next_line)
+
+        if block.line_offsets:
+            block.end_offset = offset
+            self._write_block(block)
+            next_block = block.block + 1
+        else:
+            next_block = block.block
+
+        head_length = min(HEAD_FINGERPRINT_BYTES, offset)
+        self._set_meta({
+            'version': INDEX_VERSION,
+            'log_path': self.log_path,
+            'inode': stat.st_ino,
+            'device': stat.st_dev,
+            'indexed_size': offset,
+            'line_count': line_count + new_lines,
+            'next_block': next_block,
+            'head_length': head_length,
+            'head_hash': self._fingerprint(head_length),
+        })
+        self._conn.commit()
+        return new_lines
+
+    def _write_block(self, block: '_BlockBuilder') -> None:
+        """Persist a block and its posting lists.
+
+        Args:
+            block: Finished block
+        """
+        self._conn.execute(
+            "INSERT INTO blocks (block, start_offset, end_offset, first_line, min_ts, max_ts, "
+            "line_offsets) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (block.block, block.start_offset, block.end_offset, block.first_line,
+             block.min_ts, block.max_ts, block.line_offsets.tobytes()),
+        )
+        self._conn.executemany(
+            "INSERT INTO postings (term, block, offsets) VALUES (?, ?, ?)",
+            [(term, block.block, offsets.tobytes()) for term, offsets in block.postings.items()],
+        )
+
+    def stats(self) -> Dict[str, object]:
+        """Get index statistics.
+
+        Returns:
+            Dictionary with index statistics
+        """
+        self.open()
+        meta = self._get_meta()
+        blocks = self._conn.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+        terms = self._conn.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+        return {
+            'log_path': self.log_path,
+            'index_path': str(self.index_path),
+            'indexed_bytes': int(meta.get('indexed_size', 0)),
+            'indexed_lines': int(meta.get('line_count', 0)),
+            'blocks': blocks,
+            'terms': terms,
+            'index_bytes': os.path.getsize(self.index_path) if self.index_path.exists() else 0,
+        }
+
+    def search(
+        self,
+        level: Optional[str] = None,
+        contains: Optional[str] = None,
+        template_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Tuple[int, int]]:
+        """Find candidate lines matching all given conditions.
+
+        ``contains`` is matched on word tokens, so candidates may still need
+        to be checked against the exact substring.
+
+        Args:
+            level: Log level
+            contains: Text whose word tokens must all appear in the message
+            template_id: Template id
+            since: Only blocks with entries at or after this time
+            until: Only blocks with entries at or before this time
+
+        Returns:
+            Sorted list of (byte offset, line number) tuples
+        """
+        self.open()
+
+        terms = []
+        if level:
+            terms.append(f"level:{level.upper()}")
+        if template_id:
+            terms.append(f"tpl:{template_id}")
+        if contains:
+            terms.extend(self.extractor.tokenize(contains))
+
+        blocks = self._select_blocks(since, until)
+        if not blocks:
+            return []
+
+        if terms:
+            candidates: Optional[Dict[int, Set[int]]] = None
+            for term in sorted(terms, key=self._term_frequency):
+                postings = self._load_postings(term, blocks)
+                if candidates is None:
+                    candidates = postings
+                else:
+                    candidates = {
+                        block: candidates[block] & relative
+                        for block, relative in postings.items()
+                        if block in candidates
+                    }
+                    candidates = {
+                        block: relative for block, relative in candidates.items() if relative
+                    }
+                if not candidates:
+                    return []
+        else:
+            candidates = {
+                block: set(line_offsets) for block, (_, _, line_offsets) in blocks.items()
+            }
+
+        matches = []
+        for block in sorted(candidates):
+            start, first_line, line_offsets = blocks[block]
+            for relative in sorted(candidates[block]):
+                matches.append((start + relative, first_line + bisect_left(line_offsets, relative)))
+        return matches
+
+    def _select_blocks(
+        self,
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> Dict[int, Tuple[int, int, array]]:
+        """Select blocks overlapping a time range.
+
+        Args:
+            since: Range start
+            until: Range end
+
+        Returns:
+            Mapping of block id to (start offset, first line, line offsets)
+        """
+        query = "SELECT block, start_offset, first_line, line_offsets FROM blocks WHERE 1=1"
+        params: List[float] = []
+        if since is not None:
+            query += " AND (max_ts IS NULL OR max_ts >= ?)"
+            params.append(to_naive(since).timestamp())
+        if until is not None:
+            query += " AND (min_ts IS NULL OR min_ts <= ?)"
+            params.append(to_naive(until).timestamp())
+
+        blocks = {}
+        for block, start_offset, first_line, blob in self._conn.execute(query, params):
+            line_offsets = array('I')
+            line_offsets.frombytes(blob)
+            blocks[block] = (start_offset, first_line, line_offsets)
+        return blocks
+
+    def _term_frequency(self, term: str) -> int:
+        """Approximate posting list size of a term, used to intersect rarest first.
+
+        Args:
+            term: Index term
+
+        Returns:
+            Total posting bytes
+        """
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(offsets)), 0) FROM postings WHERE term = ?", (term,)
+        ).fetchone()
+        return row[0]
+
+    def _load_postings(
+        self,
+        term: str,
+        blocks: Dict[int, Tuple[int, int, array]]
+    ) -> Dict[int, Set[int]]:
+        """Load the posting lists of a term within the selected blocks.
+
+        Args:
+            term: Index term
+            blocks: Selected blocks
+
+        Returns:
+            Mapping of block id to block-relative offsets
+        """
+        postings: Dict[int, Set[int]] = {}
+        for block, blob in self._conn.execute(
+            "SELECT block, offsets FROM postings WHERE term = ?", (term,)
+        ):
+            if block not in blocks:
+                continue
+            relative = array('I')
+            relative.frombytes(blob)
+            postings.setdefault(block, set()).update(relative)
+        return postings
+
+    def read_entries(
+        self,
+        matches: List[Tuple[int, int]],
+        parser: Optional[LogParser] = None
+    ) -> Iterator[LogEntry]:
+        """Read and parse the lines at the given offsets.
+
+        Each line is parsed on its own: continuation lines are not merged and
+        a line without a timestamp inherits the previous match's. LogCollector
+        with ``use_index`` reads whole records instead.
+
+        Args:
+            matches: (byte offset, line number) tuples from ``search``
+            parser: Parser to use (default: a new LogParser)
+
+        Yields:
+            LogEntry objects in file order
+        """
+        parser = parser or LogParser()
+        with open(self.log_path, 'rb') as f:
+            for offset, line_number in matches:
+                f.seek(offset)
+                line = f.readline().decode('utf-8', errors='ignore')
+                entry = parser.parse(line, self.log_path, line_number)
+                if entry:
+                    yield entry
+
+
+class _BlockBuilder:
+    """Accumulates posting lists for one block while indexing."""
+
+    def __init__(self, block: int, start_offset: int, first_line: int):
+        self.block = block
+        self.start_offset = start_offset
+        self.end_offset = start_offset
+        self.first_line = first_line
+        self.next_line = first_line
+        self.min_ts: Optional[float] = None
+        self.max_ts: Optional[float] = None
+        self.line_offsets = array('I')
+        self.postings: Dict[str, array] = defaultdict(lambda: array('I'))
+
+    def add_line(
+        self,
+        offset: int,
+        entry: Optional[LogEntry],
+        extractor: TemplateExtractor
+    ) -> None:
+        """Index one line.
+
+        Args:
+            offset: Absolute byte offset of the line
+            entry: Parsed entry, or None for blank lines
+            extractor: Template extractor used for template ids and tokens
+        """
+        relative = offset - self.start_offset
+        self.line_offsets.append(relative)
+        self.next_line += 1
+
+        if entry is None:
+            return
+
+        timestamp = to_naive(entry.timestamp).timestamp()
+        if self.min_ts is None or timestamp < self.min_ts:
+            self.min_ts = timestamp
+        if self.max_ts is None or timestamp > self.max_ts:
+            self.max_ts = timestamp
+
+        postings = self.postings
+        postings[f"level:{entry.level}"].append(relative)
+        _, template_id = extractor.extract(entry.message)
+        postings[f"tpl:{template_id}"].append(relative)
+        for token in extractor.tokenize(entry.message):
+            postings[token].append(relative)
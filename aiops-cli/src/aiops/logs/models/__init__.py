@@ -1,10 +1,14 @@
 """Log models."""
 
 from aiops.logs.models.log_entry import LogEntry, LogLevel
+from aiops.logs.models.log_metric import LogMetric
 from aiops.logs.models.log_pattern import LogPattern
+from aiops.logs.models.oom_kill import OOMKill
 
 __all__ = [
     'LogEntry',
     'LogLevel',
+    'LogMetric',
     'LogPattern',
+    'OOMKill',
 ]
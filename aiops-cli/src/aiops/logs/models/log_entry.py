@@ -17,6 +17,9 @@ class LogLevel(Enum):
     UNKNOWN = "UNKNOWN"
 
 
+VALID_LEVELS = frozenset(level.value for level in LogLevel)
+
+
 @dataclass
 class LogEntry:
     """Log entry data model."""
@@ -50,8 +53,7 @@ class LogEntry:
         self.level = self.level.upper()
 
         # Validate log level
-        valid_levels = [level.value for level in LogLevel]
-        if self.level not in valid_levels:
+        if self.level not in VALID_LEVELS:
             self.level = LogLevel.UNKNOWN.value
 
     @property
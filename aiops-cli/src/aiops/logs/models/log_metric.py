@@ -0,0 +1,45 @@
+"""Log metric data model."""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict
+
+
+@dataclass
+class LogMetric:
+    """Log counts of one interval of the metric collection grid."""
+
+    timestamp: datetime  # Interval start
+    interval_seconds: float
+    total: int = 0
+
+    # Counts per series value
+    levels: Dict[str, int] = field(default_factory=dict)
+    templates: Dict[str, int] = field(default_factory=dict)  # Keyed by template id
+    processes: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        """Validate log metric."""
+        if self.interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+
+        if self.total < 0:
+            raise ValueError("total must be non-negative")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a flat dictionary of series.
+
+        Returns:
+            Dictionary with ``level.<LEVEL>``, ``template.<id>`` and
+            ``process.<name>`` counts
+        """
+        data: Dict[str, Any] = {
+            'timestamp': self.timestamp.isoformat(),
+            'interval_seconds': self.interval_seconds,
+            'total': self.total,
+        }
+        for prefix, counts in (('level', self.levels), ('template', self.templates),
+                               ('process', self.processes)):
+            for name, count in counts.items():
+                data[f'{prefix}.{name}'] = count
+        return data
@@ -0,0 +1,71 @@
+"""OOM kill data model."""
+
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class OOMKill:
+    """A process killed by the kernel OOM killer.
+
+    Assembled from the kernel messages of one OOM kill: the
+    ``invoked oom-killer`` line, the memory cgroup usage, the
+    ``oom-kill:`` summary and the ``Killed process`` line.
+    """
+
+    timestamp: datetime
+    pid: int  # Victim
+    process_name: str
+
+    # Victim memory in kB
+    total_vm_kb: Optional[int] = None
+    anon_rss_kb: Optional[int] = None
+    file_rss_kb: Optional[int] = None
+    shmem_rss_kb: Optional[int] = None
+
+    uid: Optional[int] = None
+    oom_score_adj: Optional[int] = None
+
+    # Context of the kill
+    trigger_process: Optional[str] = None  # Process whose allocation invoked the OOM killer
+    constraint: Optional[str] = None  # CONSTRAINT_NONE, CONSTRAINT_MEMCG, ...
+    cgroup: Optional[str] = None  # Victim memory cgroup
+    oom_memcg: Optional[str] = None  # Memory cgroup that ran out of memory
+    memcg_usage_kb: Optional[int] = None
+    memcg_limit_kb: Optional[int] = None
+
+    source: Optional[str] = None
+    sequence: Optional[int] = None  # Sequence number of the Killed process record
+
+    def __post_init__(self):
+        """Validate OOM kill."""
+        if self.pid < 0:
+            raise ValueError("pid must be non-negative")
+
+        if not self.process_name:
+            raise ValueError("process_name cannot be empty")
+
+    @property
+    def rss_kb(self) -> Optional[int]:
+        """Get the victim's resident memory (anon + file + shmem) in kB."""
+        parts = (self.anon_rss_kb, self.file_rss_kb, self.shmem_rss_kb)
+        if all(part is None for part in parts):
+            return None
+        return sum(part or 0 for part in parts)
+
+    @property
+    def is_cgroup_limit(self) -> bool:
+        """Check if the kill was caused by a memory cgroup limit."""
+        return self.constraint == 'CONSTRAINT_MEMCG'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary.
+
+        Returns:
+            Dictionary representation
+        """
+        data = asdict(self)
+        data['timestamp'] = self.timestamp.isoformat()
+        data['rss_kb'] = self.rss_kb
+        return data
@@ -1,7 +1,15 @@
 """Log parsers."""
 
 from aiops.logs.parsers.log_parser import LogParser
+from aiops.logs.parsers.timestamp_parser import TimestampParser
+from aiops.logs.parsers.template_extractor import TemplateExtractor
+from aiops.logs.parsers.multiline import MultilineAssembler
+from aiops.logs.parsers.kmsg_parser import KmsgParser
 
 __all__ = [
     'LogParser',
+    'TimestampParser',
+    'TemplateExtractor',
+    'MultilineAssembler',
+    'KmsgParser',
 ]
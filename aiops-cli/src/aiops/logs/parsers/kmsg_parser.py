@@ -0,0 +1,186 @@
+"""Parser for kernel ring buffer messages (/dev/kmsg and dmesg output)."""
+
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from aiops.logs.models import LogEntry
+
+
+# Syslog priority (pri & 7) to log level
+PRIORITY_LEVELS = ('FATAL', 'CRITICAL', 'CRITICAL', 'ERROR', 'WARNING', 'INFO', 'INFO', 'DEBUG')
+
+# Kernel messages are logged with the kernel facility unless written by user space
+KERNEL_FACILITY = 0
+
+
+class KmsgParser:
+    """Parse kernel log records into LogEntry objects.
+
+    Supports the /dev/kmsg record format
+    (``6,1234,5678901,-;message`` followed by `` KEY=value`` device
+    properties) and dmesg text output with ``[  5678.901234] message`` or raw
+    ``<6>[  5678.901234] message`` prefixes.
+
+    Records carry monotonic timestamps (microseconds since boot), which are
+    converted to wall-clock time with ``boot_time``. The sequence number,
+    monotonic time, priority, subsystem and device properties are kept in
+    ``parameters``. Text output has no sequence numbers; the caller passes
+    the line number instead.
+    """
+
+    KMSG_PATTERN = re.compile(r'(\d+),(\d+),(\d+),([^;,]*)[^;]*;(.*)', re.DOTALL)
+    DMESG_PATTERN = re.compile(r'(?:<(\d+)>)?\[\s*(\d+)\.(\d+)\]\s?(.*)', re.DOTALL)
+
+    # Subsystem prefix such as "EXT4-fs (sda1): ..." or "nvme nvme0: ..."
+    SUBSYSTEM_PATTERN = re.compile(r'([A-Za-z][\w.-]*)(?: [\w.:-]+)?(?: \([^)]*\))?: ')
+
+    def __init__(self, boot_time: Optional[datetime] = None):
+        """Initialize kmsg parser.
+
+        Args:
+            boot_time: Wall-clock boot time (default: epoch, so timestamps
+                are time since boot)
+        """
+        self.boot_time = boot_time or datetime(1970, 1, 1)
+
+    def parse_record(self, record: str, source: str = '/dev/kmsg') -> Optional[LogEntry]:
+        """Parse one /dev/kmsg record.
+
+        Args:
+            record: Record as returned by one read() of /dev/kmsg
+            source: Source identifier
+
+        Returns:
+            LogEntry, or None if the record is malformed
+        """
+        match = self.KMSG_PATTERN.match(record)
+        if not match:
+            return None
+
+        priority, sequence, monotonic_us, flags, body = match.groups()
+        lines = body.rstrip('\n').split('\n')
+        properties: Dict[str, str] = {}
+        for line in lines[1:]:
+            key, sep, value = line.strip().partition('=')
+            if sep:
+                properties[key] = value
+
+        return self._create_entry(
+            int(priority), int(sequence), int(monotonic_us), self._unescape(lines[0]), source,
+            record.rstrip('\n'), properties, continued=flags == 'c'
+        )
+
+    def parse_line(
+        self,
+        line: str,
+        source: str,
+        line_number: Optional[int] = None
+    ) -> Optional[LogEntry]:
+        """Parse one line of dmesg text output.
+
+        Args:
+            line: Line of dmesg output
+            source: Source identifier (file path)
+            line_number: Line number, used as the sequence number
+
+        Returns:
+            LogEntry, or None if the line has no kernel timestamp
+        """
+        match = self.DMESG_PATTERN.match(line.rstrip('\n'))
+        if not match:
+            return None
+
+        priority, seconds, fraction, message = match.groups()
+        monotonic_us = int(seconds) * 1000000 + int(fraction.ljust(6, '0')[:6])
+        entry = self._create_entry(
+            int(priority) if priority else 6, line_number, monotonic_us, message, source,
+            line.rstrip('\n'), {}
+        )
+        if entry is not None:
+            entry.line_number = line_number
+        return entry
+
+    def parse_lines(self, lines: List[str], source: str) -> List[LogEntry]:
+        """Parse dmesg text output.
+
+        Args:
+            lines: Lines of dmesg output
+            source: Source identifier
+
+        Returns:
+            List of LogEntry objects
+        """
+        entries = []
+        for line_number, line in enumerate(lines, start=1):
+            entry = self.parse_line(line, source, line_number)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def _create_entry(
+        self,
+        priority: int,
+        sequence: Optional[int],
+        monotonic_us: int,
+        message: str,
+        source: str,
+        raw_line: str,
+        properties: Dict[str, str],
+        continued: bool = False
+    ) -> Optional[LogEntry]:
+        """Create a log entry from the fields of a kernel record.
+
+        Args:
+            priority: Syslog priority (facility * 8 + level)
+            sequence: Record sequence number
+            monotonic_us: Microseconds since boot
+            message: Message text
+            source: Source identifier
+            raw_line: Raw record
+            properties: Device properties
+            continued: Record is a fragment continued by the next one
+
+        Returns:
+            LogEntry, or None for empty messages
+        """
+        if not message.strip():
+            return None
+
+        facility = priority >> 3
+        match = self.SUBSYSTEM_PATTERN.match(message)
+        parameters = {
+            'sequence': sequence,
+            'monotonic_us': monotonic_us,
+            'priority': priority & 7,
+            'facility': facility,
+        }
+        if match:
+            parameters['subsystem'] = match.group(1)
+        if properties:
+            parameters['properties'] = properties
+        if continued:
+            parameters['continued'] = True
+
+        return LogEntry(
+            timestamp=self.boot_time + timedelta(microseconds=monotonic_us),
+            level=PRIORITY_LEVELS[priority & 7],
+            message=message,
+            source=source,
+            process='kernel' if facility == KERNEL_FACILITY else None,
+            raw_line=raw_line,
+            parameters=parameters,
+        )
+
+    @staticmethod
+    def _unescape(text: str) -> str:
+        r"""Decode the \xNN escapes /dev/kmsg uses for non-printable bytes.
+
+        Args:
+            text: Escaped message
+
+        Returns:
+            Message text
+        """
+        if '\\x' not in text:
+            return text
+        return re.sub(r'\\x([0-9a-fA-F]{2})', lambda match: chr(int(match.group(1), 16)), text)
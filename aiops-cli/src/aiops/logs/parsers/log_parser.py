@@ -1,13 +1,60 @@
 """Log parser for extracting structured information from log lines."""
 
+import json
 import re
-from datetime import datetime
-from typing import Optional, Dict, Any
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple, Pattern, Sequence, Union
 from aiops.logs.models import LogEntry, LogLevel
+from aiops.logs.parsers.timestamp_parser import TimestampParser
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Entry fields filled from JSON lines, in unpacking order
+JSON_ENTRY_FIELDS = ('timestamp', 'level', 'message', 'process', 'pid', 'hostname')
+
+
+class _SourceFormat:
+    """Format sniffing state for a single log source."""
+
+    __slots__ = ('locked', 'preceding', 'votes', 'sniffed', 'misses', 'last_timestamp')
+
+    def __init__(self):
+        self.locked: Optional[Tuple[str, Pattern]] = None
+        # More specific patterns, tried before the locked one
+        self.preceding: List[Tuple[str, Pattern]] = []
+        self.votes: Counter = Counter()
+        self.sniffed = 0
+        self.misses = 0
+        self.last_timestamp: Optional[datetime] = None
+
+    def reset(self) -> None:
+        """Drop the locked format and start sniffing again."""
+        self.locked = None
+        self.preceding = []
+        self.votes.clear()
+        self.sniffed = 0
+        self.misses = 0
 
 
 class LogParser:
-    """Parse log lines into structured LogEntry objects."""
+    """Parse log lines into structured LogEntry objects.
+
+    Each source starts in sniffing mode, where every pattern is tried in
+    order. After ``sniff_lines`` lines the parser locks onto the pattern that
+    matched most often and only tries that one, after the more specific
+    patterns listed before it (so a python logging line is never parsed by
+    the generic pattern); ``resniff_misses`` consecutive misses drop the lock
+    and sniffing starts over.
+
+    Lines without a parseable timestamp inherit the last timestamp seen on the
+    same source, so entry order follows the file rather than the wall clock.
+
+    Lines starting with ``{`` are decoded as JSON objects first. Entry fields
+    are looked up through ``json_fields`` (see ``JSON_FIELDS``); the remaining
+    keys become the entry's ``parameters``.
+    """
 
     # Common log patterns
     SYSLOG_PATTERN = re.compile(
@@ -39,14 +86,103 @@ class LogParser:
         re.IGNORECASE
     )
 
-    def __init__(self):
-        """Initialize log parser."""
+    # Level keywords, matched with a lookahead so overlapping keywords are all
+    # found in one pass over the lowercased message
+    LEVEL_KEYWORD_PATTERN = re.compile(
+        r'(?=(f(?:atal|ail(?:ed|ure))|panic|crit|e(?:rr|xception)|warn|debug|trace))'
+    )
+
+    KEYWORD_LEVELS = {
+        'fatal': (5, LogLevel.FATAL.value),
+        'panic': (5, LogLevel.FATAL.value),
+        'crit': (4, LogLevel.CRITICAL.value),
+        'err': (3, LogLevel.ERROR.value),
+        'exception': (3, LogLevel.ERROR.value),
+        'failed': (3, LogLevel.ERROR.value),
+        'failure': (3, LogLevel.ERROR.value),
+        'warn': (2, LogLevel.WARNING.value),
+        'debug': (1, LogLevel.DEBUG.value),
+        'trace': (1, LogLevel.DEBUG.value),
+    }
+
+    # JSON keys tried, in order, for each entry field
+    JSON_FIELDS = {
+        'timestamp': ('timestamp', 'time', 'ts', '@timestamp'),
+        'level': ('level', 'severity', 'lvl', 'levelname'),
+        'message': ('message', 'msg', 'log'),
+        'process': ('logger', 'name', 'process', 'service'),
+        'pid': ('pid',),
+        'hostname': ('hostname', 'host'),
+    }
+
+    # Short names accepted in json_fields
+    JSON_FIELD_ALIASES = {
+        'ts': 'timestamp',
+        'msg': 'message',
+        'host': 'hostname',
+    }
+
+    JSON_LEVELS = {
+        'trace': LogLevel.DEBUG.value,
+        'debug': LogLevel.DEBUG.value,
+        'info': LogLevel.INFO.value,
+        'notice': LogLevel.INFO.value,
+        'warn': LogLevel.WARNING.value,
+        'warning': LogLevel.WARNING.value,
+        'err': LogLevel.ERROR.value,
+        'error': LogLevel.ERROR.value,
+        'crit': LogLevel.CRITICAL.value,
+        'critical': LogLevel.CRITICAL.value,
+        'fatal': LogLevel.FATAL.value,
+        'panic': LogLevel.FATAL.value,
+        # bunyan / pino numeric levels
+        10: LogLevel.DEBUG.value,
+        20: LogLevel.DEBUG.value,
+        30: LogLevel.INFO.value,
+        40: LogLevel.WARNING.value,
+        50: LogLevel.ERROR.value,
+        60: LogLevel.FATAL.value,
+    }
+
+    def __init__(
+        self,
+        sniff_lines: int = 20,
+        resniff_misses: int = 5,
+        json_fields: Optional[Dict[str, Union[str, Sequence[str]]]] = None
+    ):
+        """Initialize log parser.
+
+        Args:
+            sniff_lines: Number of lines sampled per source before locking a format
+            resniff_misses: Consecutive misses of the locked format that trigger re-sniffing
+            json_fields: JSON key (or keys, tried in order) per entry field, overriding
+                ``JSON_FIELDS`` (e.g. ``{'ts': 'time', 'msg': ['text', 'body']}``)
+        """
+        if sniff_lines <= 0:
+            raise ValueError("sniff_lines must be positive")
+        if resniff_misses <= 0:
+            raise ValueError("resniff_misses must be positive")
+
+        self.json_fields = dict(self.JSON_FIELDS)
+        for field_name, keys in (json_fields or {}).items():
+            field_name = self.JSON_FIELD_ALIASES.get(field_name, field_name)
+            if field_name not in self.JSON_FIELDS:
+                raise ValueError(f"Unknown JSON field: {field_name}")
+            self.json_fields[field_name] = (keys,) if isinstance(keys, str) else tuple(keys)
+        self._json_key_groups = tuple(
+            self.json_fields[field_name] for field_name in JSON_ENTRY_FIELDS
+        )
+
         self.patterns = [
             ('python', self.PYTHON_PATTERN),
             ('generic', self.GENERIC_PATTERN),
             ('syslog', self.SYSLOG_PATTERN),
             ('apache', self.APACHE_PATTERN),
         ]
+        self.sniff_lines = sniff_lines
+        self.resniff_misses = resniff_misses
+        self.timestamp_parser = TimestampParser()
+        self._formats: Dict[str, _SourceFormat] = {}
 
     def parse(self, line: str, source: str, line_number: Optional[int] = None) -> Optional[LogEntry]:
         """Parse a log line into a LogEntry.
@@ -63,15 +199,200 @@ class LogParser:
         if not line:
             return None
 
-        # Try each pattern
+        state = self._formats.get(source)
+        if state is None:
+            state = self._formats[source] = _SourceFormat()
+
+        # JSON lines are recognized by their first character
+        if line[0] == '{':
+            record = self._decode_json(line)
+            if record is not None:
+                return self._create_json_entry(record, line, source, line_number)
+
+        # Fast path: only the format locked for this source
+        locked = state.locked
+        if locked is not None:
+            for pattern_name, pattern in state.preceding:
+                match = pattern.match(line)
+                if match:
+                    state.misses = 0
+                    return self._create_log_entry(match, pattern_name, line, source,
+                                                  line_number)
+
+            match = locked[1].match(line)
+            if match:
+                state.misses = 0
+                return self._create_log_entry(match, locked[0], line, source, line_number)
+
+            state.misses += 1
+            if state.misses >= self.resniff_misses:
+                state.reset()
+
+        # Slow path: try each pattern in order
         for pattern_name, pattern in self.patterns:
+            if locked is not None and pattern is locked[1]:
+                continue
             match = pattern.match(line)
             if match:
+                if locked is None:
+                    self._record_vote(state, pattern_name)
                 return self._create_log_entry(match, pattern_name, line, source, line_number)
 
+        if locked is None:
+            self._record_vote(state, None)
+
         # Fallback: create entry with minimal parsing
         return self._create_fallback_entry(line, source, line_number)
 
+    def parse_record(
+        self,
+        lines: List[str],
+        source: str,
+        line_number: Optional[int] = None
+    ) -> Optional[LogEntry]:
+        """Parse a multiline record into a single LogEntry.
+
+        The first non-blank line is parsed as usual; the remaining lines are
+        appended to the message and raw line, keeping their indentation.
+
+        Args:
+            lines: Record lines, as assembled by MultilineAssembler
+            source: Log source identifier (file path)
+            line_number: Line number of the first line
+
+        Returns:
+            LogEntry object or None if the record is blank
+        """
+        if len(lines) == 1:
+            return self.parse(lines[0], source, line_number)
+
+        for index, line in enumerate(lines):
+            if line.strip():
+                break
+        else:
+            return None
+
+        if line_number is not None:
+            line_number += index
+        entry = self.parse(line, source, line_number)
+
+        continuation = '\n'.join(line.rstrip() for line in lines[index + 1:]).rstrip()
+        if entry is not None and continuation:
+            entry.message = f"{entry.message}\n{continuation}"
+            entry.raw_line = f"{entry.raw_line}\n{continuation}"
+        return entry
+
+    def extract_timestamp(self, line: str, source: Optional[str] = None) -> Optional[datetime]:
+        """Extract only the timestamp of a log line.
+
+        Unlike ``parse`` this does not build an entry, touch the sniffing
+        state, or substitute a timestamp for lines without one.
+
+        Args:
+            line: Raw log line
+            source: Log source identifier
+
+        Returns:
+            datetime object or None if the line has no parseable timestamp
+        """
+        line = line.strip()
+        if not line:
+            return None
+
+        if line[0] == '{':
+            record = self._decode_json(line)
+            if record is not None:
+                return self._json_timestamp(self._pop_json_field(record, 'timestamp'), source)
+
+        for _, pattern in self.patterns:
+            match = pattern.match(line)
+            if match:
+                return self.timestamp_parser.parse(match.group('timestamp'), source)
+
+        return None
+
+    def level_keywords(self, level: str) -> Optional[List[str]]:
+        """Get substrings, one of which appears in every line parsed as a level.
+
+        Covers both explicit level fields and levels inferred from message
+        keywords, matched case-insensitively against the whole line. Lines
+        containing none of them can be skipped without parsing when filtering
+        by the level.
+
+        Args:
+            level: Log level
+
+        Returns:
+            Lowercase substrings, or None if any line can have the level
+            (INFO is the default for lines without keywords)
+        """
+        level = level.upper()
+        if level in (LogLevel.INFO.value, LogLevel.UNKNOWN.value):
+            return None
+
+        keywords = {level.lower()}
+        if level == LogLevel.WARNING.value:
+            keywords.add('warn')
+        keywords.update(keyword for keyword, (_, keyword_level) in self.KEYWORD_LEVELS.items()
+                        if keyword_level == level)
+
+        # A keyword containing a shorter one adds no candidates
+        return sorted(
+            keyword for keyword in keywords
+            if not any(other != keyword and other in keyword for other in keywords)
+        )
+
+    def get_format(self, source: str) -> Optional[str]:
+        """Get the format locked for a source.
+
+        Args:
+            source: Log source identifier
+
+        Returns:
+            Pattern name or None if the source is still being sniffed
+        """
+        state = self._formats.get(source)
+        if state is None or state.locked is None:
+            return None
+        return state.locked[0]
+
+    def reset(self, source: Optional[str] = None) -> None:
+        """Forget sniffed formats.
+
+        Args:
+            source: Source to reset (default: all sources)
+        """
+        if source is None:
+            self._formats.clear()
+            self.timestamp_parser.reset()
+        else:
+            self._formats.pop(source, None)
+
+    def _record_vote(self, state: _SourceFormat, pattern_name: Optional[str]) -> None:
+        """Record a sniffing result and lock the source format once enough lines are seen.
+
+        Args:
+            state: Source format state
+            pattern_name: Name of the matched pattern, or None if no pattern matched
+        """
+        if pattern_name is not None:
+            state.votes[pattern_name] += 1
+        state.sniffed += 1
+
+        if state.sniffed < self.sniff_lines:
+            return
+
+        if state.votes:
+            winner = state.votes.most_common(1)[0][0]
+            position = next(i for i, (name, _) in enumerate(self.patterns) if name == winner)
+            state.locked = self.patterns[position]
+            state.preceding = self.patterns[:position]
+            state.votes.clear()
+            state.misses = 0
+        else:
+            # Nothing matched: keep sniffing in case the format shows up later
+            state.reset()
+
     def _create_log_entry(
         self,
         match: re.Match,
@@ -95,7 +416,7 @@ class LogParser:
         groups = match.groupdict()
 
         # Parse timestamp
-        timestamp = self._parse_timestamp(groups.get('timestamp'))
+        timestamp = self._parse_timestamp(groups.get('timestamp'), source)
 
         # Extract level
         level = groups.get('level', 'INFO')
@@ -151,7 +472,7 @@ class LogParser:
         level = self._detect_level_from_message(line)
 
         return LogEntry(
-            timestamp=datetime.now(),
+            timestamp=self._parse_timestamp(None, source),
             level=level,
             message=line,
             source=source,
@@ -159,44 +480,168 @@ class LogParser:
             line_number=line_number,
         )
 
-    def _parse_timestamp(self, timestamp_str: Optional[str]) -> datetime:
+    @staticmethod
+    def _decode_json(line: str) -> Optional[Dict[str, Any]]:
+        """Decode a JSON object line.
+
+        ``raw_decode`` skips the whitespace handling of ``json.loads``; the
+        line is already stripped.
+
+        Args:
+            line: Stripped log line starting with ``{``
+
+        Returns:
+            Decoded object or None if the line is not a JSON object
+        """
+        try:
+            record, end = _JSON_DECODER.raw_decode(line)
+        except ValueError:
+            return None
+        if end != len(line) or not isinstance(record, dict):
+            return None
+        return record
+
+    def _pop_json_field(self, record: Dict[str, Any], field_name: str) -> Any:
+        """Remove and return the first mapped key present for an entry field.
+
+        Args:
+            record: Decoded JSON object
+            field_name: Entry field name
+
+        Returns:
+            Field value or None if no mapped key is present
+        """
+        for key in self.json_fields[field_name]:
+            if key in record:
+                return record.pop(key)
+        return None
+
+    def _json_timestamp(self, value: Any, source: Optional[str]) -> Optional[datetime]:
+        """Convert a JSON timestamp value.
+
+        Args:
+            value: Timestamp string, or epoch seconds/milliseconds
+            source: Log source identifier
+
+        Returns:
+            datetime object or None if the value cannot be parsed
+        """
+        if isinstance(value, str):
+            return self.timestamp_parser.parse(value, source)
+
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if value > 1e11:
+                # Epoch milliseconds
+                value /= 1000
+            try:
+                # Naive UTC, like ISO timestamps with a 'Z' suffix
+                return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+            except (OverflowError, OSError, ValueError):
+                return None
+
+        return None
+
+    def _create_json_entry(
+        self,
+        record: Dict[str, Any],
+        line: str,
+        source: str,
+        line_number: Optional[int]
+    ) -> LogEntry:
+        """Create LogEntry from a decoded JSON line.
+
+        Mapped keys are popped from the decoded object, which is then kept as
+        the entry's parameters without copying.
+
+        Args:
+            record: Decoded JSON object
+            line: Raw log line
+            source: Log source
+            line_number: Line number
+
+        Returns:
+            LogEntry object
+        """
+        values = []
+        for keys in self._json_key_groups:
+            for key in keys:
+                if key in record:
+                    values.append(record.pop(key))
+                    break
+            else:
+                values.append(None)
+        timestamp, level, message, process, pid, hostname = values
+
+        timestamp = self._json_timestamp(timestamp, source)
+        if timestamp is not None:
+            state = self._formats.get(source)
+            if state is not None:
+                state.last_timestamp = timestamp
+        else:
+            timestamp = self._parse_timestamp(None, source)
+
+        if message is None or message == '':
+            message = line
+        elif not isinstance(message, str):
+            message = str(message)
+
+        if level is None:
+            level = self._detect_level_from_message(message)
+        elif isinstance(level, str):
+            level = self.JSON_LEVELS.get(level.lower()) or level
+        elif isinstance(level, int) and not isinstance(level, bool):
+            level = self.JSON_LEVELS.get(level) or str(level)
+        else:
+            # Lists, objects and other values name no level
+            level = LogLevel.UNKNOWN.value
+
+        if pid is not None:
+            try:
+                pid = int(pid)
+            except (TypeError, ValueError):
+                pid = None
+
+        return LogEntry(
+            timestamp=timestamp,
+            level=level,
+            message=message,
+            source=source,
+            process=None if process is None else str(process),
+            pid=pid,
+            hostname=None if hostname is None else str(hostname),
+            raw_line=line,
+            line_number=line_number,
+            parameters=record or None,
+        )
+
+    def _parse_timestamp(
+        self,
+        timestamp_str: Optional[str],
+        source: Optional[str] = None
+    ) -> datetime:
         """Parse timestamp string into datetime object.
 
         Args:
             timestamp_str: Timestamp string
+            source: Log source identifier
 
         Returns:
-            datetime object
-        """
-        if not timestamp_str:
-            return datetime.now()
-
-        # Try common timestamp formats
-        formats = [
-            '%Y-%m-%d %H:%M:%S,%f',  # Python logging
-            '%Y-%m-%d %H:%M:%S.%f',  # Generic with microseconds
-            '%Y-%m-%d %H:%M:%S',     # Generic
-            '%Y-%m-%dT%H:%M:%S.%fZ', # ISO8601 with Z
-            '%Y-%m-%dT%H:%M:%S%z',   # ISO8601 with timezone
-            '%Y-%m-%dT%H:%M:%S',     # ISO8601
-            '%b %d %H:%M:%S',        # Syslog (no year)
-            '%d/%b/%Y:%H:%M:%S %z',  # Apache
-        ]
+            datetime object; the last timestamp seen on the source (or the
+            current time for a new source) if the string cannot be parsed
+        """
+        timestamp = self.timestamp_parser.parse(timestamp_str, source)
 
-        for fmt in formats:
-            try:
-                return datetime.strptime(timestamp_str, fmt)
-            except ValueError:
-                continue
+        state = self._formats.get(source)
+        if timestamp is not None:
+            if state is not None:
+                state.last_timestamp = timestamp
+            return timestamp
 
-        # If syslog format (no year), add current year
-        try:
-            dt = datetime.strptime(timestamp_str, '%b %d %H:%M:%S')
-            return dt.replace(year=datetime.now().year)
-        except ValueError:
-            pass
+        if state is not None:
+            if state.last_timestamp is None:
+                state.last_timestamp = datetime.now()
+            return state.last_timestamp
 
-        # Fallback to current time
         return datetime.now()
 
     def _detect_level_from_message(self, message: str) -> str:
@@ -208,17 +653,9 @@ class LogParser:
         Returns:
             Log level string
         """
-        message_lower = message.lower()
-
-        if any(keyword in message_lower for keyword in ['fatal', 'panic']):
-            return LogLevel.FATAL.value
-        elif any(keyword in message_lower for keyword in ['critical', 'crit']):
-            return LogLevel.CRITICAL.value
-        elif any(keyword in message_lower for keyword in ['error', 'err', 'exception', 'failed', 'failure']):
-            return LogLevel.ERROR.value
-        elif any(keyword in message_lower for keyword in ['warn', 'warning']):
-            return LogLevel.WARNING.value
-        elif any(keyword in message_lower for keyword in ['debug', 'trace']):
-            return LogLevel.DEBUG.value
-        else:
+        keywords = self.LEVEL_KEYWORD_PATTERN.findall(message.lower())
+        if not keywords:
             return LogLevel.INFO.value
+
+        # Most severe keyword wins
+        return max(self.KEYWORD_LEVELS[keyword] for keyword in keywords)[1]
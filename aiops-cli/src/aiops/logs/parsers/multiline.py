@@ -0,0 +1,245 @@
+"""Multiline record assembly for stack traces and continuation lines."""
+
+import re
+import time
+from fnmatch import fnmatch
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+
+# (source, line number of the first line, lines)
+Record = Tuple[str, Optional[int], List[str]]
+
+
+class _PendingRecord:
+    """Record being assembled for one source."""
+
+    __slots__ = ('line_number', 'lines', 'dropped', 'updated')
+
+    def __init__(self, line_number: Optional[int], line: str, updated: float):
+        self.line_number = line_number
+        self.lines = [line]
+        self.dropped = 0
+        self.updated = updated
+
+
+class MultilineAssembler:
+    """Merge continuation lines into the record they belong to.
+
+    By default a line continues the previous record if it is blank, indented
+    (stack frames, wrapped text) or a well-known stack trace line such as
+    ``Traceback (most recent call last):``, ``Caused by: ...``,
+    ``... 12 more`` or ``java.lang.IllegalStateException: ...``. A start
+    pattern configured for a source replaces that rule: every line not
+    matching it is a continuation.
+
+    Records are bounded by ``max_lines``; further continuation lines are
+    dropped and counted in a trailing marker line. In follow mode a record is
+    emitted once no line arrived for ``flush_timeout`` seconds, since the next
+    record may never come.
+    """
+
+    CONTINUATION_PATTERN = re.compile(
+        r'(?:\s'
+        r'|$'
+        r'|Traceback \(most recent call last\)'
+        r'|During handling of the above exception'
+        r'|The above exception was the direct cause'
+        r'|Caused by:'
+        r'|Suppressed:'
+        r'|\.\.\. \d+ (?:more|common frames omitted)'
+        r'|[\w$.]*(?:Error|Exception|Throwable|Interrupt|Exit)(?::|$))'
+    )
+
+    def __init__(
+        self,
+        start_patterns: Optional[Dict[str, str]] = None,
+        max_lines: int = 500,
+        flush_timeout: float = 2.0
+    ):
+        """Initialize multiline assembler.
+
+        Args:
+            start_patterns: Start-of-record regex per source glob pattern
+                (``'*'`` applies to every source)
+            max_lines: Maximum number of lines kept per record
+            flush_timeout: Seconds without new lines after which a pending
+                record is emitted in follow mode
+        """
+        if max_lines <= 0:
+            raise ValueError("max_lines must be positive")
+        if flush_timeout <= 0:
+            raise ValueError("flush_timeout must be positive")
+
+        self.start_patterns: List[Tuple[str, Pattern]] = []
+        for source_glob, pattern in (start_patterns or {}).items():
+            try:
+                self.start_patterns.append((source_glob, re.compile(pattern)))
+            except re.error as e:
+                raise ValueError(f"Invalid start pattern for {source_glob}: {str(e)}")
+
+        self.max_lines = max_lines
+        self.flush_timeout = flush_timeout
+        self._rules: Dict[str, Callable[[str], bool]] = {}
+        self._pending: Dict[str, _PendingRecord] = {}
+
+    def continuation_rule(self, source: str) -> Callable[[str], bool]:
+        """Get the continuation test for a source.
+
+        Args:
+            source: Log source identifier (file path)
+
+        Returns:
+            Function returning True if a line continues the previous record
+        """
+        rule = self._rules.get(source)
+        if rule is None:
+            start = next((pattern for source_glob, pattern in self.start_patterns
+                          if fnmatch(source, source_glob)), None)
+            if start is None:
+                match = self.CONTINUATION_PATTERN.match
+                rule = lambda line: match(line) is not None
+            else:
+                match = start.match
+                rule = lambda line: match(line) is None
+            self._rules[source] = rule
+        return rule
+
+    def is_continuation(self, line: str, source: str) -> bool:
+        """Check if a line continues the previous record of its source.
+
+        Args:
+            line: Raw log line
+            source: Log source identifier
+
+        Returns:
+            True if the line is a continuation line
+        """
+        return self.continuation_rule(source)(line)
+
+    def assemble(self, lines: Iterable[Tuple[str, Optional[int], str]]) -> Iterator[Record]:
+        """Group a stream of lines into records.
+
+        Records never span sources.
+
+        Args:
+            lines: (source, line number, line) tuples in file order
+
+        Yields:
+            (source, line number of the first line, lines) tuples
+        """
+        max_lines = self.max_lines
+        source = None
+        is_continuation = None
+        record: Optional[List[str]] = None
+        record_line = None
+        dropped = 0
+
+        for line_source, line_number, line in lines:
+            if line_source != source:
+                if record is not None:
+                    yield source, record_line, self._close(record, dropped)
+                    record = None
+                source = line_source
+                is_continuation = self.continuation_rule(source)
+
+            if record is not None and is_continuation(line):
+                if len(record) < max_lines:
+                    record.append(line)
+                else:
+                    dropped += 1
+                continue
+
+            if record is not None:
+                yield source, record_line, self._close(record, dropped)
+            record = [line]
+            record_line = line_number
+            dropped = 0
+
+        if record is not None:
+            yield source, record_line, self._close(record, dropped)
+
+    def feed(
+        self,
+        source: str,
+        line_number: Optional[int],
+        line: str,
+        now: Optional[float] = None
+    ) -> Optional[Record]:
+        """Add one line in follow mode.
+
+        Args:
+            source: Log source identifier
+            line_number: Line number, if known
+            line: Raw log line
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            The previous record of the source if this line starts a new one
+        """
+        if now is None:
+            now = time.monotonic()
+
+        pending = self._pending.get(source)
+        if pending is not None and self.continuation_rule(source)(line):
+            if len(pending.lines) < self.max_lines:
+                pending.lines.append(line)
+            else:
+                pending.dropped += 1
+            pending.updated = now
+            return None
+
+        self._pending[source] = _PendingRecord(line_number, line, now)
+        if pending is None:
+            return None
+        return source, pending.line_number, self._close(pending.lines, pending.dropped)
+
+    def flush_expired(self, now: Optional[float] = None) -> List[Record]:
+        """Emit pending records that saw no new line within the timeout.
+
+        Args:
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            Completed records
+        """
+        if now is None:
+            now = time.monotonic()
+
+        expired = [source for source, pending in self._pending.items()
+                   if now - pending.updated >= self.flush_timeout]
+        return [self._pop(source) for source in expired]
+
+    def flush(self) -> List[Record]:
+        """Emit all pending records.
+
+        Returns:
+            Completed records
+        """
+        return [self._pop(source) for source in list(self._pending)]
+
+    def _pop(self, source: str) -> Record:
+        """Remove and close the pending record of a source.
+
+        Args:
+            source: Log source identifier
+
+        Returns:
+            Completed record
+        """
+        pending = self._pending.pop(source)
+        return source, pending.line_number, self._close(pending.lines, pending.dropped)
+
+    @staticmethod
+    def _close(lines: List[str], dropped: int) -> List[str]:
+        """Finish a record, noting dropped lines.
+
+        Args:
+            lines: Record lines
+            dropped: Number of continuation lines beyond ``max_lines``
+
+        Returns:
+            Record lines
+        """
+        if dropped:
+            lines.append(f"... {dropped} more lines")
+        return lines
@@ -0,0 +1,73 @@
+"""Template extractor for grouping log messages by shape."""
+
+import hashlib
+import re
+from typing import Dict, List, Tuple
+
+
+class TemplateExtractor:
+    """Reduce log messages to templates by masking variable tokens.
+
+    Any whitespace-separated token containing a digit (ids, counters,
+    addresses, durations) becomes ``<*>``. The template id is a short stable
+    hash of the template text.
+    """
+
+    VARIABLE_PATTERN = re.compile(r'(?<!\S)\S*\d\S*')
+
+    # Word tokens used for full-text indexing
+    TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+    PLACEHOLDER = '<*>'
+
+    def __init__(self, cache_size: int = 10000, max_token_length: int = 64):
+        """Initialize template extractor.
+
+        Args:
+            cache_size: Maximum number of cached template ids
+            max_token_length: Tokens longer than this are not indexed
+        """
+        if cache_size <= 0:
+            raise ValueError("cache_size must be positive")
+
+        self.cache_size = cache_size
+        self.max_token_length = max_token_length
+        self._ids: Dict[str, str] = {}
+
+    def extract(self, message: str) -> Tuple[str, str]:
+        """Extract the template of a message.
+
+        Args:
+            message: Log message
+
+        Returns:
+            Tuple of (template, template_id)
+        """
+        template = self.VARIABLE_PATTERN.sub(self.PLACEHOLDER, message)
+
+        template_id = self._ids.get(template)
+        if template_id is None:
+            template_id = hashlib.sha1(template.encode('utf-8')).hexdigest()[:12]
+            if len(self._ids) >= self.cache_size:
+                self._ids.clear()
+            self._ids[template] = template_id
+
+        return template, template_id
+
+    def tokenize(self, text: str) -> List[str]:
+        """Split text into lowercase word tokens.
+
+        Tokens must contain a letter; pure numbers are skipped because they
+        are mostly unique ids that would bloat an index.
+
+        Args:
+            text: Text to tokenize
+
+        Returns:
+            List of unique tokens in order of first appearance
+        """
+        max_length = self.max_token_length
+        return list(dict.fromkeys(
+            token for token in self.TOKEN_PATTERN.findall(text.lower())
+            if len(token) <= max_length and not token.isdigit()
+        ))
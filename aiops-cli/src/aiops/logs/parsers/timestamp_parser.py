@@ -0,0 +1,336 @@
+"""Timestamp parser for log ingestion."""
+
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+DIGITS = '0123456789'
+
+# Multiplier turning a 1-6 digit fraction into microseconds
+FRACTION_SCALE = (0, 100000, 10000, 1000, 100, 10, 1)
+
+# Millisecond fractions (',000'..'.999') to offsets, the most common suffix; adding
+# one to a cached datetime is several times cheaper than building a datetime
+MILLISECONDS = {
+    '%s%03d' % (separator, ms): timedelta(milliseconds=ms)
+    for separator in ',.' for ms in range(1000)
+}
+
+# (year, month, day, hour, minute, second)
+DateFields = Tuple[int, int, int, int, int, int]
+
+
+def to_naive(timestamp: datetime) -> datetime:
+    """Convert a timezone-aware datetime to naive local time.
+
+    Args:
+        timestamp: datetime object
+
+    Returns:
+        Naive datetime comparable with other naive datetimes
+    """
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone().replace(tzinfo=None)
+
+
+class TimestampParser:
+    """Parse log timestamps with fixed-offset slicing and per-source format memory.
+
+    The common layouts (ISO 8601 / python logging, syslog and apache) are
+    parsed by hand-written slicers. The second-resolution part of each
+    timestamp is cached, so consecutive lines from the same second only pay
+    for a dict lookup. The format that last worked for a source is tried
+    first on the next line. Anything else goes through ``strptime`` with
+    ``extra_formats``.
+
+    Timestamps with a numeric UTC offset are returned timezone-aware, all
+    others are naive. Syslog timestamps carry no year and get the current
+    year.
+    """
+
+    DEFAULT_EXTRA_FORMATS = [
+        '%Y/%m/%d %H:%M:%S',
+        '%d-%b-%Y %H:%M:%S',
+    ]
+
+    def __init__(self, extra_formats: Optional[List[str]] = None, cache_size: int = 4096):
+        """Initialize timestamp parser.
+
+        Args:
+            extra_formats: strptime formats tried after the built-in layouts
+            cache_size: Maximum number of cached second-resolution prefixes
+        """
+        if cache_size <= 0:
+            raise ValueError("cache_size must be positive")
+
+        self.extra_formats = list(
+            self.DEFAULT_EXTRA_FORMATS if extra_formats is None else extra_formats
+        )
+        self.cache_size = cache_size
+
+        self._parsers: List[Tuple[str, Callable[[str], Optional[datetime]]]] = [
+            ('iso', self._parse_iso),
+            ('syslog', self._parse_syslog),
+            ('apache', self._parse_apache),
+        ]
+        for fmt in self.extra_formats:
+            self._parsers.append((fmt, self._make_strptime_parser(fmt)))
+        self._parse_funcs = [parser for _, parser in self._parsers]
+
+        # Parser that last worked per source, called directly on the next line
+        self._source_parsers: Dict[Optional[str], Callable[[str], Optional[datetime]]] = {}
+        self._iso_cache: Dict[str, datetime] = {}
+        self._syslog_cache: Dict[str, datetime] = {}
+        self._apache_cache: Dict[str, DateFields] = {}
+        self._timezones: Dict[str, tzinfo] = {}
+        self._year = datetime.now().year
+
+    def parse(self, text: Optional[str], source: Optional[str] = None) -> Optional[datetime]:
+        """Parse a timestamp string.
+
+        Args:
+            text: Timestamp string
+            source: Log source identifier used to remember the winning format
+
+        Returns:
+            datetime object or None if no known format matches
+        """
+        if not text:
+            return None
+
+        last = self._source_parsers.get(source)
+        if last is not None:
+            result = last(text)
+            if result is not None:
+                return result
+
+        for parser in self._parse_funcs:
+            if parser is last:
+                continue
+            result = parser(text)
+            if result is not None:
+                self._source_parsers[source] = parser
+                return result
+
+        return None
+
+    def get_format(self, source: Optional[str] = None) -> Optional[str]:
+        """Get the timestamp format remembered for a source.
+
+        Args:
+            source: Log source identifier
+
+        Returns:
+            Format name ('iso', 'syslog', 'apache' or a strptime format) or None
+        """
+        parser = self._source_parsers.get(source)
+        return next((name for name, func in self._parsers if func is parser), None)
+
+    def reset(self) -> None:
+        """Forget remembered formats and cached prefixes."""
+        self._source_parsers.clear()
+        self._iso_cache.clear()
+        self._syslog_cache.clear()
+        self._apache_cache.clear()
+        self._year = datetime.now().year
+
+    def _cache_put(self, cache: Dict[str, Any], key: str, value: Any) -> None:
+        """Store a parsed prefix, dropping the whole cache when it is full.
+
+        Args:
+            cache: Per-layout prefix cache
+            key: Second-resolution prefix
+            value: Parsed datetime or date fields
+        """
+        if len(cache) >= self.cache_size:
+            cache.clear()
+        cache[key] = value
+
+    def _get_timezone(self, offset: str) -> Optional[tzinfo]:
+        """Get a fixed-offset timezone for '+HH:MM', '+HHMM' or '+HH'.
+
+        Args:
+            offset: UTC offset string including the sign
+
+        Returns:
+            tzinfo object or None if the offset is malformed
+        """
+        tz = self._timezones.get(offset)
+        if tz is not None:
+            return tz
+
+        digits = offset[1:].replace(':', '', 1)
+        if len(digits) not in (2, 4) or not (digits.isdigit() and digits.isascii()):
+            return None
+
+        hours = int(digits[:2])
+        minutes = int(digits[2:]) if len(digits) == 4 else 0
+        if hours > 23 or minutes > 59:
+            return None
+
+        delta = timedelta(hours=hours, minutes=minutes)
+        if offset[0] == '-':
+            delta = -delta
+        elif offset[0] != '+':
+            return None
+
+        tz = timezone.utc if not delta else timezone(delta)
+        self._timezones[offset] = tz
+        return tz
+
+    def _parse_iso(self, text: str) -> Optional[datetime]:
+        """Parse 'YYYY-MM-DD[T ]HH:MM:SS[.,fraction][Z|offset]'.
+
+        Args:
+            text: Timestamp string
+
+        Returns:
+            datetime object or None
+        """
+        prefix = text[:19]
+        base = self._iso_cache.get(prefix)
+        if base is None:
+            if len(text) < 19:
+                return None
+            if (text[4] != '-' or text[7] != '-' or text[10] not in 'T '
+                    or text[13] != ':' or text[16] != ':'):
+                return None
+            digits = (prefix[0:4] + prefix[5:7] + prefix[8:10]
+                      + prefix[11:13] + prefix[14:16] + prefix[17:19])
+            if not (digits.isdigit() and digits.isascii()):
+                return None
+            try:
+                base = datetime(
+                    int(prefix[0:4]), int(prefix[5:7]), int(prefix[8:10]),
+                    int(prefix[11:13]), int(prefix[14:16]), int(prefix[17:19]),
+                )
+            except ValueError:
+                return None
+            self._cache_put(self._iso_cache, prefix, base)
+
+        size = len(text)
+        if size == 23 or (size == 24 and text[23] == 'Z'):
+            milliseconds = MILLISECONDS.get(text[19:23])
+            if milliseconds is not None:
+                return base + milliseconds
+
+        rest = text[19:]
+
+        microsecond = 0
+        tz = None
+        if rest:
+            if rest[0] == '.' or rest[0] == ',':
+                tail = rest[1:].lstrip(DIGITS)
+                fraction = rest[1:len(rest) - len(tail)][:6]
+                if not fraction:
+                    return None
+                microsecond = int(fraction) * FRACTION_SCALE[len(fraction)]
+                rest = tail
+
+            if rest and rest != 'Z':
+                tz = self._get_timezone(rest)
+                if tz is None:
+                    return None
+
+        if microsecond or tz is not None:
+            return base.replace(microsecond=microsecond, tzinfo=tz)
+        return base
+
+    def _parse_syslog(self, text: str) -> Optional[datetime]:
+        """Parse 'Mon DD HH:MM:SS' (no year).
+
+        Args:
+            text: Timestamp string
+
+        Returns:
+            datetime object or None
+        """
+        cached = self._syslog_cache.get(text)
+        if cached is not None:
+            return cached
+
+        parts = text.split()
+        if len(parts) != 3:
+            return None
+
+        month = MONTHS.get(parts[0].lower())
+        clock = parts[2]
+        if (month is None or not parts[1].isdigit() or len(clock) != 8
+                or clock[2] != ':' or clock[5] != ':'):
+            return None
+
+        clock_digits = clock[0:2] + clock[3:5] + clock[6:8]
+        if not (clock_digits.isdigit() and clock_digits.isascii()):
+            return None
+
+        try:
+            result = datetime(
+                self._year, month, int(parts[1]),
+                int(clock[0:2]), int(clock[3:5]), int(clock[6:8]),
+            )
+        except ValueError:
+            return None
+
+        self._cache_put(self._syslog_cache, text, result)
+        return result
+
+    def _parse_apache(self, text: str) -> Optional[datetime]:
+        """Parse 'DD/Mon/YYYY:HH:MM:SS +HHMM'.
+
+        Args:
+            text: Timestamp string
+
+        Returns:
+            datetime object or None
+        """
+        if len(text) < 26 or text[20] != ' ':
+            return None
+
+        prefix = text[:20]
+        fields = self._apache_cache.get(prefix)
+        if fields is None:
+            if (text[2] != '/' or text[6] != '/' or text[11] != ':'
+                    or text[14] != ':' or text[17] != ':'):
+                return None
+            month = MONTHS.get(prefix[3:6].lower())
+            digits = prefix[0:2] + prefix[7:11] + prefix[12:14] + prefix[15:17] + prefix[18:20]
+            if month is None or not (digits.isdigit() and digits.isascii()):
+                return None
+            fields = (
+                int(prefix[7:11]), month, int(prefix[0:2]),
+                int(prefix[12:14]), int(prefix[15:17]), int(prefix[18:20]),
+            )
+            try:
+                datetime(*fields)
+            except ValueError:
+                return None
+            self._cache_put(self._apache_cache, prefix, fields)
+
+        tz = self._get_timezone(text[21:])
+        if tz is None:
+            return None
+        return datetime(fields[0], fields[1], fields[2], fields[3], fields[4], fields[5], 0, tz)
+
+    @staticmethod
+    def _make_strptime_parser(fmt: str) -> Callable[[str], Optional[datetime]]:
+        """Build a parser for a strptime format.
+
+        Args:
+            fmt: strptime format string
+
+        Returns:
+            Parser callable returning None on mismatch
+        """
+        def parse(text: str) -> Optional[datetime]:
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                return None
+
+        return parse
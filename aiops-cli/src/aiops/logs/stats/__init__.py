@@ -0,0 +1,13 @@
+"""Streaming log statistics."""
+
+from aiops.logs.stats.sketches import HyperLogLog, MinuteHistogram, SpaceSaving
+from aiops.logs.stats.log_statistics import LogStatistics
+from aiops.logs.stats.log_metrics import LogMetricDeriver
+
+__all__ = [
+    'HyperLogLog',
+    'LogMetricDeriver',
+    'LogStatistics',
+    'MinuteHistogram',
+    'SpaceSaving',
+]
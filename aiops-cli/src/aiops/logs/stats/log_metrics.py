@@ -0,0 +1,184 @@
+"""Derive metric time series from log entries."""
+
+import itertools
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from aiops.logs.models import LogEntry, LogMetric
+from aiops.logs.parsers import TemplateExtractor
+from aiops.logs.parsers.timestamp_parser import to_naive
+
+
+# Series name for values beyond the series limit
+OTHER = 'other'
+
+# Default maximum number of empty intervals emitted between two entries
+DEFAULT_MAX_GAP = 100000
+
+
+class LogMetricDeriver:
+    """Turn a stream of log entries into per-interval LogMetric snapshots.
+
+    Intervals are aligned to a grid starting at ``grid_start`` (default: the
+    epoch), so they line up with metric snapshots collected at the same
+    interval. Every interval between the first and the last entry is emitted,
+    including empty ones, so the series are dense.
+
+    Template and process series are capped at ``max_series`` each; values
+    first seen after the cap are counted as ``other``. Only the open
+    interval's counts are kept in memory.
+
+    Empty intervals are produced lazily, and at most ``max_gap`` of them
+    between two entries: a longer gap (e.g. a stray line with a wrong year)
+    leaves the intervals past the limit out instead of filling them.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 1.0,
+        grid_start: Optional[datetime] = None,
+        templates: bool = True,
+        max_series: int = 50,
+        max_gap: int = DEFAULT_MAX_GAP
+    ):
+        """Initialize log metric deriver.
+
+        Args:
+            interval_seconds: Interval length in seconds
+            grid_start: Start of any interval of the grid (default: epoch)
+            templates: Count entries per message template
+            max_series: Maximum number of template and of process series
+            max_gap: Maximum number of empty intervals emitted between two entries
+        """
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+        if max_series < 0:
+            raise ValueError("max_series must be non-negative")
+        if max_gap < 0:
+            raise ValueError("max_gap must be non-negative")
+
+        self.interval_seconds = interval_seconds
+        self.grid_start = to_naive(grid_start) if grid_start else datetime(1970, 1, 1)
+        self.max_series = max_series
+        self.max_gap = max_gap
+        self.extractor = TemplateExtractor() if templates else None
+
+        # Template text per template id of the template series
+        self.templates: Dict[str, str] = {}
+        self.processes: Set[str] = set()
+
+        self._interval = timedelta(seconds=interval_seconds)
+        self._index: Optional[int] = None
+        self._start: Optional[datetime] = None
+        self._end: Optional[datetime] = None
+        self._metric: Optional[LogMetric] = None
+
+    def feed(self, entries: Iterable[LogEntry]) -> Iterator[LogMetric]:
+        """Derive metrics from a stream of entries.
+
+        Args:
+            entries: Log entries in time order (any iterable)
+
+        Yields:
+            LogMetric for every interval, ending with the last open one
+        """
+        for entry in entries:
+            yield from self._add(entry)
+        yield from self.flush()
+
+    def add(self, entry: LogEntry) -> List[LogMetric]:
+        """Add one log entry.
+
+        Entries older than the open interval are counted in it. Timezone-aware
+        timestamps are converted to naive local time first.
+
+        Args:
+            entry: Log entry
+
+        Returns:
+            Metrics of the intervals closed by this entry
+        """
+        return list(self._add(entry))
+
+    def _add(self, entry: LogEntry) -> Iterator[LogMetric]:
+        """Add one log entry, returning the intervals it closed lazily.
+
+        The entry is counted before this returns; the empty intervals are
+        only created as the returned iterator is consumed.
+        """
+        closed: Iterator[LogMetric] = iter(())
+        timestamp = to_naive(entry.timestamp)
+        if self._start is None or timestamp >= self._end:
+            index = (timestamp - self.grid_start) // self._interval
+            if self._metric is not None:
+                # Empty intervals keep the series dense
+                first = self._index + 1
+                closed = itertools.chain([self._metric], self._empty(
+                    first, min(index, first + self.max_gap)
+                ))
+            self._index = index
+            self._start = self._at(index)
+            self._end = self._start + self._interval
+            self._metric = LogMetric(self._start, self.interval_seconds)
+
+        metric = self._metric
+        metric.total += 1
+        metric.levels[entry.level] = metric.levels.get(entry.level, 0) + 1
+
+        process = entry.process
+        if process:
+            if process not in self.processes:
+                if len(self.processes) < self.max_series:
+                    self.processes.add(process)
+                else:
+                    process = OTHER
+            metric.processes[process] = metric.processes.get(process, 0) + 1
+
+        if self.extractor is not None:
+            # The first line of a multiline record names its template
+            template, template_id = self.extractor.extract(entry.message.split('\n', 1)[0])
+            if template_id not in self.templates:
+                if len(self.templates) < self.max_series:
+                    self.templates[template_id] = template
+                else:
+                    template_id = OTHER
+            metric.templates[template_id] = metric.templates.get(template_id, 0) + 1
+
+        return closed
+
+    def _empty(self, first: int, stop: int) -> Iterator[LogMetric]:
+        """Generate empty metrics for a range of grid intervals.
+
+        Args:
+            first: First interval number
+            stop: Interval number after the last one
+
+        Yields:
+            LogMetric without counts
+        """
+        for index in range(first, stop):
+            yield LogMetric(self._at(index), self.interval_seconds)
+
+    def flush(self) -> List[LogMetric]:
+        """Close the open interval.
+
+        Returns:
+            Metric of the open interval, if any
+        """
+        if self._metric is None:
+            return []
+        metric = self._metric
+        self._metric = None
+        self._start = self._end = None
+        return [metric]
+
+    def _at(self, index: int) -> datetime:
+        """Get the start of a grid interval.
+
+        Args:
+            index: Interval number since the grid start
+
+        Returns:
+            Interval start
+        """
+        return self.grid_start + index * self._interval
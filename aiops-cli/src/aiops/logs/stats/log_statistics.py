@@ -0,0 +1,114 @@
+"""Streaming log statistics."""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from aiops.logs.models import LogEntry
+from aiops.logs.parsers.timestamp_parser import to_naive
+from aiops.logs.stats.sketches import HyperLogLog, MinuteHistogram, SpaceSaving
+
+
+ERROR_LEVELS = ('ERROR', 'CRITICAL', 'FATAL')
+
+
+class LogStatistics:
+    """Aggregate log entries in constant memory.
+
+    Level counts and time bounds are exact; times with a UTC offset are
+    converted to naive local time. Top sources and processes come
+    from Space-Saving sketches, distinct counts from HyperLogLog and rates
+    from a fixed-size per-minute histogram, so memory does not grow with the
+    number of entries.
+    """
+
+    def __init__(self, top_capacity: int = 100, hll_precision: int = 12, rate_buckets: int = 1440):
+        """Initialize statistics.
+
+        Args:
+            top_capacity: Items tracked by each heavy hitters sketch
+            hll_precision: HyperLogLog precision for distinct counts
+            rate_buckets: Number of buckets of the rate histogram
+        """
+        self.total = 0
+        self.level_counts: Dict[str, int] = {}
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+        self.sources = SpaceSaving(top_capacity)
+        self.processes = SpaceSaving(top_capacity)
+        self.distinct_sources = HyperLogLog(hll_precision)
+        self.distinct_processes = HyperLogLog(hll_precision)
+        self.rates = MinuteHistogram(rate_buckets)
+
+    def add(self, entry: LogEntry) -> None:
+        """Add one log entry.
+
+        Args:
+            entry: Log entry
+        """
+        self.total += 1
+        level_counts = self.level_counts
+        level_counts[entry.level] = level_counts.get(entry.level, 0) + 1
+
+        # Sources with and without a UTC offset are compared in local time
+        timestamp = to_naive(entry.timestamp)
+        if self.start is None or timestamp < self.start:
+            self.start = timestamp
+        if self.end is None or timestamp > self.end:
+            self.end = timestamp
+        self.rates.add(timestamp)
+
+        self.sources.add(entry.source)
+        self.distinct_sources.add(entry.source)
+        if entry.process:
+            self.processes.add(entry.process)
+            self.distinct_processes.add(entry.process)
+
+    def update(self, entries: Iterable[LogEntry]) -> 'LogStatistics':
+        """Add a stream of log entries.
+
+        Args:
+            entries: Log entries (any iterable, consumed once)
+
+        Returns:
+            self
+        """
+        add = self.add
+        for entry in entries:
+            add(entry)
+        return self
+
+    def to_dict(self, top: int = 10) -> Dict[str, Any]:
+        """Summarize the statistics.
+
+        Args:
+            top: Number of top sources and processes
+
+        Returns:
+            Dictionary with statistics
+        """
+        error_count = sum(self.level_counts.get(level, 0) for level in ERROR_LEVELS)
+        error_rate = (error_count / self.total * 100) if self.total > 0 else 0
+
+        series = self.rates.series()
+        peak_time, peak_count = max(series, key=lambda bucket: bucket[1], default=(None, 0))
+        minutes = len(series) * self.rates.width
+
+        return {
+            'total_entries': self.total,
+            'level_distribution': dict(self.level_counts),
+            'error_rate': error_rate,
+            'top_sources': dict(self.sources.top(top)),
+            'top_processes': dict(self.processes.top(top)),
+            'distinct_sources': self.distinct_sources.count(),
+            'distinct_processes': self.distinct_processes.count(),
+            'time_range': {
+                'start': self.start.isoformat() if self.start else None,
+                'end': self.end.isoformat() if self.end else None,
+            },
+            'rate_per_minute': {
+                'mean': self.total / minutes if minutes else 0,
+                'peak': peak_count / self.rates.width,
+                'peak_time': peak_time.isoformat() if peak_time else None,
+                'resolution_minutes': self.rates.width,
+            },
+        }
@@ -0,0 +1,241 @@
+"""Fixed-size summaries for streaming log statistics."""
+
+import math
+from hashlib import blake2b
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, List, Optional, Tuple
+from aiops.logs.parsers.timestamp_parser import to_naive
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MINUTE = timedelta(minutes=1)
+
+
+def _hash64(item: Hashable) -> int:
+    """Hash an item to 64 bits, identically in every process.
+
+    Args:
+        item: Item to hash (hashed by its string form)
+
+    Returns:
+        64-bit hash
+    """
+    digest = blake2b(str(item).encode('utf-8', 'surrogateescape'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters sketch.
+
+    Tracks at most ``capacity`` items. When a new item arrives while full, the
+    item with the smallest count is replaced and the newcomer inherits that
+    count as its overestimation error. Every item occurring more than
+    ``total / capacity`` times is guaranteed to be tracked, and counts are
+    exact while fewer than ``capacity`` distinct items were seen.
+    """
+
+    def __init__(self, capacity: int = 100):
+        """Initialize sketch.
+
+        Args:
+            capacity: Maximum number of tracked items
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+
+    def add(self, item: Hashable, count: int = 1) -> None:
+        """Count an occurrence of an item.
+
+        Args:
+            item: Item to count
+            count: Number of occurrences
+        """
+        self.total += count
+        counts = self._counts
+        if item in counts:
+            counts[item] += count
+            return
+
+        if len(counts) < self.capacity:
+            counts[item] = count
+            self._errors[item] = 0
+            return
+
+        # Replace the least frequent item (O(capacity), only on misses)
+        victim = min(counts, key=counts.__getitem__)
+        floor = counts.pop(victim)
+        del self._errors[victim]
+        counts[item] = floor + count
+        self._errors[item] = floor
+
+    def top(self, n: int = 10) -> List[Tuple[Hashable, int]]:
+        """Get the most frequent items.
+
+        Args:
+            n: Number of items
+
+        Returns:
+            (item, estimated count) pairs, most frequent first
+        """
+        return sorted(self._counts.items(), key=lambda pair: pair[1], reverse=True)[:n]
+
+    def error(self, item: Hashable) -> int:
+        """Get the maximum overestimation of an item's count.
+
+        Args:
+            item: Tracked item
+
+        Returns:
+            Upper bound of the count error (0 for exact counts)
+        """
+        return self._errors.get(item, 0)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct count estimator.
+
+    Uses ``2 ** precision`` one-byte registers; the standard error is about
+    ``1.04 / sqrt(2 ** precision)`` (1.6% for the default precision of 12).
+    Small cardinalities are estimated with linear counting.
+    """
+
+    def __init__(self, precision: int = 12):
+        """Initialize estimator.
+
+        Args:
+            precision: Number of index bits (4-16)
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self._size = 1 << precision
+        self._shift = 64 - precision
+        self._registers = bytearray(self._size)
+        self._last: Optional[Hashable] = None
+
+        if self._size >= 128:
+            self._alpha = 0.7213 / (1 + 1.079 / self._size)
+        else:
+            self._alpha = {16: 0.673, 32: 0.697, 64: 0.709}[self._size]
+
+    def add(self, item: Hashable) -> None:
+        """Add an item.
+
+        Args:
+            item: Item to count
+        """
+        # Log fields repeat in runs; skip hashing the same item again
+        if item == self._last:
+            return
+        self._last = item
+
+        value = _hash64(item)
+        index = value >> self._shift
+        rest = value & ((1 << self._shift) - 1)
+        rank = self._shift - rest.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def count(self) -> int:
+        """Estimate the number of distinct items added.
+
+        Returns:
+            Estimated distinct count
+        """
+        size = self._size
+        estimate = self._alpha * size * size / sum(2.0 ** -register for register in self._registers)
+        if estimate <= 2.5 * size:
+            zeros = self._registers.count(0)
+            if zeros:
+                estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+
+class MinuteHistogram:
+    """Event counts per time bucket in a fixed number of buckets.
+
+    Buckets start one minute wide. When the observed time span no longer fits,
+    adjacent buckets are merged and the width doubles, so memory stays fixed
+    for any span while resolution degrades gracefully.
+    """
+
+    def __init__(self, buckets: int = 1440):
+        """Initialize histogram.
+
+        Args:
+            buckets: Number of buckets
+        """
+        if buckets < 2:
+            raise ValueError("buckets must be at least 2")
+        self.buckets = buckets
+        self.width = 1
+        self._counts = [0] * buckets
+        self._origin: Optional[int] = None
+        self._low = 0
+        self._high = 0
+
+    def add(self, timestamp: datetime, count: int = 1) -> None:
+        """Count events at a time.
+
+        Args:
+            timestamp: Event time (timezone-aware times count in local time)
+            count: Number of events
+        """
+        minute = (to_naive(timestamp) - _EPOCH) // _MINUTE
+        if self._origin is None:
+            self._origin = self._low = self._high = minute
+
+        index = (minute - self._origin) // self.width
+        if not 0 <= index < self.buckets:
+            self._rebuild(min(self._low, minute), max(self._high, minute))
+            index = (minute - self._origin) // self.width
+
+        self._counts[index] += count
+        if minute < self._low:
+            self._low = minute
+        elif minute > self._high:
+            self._high = minute
+
+    def _rebuild(self, low: int, high: int) -> None:
+        """Re-bucket counts so the minutes from low to high fit.
+
+        Args:
+            low: First minute to cover
+            high: Last minute to cover
+        """
+        width = self.width
+        while high // width - low // width >= self.buckets:
+            width *= 2
+
+        # Center the data so the next few out-of-window minutes fit as well
+        slack = self.buckets - 1 - (high // width - low // width)
+        origin = (low // width - slack // 2) * width
+
+        counts = [0] * self.buckets
+        for index, value in enumerate(self._counts):
+            if value:
+                start = self._origin + index * self.width
+                counts[(start - origin) // width] += value
+
+        self._counts = counts
+        self._origin = origin
+        self.width = width
+
+    def series(self) -> List[Tuple[datetime, int]]:
+        """Get the non-empty span of buckets.
+
+        Returns:
+            (bucket start, count) pairs in time order
+        """
+        if self._origin is None:
+            return []
+        first = (self._low - self._origin) // self.width
+        last = (self._high - self._origin) // self.width
+        return [
+            (_EPOCH + _MINUTE * (self._origin + index * self.width), self._counts[index])
+            for index in range(first, last + 1)
+        ]
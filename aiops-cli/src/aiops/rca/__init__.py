@@ -1,7 +1,10 @@
 """Root cause analysis module."""
 
 from aiops.rca.analyzer import RootCauseAnalyzer
+from aiops.rca.events import iter_events, load_events
 
 __all__ = [
     'RootCauseAnalyzer',
+    'iter_events',
+    'load_events',
 ]
@@ -1,5 +1,6 @@
 """Root cause analysis module."""
 
+import math
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from collections import Counter
@@ -84,6 +85,12 @@ class RootCauseAnalyzer:
         # Check for specific patterns
         types = set(type_counts.keys())
 
+        # Kernel events confirm what the metric patterns below only suggest
+        if 'oom_kill' in types:
+            return "Memory exhaustion: processes killed by the kernel OOM killer"
+        if 'disk_io_error' in types:
+            return "Disk or filesystem errors reported by the kernel"
+
         # CPU-related patterns
         if 'high_cpu' in types or 'cpu_spike' in types:
             if 'memory_leak' in types:
@@ -151,9 +158,10 @@ class RootCauseAnalyzer:
                 'metrics': event.metrics,
             })
 
-        # Evidence from metrics
+        # Evidence from metrics; NaN marks gaps of resampled series
         if metrics_data:
             for metric_name, values in metrics_data.items():
+                values = [value for value in values if not math.isnan(value)]
                 if len(values) > 0:
                     evidence.append({
                         'type': 'metric',
@@ -0,0 +1,59 @@
+"""Load anomaly events from files."""
+
+from typing import Iterator, List
+from aiops.core.jsonstream import JsonStream, iter_ndjson
+from aiops.correlation.series import NDJSON_SUFFIXES
+from aiops.cpu.models.anomaly_event import AnomalyEvent
+
+
+def iter_events(path: str) -> Iterator[AnomalyEvent]:
+    """Stream the anomaly events of a file.
+
+    The file holds a JSON array of events, a JSON object listing them under
+    ``anomalies`` (``aiops analyze`` reports, ``aiops collector run
+    --correlate`` output), or one event per line (``.ndjson`` or
+    ``.jsonl``). Events are decoded one at a time, so the document is never
+    held in memory as a whole.
+
+    Args:
+        path: File path
+
+    Yields:
+        AnomalyEvent objects (see AnomalyEvent.from_dict())
+
+    Raises:
+        ValueError: If the file is not valid JSON or an event is invalid
+    """
+    with open(path, 'r') as f:
+        if path.lower().endswith(NDJSON_SUFFIXES):
+            for data in iter_ndjson(f):
+                yield AnomalyEvent.from_dict(data)
+            return
+
+        stream = JsonStream(f)
+        if stream.peek() == '[':
+            for data in stream.items():
+                yield AnomalyEvent.from_dict(data)
+            return
+
+        for key in stream.members():
+            if key == 'anomalies':
+                for data in stream.items():
+                    yield AnomalyEvent.from_dict(data)
+            else:
+                stream.value()
+
+
+def load_events(path: str) -> List[AnomalyEvent]:
+    """Load the anomaly events of a file.
+
+    Args:
+        path: File path (see iter_events())
+
+    Returns:
+        List of AnomalyEvent objects
+
+    Raises:
+        ValueError: If the file is not valid JSON or an event is invalid
+    """
+    return list(iter_events(path))
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+告警性能测试
+
+测试内容:
+1. 告警存储的批量写入吞吐量与历史规模无关的状态转换耗时
+2. 数千条编译后告警规则的单次评估耗时
+3. 数万个维护窗口下 "当前是否被静默" 查询的耗时
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from aiops.alerting import Alert, AlertManager, RuleEvaluator, Silence, SilenceIndex
+
+
+HISTORY_SIZE = 100000
+
+
+def make_alerts(count, start=datetime(2024, 1, 15)):
+    """生成已解决的历史告警"""
+    return [
+        Alert(
+            rule_name=f"rule_{i % 500}",
+            status="resolved",
+            severity="warning",
+            message="resolved alert",
+            started_at=start + timedelta(seconds=i),
+            ended_at=start + timedelta(seconds=i + 60),
+            labels={"host": f"web-{i % 20}"},
+        )
+        for i in range(count)
+    ]
+
+
+def operation_time(manager, repeats=50):
+    """创建、确认并解决告警的平均耗时 (秒)"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for i in range(repeats):
+            manager.create_alert(Alert(
+                rule_name="probe", status="firing", severity="critical",
+                message="probe", started_at=datetime.now(),
+            ))
+            manager.acknowledge_alert("probe", "ops")
+            manager.resolve_alert("probe")
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best
+
+
+@pytest.mark.performance
+class TestAlertStorePerformance:
+    """告警存储性能测试"""
+
+    def test_operations_independent_of_history(self, tmp_path):
+        """测试 10 万条历史告警下单次操作耗时不随历史增长"""
+        small = AlertManager(storage_path=str(tmp_path / "small"))
+        small.create_alerts(make_alerts(1000))
+
+        large = AlertManager(storage_path=str(tmp_path / "large"))
+        history = make_alerts(HISTORY_SIZE)
+        start = time.perf_counter()
+        large.create_alerts(history)
+        insert_rate = HISTORY_SIZE / (time.perf_counter() - start)
+
+        small_time = operation_time(small)
+        large_time = operation_time(large)
+        print(f"\n批量写入: {insert_rate:,.0f} 条/秒, 单次操作: "
+              f"{small_time * 1000:.2f} ms (1k) / {large_time * 1000:.2f} ms (100k)")
+
+        assert insert_rate > 10000
+        assert large_time < 0.02
+        assert large_time < small_time * 3
+
+        small.close()
+        large.close()
+
+
+RULE_COUNT = 2000
+
+
+def make_batch(hosts=500, seed=1):
+    """生成一批多主机指标"""
+    rng = random.Random(seed)
+    values = {}
+    for host in range(hosts):
+        values[f"host{host}.cpu.cpu_percent"] = rng.uniform(0, 100)
+        values[f"host{host}.memory.mem_used_percent"] = rng.uniform(0, 100)
+    for device in "abcdefgh":
+        values[f"disk.sd{device}.avg_write_time_ms"] = rng.uniform(0, 100)
+    return values
+
+
+@pytest.mark.performance
+class TestRuleEvaluatorPerformance:
+    """告警规则评估性能测试"""
+
+    def test_thousands_of_rules_per_tick(self):
+        """测试 2000 条规则 (含窗口函数与通配符) 的单次评估在数毫秒内完成"""
+        evaluator = RuleEvaluator()
+        for i in range(RULE_COUNT):
+            host = f"host{i % 500}"
+            evaluator.add_rule(f"rule_{i}", [
+                f"{host}.cpu.cpu_percent > 90 and {host}.memory.mem_used_percent > 80",
+                f"avg_over({host}.cpu.cpu_percent, 5m) > 75",
+                f"{host}.memory.mem_used_percent / 100 > 0.95 or {host}.cpu.cpu_percent < 1",
+                f"disk.*.avg_write_time_ms > {50 + i % 50}",
+            ][i % 4])
+
+        values = make_batch()
+        start_time = datetime(2024, 1, 15)
+        best = float('inf')
+        for tick in range(30):
+            start = time.perf_counter()
+            results = evaluator.evaluate(values, start_time + timedelta(seconds=10 * tick))
+            best = min(best, time.perf_counter() - start)
+
+        print(f"\n{RULE_COUNT} 条规则单次评估: {best * 1000:.2f} ms, 成立规则 {len(results)}")
+
+        assert results
+        assert best < 0.01
+
+
+def make_silences(count, start=datetime(2024, 1, 1)):
+    """生成每小时一个、各持续两小时的维护窗口"""
+    return [
+        Silence(
+            matchers=[f"host=web-{i % 50}", "alertname=~io_.*"],
+            starts_at=start + timedelta(hours=i),
+            ends_at=start + timedelta(hours=i + 2),
+            comment="maintenance",
+        )
+        for i in range(count)
+    ]
+
+
+def lookup_time(index, labels, times, repeats=5):
+    """静默查询的最佳平均耗时 (秒)"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for now in times:
+            index.silenced_by(labels, now)
+        best = min(best, (time.perf_counter() - start) / len(times))
+    return best
+
+
+@pytest.mark.performance
+class TestSilenceIndexPerformance:
+    """静默索引性能测试"""
+
+    def test_lookup_independent_of_windows(self):
+        """测试静默查询耗时随维护窗口数量呈对数增长"""
+        labels = {"alertname": "io_latency_spike_read", "host": "web-7", "instance": "sda"}
+        rng = random.Random(42)
+        timings = {}
+        for count in (1000, 20000):
+            index = SilenceIndex(make_silences(count))
+            start = datetime(2024, 1, 1)
+            times = [start + timedelta(minutes=rng.randrange(count * 60)) for _ in range(2000)]
+            timings[count] = lookup_time(index, labels, times)
+
+        print(f"\n静默查询: 1000 个窗口 {timings[1000] * 1e6:.1f} us, "
+              f"20000 个窗口 {timings[20000] * 1e6:.1f} us")
+
+        # 窗口数增加 20 倍, 查询耗时远小于线性增长
+        assert timings[20000] < timings[1000] * 4
+        assert timings[20000] < 0.0005
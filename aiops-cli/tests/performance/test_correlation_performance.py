@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关联分析性能测试
+
+测试内容:
+1. 数千条序列的全量相关矩阵计算耗时
+2. 一天秒级数据在 ±600 步范围内的滞后相关耗时
+3. 数百万个不规则采样点重采样到统一时间网格的耗时
+4. 流式滚动相关监控的单样本更新耗时与窗口大小无关
+5. 5 万条序列中查找与目标最相关序列的耗时与召回
+6. 从大型采集文件流式读取所选序列的内存峰值与耗时
+"""
+
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from datetime import datetime, timedelta
+from aiops.correlation import CorrelationAnalyzer, CorrelationMonitor, align_series, load_series
+
+
+SERIES_COUNT = 2000
+SERIES_LENGTH = 1000
+
+
+def make_series(count, length, seed=0):
+    """生成共享若干驱动因子的随机序列"""
+    rng = np.random.default_rng(seed)
+    drivers = rng.normal(size=(10, length))
+    weights = rng.normal(size=(count, 10)) * (rng.random((count, 1)) < 0.05)
+    values = weights @ drivers + rng.normal(size=(count, length))
+    return {f"series_{i}": values[i].tolist() for i in range(count)}
+
+
+@pytest.mark.performance
+class TestFindCorrelationsPerformance:
+    """全量相关分析性能测试"""
+
+    def test_thousands_of_series(self):
+        """测试 2000 条序列 (约 200 万对) 的相关分析在数秒内完成"""
+        data = make_series(SERIES_COUNT, SERIES_LENGTH)
+        analyzer = CorrelationAnalyzer()
+
+        start = time.perf_counter()
+        results = analyzer.find_correlations(data, threshold=0.7)
+        elapsed = time.perf_counter() - start
+
+        pairs = SERIES_COUNT * (SERIES_COUNT - 1) // 2
+        print(f"\n{SERIES_COUNT} 条序列 ({pairs:,} 对): {elapsed:.2f} 秒, 相关对 {len(results)}")
+
+        assert results
+        assert all(abs(r['correlation']) >= 0.7 for r in results)
+        assert elapsed < 5.0
+
+
+@pytest.mark.performance
+class TestLagCorrelationPerformance:
+    """滞后相关性能测试"""
+
+    def test_day_of_seconds(self):
+        """测试 86400 点序列在 ±600 步滞后范围内的完整滞后剖面计算在 1 秒内完成"""
+        rng = np.random.default_rng(1)
+        cpu = rng.normal(size=86400)
+        latency = (np.roll(cpu, 120) + rng.normal(size=86400)).tolist()
+        analyzer = CorrelationAnalyzer()
+
+        start = time.perf_counter()
+        result = analyzer.calculate_lag_correlation(cpu.tolist(), latency, max_lag=600)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n86400 点 ±600 步滞后相关: {elapsed * 1000:.1f} ms, 最佳滞后 {result['lag']}")
+
+        assert result['lag'] == -120
+        assert len(result['profile']) == 1201
+        assert elapsed < 1.0
+
+
+@pytest.mark.performance
+class TestResamplePerformance:
+    """重采样性能测试"""
+
+    def test_millions_of_points(self):
+        """测试 3 条共约 300 万点、采样间隔不同且有缺口的序列对齐到 10 秒网格在 1 秒内完成"""
+        rng = np.random.default_rng(2)
+        series = {}
+        for name, interval in [("cpu", 0.5), ("disk", 1.0), ("requests", 2.0)]:
+            timestamps = np.cumsum(rng.exponential(interval, size=1_000_000))
+            # Five minutes of every hour are missing
+            timestamps = timestamps[(timestamps % 3600) > 300]
+            series[name] = (timestamps, rng.normal(size=len(timestamps)))
+        total = sum(len(timestamps) for timestamps, _ in series.values())
+
+        start = time.perf_counter()
+        grid, aligned = align_series(series, 10, how={"cpu": "mean", "disk": "max",
+                                                      "requests": "rate"},
+                                     fill="ffill", limit=6)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n{total:,} 点对齐到 {len(grid):,} 个网格: {elapsed * 1000:.1f} ms")
+
+        assert total > 2_500_000
+        assert all(len(values) == len(grid) for values in aligned.values())
+        assert elapsed < 1.0
+
+
+@pytest.mark.performance
+class TestCorrelationMonitorPerformance:
+    """流式相关监控性能测试"""
+
+    @staticmethod
+    def _time_per_update(window, samples):
+        """测量一组 6 个指标 (15 对) 每对每个样本的平均更新耗时"""
+        names = [f"metric_{i}" for i in range(6)]
+        rng = np.random.default_rng(window)
+        rows = [dict(zip(names, row)) for row in rng.normal(size=(samples, 6)).tolist()]
+        monitor = CorrelationMonitor([names], window=window)
+        now = datetime.now()
+
+        start = time.perf_counter()
+        for row in rows:
+            monitor.update(row, now)
+        return (time.perf_counter() - start) / (samples * len(monitor.trackers))
+
+    def test_update_cost_is_constant(self):
+        """测试窗口从 60 增大到 3600 时每对每样本的更新耗时基本不变 (O(1))"""
+        small = self._time_per_update(60, 12000)
+        large = self._time_per_update(3600, 12000)
+
+        print(f"\n每对每样本更新: 窗口 60 为 {small * 1e6:.1f} µs, "
+              f"窗口 3600 为 {large * 1e6:.1f} µs")
+
+        assert small < 50e-6
+        assert large < 3 * small
+
+
+@pytest.mark.performance
+class TestTopCorrelationsPerformance:
+    """近似相关搜索性能测试"""
+
+    def test_fifty_thousand_series(self):
+        """测试在 5 万条 240 点序列中查找与目标最相关的 20 条序列在 1 秒内完成且不漏掉植入的相关序列"""
+        rng = np.random.default_rng(3)
+        values = rng.normal(size=(50_000, 240))
+        target = rng.normal(size=240)
+        planted = {}
+        for k, r in enumerate(np.linspace(0.6, 0.95, 10)):
+            sign = -1 if k % 2 else 1
+            values[k * 5000] = sign * r * target + np.sqrt(1 - r * r) * rng.normal(size=240)
+            planted[f"series_{k * 5000}"] = sign * r
+        data = {f"series_{i}": row for i, row in enumerate(values)}
+        data["cpu.percent"] = target
+        analyzer = CorrelationAnalyzer()
+
+        start = time.perf_counter()
+        results = analyzer.find_top_correlations("cpu.percent", data, top=20)
+        elapsed = time.perf_counter() - start
+
+        found = {r['metric2'] for r in results}
+        print(f"\n50,000 条序列 Top 20 相关搜索: {elapsed * 1000:.0f} ms, "
+              f"召回植入序列 {len(found & set(planted))}/{len(planted)}")
+
+        assert set(planted) <= found
+        assert elapsed < 1.0
+
+
+@pytest.mark.performance
+class TestStreamingLoadPerformance:
+    """流式读取采集文件性能测试"""
+
+    def test_selected_series_of_large_file(self, tmp_path):
+        """测试从 2000 个快照 x 100 个进程的采集文件读取 2 条序列时内存峰值远低于整体解析"""
+        rng = np.random.default_rng(4)
+        start_time = datetime(2024, 1, 15)
+        path = tmp_path / "processes.json"
+        with open(path, 'w') as f:
+            f.write('{"collection_info": {"interval_seconds": 1.0, "total_snapshots": 2000}, '
+                    '"data": [')
+            for i in range(2000):
+                snapshot = {
+                    'timestamp': (start_time + timedelta(seconds=i)).isoformat(),
+                    'process': [{'name': f"proc_{k}", 'cpu_percent': v, 'rss': v * 1e6}
+                                for k, v in enumerate(rng.random(100).tolist())],
+                }
+                f.write((',\n' if i else '\n') + json.dumps(snapshot, indent=2))
+            f.write(']}')
+        names = ['process.proc_0.cpu_percent', 'process.proc_1.rss']
+
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            series = load_series([str(path)], names=names)
+            elapsed = time.perf_counter() - start
+            streamed = tracemalloc.get_traced_memory()[1]
+
+            tracemalloc.reset_peak()
+            with open(path, 'r') as f:
+                json.load(f)
+            parsed = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        print(f"\n{path.stat().st_size / 1e6:.0f} MB 采集文件读取 2 条序列: {elapsed * 1000:.0f} ms, "
+              f"内存峰值 {streamed / 1e6:.1f} MB (整体解析 {parsed / 1e6:.0f} MB)")
+
+        assert sorted(series) == names
+        assert all(len(values) == 2000 for values in series.values())
+        assert streamed < parsed / 10
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志解析性能测试
+
+测试内容:
+1. 各日志格式的解析吞吐量 (行/秒)
+2. 时间戳解析相对 strptime 循环的加速比
+3. 按级别查询时字节级预过滤的加速比
+4. JSON 行解析相对正则回退路径的吞吐量
+5. 堆栈风暴下多行合并的条目减少倍数和加速比
+6. 流式统计的内存上限
+7. 窗口化日志异常检测器的吞吐量
+"""
+
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+
+from aiops.logs.collectors import LogCollector
+from aiops.logs.detectors import LogLevelAnomalyDetector, LogVolumeAnomalyDetector
+from aiops.logs.models import LogEntry
+from aiops.logs.parsers import LogParser, TimestampParser
+from aiops.logs.stats import LogStatistics
+
+
+LINE_COUNT = 20000
+
+SAMPLE_LINES = {
+    'python': "2024-01-15 10:30:{sec:02d},{ms:03d} INFO app.server Request {i} handled in 12ms",
+    'generic': "2024-01-15T10:30:{sec:02d}.{ms:03d}Z [ERROR] [worker-3] Job {i} failed: timeout",
+    'syslog': "Jan 15 10:30:{sec:02d} web01 sshd[1234]: Accepted publickey for user{i}",
+    'apache': '10.0.0.1 - - [15/Jan/2024:10:30:{sec:02d} +0000] '
+              '"GET /api/items/{i} HTTP/1.1" 200 512',
+    'fallback': "worker {i} finished batch with warning at tick {sec}",
+}
+
+
+LEGACY_TIMESTAMP_FORMATS = [
+    '%Y-%m-%d %H:%M:%S,%f',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S',
+    '%b %d %H:%M:%S',
+    '%d/%b/%Y:%H:%M:%S %z',
+]
+
+
+def generate_lines(template, count=LINE_COUNT):
+    """生成指定格式的日志行"""
+    return [template.format(i=i, sec=i % 60, ms=i % 1000) for i in range(count)]
+
+
+def legacy_parse_timestamp(timestamp_str):
+    """逐个尝试 strptime 格式 (旧实现)"""
+    for fmt in LEGACY_TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(timestamp_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+@pytest.mark.performance
+class TestLogParserThroughput:
+    """日志解析吞吐量测试"""
+
+    @pytest.mark.parametrize("log_format", sorted(SAMPLE_LINES))
+    def test_parse_throughput(self, log_format):
+        """测试单一格式日志的解析速度"""
+        lines = generate_lines(SAMPLE_LINES[log_format])
+        parser = LogParser()
+        source = f"/var/log/{log_format}.log"
+
+        start_time = time.perf_counter()
+        for line_number, line in enumerate(lines, start=1):
+            parser.parse(line, source, line_number)
+        elapsed_time = time.perf_counter() - start_time
+
+        throughput = len(lines) / elapsed_time
+
+        print(f"\n格式 {log_format}: 解析 {len(lines)} 行耗时 {elapsed_time:.4f} 秒")
+        print(f"吞吐量: {throughput:.0f} 行/秒")
+
+        # 性能要求：每秒至少解析 20000 行
+        assert throughput > 20000
+
+
+TIMESTAMP_TEMPLATES = [
+    "2024-01-15 10:{min:02d}:{sec:02d},{ms:03d}",
+    "2024-01-15T10:{min:02d}:{sec:02d}.{ms:03d}Z",
+    "Jan 15 10:{min:02d}:{sec:02d}",
+    "15/Jan/2024:10:{min:02d}:{sec:02d} +0000",
+]
+
+
+def generate_timestamps(template, count=LINE_COUNT):
+    """生成时间戳，每秒 20 行，模拟连续日志共享同一秒前缀"""
+    return [
+        template.format(min=(i // 1200) % 60, sec=(i // 20) % 60, ms=i % 1000)
+        for i in range(count)
+    ]
+
+
+def measure_speedup(timestamps, repeat=3):
+    """返回 (strptime 耗时, 快速解析耗时)，各取 repeat 次运行中的最短耗时以排除调度抖动"""
+    legacy_elapsed = fast_elapsed = float('inf')
+    for _ in range(repeat):
+        parser = TimestampParser()
+
+        start_time = time.perf_counter()
+        for text in timestamps:
+            legacy_parse_timestamp(text)
+        legacy_elapsed = min(legacy_elapsed, time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        for text in timestamps:
+            parser.parse(text, "/var/log/app.log")
+        fast_elapsed = min(fast_elapsed, time.perf_counter() - start_time)
+
+    return legacy_elapsed, fast_elapsed
+
+
+@pytest.mark.performance
+class TestTimestampParserPerformance:
+    """时间戳解析性能测试"""
+
+    @pytest.mark.parametrize("template", TIMESTAMP_TEMPLATES)
+    def test_speedup_per_layout(self, template):
+        """测试每种时间戳格式的解析都至少快 10 倍"""
+        legacy_elapsed, fast_elapsed = measure_speedup(generate_timestamps(template))
+        speedup = legacy_elapsed / fast_elapsed
+
+        print(f"\n{template}: strptime {legacy_elapsed:.4f} 秒, 快速解析 {fast_elapsed:.4f} 秒")
+        print(f"加速比: {speedup:.1f}x")
+
+        # python logging 格式在旧实现中第一个格式即命中，加速比最低
+        assert speedup >= 10
+
+    def test_speedup_mixed_layouts(self):
+        """测试混合格式日志的时间戳解析至少快 10 倍"""
+        timestamps = []
+        for template in TIMESTAMP_TEMPLATES:
+            timestamps.extend(generate_timestamps(template, LINE_COUNT // len(TIMESTAMP_TEMPLATES)))
+
+        legacy_elapsed, fast_elapsed = measure_speedup(timestamps)
+        speedup = legacy_elapsed / fast_elapsed
+
+        print(f"\n混合格式: strptime {legacy_elapsed:.4f} 秒, 快速解析 {fast_elapsed:.4f} 秒")
+        print(f"加速比: {speedup:.1f}x")
+
+        assert speedup >= 10
+
+
+def collect_errors(path, prefilter):
+    """按 ERROR 级别查询, 返回 (结果, 耗时)"""
+    collector = LogCollector([str(path)], level_filter="ERROR")
+    if not prefilter:
+        collector._level_keywords = None
+    collector.initialize()
+
+    start_time = time.perf_counter()
+    entries = collector.collect()
+    return entries, time.perf_counter() - start_time
+
+
+@pytest.mark.performance
+class TestLevelPrefilterPerformance:
+    """级别预过滤性能测试"""
+
+    def test_prefilter_speedup(self, tmp_path):
+        """测试 99% 为 INFO 的日志按 ERROR 查询至少快 5 倍"""
+        path = tmp_path / "app.log"
+        with open(path, "w") as f:
+            for i in range(LINE_COUNT * 5):
+                level = "ERROR" if i % 100 == 0 else "INFO"
+                f.write(f"2024-01-15 10:{i // 60 % 60:02d}:{i % 60:02d},000 {level} "
+                        f"app.server Request {i} handled in 12ms\n")
+
+        full_entries, full_elapsed = collect_errors(path, prefilter=False)
+        fast_entries, fast_elapsed = collect_errors(path, prefilter=True)
+        speedup = full_elapsed / fast_elapsed
+
+        print(f"\n全量解析 {full_elapsed:.4f} 秒, 预过滤 {fast_elapsed:.4f} 秒")
+        print(f"加速比: {speedup:.1f}x")
+
+        assert fast_entries == full_entries
+        assert len(fast_entries) == LINE_COUNT * 5 // 100
+        assert speedup >= 5
+
+
+def generate_json_lines(count=LINE_COUNT):
+    """生成 JSON 行日志"""
+    return [
+        json.dumps({
+            "timestamp": f"2024-01-15T10:30:{i % 60:02d}.{i % 1000:03d}Z",
+            "level": "info",
+            "message": f"request {i} handled",
+            "pid": 1234,
+            "hostname": "web01",
+            "logger": "app.server",
+            "request_id": f"r{i}",
+            "duration_ms": 12.5,
+        })
+        for i in range(count)
+    ]
+
+
+def measure_parse(parser, lines):
+    """返回解析全部行的最短耗时 (取 3 次最小值以降低抖动)"""
+    timings = []
+    for _ in range(3):
+        parser.reset()
+        start_time = time.perf_counter()
+        for line_number, line in enumerate(lines, start=1):
+            parser.parse(line, "/var/log/app.jsonl", line_number)
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+@pytest.mark.performance
+class TestJsonLinesPerformance:
+    """JSON 行解析性能测试"""
+
+    def test_json_faster_than_fallback(self):
+        """测试 JSON 行解析快于正则回退路径"""
+        lines = generate_json_lines()
+
+        json_elapsed = measure_parse(LogParser(), lines)
+
+        fallback_parser = LogParser()
+        fallback_parser._decode_json = lambda line: None
+        fallback_elapsed = measure_parse(fallback_parser, lines)
+
+        speedup = fallback_elapsed / json_elapsed
+        throughput = len(lines) / json_elapsed
+
+        print(f"\nJSON 解析 {json_elapsed:.4f} 秒, 正则回退 {fallback_elapsed:.4f} 秒")
+        print(f"吞吐量: {throughput:.0f} 行/秒, 加速比: {speedup:.1f}x")
+
+        assert throughput > 20000
+        assert speedup > 1.2
+
+
+def write_crash_storm(path, records=LINE_COUNT // 20, frames=15):
+    """生成每条错误都带 Python 堆栈的日志"""
+    with open(path, "w") as f:
+        for i in range(records):
+            f.write(f"2024-01-15 10:{i // 60 % 60:02d}:{i % 60:02d},000 "
+                    f"ERROR app.worker job {i} failed\n")
+            f.write("Traceback (most recent call last):\n")
+            for frame in range(frames):
+                f.write(f"  File \"/srv/app/worker.py\", line {frame + 10}, in step_{frame}\n")
+                f.write(f"    result = step_{frame + 1}(job)\n")
+            f.write(f"KeyError: 'job-{i}'\n")
+
+
+def measure_collect(path, multiline):
+    """返回收集结果和最短耗时 (取 3 次最小值以降低抖动)"""
+    timings = []
+    for _ in range(3):
+        collector = LogCollector([str(path)], multiline=multiline)
+        collector.initialize()
+        start_time = time.perf_counter()
+        entries = collector.collect()
+        timings.append(time.perf_counter() - start_time)
+    return entries, min(timings)
+
+
+@pytest.mark.performance
+class TestMultilinePerformance:
+    """多行合并性能测试"""
+
+    def test_crash_storm(self, tmp_path):
+        """测试堆栈风暴合并后条目数至少减少 10 倍且收集更快"""
+        path = tmp_path / "crash.log"
+        write_crash_storm(path)
+
+        line_entries, line_elapsed = measure_collect(path, multiline=False)
+        record_entries, record_elapsed = measure_collect(path, multiline=True)
+        reduction = len(line_entries) / len(record_entries)
+        speedup = line_elapsed / record_elapsed
+
+        print(f"\n逐行 {len(line_entries)} 条 {line_elapsed:.4f} 秒, "
+              f"合并 {len(record_entries)} 条 {record_elapsed:.4f} 秒")
+        print(f"条目减少: {reduction:.1f}x, 加速比: {speedup:.1f}x")
+
+        assert len(record_entries) == LINE_COUNT // 20
+        assert all(entry.level == "ERROR" for entry in record_entries)
+        assert reduction >= 10
+        assert speedup >= 2
+
+
+def measure_stats_peak(path, lines):
+    """写入指定行数的日志, 返回流式统计结果和峰值内存 (字节)"""
+    with open(path, "w") as f:
+        for i in range(lines):
+            f.write(f"2024-01-15 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d},000 "
+                    f"{'ERROR' if i % 50 == 0 else 'INFO'} app.worker{i % 500} request {i} done\n")
+
+    collector = LogCollector([str(path)])
+    collector.initialize()
+    tracemalloc.start()
+    try:
+        summary = LogStatistics().update(collector.iter_entries()).to_dict()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return summary, peak
+
+
+@pytest.mark.performance
+class TestLogStatisticsPerformance:
+    """流式统计性能测试"""
+
+    def test_memory_does_not_grow_with_input(self, tmp_path):
+        """测试输入增大 8 倍时统计峰值内存基本不变"""
+        small, small_peak = measure_stats_peak(tmp_path / "small.log", LINE_COUNT // 4)
+        large, large_peak = measure_stats_peak(tmp_path / "large.log", LINE_COUNT * 2)
+
+        print(f"\n{small['total_entries']} 条峰值 {small_peak / 1024:.0f} KB, "
+              f"{large['total_entries']} 条峰值 {large_peak / 1024:.0f} KB")
+
+        assert large['total_entries'] == LINE_COUNT * 2
+        assert large['level_distribution'] == {'INFO': LINE_COUNT * 2 * 49 // 50,
+                                               'ERROR': LINE_COUNT * 2 // 50}
+        assert abs(large['distinct_processes'] - 500) <= 25
+        assert large_peak < small_peak * 1.5
+        assert large_peak < 4 * 1024 * 1024
+
+
+@pytest.mark.performance
+class TestWindowedDetectorPerformance:
+    """窗口化检测器性能测试"""
+
+    @pytest.mark.parametrize("detector_class,options", [
+        (LogVolumeAnomalyDetector, {"volume_threshold": None}),
+        (LogLevelAnomalyDetector, {"error_threshold": None}),
+    ])
+    def test_detector_throughput(self, detector_class, options):
+        """测试检测器每秒处理超过 100 万条日志"""
+        start = datetime(2024, 1, 15)
+        entries = [
+            LogEntry(timestamp=start + timedelta(milliseconds=i * 20),
+                     level="ERROR" if i % 50 == 0 else "INFO",
+                     message=f"request {i}", source="/var/log/app.log")
+            for i in range(LINE_COUNT * 5)
+        ]
+
+        timings = []
+        for _ in range(3):
+            detector = detector_class(**options)
+            detector.initialize()
+            start_time = time.perf_counter()
+            events = detector.detect(iter(entries))
+            timings.append(time.perf_counter() - start_time)
+
+        throughput = len(entries) / min(timings)
+        print(f"\n{detector.get_name()}: {throughput:.0f} 条/秒, {len(events)} 个事件")
+
+        assert events == []
+        assert throughput > 1000000
@@ -0,0 +1,178 @@
+"""
+Unit tests for alert rule conditions and their evaluation
+"""
+import pytest
+from datetime import datetime, timedelta
+from aiops.alerting import AlertManager, AlertRule, RuleEvaluator, compile_condition
+from aiops.alerting.conditions import parse_duration
+from aiops.alerting.evaluator import SeriesWindow
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+VALUES = {
+    "cpu.cpu_percent": 95.0,
+    "memory.mem_used_percent": 85.0,
+    "disk.sda.avg_write_time_ms": 80.0,
+    "disk.sdb.avg_write_time_ms": 5.0,
+    "process.my-app.vm_rss": 4096.0,
+}
+
+
+class TestConditions:
+    """Test condition parsing and compilation"""
+
+    @pytest.mark.parametrize("condition,expected", [
+        ("cpu.cpu_percent > 90 and memory.mem_used_percent > 80", True),
+        ("cpu.cpu_percent > 90 and memory.mem_used_percent > 90", False),
+        ("cpu.cpu_percent > 99 or memory.mem_used_percent >= 85", True),
+        ("not cpu.cpu_percent < 90", True),
+        ("(cpu.cpu_percent + memory.mem_used_percent) / 2 == 90", True),
+        ("cpu.cpu_percent - 100 < -4", True),
+        ("abs(memory.mem_used_percent - cpu.cpu_percent) <= 10", True),
+        ("`process.my-app.vm_rss` / 1024 != 4", False),
+        ("cpu.cpu_percent > memory.mem_used_percent", True),
+        ("cpu.cpu_percent", True),
+        ("cpu.cpu_percent * 2 > 180", True),
+        ("cpu.cpu_percent*2 > 190", False),
+        ("2*cpu.cpu_percent == 190", True),
+        ("(cpu.cpu_percent)*2 >= 190", True),
+    ])
+    def test_evaluation(self, condition, expected):
+        """Test operators, precedence and functions"""
+        assert compile_condition(condition).holds(VALUES) is expected
+
+    @pytest.mark.parametrize("condition", [
+        "missing.series > 1",
+        "missing.series < 1",
+        "missing.series + 1 > 0",
+        "cpu.cpu_percent / 0 > 1",
+    ])
+    def test_missing_values_never_hold(self, condition):
+        """Test comparisons with missing series or undefined arithmetic are false"""
+        assert not compile_condition(condition).holds(VALUES)
+
+    def test_not_of_missing_series(self):
+        """Test a negated comparison with a missing series holds"""
+        assert compile_condition("not missing.series > 1").holds(VALUES)
+
+    @pytest.mark.parametrize("condition,message", [
+        ("", "cannot be empty"),
+        ("cpu >", "Unexpected end"),
+        ("cpu > 90 90", "unexpected '90'"),
+        ("cpu $ 90", "Unexpected character at 5"),
+        ("avg_over(cpu, 5) > 1", "expects a duration"),
+        ("median(cpu) > 1", "unknown function"),
+        ("cpu > 5m", "outside a window function"),
+        ("a.*.*.b > 1", "more than one"),
+        ("* 2 > 1", "unexpected '\\*'"),
+    ])
+    def test_invalid_conditions(self, condition, message):
+        """Test invalid conditions raise ValueError with the reason"""
+        with pytest.raises(ValueError, match=message):
+            compile_condition(condition)
+
+    def test_names_and_windows(self):
+        """Test the series and windows a condition reads are reported"""
+        condition = compile_condition("avg_over(cpu.cpu_percent, 5m) > 75 and disk.*.x > 1")
+
+        assert condition.names == {"cpu.cpu_percent", "disk.*.x"}
+        assert condition.wildcards == {"disk.*.x"}
+        assert [(w.name, w.seconds) for w in condition.windows] == [("cpu.cpu_percent", 300.0)]
+        assert compile_condition("disk.*.x*2 > 1").names == {"disk.*.x"}
+
+    def test_parse_duration(self):
+        """Test duration units"""
+        assert [parse_duration(text) for text in ("30s", "5m", "1.5h", "1d")] == [
+            30.0, 300.0, 5400.0, 86400.0,
+        ]
+        with pytest.raises(ValueError):
+            parse_duration("5 minutes")
+
+
+class TestSeriesWindow:
+    """Test SeriesWindow"""
+
+    def test_aggregates_slide(self):
+        """Test aggregates cover only the samples within the window"""
+        window = SeriesWindow(seconds=30)
+        for second, value in [(0, 5.0), (10, 1.0), (20, 9.0), (30, 3.0)]:
+            window.add(float(second), value)
+
+        # The sample at 0 s left the window at 30 s
+        assert len(window) == 3
+        assert window.aggregate("avg") == pytest.approx(13.0 / 3)
+        assert window.aggregate("min") == 1.0
+        assert window.aggregate("max") == 9.0
+        assert window.aggregate("sum") == 13.0
+        assert window.aggregate("delta") == 2.0
+        assert window.aggregate("rate") == pytest.approx(0.1)
+
+        window.expire(100.0)
+        assert window.aggregate("avg") is None
+        assert window.aggregate("count") == 0.0
+
+
+class TestRuleEvaluator:
+    """Test RuleEvaluator"""
+
+    def test_rules_that_hold(self):
+        """Test only the rules that hold are returned"""
+        evaluator = RuleEvaluator()
+        evaluator.add_rule("high_cpu", "cpu.cpu_percent > 90")
+        evaluator.add_rule("high_memory", "memory.mem_used_percent > 90")
+
+        assert evaluator.evaluate(VALUES, START) == {"high_cpu": [{}]}
+
+        evaluator.remove_rule("high_cpu")
+        assert evaluator.evaluate(VALUES, START) == {}
+
+    def test_wildcard_instances(self):
+        """Test wildcard rules hold per instance"""
+        evaluator = RuleEvaluator()
+        evaluator.add_rule("slow_disk", "disk.*.avg_write_time_ms > 50")
+
+        assert evaluator.evaluate(VALUES, START) == {"slow_disk": [{"instance": "sda"}]}
+
+    def test_window_functions_over_batches(self):
+        """Test window functions aggregate the batches within their window"""
+        evaluator = RuleEvaluator()
+        evaluator.add_rule("busy", "avg_over(cpu.cpu_percent, 2m) > 75")
+        evaluator.add_rule("rising", "delta_over(disk.*.avg_write_time_ms, 2m) > 5")
+
+        results = []
+        for minute, cpu in enumerate([70.0, 90.0, 60.0, 95.0]):
+            values = {
+                "cpu.cpu_percent": cpu,
+                "disk.sda.avg_write_time_ms": 10.0 * minute,
+                "disk.sdb.avg_write_time_ms": 5.0,
+            }
+            results.append(evaluator.evaluate(values, START + timedelta(minutes=minute)))
+
+        assert results == [
+            {},
+            {"busy": [{}], "rising": [{"instance": "sda"}]},
+            {"rising": [{"instance": "sda"}]},
+            {"busy": [{}], "rising": [{"instance": "sda"}]},
+        ]
+
+    def test_evaluate_snapshot(self):
+        """Test collector snapshots are flattened before evaluation"""
+        evaluator = RuleEvaluator()
+        evaluator.add_rule("slow_disk", "disk.*.avg_write_time_ms > 50")
+
+        results = evaluator.evaluate_snapshot({
+            "timestamp": START.isoformat(),
+            "disk": [{"device": "sda", "avg_write_time_ms": 80.0}],
+        })
+
+        assert results == {"slow_disk": [{"instance": "sda"}]}
+
+    def test_manager_rejects_invalid_condition(self, tmp_path):
+        """Test rules are only created with valid conditions"""
+        manager = AlertManager(storage_path=str(tmp_path))
+
+        with pytest.raises(ValueError, match="Unexpected end"):
+            manager.create_rule(AlertRule(name="bad", condition="cpu >", severity="warning"))
+        assert manager.list_rules() == []
+        manager.close()
@@ -0,0 +1,265 @@
+"""
+Unit tests for alert inhibition and grouping
+"""
+import pytest
+from datetime import datetime, timedelta
+from aiops.alerting import (
+    AlertGrouper, AlertManager, AlertRule, AlertScheduler, AlertStore, AlertTransition,
+    InhibitRule, Inhibitor,
+)
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+# Rules firing together when a disk saturates
+SYMPTOMS = {
+    "io_queue_congestion": "disk.*.queue_length > 10",
+    "io_latency_spike_read": "disk.*.avg_read_time_ms > 50",
+    "io_latency_spike_write": "disk.*.avg_write_time_ms > 50",
+    "high_cpu": "cpu.iowait > 30",
+}
+
+SATURATED = {
+    "disk.sda.queue_length": 32.0,
+    "disk.sda.avg_read_time_ms": 120.0,
+    "disk.sda.avg_write_time_ms": 180.0,
+    "cpu.iowait": 45.0,
+}
+
+HEALTHY = {
+    "disk.sda.queue_length": 1.0,
+    "disk.sda.avg_read_time_ms": 2.0,
+    "disk.sda.avg_write_time_ms": 3.0,
+    "cpu.iowait": 1.0,
+}
+
+
+def at(seconds):
+    """Time ``seconds`` after START"""
+    return START + timedelta(seconds=seconds)
+
+
+def transition(rule_name, status="firing", seconds=0, **labels):
+    """Alert transition of a rule"""
+    return AlertTransition(rule_name=rule_name, labels=labels, previous="", status=status,
+                           timestamp=at(seconds))
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Alert store in a temporary directory"""
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    yield store
+    store.close()
+
+
+def disk_scheduler(store, for_duration=0):
+    """Scheduler for the disk symptoms, with congestion inhibiting the others"""
+    rules = [
+        AlertRule(name=name, condition=condition, severity="warning", labels={"host": "web-1"},
+                  for_duration=for_duration if name != "io_queue_congestion" else 0)
+        for name, condition in SYMPTOMS.items()
+    ]
+    inhibitor = Inhibitor([InhibitRule(
+        source={"alertname": "io_queue_congestion"},
+        target={"host": "web-1"},
+        equal=["host"],
+    )])
+    return AlertScheduler(store, rules, inhibitor=inhibitor)
+
+
+class TestInhibitor:
+    """Test Inhibitor"""
+
+    def test_equal_labels(self):
+        """Test only targets sharing the equal labels with a source are inhibited"""
+        inhibitor = Inhibitor([InhibitRule(
+            source={"alertname": "io_queue_congestion"}, target={"alertname": "high_cpu"},
+            equal=["host"],
+        )])
+        inhibitor.index([{"alertname": "io_queue_congestion", "host": "web-1"}])
+
+        assert inhibitor.is_inhibited({"alertname": "high_cpu", "host": "web-1"})
+        assert not inhibitor.is_inhibited({"alertname": "high_cpu", "host": "web-2"})
+        assert not inhibitor.is_inhibited({"alertname": "high_memory", "host": "web-1"})
+
+    def test_alert_does_not_inhibit_itself(self):
+        """Test an alert matching both sides is only inhibited by pure sources"""
+        inhibitor = Inhibitor([InhibitRule(source={"host": "web-1"}, target={"host": "web-1"})])
+        inhibitor.index([{"alertname": "a", "host": "web-1"}, {"alertname": "b", "host": "web-1"}])
+
+        assert not inhibitor.is_inhibited({"alertname": "a", "host": "web-1"})
+
+    def test_severity_matchers(self):
+        """Test critical alerts can inhibit warnings"""
+        inhibitor = Inhibitor([
+            InhibitRule(source={"severity": "critical"}, target={"severity": "warning"}),
+        ])
+        inhibitor.index([{"alertname": "disk_full", "severity": "critical"}])
+
+        assert inhibitor.is_inhibited({"alertname": "slow_disk", "severity": "warning"})
+        assert not inhibitor.is_inhibited({"alertname": "oom", "severity": "critical"})
+
+    def test_invalid_rule(self):
+        """Test inhibit rules need source and target matchers"""
+        with pytest.raises(ValueError):
+            InhibitRule(source={}, target={"alertname": "x"})
+
+
+class TestSchedulerInhibition:
+    """Test inhibition in AlertScheduler"""
+
+    def test_symptoms_are_not_written(self, store):
+        """Test only the cause of a disk saturation reaches the alert store"""
+        scheduler = disk_scheduler(store)
+
+        transitions = scheduler.tick(SATURATED, at(0))
+
+        assert sorted((t.rule_name, t.status) for t in transitions) == [
+            ("high_cpu", "inhibited"),
+            ("io_latency_spike_read", "inhibited"),
+            ("io_latency_spike_write", "inhibited"),
+            ("io_queue_congestion", "firing"),
+        ]
+        alert, = store.list_alerts()
+        assert alert['rule_name'] == "io_queue_congestion"
+
+        # Nothing changes while the incident lasts
+        assert scheduler.tick(SATURATED, at(60)) == []
+
+        # Symptoms end with their cause without ever being written
+        scheduler.tick(HEALTHY, at(120))
+        assert [(a['rule_name'], a['status']) for a in store.list_alerts()] == [
+            ("io_queue_congestion", "resolved"),
+        ]
+        assert scheduler.states == []
+
+    def test_symptom_fires_when_cause_resolves(self, store):
+        """Test an inhibited alert fires once its source no longer fires"""
+        scheduler = disk_scheduler(store)
+        scheduler.tick(SATURATED, at(0))
+
+        transitions = scheduler.tick({**SATURATED, "disk.sda.queue_length": 1.0}, at(60))
+
+        assert sorted((t.rule_name, t.previous, t.status) for t in transitions) == [
+            ("high_cpu", "inhibited", "firing"),
+            ("io_latency_spike_read", "inhibited", "firing"),
+            ("io_latency_spike_write", "inhibited", "firing"),
+            ("io_queue_congestion", "firing", "resolved"),
+        ]
+        assert store.count_alerts(status="firing") == 3
+        fired = store.list_alerts(rule_name="high_cpu")[0]
+        assert fired['started_at'] == START.isoformat()
+
+    def test_pending_symptom_is_dropped_from_store(self, store):
+        """Test a pending alert that becomes inhibited leaves the store"""
+        scheduler = disk_scheduler(store, for_duration=60)
+        scheduler.tick({**SATURATED, "disk.sda.queue_length": 1.0}, at(0))
+        assert store.count_alerts(status="pending") == 3
+
+        scheduler.tick(SATURATED, at(60))
+
+        assert [a['rule_name'] for a in store.list_alerts()] == ["io_queue_congestion"]
+
+    def test_other_hosts_not_inhibited(self, store):
+        """Test inhibition needs the equal labels to match"""
+        inhibitor = Inhibitor([InhibitRule(
+            source={"alertname": "io_queue_congestion"}, target={"alertname": "high_cpu"},
+            equal=["host"],
+        )])
+        scheduler = AlertScheduler(store, [
+            AlertRule(name="io_queue_congestion", condition=SYMPTOMS["io_queue_congestion"],
+                      severity="critical", labels={"host": "web-1"}),
+            AlertRule(name="high_cpu", condition=SYMPTOMS["high_cpu"], severity="warning",
+                      labels={"host": "web-2"}),
+        ], inhibitor=inhibitor)
+
+        scheduler.tick(SATURATED, at(0))
+
+        assert store.count_alerts(status="firing") == 2
+
+    def test_inhibit_rules_stored(self, tmp_path):
+        """Test the manager stores inhibit rules and builds an inhibitor"""
+        manager = AlertManager(storage_path=str(tmp_path))
+        assert manager.create_inhibitor() is None
+
+        rule_id = manager.create_inhibit_rule(InhibitRule(
+            source={"alertname": "a"}, target={"alertname": "b"}, equal=["host"],
+        ))
+        assert manager.list_inhibit_rules() == [{
+            "id": rule_id, "source": {"alertname": "a"}, "target": {"alertname": "b"},
+            "equal": ["host"],
+        }]
+        assert manager.create_inhibitor().rules[0].equal == ["host"]
+
+        assert manager.delete_inhibit_rule(rule_id)
+        assert not manager.delete_inhibit_rule(rule_id)
+        manager.close()
+
+
+class TestAlertGrouper:
+    """Test AlertGrouper"""
+
+    def test_group_wait_collapses_burst(self):
+        """Test alerts arriving within group_wait form one notification"""
+        grouper = AlertGrouper(group_wait=30, group_interval=300)
+        for i, name in enumerate(SYMPTOMS):
+            grouper.add(transition(name, seconds=i, host="web-1"), ["ops"])
+
+        assert grouper.flush(at(10)) == []
+        assert grouper.next_flush() == at(30)
+
+        (channels, payload), = grouper.flush(at(30))
+        assert channels == ("ops",)
+        assert payload["status"] == "firing"
+        assert payload["firing"] == 4
+        assert [a["rule_name"] for a in payload["alerts"]] == sorted(SYMPTOMS)
+
+    def test_group_interval_and_dedup(self):
+        """Test later changes wait for group_interval and keep each alert's latest status"""
+        grouper = AlertGrouper(group_wait=0, group_interval=300)
+        grouper.add(transition("high_cpu", host="web-1"), ["ops"])
+        grouper.flush(at(0))
+
+        grouper.add(transition("high_cpu", seconds=60, host="web-1"), ["ops"])
+        assert grouper.next_flush() is None  # Same status: nothing new
+
+        grouper.add(transition("slow_disk", seconds=60, instance="sda"), ["ops"])
+        grouper.add(transition("slow_disk", "resolved", seconds=90, instance="sda"), ["ops"])
+        assert grouper.flush(at(120)) == []
+
+        (_, payload), = grouper.flush(at(300))
+        assert [(a["rule_name"], a["status"]) for a in payload["alerts"]] == [
+            ("high_cpu", "firing"), ("slow_disk", "resolved"),
+        ]
+
+        # Resolved alerts are sent once; the group ends with its last alert
+        grouper.add(transition("high_cpu", "resolved", seconds=400, host="web-1"), ["ops"])
+        (_, payload), = grouper.flush(at(600))
+        assert payload["status"] == "resolved"
+        assert grouper.groups == {}
+
+    def test_group_by_labels_and_channels(self):
+        """Test groups are split by the group_by labels and the channels"""
+        grouper = AlertGrouper(group_by=["host"], group_wait=0)
+        grouper.add(transition("high_cpu", host="web-1"), ["ops"])
+        grouper.add(transition("slow_disk", host="web-1"), ["ops"])
+        grouper.add(transition("high_cpu", host="web-2"), ["ops"])
+        grouper.add(transition("high_cpu", host="web-2"), ["ops", "mail"])
+        grouper.add(transition("high_cpu", host="web-3"), [])
+
+        notifications = grouper.flush(at(0))
+
+        assert sorted((channels, payload["group_labels"]["host"], payload["firing"])
+                      for channels, payload in notifications) == [
+            (("mail", "ops"), "web-2", 1),
+            (("ops",), "web-1", 2),
+            (("ops",), "web-2", 1),
+        ]
+
+    def test_force_flush(self):
+        """Test a forced flush ignores the timers"""
+        grouper = AlertGrouper(group_wait=30)
+        grouper.add(transition("high_cpu"), ["ops"])
+
+        assert len(grouper.flush(at(0), force=True)) == 1
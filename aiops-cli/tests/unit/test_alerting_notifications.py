@@ -0,0 +1,273 @@
+"""
+Unit tests for alert notification channels and the dispatcher
+"""
+import asyncio
+import json
+import threading
+import time
+import pytest
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from aiops.alerting import (
+    AlertManager, AlertTransition, FileChannel, NotificationDispatcher, Outbox, SMTPChannel,
+    WebhookChannel, create_channel,
+)
+from aiops.core.exceptions import NotificationError
+
+
+class StandInServer:
+    """Local HTTP server recording the JSON bodies posted to it"""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)  # Responses before answering 200
+        self.bodies = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                status = server.statuses.pop(0) if server.statuses else 200
+                if status == 200:
+                    server.bodies.append(json.loads(body))
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/alerts"
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    """HTTP stand-in for a webhook endpoint"""
+    server = StandInServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    """Outbox in a temporary directory"""
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    yield outbox
+    outbox.close()
+
+
+def payload(i):
+    """Notification payload of a fired alert"""
+    return {"rule_name": f"rule_{i}", "status": "firing", "labels": {"instance": "sda"}}
+
+
+async def deliver(dispatcher, payloads, channels=("hook",), timeout=5.0):
+    """Start a dispatcher, submit payloads and stop it once they are handled"""
+    await dispatcher.start()
+    for item in payloads:
+        dispatcher.submit(channels, item)
+    deadline = time.monotonic() + timeout
+    while dispatcher.outbox.count() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return await dispatcher.stop()
+
+
+class TestNotificationDispatcher:
+    """Test NotificationDispatcher"""
+
+    def test_batches_into_digest(self, server, outbox):
+        """Test notifications arriving within the batch window form one digest"""
+        hook = WebhookChannel("hook", server.url, batch_wait=0.2)
+        dispatcher = NotificationDispatcher(outbox, [hook])
+
+        assert asyncio.run(deliver(dispatcher, [payload(i) for i in range(3)]))
+
+        digest, = server.bodies
+        assert digest["channel"] == "hook"
+        assert digest["count"] == 3
+        assert [n["rule_name"] for n in digest["notifications"]] == ["rule_0", "rule_1", "rule_2"]
+        assert outbox.count() == 0
+        assert dispatcher.stats["digests"] == 1
+
+    def test_batch_size_splits_digests(self, server, outbox):
+        """Test digests carry at most batch_size notifications"""
+        hook = WebhookChannel("hook", server.url, batch_wait=0.2, batch_size=2)
+
+        asyncio.run(deliver(NotificationDispatcher(outbox, [hook]), [payload(i) for i in range(5)]))
+
+        assert [body["count"] for body in server.bodies] == [2, 2, 1]
+
+    def test_retries_with_backoff(self, outbox):
+        """Test failed digests are retried until the endpoint accepts them"""
+        server = StandInServer(statuses=[500, 503])
+        hook = WebhookChannel("hook", server.url, batch_wait=0)
+        dispatcher = NotificationDispatcher(outbox, [hook], backoff=0.05, jitter=0)
+
+        asyncio.run(deliver(dispatcher, [payload(1)]))
+        server.close()
+
+        assert len(server.bodies) == 1
+        assert dispatcher.stats["retried"] == 2
+        assert outbox.count() == 0
+
+    def test_gives_up_after_max_attempts(self, outbox):
+        """Test notifications are marked failed after max_attempts"""
+        server = StandInServer(statuses=[500] * 10)
+        hook = WebhookChannel("hook", server.url, batch_wait=0)
+        dispatcher = NotificationDispatcher(outbox, [hook], max_attempts=3, backoff=0.01)
+
+        asyncio.run(deliver(dispatcher, [payload(1)]))
+        server.close()
+
+        failed, = outbox.failed()
+        assert failed.attempts == 3
+        assert "500" in failed.last_error
+        assert dispatcher.stats["failed"] == 1
+
+    def test_backoff_delay_doubles_up_to_maximum(self, outbox):
+        """Test the retry delay grows exponentially and is capped"""
+        dispatcher = NotificationDispatcher(outbox, [], backoff=1.0, max_backoff=10.0, jitter=0)
+
+        assert [dispatcher.backoff_delay(n) for n in range(1, 6)] == [1.0, 2.0, 4.0, 8.0, 10.0]
+
+    def test_rate_limit(self, server, outbox):
+        """Test digests of a channel are spaced by its rate limit"""
+        hook = WebhookChannel("hook", server.url, batch_wait=0, batch_size=1, rate_limit=600)
+
+        start = time.monotonic()
+        asyncio.run(deliver(NotificationDispatcher(outbox, [hook]), [payload(i) for i in range(3)]))
+
+        # One send at once, then one every 0.1 s
+        assert len(server.bodies) == 3
+        assert time.monotonic() - start >= 0.2
+
+    def test_outbox_survives_restart(self, server, tmp_path):
+        """Test notifications submitted while stopped are delivered after start"""
+        hook = WebhookChannel("hook", server.url, batch_wait=0)
+        with Outbox(str(tmp_path / "outbox.db")) as outbox:
+            NotificationDispatcher(outbox, [hook]).submit(["hook", "unknown"], payload(1))
+            assert outbox.count() == 1
+
+        with Outbox(str(tmp_path / "outbox.db")) as outbox:
+            asyncio.run(deliver(NotificationDispatcher(outbox, [hook]), []))
+            assert outbox.count() == 0
+        assert server.bodies[0]["notifications"] == [payload(1)]
+
+    def test_background_thread(self, server, outbox):
+        """Test transitions are notified from another thread without blocking"""
+        hook = WebhookChannel("hook", server.url, batch_wait=0.1)
+        dispatcher = NotificationDispatcher(outbox, [hook])
+        dispatcher.start_background()
+
+        for status in ("pending", "firing", "resolved"):
+            dispatcher.notify(AlertTransition(
+                rule_name="high_cpu", labels={}, previous="", status=status,
+                timestamp=datetime(2024, 1, 15, 10, 0),
+            ), ["hook"])
+
+        assert dispatcher.stop_background()
+        statuses = [n["status"] for body in server.bodies for n in body["notifications"]]
+        assert statuses == ["firing", "resolved"]
+
+
+class TestNotificationChannels:
+    """Test notification channels"""
+
+    def test_file_channel(self, tmp_path, outbox):
+        """Test the file channel appends one JSON line per notification"""
+        path = tmp_path / "out" / "alerts.ndjson"
+        channel = FileChannel("audit", str(path), batch_wait=0.1)
+
+        asyncio.run(deliver(NotificationDispatcher(outbox, [channel]),
+                            [payload(1), payload(2)], channels=["audit"]))
+
+        lines = path.read_text().splitlines()
+        assert [json.loads(line) for line in lines] == [payload(1), payload(2)]
+
+    def test_smtp_channel(self):
+        """Test digests are mailed through an SMTP stand-in"""
+        received = []
+
+        async def handle(reader, writer):
+            writer.write(b"220 stand-in\r\n")
+            data = False
+            lines = []
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if data:
+                    if line == b".\r\n":
+                        data = False
+                        received.append(b"".join(lines).decode())
+                        writer.write(b"250 queued\r\n")
+                    else:
+                        lines.append(line)
+                elif line.upper().startswith(b"DATA"):
+                    data = True
+                    writer.write(b"354 go ahead\r\n")
+                elif line.upper().startswith(b"QUIT"):
+                    writer.write(b"221 bye\r\n")
+                    await writer.drain()
+                    break
+                else:
+                    writer.write(b"250 ok\r\n")
+                await writer.drain()
+            writer.close()
+
+        async def run():
+            smtp = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = smtp.sockets[0].getsockname()[1]
+            channel = SMTPChannel("mail", ["ops@example.com"], host="127.0.0.1", port=port)
+            await channel.send([payload(1), payload(2)])
+            smtp.close()
+            await smtp.wait_closed()
+
+        asyncio.run(run())
+
+        message, = received
+        assert "Subject: [aiops] 2 alert notifications" in message
+        assert "rule_1 {instance=sda}  firing" in message
+
+    def test_webhook_errors(self, outbox):
+        """Test unreachable endpoints raise NotificationError"""
+        server = StandInServer()
+        url = server.url
+        server.close()
+
+        with pytest.raises(NotificationError):
+            asyncio.run(WebhookChannel("hook", url, timeout=1).send([payload(1)]))
+
+    @pytest.mark.parametrize("definition,message", [
+        ({"name": "x", "type": "pager"}, "Unknown channel type"),
+        ({"name": "x", "type": "webhook", "url": "ftp://host"}, "Invalid webhook url"),
+        ({"name": "x", "type": "smtp"}, "Invalid smtp channel"),
+        ({"name": "x", "type": "file", "path": "a", "batch_size": 0}, "batch_size"),
+    ])
+    def test_invalid_definitions(self, definition, message):
+        """Test invalid channel definitions raise ValueError"""
+        with pytest.raises(ValueError, match=message):
+            create_channel(definition)
+
+    def test_definitions_round_trip(self, tmp_path):
+        """Test the manager stores channel definitions and builds a dispatcher"""
+        manager = AlertManager(storage_path=str(tmp_path))
+        manager.create_channel({"name": "hook", "type": "webhook", "url": "http://localhost/a",
+                                "rate_limit": 6})
+        manager.create_channel({"name": "audit", "type": "file", "path": "/tmp/a.ndjson"})
+        with pytest.raises(ValueError, match="already exists"):
+            manager.create_channel({"name": "hook", "type": "file", "path": "b"})
+
+        dispatcher = manager.create_dispatcher()
+        assert sorted(dispatcher.channels) == ["audit", "hook"]
+        assert dispatcher.channels["hook"].rate_limit == 6
+
+        manager.delete_channel("audit")
+        assert [c["name"] for c in manager.list_channels()] == ["hook"]
+        dispatcher.outbox.close()
+        manager.close()
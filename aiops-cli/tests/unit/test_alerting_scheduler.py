@@ -0,0 +1,189 @@
+"""
+Unit tests for alert rule scheduling and the alert lifecycle
+"""
+import pytest
+from datetime import datetime, timedelta
+from aiops.alerting import AlertRule, AlertScheduler, AlertStore
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+
+def at(seconds):
+    """Time ``seconds`` after START"""
+    return START + timedelta(seconds=seconds)
+
+
+def statuses(transitions):
+    """Summarize transitions as (rule, labels, previous, status)"""
+    return [(t.rule_name, t.labels, t.previous, t.status) for t in transitions]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Alert store in a temporary directory"""
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    yield store
+    store.close()
+
+
+class TestAlertScheduler:
+    """Test AlertScheduler"""
+
+    def test_pending_firing_resolved(self, store):
+        """Test a rule with for_duration goes pending, fires and resolves"""
+        scheduler = AlertScheduler(store, [AlertRule(
+            name="high_cpu", condition="cpu.cpu_percent > 90", severity="critical",
+            evaluation_interval=30, for_duration=60, labels={"team": "ops"},
+        )])
+        labels = {"team": "ops"}
+
+        assert statuses(scheduler.tick({"cpu.cpu_percent": 95.0}, at(0))) == [
+            ("high_cpu", labels, "inactive", "pending"),
+        ]
+        assert scheduler.tick({"cpu.cpu_percent": 95.0}, at(30)) == []
+        assert statuses(scheduler.tick({"cpu.cpu_percent": 95.0}, at(60))) == [
+            ("high_cpu", labels, "pending", "firing"),
+        ]
+        alert, = store.list_alerts()
+        assert alert['status'] == "firing"
+        assert alert['started_at'] == START.isoformat()
+        assert alert['labels'] == labels
+        assert alert['metrics'] == {"cpu.cpu_percent": 95.0}
+
+        assert statuses(scheduler.tick({"cpu.cpu_percent": 50.0}, at(90))) == [
+            ("high_cpu", labels, "firing", "resolved"),
+        ]
+        alert, = store.list_alerts()
+        assert alert['status'] == "resolved"
+        assert alert['ended_at'] == at(90).isoformat()
+        assert scheduler.states == []
+
+    def test_fires_at_once_without_for_duration(self, store):
+        """Test a rule without for_duration fires on the first evaluation"""
+        scheduler = AlertScheduler(store, [
+            AlertRule(name="high_cpu", condition="cpu.cpu_percent > 90", severity="critical"),
+        ])
+
+        transition, = scheduler.tick({"cpu.cpu_percent": 95.0}, START)
+
+        assert transition.status == "firing"
+        assert transition.alert['id'] == store.list_alerts()[0]['id']
+
+    def test_pending_dropped_without_firing(self, store):
+        """Test a pending label set that stops holding leaves no alert behind"""
+        scheduler = AlertScheduler(store, [AlertRule(
+            name="high_cpu", condition="cpu.cpu_percent > 90", severity="critical",
+            for_duration=300,
+        )])
+
+        scheduler.tick({"cpu.cpu_percent": 95.0}, at(0))
+        assert store.count_alerts(status="pending") == 1
+
+        assert statuses(scheduler.tick({"cpu.cpu_percent": 50.0}, at(60))) == [
+            ("high_cpu", {}, "pending", "inactive"),
+        ]
+        assert store.count_alerts() == 0
+
+    def test_label_sets_are_tracked_separately(self, store):
+        """Test each wildcard instance has its own lifecycle"""
+        scheduler = AlertScheduler(store, [AlertRule(
+            name="slow_disk", condition="disk.*.avg_write_time_ms > 50", severity="warning",
+        )])
+
+        scheduler.tick({"disk.sda.avg_write_time_ms": 80.0, "disk.sdb.avg_write_time_ms": 5.0},
+                       at(0))
+        transitions = scheduler.tick(
+            {"disk.sda.avg_write_time_ms": 10.0, "disk.sdb.avg_write_time_ms": 70.0}, at(60)
+        )
+
+        assert statuses(transitions) == [
+            ("slow_disk", {"instance": "sda"}, "firing", "resolved"),
+            ("slow_disk", {"instance": "sdb"}, "inactive", "firing"),
+        ]
+        assert store.list_alerts(status="firing")[0]['metrics'] == {
+            "disk.sdb.avg_write_time_ms": 70.0,
+        }
+
+    def test_groups_run_on_their_intervals(self, store):
+        """Test rules are only evaluated when their interval group is due"""
+        scheduler = AlertScheduler(store, [
+            AlertRule(name="fast", condition="cpu.cpu_percent > 90", severity="warning",
+                      evaluation_interval=10),
+            AlertRule(name="slow", condition="cpu.cpu_percent > 90", severity="warning",
+                      evaluation_interval=60),
+            AlertRule(name="off", condition="cpu.cpu_percent > 90", severity="warning",
+                      enabled=False),
+        ])
+        values = {"cpu.cpu_percent": 95.0}
+
+        assert sorted(scheduler.groups) == [10, 60]
+        assert [t.rule_name for t in scheduler.tick(values, at(0))] == ["fast", "slow"]
+        assert scheduler.next_run() == at(10)
+
+        scheduler.tick({"cpu.cpu_percent": 50.0}, at(10))
+        assert [(a['rule_name'], a['status']) for a in store.list_alerts()] == [
+            ("fast", "resolved"), ("slow", "firing"),
+        ]
+
+    def test_recovers_state_after_restart(self, store):
+        """Test a new scheduler continues from the open alerts"""
+        rules = [
+            AlertRule(name="high_cpu", condition="cpu.cpu_percent > 90", severity="critical",
+                      for_duration=120).to_dict(),
+            AlertRule(name="high_memory", condition="memory.mem_used_percent > 90",
+                      severity="critical").to_dict(),
+        ]
+        values = {"cpu.cpu_percent": 95.0, "memory.mem_used_percent": 95.0}
+        AlertScheduler(store, rules).tick(values, at(0))
+
+        scheduler = AlertScheduler(store, rules)
+        assert scheduler.recover() == 2
+
+        # Pending keeps its start time: fires 120 s after the first evaluation
+        assert statuses(scheduler.tick(values, at(120))) == [
+            ("high_cpu", {}, "pending", "firing"),
+        ]
+        assert statuses(scheduler.tick({"cpu.cpu_percent": 95.0}, at(180))) == [
+            ("high_memory", {}, "firing", "resolved"),
+        ]
+        assert store.count_alerts() == 2
+
+    def test_manually_resolved_alert_is_left_alone(self, store):
+        """Test transitions do not overwrite alerts that were closed by hand"""
+        scheduler = AlertScheduler(store, [
+            AlertRule(name="high_cpu", condition="cpu.cpu_percent > 90", severity="critical"),
+        ])
+        scheduler.tick({"cpu.cpu_percent": 95.0}, at(0))
+        store.transition("high_cpu", ["firing"], {"status": "resolved", "ended_at": at(30)})
+
+        scheduler.tick({"cpu.cpu_percent": 50.0}, at(60))
+
+        assert store.list_alerts()[0]['ended_at'] == at(30).isoformat()
+
+    def test_invalid_rules_are_skipped(self, store):
+        """Test a rule whose condition does not compile is skipped, not the others"""
+        scheduler = AlertScheduler(store, [
+            {"name": "legacy", "condition": "cpu usage > 90%", "severity": "warning"},
+            AlertRule(name="high_cpu", condition="cpu.cpu_percent > 90", severity="critical"),
+        ])
+
+        assert list(scheduler.skipped) == ["legacy"]
+        assert "Unexpected character" in scheduler.skipped["legacy"]
+        assert statuses(scheduler.tick({"cpu.cpu_percent": 95.0}, at(0))) == [
+            ("high_cpu", {}, "inactive", "firing"),
+        ]
+
+        # An invalid replacement raises and leaves the running rule as it is
+        with pytest.raises(ValueError):
+            scheduler.add_rule(AlertRule(name="high_cpu", condition="cpu >", severity="warning"))
+        assert list(scheduler.groups[60].rules) == ["high_cpu"]
+
+    def test_rule_from_dict(self):
+        """Test rules round-trip through their dictionaries"""
+        rule = AlertRule(name="high_cpu", condition="cpu.cpu_percent > 90", severity="critical",
+                         for_duration=300, created_at=START)
+
+        assert AlertRule.from_dict(rule.to_dict()) == rule
+        with pytest.raises(ValueError):
+            AlertRule(name="x", condition="y > 1", severity="warning", for_duration=-1)
@@ -0,0 +1,279 @@
+"""
+Unit tests for alert silences
+"""
+import random
+import pytest
+from datetime import datetime, timedelta
+from aiops.alerting import (
+    AlertGrouper, AlertManager, AlertRule, AlertScheduler, AlertStore, AlertTransition, Silence,
+    SilenceIndex,
+)
+from aiops.alerting.dispatcher import should_notify
+from aiops.alerting.silences import Matcher
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+SLOW = {"disk.sda.avg_read_time_ms": 120.0, "disk.sdb.avg_read_time_ms": 150.0}
+FAST = {"disk.sda.avg_read_time_ms": 2.0, "disk.sdb.avg_read_time_ms": 3.0}
+
+
+def at(seconds):
+    """Time ``seconds`` after START"""
+    return START + timedelta(seconds=seconds)
+
+
+def silence(*matchers, start=0, end=3600):
+    """Silence from ``start`` to ``end`` seconds after START"""
+    return Silence(matchers=list(matchers), starts_at=at(start), ends_at=at(end))
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Alert store in a temporary directory"""
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    yield store
+    store.close()
+
+
+def disk_scheduler(store):
+    """Scheduler of a read latency rule per disk"""
+    return AlertScheduler(store, [AlertRule(
+        name="slow_disk", condition="disk.*.avg_read_time_ms > 50", severity="warning",
+        labels={"host": "web-1"},
+    )])
+
+
+def statuses(store):
+    """Status per disk of the alerts in the store"""
+    return {alert['labels']['instance']: alert['status'] for alert in store.list_alerts()}
+
+
+class TestSilence:
+    """Test Silence and Matcher"""
+
+    @pytest.mark.parametrize("text,labels,expected", [
+        ("host=web-1", {"host": "web-1"}, True),
+        ("host=web-1", {"host": "web-2"}, False),
+        ("host!=web-1", {"host": "web-2"}, True),
+        ("host!=web-1", {}, True),
+        ("alertname=~io_.*", {"alertname": "io_queue_congestion"}, True),
+        ("alertname=~io_", {"alertname": "io_queue_congestion"}, False),
+        ("instance!~sd[ab]", {"instance": "sdc"}, True),
+        ("team=", {"host": "web-1"}, True),
+    ])
+    def test_matchers(self, text, labels, expected):
+        """Test the matcher operators; regular expressions match the whole value"""
+        assert Matcher.parse(text).matches(labels) is expected
+
+    @pytest.mark.parametrize("text", ["host", "=web-1", "host=~(", ""])
+    def test_invalid_matchers(self, text):
+        """Test invalid matchers raise ValueError"""
+        with pytest.raises(ValueError):
+            Matcher.parse(text)
+
+    def test_validation(self):
+        """Test silences need matchers and a positive time range"""
+        with pytest.raises(ValueError):
+            silence()
+        with pytest.raises(ValueError):
+            silence("host=web-1", start=60, end=60)
+
+    def test_round_trip(self):
+        """Test to_dict()/from_dict() keep the silence"""
+        item = silence("host=web-1", "alertname=~io_.*")
+        item.comment = "deploy"
+
+        assert Silence.from_dict(item.to_dict()) == item
+        assert item.state(at(-1)) == "pending"
+        assert item.state(at(0)) == "active"
+        assert item.state(at(3600)) == "expired"
+
+
+class TestSilenceIndex:
+    """Test SilenceIndex"""
+
+    def test_matches_linear_scan(self):
+        """Test the interval tree finds the same silences as a scan"""
+        rng = random.Random(7)
+        silences = []
+        for i in range(500):
+            start = rng.randrange(0, 100000)
+            silences.append(silence(f"host=web-{i}", start=start,
+                                    end=start + rng.choice([1, 60, 3600, 50000])))
+        index = SilenceIndex(silences)
+
+        assert len(index) == 500
+        for seconds in [rng.randrange(-10, 160000) for _ in range(300)] + [0, 60, 3600]:
+            now = at(seconds)
+            expected = {id(s) for s in silences if s.is_active(now)}
+            assert {id(s) for s in index.active(now)} == expected
+
+    def test_silenced_by(self):
+        """Test a silence applies from its start until (excluding) its end"""
+        maintenance = silence("host=web-1", start=60, end=120)
+        index = SilenceIndex([maintenance, silence("host=web-2")])
+        labels = {"alertname": "slow_disk", "host": "web-1"}
+
+        assert index.silenced_by(labels, at(59)) is None
+        assert index.silenced_by(labels, at(60)) is maintenance
+        assert index.silenced_by(labels, at(120)) is None
+        assert index.next_expiry == at(120)
+        assert SilenceIndex().silenced_by(labels, at(60)) is None
+
+
+class TestSilenceStore:
+    """Test silence storage"""
+
+    def test_expire(self, store):
+        """Test expiring ends active silences and deletes pending ones"""
+        active = store.create_silence(silence("host=web-1").to_dict())
+        pending = store.create_silence(silence("host=web-2", start=600).to_dict())
+        version = store.silences_version()
+
+        assert store.expire_silence(active, at(60))
+        assert store.expire_silence(pending, at(60))
+        assert not store.expire_silence(active, at(120))
+
+        assert store.get_silence(active)['ends_at'] == at(60).isoformat()
+        assert store.get_silence(pending) is None
+        assert store.list_silences(at(60)) == []
+        assert store.silences_version() == version + 2
+
+    def test_purge(self, store):
+        """Test only silences ended before the given time are purged"""
+        store.create_silence(silence("host=web-1", end=60).to_dict())
+        kept = store.create_silence(silence("host=web-2", end=7200).to_dict())
+
+        assert store.purge_silences(at(3600)) == 1
+        assert [s['id'] for s in store.list_silences()] == [kept]
+
+    def test_manager(self, tmp_path):
+        """Test the manager lists the silences that have not expired"""
+        manager = AlertManager(storage_path=str(tmp_path))
+        now = datetime.now()
+        silence_id = manager.create_silence(Silence(
+            matchers=["host=web-1"], starts_at=now, ends_at=now + timedelta(hours=1),
+            created_by="ops", comment="deploy",
+        ))
+
+        item, = manager.list_silences()
+        assert (item['id'], item['created_by'], item['comment']) == (silence_id, "ops", "deploy")
+
+        assert manager.expire_silence(silence_id)
+        assert manager.list_silences() == []
+        assert len(manager.list_silences(include_expired=True)) == 1
+        manager.close()
+
+
+class TestSchedulerSilences:
+    """Test silences in AlertScheduler"""
+
+    def test_silenced_alert_is_stored_as_silenced(self, store):
+        """Test a matching alert is written as silenced and fires when the silence ends"""
+        store.create_silence(silence("instance=sdb", "alertname=~slow_.*", end=120).to_dict())
+        scheduler = disk_scheduler(store)
+
+        transitions = scheduler.tick(SLOW, at(0))
+
+        assert sorted((t.labels['instance'], t.status) for t in transitions) == [
+            ("sda", "firing"), ("sdb", "silenced"),
+        ]
+        assert statuses(store) == {"sda": "firing", "sdb": "silenced"}
+
+        transitions = scheduler.tick(SLOW, at(120))
+        assert [(t.labels['instance'], t.previous, t.status) for t in transitions] == [
+            ("sdb", "silenced", "firing"),
+        ]
+        assert statuses(store) == {"sda": "firing", "sdb": "firing"}
+
+    def test_firing_notified_when_silence_ends(self, store):
+        """Test an alert still firing when its silence ends is notified"""
+        store.create_silence(silence("instance=sdb", end=25).to_dict())
+        scheduler = disk_scheduler(store)
+        assert [should_notify(t) for t in scheduler.tick(SLOW, at(0))
+                if t.labels['instance'] == "sdb"] == [False]
+
+        transition, = scheduler.tick(SLOW, at(60))
+
+        assert (transition.previous, transition.status) == ("silenced", "firing")
+        assert should_notify(transition)
+
+    def test_silence_added_while_firing(self, store):
+        """Test a silence created by another process applies on the next tick"""
+        scheduler = disk_scheduler(store)
+        scheduler.tick(SLOW, at(0))
+
+        with AlertStore(str(store.db_path)) as other:
+            other.create_silence(silence("host=web-1", start=30).to_dict())
+        transitions = scheduler.tick(SLOW, at(60))
+
+        assert sorted((t.labels['instance'], t.status) for t in transitions) == [
+            ("sda", "silenced"), ("sdb", "silenced"),
+        ]
+        assert not any(should_notify(t) for t in transitions)
+
+        # Resolving a silenced alert is not notified either
+        transitions = scheduler.tick(FAST, at(120))
+        assert [t.status for t in transitions] == ["resolved", "resolved"]
+        assert not any(should_notify(t) for t in transitions)
+        assert set(statuses(store).values()) == {"resolved"}
+
+    def test_acknowledged_alert_keeps_status(self, store):
+        """Test silences starting and ending do not undo an acknowledgement"""
+        scheduler = disk_scheduler(store)
+        scheduler.tick(SLOW, at(0))
+        with AlertStore(str(store.db_path)) as other:
+            other.transition("slow_disk", ["firing"], {"status": "acknowledged"})
+            other.create_silence(silence("host=web-1", start=30, end=90).to_dict())
+        acknowledged, = [disk for disk, status in statuses(store).items()
+                         if status == "acknowledged"]
+
+        for seconds in [60, 120]:
+            transitions = scheduler.tick(SLOW, at(seconds))
+            assert [t.labels['instance'] for t in transitions] != [acknowledged]
+            assert statuses(store)[acknowledged] == "acknowledged"
+
+        recovered = disk_scheduler(store)
+        assert recovered.recover() == 2
+        assert recovered.tick(SLOW, at(180)) == []
+        assert [t.previous for t in recovered.tick(FAST, at(240))
+                if t.labels['instance'] == acknowledged] == ["acknowledged"]
+
+    def test_recover_silenced(self, store):
+        """Test silenced alerts are recovered as silenced"""
+        store.create_silence(silence("instance=sdb").to_dict())
+        disk_scheduler(store).tick(SLOW, at(0))
+
+        scheduler = disk_scheduler(store)
+        assert scheduler.recover() == 2
+        assert scheduler.tick(SLOW, at(60)) == []
+
+    def test_expired_silences_are_purged(self, store):
+        """Test expired silences are dropped from the index and purged after the retention"""
+        store.create_silence(silence("instance=sda", end=60).to_dict())
+        store.create_silence(silence("instance=sdb", end=7200).to_dict())
+        scheduler = AlertScheduler(store, [], silence_retention=600)
+
+        scheduler.tick({}, at(0))
+        assert len(scheduler.silences) == 2
+
+        scheduler.tick({}, at(60))
+        assert len(scheduler.silences) == 1
+        assert len(store.list_silences()) == 2
+
+        scheduler.tick({}, at(7200))
+        assert len(scheduler.silences) == 0
+        assert [s['ends_at'] for s in store.list_silences()] == [at(7200).isoformat()]
+
+    def test_grouper_discards_silenced(self):
+        """Test an alert silenced after firing leaves its notification group"""
+        grouper = AlertGrouper(group_wait=30)
+        firing = AlertTransition(rule_name="slow_disk", labels={"instance": "sda"}, previous="",
+                                 status="firing", timestamp=START)
+        grouper.add(firing, ["ops"])
+
+        grouper.discard(AlertTransition(rule_name="slow_disk", labels={"instance": "sda"},
+                                        previous="firing", status="silenced", timestamp=START))
+
+        assert grouper.groups == {}
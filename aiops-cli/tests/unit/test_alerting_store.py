@@ -0,0 +1,247 @@
+"""
+Unit tests for alert storage
+"""
+import json
+import multiprocessing
+import pytest
+from datetime import datetime, timedelta
+from aiops.alerting import Alert, AlertManager, AlertRule, AlertStore
+from aiops.core.exceptions import StorageError
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+
+def make_alert(rule_name="high_cpu", status="firing", severity="critical", minutes=0):
+    """Create an alert started ``minutes`` after START"""
+    return Alert(
+        rule_name=rule_name,
+        status=status,
+        severity=severity,
+        message=f"{rule_name} {status}",
+        started_at=START + timedelta(minutes=minutes),
+        labels={"host": "web-1"},
+        metrics={"cpu_percent": 95.0},
+    )
+
+
+def open_manager(storage):
+    """Open (and possibly migrate) an alert manager in a child process"""
+    AlertManager(storage_path=storage).close()
+
+
+def resolve_alerts(storage, count):
+    """Resolve ``count`` alerts of high_cpu in a child process"""
+    manager = AlertManager(storage_path=storage)
+    for _ in range(count):
+        manager.resolve_alert("high_cpu")
+    manager.close()
+
+
+def run_processes(target, *args, count=4):
+    """Run ``target`` in ``count`` processes at once and wait for them"""
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=target, args=args) for _ in range(count)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+    assert [process.exitcode for process in processes] == [0] * count
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Alert manager storing into a temporary directory"""
+    manager = AlertManager(storage_path=str(tmp_path / "alerts"))
+    yield manager
+    manager.close()
+
+
+class TestAlertStore:
+    """Test AlertStore"""
+
+    def test_insert_and_filter(self, tmp_path):
+        """Test batched inserts round-trip and filters are combined"""
+        with AlertStore(str(tmp_path / "alerts.db")) as store:
+            count = store.insert_alerts([
+                make_alert().to_dict(),
+                make_alert("disk_full", severity="warning", minutes=5).to_dict(),
+                make_alert(status="resolved", minutes=10).to_dict(),
+            ])
+
+            assert count == 3
+            alerts = store.list_alerts(rule_name="high_cpu", status="firing")
+            assert len(alerts) == 1
+            assert alerts[0]['labels'] == {"host": "web-1"}
+            assert alerts[0]['metrics'] == {"cpu_percent": 95.0}
+            assert alerts[0]['started_at'] == START.isoformat()
+
+            assert [a['rule_name'] for a in store.list_alerts(severity="warning")] == ["disk_full"]
+            assert len(store.list_alerts(since=START + timedelta(minutes=5))) == 2
+            assert [a['status'] for a in store.list_alerts(limit=2)] == ["firing", "resolved"]
+            assert store.count_alerts() == 3
+            assert store.count_alerts(status="firing") == 2
+
+    def test_transition_updates_oldest_match(self, tmp_path):
+        """Test a transition updates only the oldest alert in the given statuses"""
+        with AlertStore(str(tmp_path / "alerts.db")) as store:
+            store.insert_alerts([
+                make_alert(status="resolved").to_dict(),
+                make_alert(status="acknowledged", minutes=1).to_dict(),
+                make_alert(status="firing", minutes=2).to_dict(),
+            ])
+
+            alert_id = store.transition("high_cpu", ["firing", "acknowledged"],
+                                        {"status": "resolved", "ended_at": START})
+
+            assert alert_id == 2
+            assert [a['status'] for a in store.list_alerts()] == [
+                "resolved", "resolved", "firing",
+            ]
+            assert store.list_alerts()[1]['ended_at'] == START.isoformat()
+            assert store.transition("other", ["firing"], {"status": "resolved"}) is None
+
+            with pytest.raises(ValueError):
+                store.transition("high_cpu", ["firing"], {"bogus": 1})
+
+    def test_queries_use_indexes(self, tmp_path):
+        """Test transitions and filters are answered from indexes"""
+        with AlertStore(str(tmp_path / "alerts.db")) as store:
+            plans = [
+                " ".join(row[-1] for row in store.conn.execute(f"EXPLAIN QUERY PLAN {query}", args))
+                for query, args in [
+                    ("SELECT id FROM alerts WHERE rule_name = ? AND status = ? "
+                     "ORDER BY id LIMIT 1", ("a", "firing")),
+                    ("SELECT * FROM alerts WHERE severity = ?", ("critical",)),
+                    ("SELECT * FROM alerts WHERE started_at >= ?", ("2024",)),
+                ]
+            ]
+
+        assert "idx_alerts_rule_status" in plans[0]
+        assert "idx_alerts_severity" in plans[1]
+        assert "idx_alerts_started_at" in plans[2]
+
+    def test_wal_mode(self, tmp_path):
+        """Test the database uses write-ahead logging"""
+        with AlertStore(str(tmp_path / "alerts.db")) as store:
+            assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_unopenable_database(self, tmp_path):
+        """Test a database path that cannot be opened raises StorageError"""
+        (tmp_path / "alerts.db").mkdir()
+
+        with pytest.raises(StorageError):
+            AlertStore(str(tmp_path / "alerts.db")).open()
+
+
+class TestAlertManager:
+    """Test AlertManager on the alert store"""
+
+    def test_rules(self, manager):
+        """Test rule creation, listing, enabling and deletion"""
+        manager.create_rule(AlertRule(name="high_cpu", condition="cpu > 90", severity="critical"))
+        manager.create_rule(AlertRule(name="disk_full", condition="disk > 95", severity="warning"))
+
+        with pytest.raises(ValueError, match="already exists"):
+            manager.create_rule(AlertRule(name="high_cpu", condition="cpu > 80",
+                                          severity="warning"))
+
+        manager.disable_rule("high_cpu")
+        assert manager.get_rule("high_cpu")['enabled'] is False
+        assert [rule['name'] for rule in manager.list_rules()] == ["high_cpu", "disk_full"]
+
+        manager.delete_rule("high_cpu")
+        assert manager.get_rule("high_cpu") is None
+
+    def test_acknowledge_and_resolve(self, manager):
+        """Test acknowledging and resolving the open alert of a rule"""
+        manager.create_alerts([make_alert(), make_alert("disk_full")])
+
+        manager.acknowledge_alert("high_cpu", "ops")
+        alert, = manager.list_alerts(rule_name="high_cpu")
+        assert alert['status'] == "acknowledged"
+        assert alert['acknowledged_by'] == "ops"
+
+        manager.resolve_alert("high_cpu")
+        alert, = manager.list_alerts(rule_name="high_cpu")
+        assert alert['status'] == "resolved"
+        assert alert['ended_at'] is not None
+        assert manager.list_alerts(status="firing")[0]['rule_name'] == "disk_full"
+
+    def test_migrates_json_files(self, tmp_path):
+        """Test rules.json and alerts.json are imported once and kept as backups"""
+        storage = tmp_path / "alerts"
+        storage.mkdir()
+        rule = AlertRule(name="high_cpu", condition="cpu > 90", severity="critical")
+        (storage / "rules.json").write_text(json.dumps([rule.to_dict()]))
+        (storage / "alerts.json").write_text(json.dumps([make_alert().to_dict()] * 3))
+
+        manager = AlertManager(storage_path=str(storage))
+        manager.close()
+        manager = AlertManager(storage_path=str(storage))
+
+        assert [rule['name'] for rule in manager.list_rules()] == ["high_cpu"]
+        assert len(manager.list_alerts()) == 3
+        assert not (storage / "alerts.json").exists()
+        assert (storage / "alerts.json.migrated").exists()
+        assert (storage / "rules.json.migrated").exists()
+        manager.close()
+
+
+class TestMultiProcess:
+    """Test processes sharing one storage path"""
+
+    def test_concurrent_migration_imports_once(self, tmp_path):
+        """Test processes starting together import alerts.json once"""
+        storage = tmp_path / "alerts"
+        storage.mkdir()
+        (storage / "alerts.json").write_text(json.dumps([make_alert().to_dict()] * 5))
+
+        run_processes(open_manager, str(storage))
+
+        with AlertStore(str(storage / "alerts.db")) as store:
+            assert store.count_alerts() == 5
+
+    def test_import_is_recorded_with_rows(self, tmp_path):
+        """Test a file imported before a crash (not renamed yet) is not imported again"""
+        storage = tmp_path / "alerts"
+        storage.mkdir()
+        alerts_file = storage / "alerts.json"
+        alerts_file.write_text(json.dumps([make_alert().to_dict()] * 2))
+
+        with AlertStore(str(storage / "alerts.db")) as store:
+            store.migrate_json(storage / "rules.json", alerts_file)
+            (storage / "alerts.json.migrated").rename(alerts_file)
+
+            assert store.migrate_json(storage / "rules.json", alerts_file) == {
+                "rules": 0, "alerts": 0,
+            }
+            assert store.count_alerts() == 2
+
+    def test_concurrent_transitions(self, tmp_path):
+        """Test concurrent resolves each take a different alert"""
+        storage = str(tmp_path / "alerts")
+        manager = AlertManager(storage_path=storage)
+        manager.create_alerts([make_alert(minutes=i) for i in range(20)])
+
+        run_processes(resolve_alerts, storage, 5)
+
+        assert manager.store.count_alerts(status="resolved") == 20
+        manager.close()
+
+    def test_rule_cache_sees_other_processes(self, manager):
+        """Test cached rules are read again after another connection changes them"""
+        manager.create_rule(AlertRule(name="high_cpu", condition="cpu > 90", severity="critical"))
+        assert [rule['name'] for rule in manager.list_rules()] == ["high_cpu"]
+
+        with AlertStore(str(manager.store.db_path)) as other:
+            other.set_rule_enabled("high_cpu", False)
+            other.delete_rule("missing")
+
+        assert manager.get_rule("high_cpu")['enabled'] is False
+
+        # Rules handed out are copies of the cached ones
+        manager.list_rules()[0]['name'] = "changed"
+        manager.get_rule("high_cpu")['labels']['team'] = "changed"
+        assert manager.get_rule("high_cpu")['name'] == "high_cpu"
+        assert manager.get_rule("high_cpu")['labels'] == {}
@@ -0,0 +1,205 @@
+"""
+Unit tests for correlation analysis
+"""
+import warnings
+import numpy as np
+import pytest
+from scipy import stats
+from aiops.correlation import CorrelationAnalyzer
+from aiops.correlation.analyzer import lagged_correlations, pearson_p_values, standardize_rows
+
+
+def pairwise_correlations(metrics_data, threshold):
+    """Reference: pearsonr on every pair truncated to its common length"""
+    results = []
+    names = list(metrics_data)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                length = min(len(metrics_data[names[i]]), len(metrics_data[names[j]]))
+                if length < 2:
+                    continue
+                corr, p_value = stats.pearsonr(metrics_data[names[i]][:length],
+                                               metrics_data[names[j]][:length])
+                if abs(corr) >= threshold:
+                    results.append((names[i], names[j], corr, p_value))
+    results.sort(key=lambda result: abs(result[2]), reverse=True)
+    return results
+
+
+def lag_profile(series1, series2, max_lag):
+    """Reference: pearsonr of the overlap at every lag"""
+    profile = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for lag in range(-max_lag, max_lag + 1):
+            if lag < 0:
+                s1, s2 = series1[:lag], series2[-lag:]
+            elif lag > 0:
+                s1, s2 = series1[lag:], series2[:-lag]
+            else:
+                s1, s2 = series1, series2
+            if len(s1) >= 2:
+                profile[lag] = stats.pearsonr(s1, s2)[0]
+    return profile
+
+
+@pytest.fixture
+def metrics_data():
+    """Series of mixed lengths sharing a common driver"""
+    rng = np.random.default_rng(3)
+    driver = rng.normal(size=200)
+    data = {}
+    for k in range(30):
+        length = [40, 120, 200][k % 3]
+        noise = rng.normal(size=200) * rng.uniform(0.2, 1.5)
+        data[f"metric_{k}"] = list((driver * rng.uniform(-1, 1) + noise)[:length])
+    return data
+
+
+class TestFindCorrelations:
+    """Test CorrelationAnalyzer.find_correlations"""
+
+    def test_matches_pairwise_pearson(self, metrics_data):
+        """Test the matrix path finds the pairs, coefficients and p-values of pearsonr"""
+        results = CorrelationAnalyzer().find_correlations(metrics_data, threshold=0.3)
+        expected = pairwise_correlations(metrics_data, 0.3)
+
+        assert [(r['metric1'], r['metric2']) for r in results] == \
+            [(name1, name2) for name1, name2, _, _ in expected]
+        for result, (_, _, corr, p_value) in zip(results, expected):
+            assert result['correlation'] == pytest.approx(corr, abs=1e-12)
+            assert result['p_value'] == pytest.approx(p_value, rel=1e-9, abs=1e-300)
+
+    def test_degenerate_series(self):
+        """Test constant, empty and too short series correlate with nothing"""
+        data = {
+            'cpu': [1.0, 2.0, 3.0, 4.0],
+            'load': [2.0, 4.0, 6.0, 8.5],
+            'constant': [5.0, 5.0, 5.0, 5.0],
+            'empty': [float('nan')] * 4,
+            'single': [1.0],
+        }
+
+        results = CorrelationAnalyzer().find_correlations(data, threshold=0.0)
+
+        assert [(r['metric1'], r['metric2']) for r in results] == [('cpu', 'load')]
+        assert results[0]['strength'] == 'very_strong'
+
+    def test_gaps_use_pairwise_complete_values(self):
+        """Test series with NaN gaps are compared over the values both have"""
+        rng = np.random.default_rng(6)
+        driver = rng.normal(size=150)
+        data = {}
+        for k in range(12):
+            values = driver * rng.uniform(-1, 1) + rng.normal(size=150) * 0.5
+            values[rng.random(150) < rng.uniform(0, 0.4)] = np.nan
+            data[f"metric_{k}"] = list(values)
+        data['constant_overlap'] = [1.0] * 75 + [np.nan] * 75
+
+        results = CorrelationAnalyzer().find_correlations(data, threshold=0.2)
+
+        expected = {}
+        for i, name1 in enumerate(data):
+            for name2 in list(data)[i + 1:]:
+                both = ~np.isnan(data[name1]) & ~np.isnan(data[name2])
+                values1, values2 = np.array(data[name1])[both], np.array(data[name2])[both]
+                if np.ptp(values1) and np.ptp(values2):
+                    corr, p_value = stats.pearsonr(values1, values2)
+                    if abs(corr) >= 0.2:
+                        expected[(name1, name2)] = (corr, p_value)
+
+        assert {(r['metric1'], r['metric2']) for r in results} == set(expected)
+        for result in results:
+            corr, p_value = expected[(result['metric1'], result['metric2'])]
+            assert result['correlation'] == pytest.approx(corr, abs=1e-12)
+            assert result['p_value'] == pytest.approx(p_value, rel=1e-9, abs=1e-300)
+
+    def test_two_points(self):
+        """Test two observations correlate perfectly without significance"""
+        result, = CorrelationAnalyzer().find_correlations({'a': [1, 2], 'b': [3, 1]})
+
+        assert result['correlation'] == pytest.approx(-1.0)
+        assert result['p_value'] == 1.0
+
+    def test_helpers(self):
+        """Test standardized rows give correlations and p-values follow pearsonr"""
+        rng = np.random.default_rng(5)
+        matrix = rng.normal(size=(3, 50))
+        standardized = standardize_rows(matrix)
+
+        np.testing.assert_allclose(standardized @ standardized.T, np.corrcoef(matrix),
+                                   atol=1e-12)
+        corr, p_value = stats.pearsonr(matrix[0], matrix[1])
+        assert pearson_p_values(np.array([corr]), 50)[0] == pytest.approx(p_value, rel=1e-9)
+        assert pearson_p_values(np.array([1.0, -1.0]), 50).tolist() == [0.0, 0.0]
+
+
+class TestLagCorrelation:
+    """Test lagged correlation"""
+
+    @pytest.mark.parametrize("shift", [-7, 0, 4])
+    def test_profile_matches_pearson_per_lag(self, shift):
+        """Test the FFT profile equals pearsonr of the overlap at every lag"""
+        rng = np.random.default_rng(11)
+        cpu = rng.normal(size=300) * 20 + 1000
+        latency = np.roll(cpu, shift) + rng.normal(size=300) * 5
+
+        result = CorrelationAnalyzer().calculate_lag_correlation(list(cpu), list(latency), 10)
+        expected = lag_profile(cpu, latency, 10)
+
+        assert sorted(result['profile']) == sorted(expected)
+        for lag, corr in expected.items():
+            assert result['profile'][lag] == pytest.approx(corr, abs=1e-9)
+        assert result['lag'] == -shift
+        assert result['correlation'] > 0.9
+
+    def test_interpretation(self):
+        """Test a leading first series gives a negative lag"""
+        rng = np.random.default_rng(2)
+        cpu = list(rng.normal(size=200))
+        latency = [0.0] * 3 + cpu[:-3]
+
+        result = CorrelationAnalyzer().calculate_lag_correlation(cpu, latency, 5)
+
+        assert result['lag'] == -3
+        assert result['interpretation'] == "metric1 leads metric2 by 3 steps"
+
+    def test_constant_and_short_series(self):
+        """Test undefined correlations are skipped and short series are not scored"""
+        analyzer = CorrelationAnalyzer()
+
+        assert analyzer.calculate_lag_correlation([1.0, 2.0], [2.0, 1.0], 5) == \
+            {'lag': 0, 'correlation': 0.0}
+        result = analyzer.calculate_lag_correlation([3.0] * 20, list(range(20)), 3)
+        assert (result['lag'], result['correlation'], result['profile']) == (0, 0.0, {})
+
+        lags, correlations = lagged_correlations([1.0, 2.0, 3.0], [1.0, 2.0, 4.0], 3)
+        assert lags.tolist() == [-3, -2, -1, 0, 1, 2, 3]
+        assert np.isnan(correlations[0, [0, 1, 5, 6]]).all()
+
+    def test_batched_against_target(self):
+        """Test the metrics leading a target are found in one batch"""
+        rng = np.random.default_rng(4)
+        target = rng.normal(size=500)
+        metrics_data = {f"noise_{i}": list(rng.normal(size=500)) for i in range(20)}
+        metrics_data["cause"] = list(np.roll(target, -6) + rng.normal(size=500) * 0.3)
+        metrics_data["effect"] = list(np.roll(target, 2) + rng.normal(size=500) * 0.3)
+        metrics_data["short"] = list(target[:100])
+
+        results = CorrelationAnalyzer().calculate_lag_correlations(
+            list(target), metrics_data, max_lag=10, threshold=0.5
+        )
+
+        # A shorter metric is compared over its overlap with the target
+        assert results[0]['metric'] == "short"
+        assert results[0]['correlation'] == pytest.approx(1.0)
+        assert sorted((r['metric'], r['lag']) for r in results) == \
+            [("cause", -6), ("effect", 2), ("short", 0)]
+        cause = next(r for r in results if r['metric'] == "cause")
+        assert cause['interpretation'] == "cause leads target by 6 steps"
+        single = CorrelationAnalyzer().calculate_lag_correlation(
+            metrics_data["cause"], list(target), 10
+        )
+        assert cause['correlation'] == pytest.approx(single['correlation'])
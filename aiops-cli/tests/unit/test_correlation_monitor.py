@@ -0,0 +1,133 @@
+"""
+Unit tests for streaming correlation monitoring
+"""
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from aiops.correlation import CorrelationMonitor, RollingCorrelation
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+
+def coupled(size, seed=0, decouple_at=None):
+    """CPU usage and network bytes that follow it, optionally decoupling"""
+    rng = np.random.default_rng(seed)
+    cpu = rng.normal(50, 10, size)
+    network = 1e12 + cpu * 1e7 + rng.normal(0, 3e7, size)
+    if decouple_at is not None:
+        network[decouple_at:] = 1e12 + rng.normal(5e8, 1e8, size - decouple_at)
+    return cpu.tolist(), network.tolist()
+
+
+def monitor_pair(monitor, cpu, network):
+    """Feed the pair to the monitor and collect the events"""
+    events = []
+    for i, (x, y) in enumerate(zip(cpu, network)):
+        events.extend(monitor.update({'cpu': x, 'network': y}, START + timedelta(seconds=i)))
+    return events
+
+
+class TestRollingCorrelation:
+    """Test RollingCorrelation"""
+
+    def test_matches_window_correlation(self):
+        """Test the rolling sums give the correlation of the last window of large values"""
+        cpu, network = coupled(500, decouple_at=250)
+        rolling = RollingCorrelation(40)
+
+        for i, (x, y) in enumerate(zip(cpu, network), 1):
+            rolling.add(x, y)
+            if i >= 2:
+                start = max(0, i - 40)
+                expected = np.corrcoef(cpu[start:i], network[start:i])[0, 1]
+                assert rolling.correlation == pytest.approx(expected, abs=1e-9)
+        assert rolling.count == 40
+
+    def test_undefined(self):
+        """Test too few pairs and constant windows have no correlation"""
+        rolling = RollingCorrelation(3)
+        rolling.add(1.0, 2.0)
+        assert rolling.correlation is None
+
+        for value in [5.0, 6.0, 7.0]:
+            rolling.add(3.0, value)
+        assert rolling.correlation is None
+
+        with pytest.raises(ValueError):
+            RollingCorrelation(1)
+
+
+class TestCorrelationMonitor:
+    """Test CorrelationMonitor"""
+
+    def test_detects_decoupling(self):
+        """Test one event is emitted when the metrics stop moving together"""
+        monitor = CorrelationMonitor([('cpu', 'network')], window=30)
+
+        events = monitor_pair(monitor, *coupled(1500, decouple_at=1000))
+
+        event, = events
+        assert event.type == "correlation_break"
+        assert START + timedelta(seconds=1000) < event.timestamp < \
+            START + timedelta(seconds=1030)
+        assert event.baseline > 0.9
+        assert event.metrics['correlation'] < event.baseline - 0.3
+        assert event.metrics['z_score'] >= 3.0
+        assert event.metadata == {'metric1': 'cpu', 'metric2': 'network', 'window': 30}
+        assert event.algorithm == monitor.get_name()
+
+    def test_recovery(self):
+        """Test a pair that recovered reports its next break again"""
+        cpu, network = coupled(3000, seed=5)
+        _, decoupled = coupled(3000, seed=6, decouple_at=0)
+        network[1000:1200] = decoupled[1000:1200]
+        network[2000:2200] = decoupled[2000:2200]
+        monitor = CorrelationMonitor([('cpu', 'network')], window=30)
+
+        events = monitor_pair(monitor, cpu, network)
+
+        assert [(event.timestamp - START).total_seconds() // 1000 for event in events] == [1, 2]
+        assert monitor._breaks == {}
+
+    def test_stable_correlation(self):
+        """Test stationary metrics, and warm-up, raise no events"""
+        monitor = CorrelationMonitor([('cpu', 'network')], window=30)
+
+        assert monitor_pair(monitor, *coupled(5000, seed=3)) == []
+
+        # Without a baseline yet the change is not reported
+        late = CorrelationMonitor([('cpu', 'network')], window=30, min_history=5000)
+        assert monitor_pair(late, *coupled(1500, decouple_at=1000)) == []
+
+    def test_groups_and_gaps(self):
+        """Test every pair of a group is tracked once and pairs skip missing values"""
+        monitor = CorrelationMonitor([('a', 'b', 'c'), ('b', 'a'), ('c', 'd')], window=5)
+
+        assert list(monitor.trackers) == [('a', 'b'), ('a', 'c'), ('b', 'c'), ('c', 'd')]
+        assert monitor.metrics == ['a', 'b', 'c', 'd']
+
+        monitor.update({'a': 1.0, 'b': 2.0, 'c': float('nan')}, START)
+        assert [tracker.count for tracker in monitor.trackers.values()] == [1, 0, 0, 0]
+
+        with pytest.raises(ValueError):
+            CorrelationMonitor([('a',)])
+
+    def test_snapshots(self):
+        """Test collector snapshots are monitored by series name"""
+        cpu, network = coupled(400, decouple_at=300)
+        snapshots = [
+            {
+                'timestamp': (START + timedelta(seconds=i)).isoformat(),
+                'cpu': [{'cpu_percent': x}],
+                'network': [{'interface': 'eth0', 'bytes_sent': y}],
+            }
+            for i, (x, y) in enumerate(zip(cpu, network))
+        ]
+        monitor = CorrelationMonitor([('cpu.cpu_percent', 'network.eth0.bytes_sent')],
+                                     window=20)
+
+        event, = monitor.detect(snapshots)
+
+        assert event.metadata['metric2'] == 'network.eth0.bytes_sent'
+        assert event.timestamp > START + timedelta(seconds=300)
@@ -0,0 +1,145 @@
+"""
+Unit tests for resampling series onto a common grid
+"""
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from aiops.correlation import align_series, resample
+from aiops.correlation.resample import forward_fill, to_seconds
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+NAN = float('nan')
+
+
+def assert_values(actual, expected):
+    """Compare arrays holding NaN"""
+    np.testing.assert_allclose(actual, expected, equal_nan=True)
+
+
+def reference(timestamps, values, start, interval, size, reduce):
+    """Reference: aggregate the samples of each grid interval in a loop"""
+    result = []
+    for i in range(size):
+        low, high = start + i * interval, start + (i + 1) * interval
+        samples = [v for t, v in zip(timestamps, values) if low <= t < high]
+        result.append(reduce(samples) if samples else NAN)
+    return result
+
+
+class TestResample:
+    """Test resample()"""
+
+    @pytest.mark.parametrize("how,reduce", [
+        ("mean", np.mean),
+        ("max", max),
+        ("last", lambda samples: samples[-1]),
+    ])
+    def test_matches_per_interval_loop(self, how, reduce):
+        """Test irregular, unsorted samples aggregate per interval like a loop"""
+        rng = np.random.default_rng(8)
+        timestamps = np.sort(rng.uniform(95, 310, size=400))
+        timestamps[rng.random(400) < 0.3] = 200.0
+        values = rng.normal(size=400)
+        # Samples before and after the grid are ignored
+        order = rng.permutation(400)
+
+        result = resample(timestamps[order], values[order], 100, 7.5, 26, how)
+
+        stable = np.argsort(timestamps[order], kind='stable')
+        expected = reference(timestamps[order][stable], values[order][stable], 100, 7.5, 26,
+                             reduce)
+        assert_values(result, expected)
+
+    def test_gaps_and_nan_samples(self):
+        """Test intervals without samples are NaN and NaN samples count as missing"""
+        result = resample([0, 1, 5, 6, 7], [1.0, 3.0, NAN, 4.0, 8.0], 0, 2, 5)
+
+        assert_values(result, [2.0, NAN, NAN, 6.0, NAN])
+
+    def test_rate(self):
+        """Test counters give per-second increases and resets count the new value"""
+        timestamps = [0, 10, 20, 30, 40, 60]
+        counter = [100, 150, 250, 20, 80, 140]
+
+        result = resample(timestamps, counter, 0, 20, 4, how='rate')
+
+        # [0, 20): 50 in 10 s; [20, 40): 100 + 20 (reset) in 20 s; [40, 60): 60 in 10 s
+        assert_values(result, [5.0, 6.0, 6.0, 3.0])
+
+    @pytest.mark.parametrize("limit,expected", [
+        (None, [NAN, 1.0, 1.0, 1.0, 1.0, 2.0, 2.0]),
+        (2, [NAN, 1.0, 1.0, 1.0, NAN, 2.0, 2.0]),
+        (0, [NAN, 1.0, NAN, NAN, NAN, 2.0, NAN]),
+    ])
+    def test_forward_fill(self, limit, expected):
+        """Test gaps are filled from the previous interval up to the limit"""
+        result = resample([10, 50], [1.0, 2.0], 0, 10, 7, fill='ffill', limit=limit)
+
+        assert_values(result, expected)
+        assert_values(forward_fill(np.array([NAN, 1.0, NAN, NAN, NAN, 2.0, NAN]), limit),
+                      expected)
+
+    def test_timestamps(self):
+        """Test datetimes and ISO strings are converted to seconds"""
+        times = [START, START + timedelta(seconds=30)]
+
+        assert to_seconds(times).tolist() == [t.timestamp() for t in times]
+        assert to_seconds([t.isoformat() for t in times]).tolist() == \
+            [t.timestamp() for t in times]
+        assert_values(resample(times, [1.0, 2.0], START.timestamp(), 60, 1), [1.5])
+
+    @pytest.mark.parametrize("kwargs", [
+        {"how": "median"},
+        {"fill": "bfill"},
+        {"interval": 0},
+        {"limit": -1},
+        {"values": [1.0]},
+    ])
+    def test_invalid_arguments(self, kwargs):
+        """Test invalid arguments raise ValueError"""
+        arguments = {"timestamps": [0, 1], "values": [1.0, 2.0], "start": 0, "interval": 1,
+                     "size": 2}
+        arguments.update(kwargs)
+
+        with pytest.raises(ValueError):
+            resample(**arguments)
+
+
+class TestAlignSeries:
+    """Test align_series()"""
+
+    def test_different_cadences(self):
+        """Test series of different cadence land on one grid spanning all samples"""
+        fast = (np.arange(0, 60, 1.0), np.arange(60.0))
+        slow = (np.arange(15, 75, 15.0), [1.0, 2.0, 3.0, 4.0])
+
+        grid, aligned = align_series({"fast": fast, "slow": slow}, 15)
+
+        assert grid.tolist() == [0, 15, 30, 45, 60]
+        assert_values(aligned["fast"], [7.0, 22.0, 37.0, 52.0, NAN])
+        assert_values(aligned["slow"], [NAN, 1.0, 2.0, 3.0, 4.0])
+
+    def test_aggregation_per_series(self):
+        """Test each series can use its own aggregation within given bounds"""
+        series = {
+            "requests": ([0, 5, 10, 15], [0, 10, 30, 60]),
+            "latency": ([0, 5, 10, 15], [1.0, 9.0, 2.0, 4.0]),
+        }
+
+        grid, aligned = align_series(series, 10, start=0, end=10,
+                                     how={"requests": "rate", "latency": "max"})
+
+        assert grid.tolist() == [0, 10]
+        assert_values(aligned["requests"], [2.0, 5.0])
+        assert_values(aligned["latency"], [9.0, 4.0])
+
+    def test_empty(self):
+        """Test series without samples give an empty grid"""
+        grid, aligned = align_series({"cpu": ([], [])}, 10)
+
+        assert len(grid) == 0
+        assert aligned["cpu"].tolist() == []
+        with pytest.raises(ValueError):
+            align_series({"cpu": ([0], [1.0])}, 0)
@@ -0,0 +1,188 @@
+"""
+Unit tests for loading correlation series
+"""
+import io
+import json
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from aiops.core.jsonstream import JsonStream
+from aiops.correlation import load_collection_series, load_series
+from aiops.correlation.series import SnapshotColumns, flatten_snapshot
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+
+def make_collection(metric_type, values, offset_ms=0, interval=1.0):
+    """Create collector output with one value per snapshot"""
+    data = []
+    for i, value in enumerate(values):
+        timestamp = (START + timedelta(seconds=i * interval, milliseconds=offset_ms)).isoformat()
+        data.append({
+            'timestamp': timestamp,
+            metric_type: [{'timestamp': timestamp, 'value': value}],
+        })
+    return {'collection_info': {'interval_seconds': interval}, 'data': data}
+
+
+def as_lists(series):
+    """Convert loaded arrays to lists"""
+    return {name: values.tolist() for name, values in series.items()}
+
+
+class TestFlattenSnapshot:
+    """Test flatten_snapshot"""
+
+    def test_names_by_type_and_identity(self):
+        """Test numeric fields are named by metric type and device"""
+        snapshot = {
+            'timestamp': START.isoformat(),
+            'cpu': [{
+                'timestamp': START.isoformat(), 'cpu_percent': 42.0, 'per_cpu_percent': [1, 2],
+            }],
+            'disk': [{'device': 'sda', 'read_bytes': 10}, {'device': 'sdb', 'read_bytes': 20}],
+            'logs': [{'total': 3, 'level.ERROR': 1, 'interval_seconds': 1.0}],
+            'process': ['not a dict'],
+        }
+
+        assert flatten_snapshot(snapshot) == {
+            'cpu.cpu_percent': 42.0,
+            'disk.sda.read_bytes': 10.0,
+            'disk.sdb.read_bytes': 20.0,
+            'logs.total': 3.0,
+            'logs.level.ERROR': 1.0,
+        }
+
+
+class TestLoadSeries:
+    """Test joining collections"""
+
+    def test_join_on_common_grid_points(self):
+        """Test jittered snapshots join on the grid and only common points are kept"""
+        metrics = make_collection('cpu', [10, 20, 30, 40], offset_ms=40)
+        logs = make_collection('logs', [0, 2, 3, 0, 5])
+        # Logs start one interval later and end after the metrics
+        del logs['data'][0]
+
+        series = load_collection_series([metrics, logs])
+
+        assert series == {'cpu.value': [20.0, 30.0, 40.0], 'logs.value': [2.0, 3.0, 0.0]}
+
+    def test_missing_series_are_zero(self):
+        """Test series first seen in a later snapshot are zero before"""
+        logs = make_collection('logs', [1, 2])
+        logs['data'][1]['logs'][0]['level.ERROR'] = 5
+
+        assert load_collection_series([logs])['logs.level.ERROR'] == [0.0, 5.0]
+
+    def test_load_files(self, tmp_path):
+        """Test plain mappings and collector output files are combined"""
+        (tmp_path / "plain.json").write_text(json.dumps({'memory': [1.0, 2.0]}))
+        (tmp_path / "cpu.json").write_text(json.dumps(make_collection('cpu', [5, 6])))
+
+        series = load_series([str(tmp_path / "cpu.json"), str(tmp_path / "plain.json")])
+
+        assert as_lists(series) == {'cpu.value': [5.0, 6.0], 'memory': [1.0, 2.0]}
+
+    def test_resample_files(self, tmp_path):
+        """Test collections of different cadence are resampled onto one grid"""
+        (tmp_path / "cpu.json").write_text(json.dumps(make_collection('cpu', [1, 3, 5, 7])))
+        (tmp_path / "disk.json").write_text(
+            json.dumps(make_collection('disk', [10, 20], offset_ms=500, interval=2.0))
+        )
+        paths = [str(tmp_path / "cpu.json"), str(tmp_path / "disk.json")]
+
+        assert as_lists(load_series(paths, interval=2.0)) == {
+            'cpu.value': [2.0, 6.0], 'disk.value': [10.0, 20.0],
+        }
+        series = load_series(paths, interval=1.0, how='max', fill='ffill')
+        assert as_lists(series) == {
+            'cpu.value': [1.0, 3.0, 5.0, 7.0], 'disk.value': [10.0, 10.0, 20.0, 20.0],
+        }
+
+    def test_missing_metrics_are_nan(self):
+        """Test metric series missing from a snapshot are NaN, not zero"""
+        metrics = make_collection('process', [50, 51, 52, 53])
+        for snapshot in metrics['data'][1::2]:
+            snapshot['process'] = []
+
+        values = load_collection_series([metrics])['process.value']
+
+        assert values[::2] == [50.0, 52.0]
+        assert np.isnan(values[1::2]).all()
+
+    def test_duplicate_grid_points(self):
+        """Test the last snapshot on a grid point wins and others keep their values"""
+        metrics = make_collection('cpu', [1, 2, 3])
+        metrics['data'][1]['cpu'][0]['other'] = 7
+        # A late snapshot rounds onto the grid point of the second one
+        late = dict(metrics['data'][1], timestamp=(START + timedelta(seconds=1.2)).isoformat())
+        late['cpu'] = [{'value': 9}]
+        metrics['data'].insert(2, late)
+
+        series = load_collection_series([metrics])
+
+        assert series['cpu.value'] == [1.0, 9.0, 3.0]
+        assert series['cpu.other'][1] == 7.0
+        assert np.isnan(series['cpu.other'][::2]).all()
+
+    def test_select_and_stream_files(self, tmp_path):
+        """Test only requested series are loaded from JSON and NDJSON files"""
+        cpu = make_collection('cpu', [1, 2, 3])
+        for snapshot in cpu['data']:
+            snapshot['cpu'][0]['idle'] = 50
+        (tmp_path / "cpu.json").write_text(json.dumps(cpu, indent=2))
+        disk = make_collection('disk', [4, 5, 6])
+        lines = [json.dumps(snapshot) for snapshot in disk['data']]
+        lines.append(json.dumps({'collection_info': disk['collection_info']}))
+        (tmp_path / "disk.ndjson").write_text('\n'.join(lines) + '\n')
+        (tmp_path / "plain.json").write_text(json.dumps({'memory': [1, None], 'swap': [{}]}))
+        paths = [str(tmp_path / name) for name in ["cpu.json", "disk.ndjson", "plain.json"]]
+
+        series = load_series(paths, names=['cpu.value', 'disk.value', 'memory'])
+
+        assert as_lists(series)['cpu.value'] == [1.0, 2.0, 3.0]
+        assert as_lists(series)['disk.value'] == [4.0, 5.0, 6.0]
+        assert sorted(series) == ['cpu.value', 'disk.value', 'memory']
+        assert np.isnan(series['memory'][1])
+        with pytest.raises(ValueError):
+            load_series(paths)
+
+    def test_columns_grow(self):
+        """Test columns grow past their capacity and series appearing later are NaN before"""
+        frame = SnapshotColumns(['cpu.value', 'cpu.late'], capacity=2)
+        for snapshot in make_collection('cpu', range(100))['data']:
+            frame.add(snapshot)
+        frame.add({'timestamp': START.isoformat(), 'cpu': [{'late': 1}]})
+
+        assert len(frame) == 101
+        assert frame.columns['cpu.value'][:100].tolist() == list(map(float, range(100)))
+        assert np.isnan(frame.columns['cpu.late'][:100]).all()
+        assert frame.timestamps[1] - frame.timestamps[0] == 1.0
+
+
+class TestJsonStream:
+    """Test JsonStream"""
+
+    @pytest.mark.parametrize('chunk_size', [1, 3, 7, 1 << 20])
+    def test_values_across_chunks(self, chunk_size):
+        """Test values split between reads decode as a whole"""
+        document = {'info': {'n': 12345.678e-3}, 'data': [1, [2, 3], 'a b', {}, 123456789],
+                    'empty': [], 'last': 10}
+
+        stream = JsonStream(io.StringIO(json.dumps(document, indent=1)), chunk_size)
+        result = {}
+        for key in stream.members():
+            result[key] = list(stream.items()) if key == 'data' else stream.value()
+
+        assert result == document
+        assert stream.peek() == ''
+
+    def test_invalid_documents(self):
+        """Test truncated or malformed documents raise ValueError"""
+        for text in ['{"a": [1, 2', '{"a" 1}', '{1: 2}', '[1, 2]']:
+            with pytest.raises(ValueError):
+                stream = JsonStream(io.StringIO(text), 2)
+                for _ in stream.members():
+                    list(stream.items())
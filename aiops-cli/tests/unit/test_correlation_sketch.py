@@ -0,0 +1,135 @@
+"""
+Unit tests for approximate correlation search
+"""
+import numpy as np
+import pytest
+from aiops.correlation import CorrelationAnalyzer, CorrelationIndex
+from aiops.correlation.analyzer import masked_correlations
+from aiops.correlation.sketch import EXACT_LIMIT
+
+
+def fleet(count, length=64, seed=0):
+    """Random series with a target and planted correlated series"""
+    rng = np.random.default_rng(seed)
+    data = {f"series_{i}": rng.normal(size=length) for i in range(count)}
+    target = rng.normal(size=length)
+    planted = {}
+    for k, r in enumerate([0.95, -0.9, 0.85, -0.8, 0.75]):
+        name = f"series_{k * (count // 5) + 3}"
+        data[name] = r * target + np.sqrt(1 - r * r) * rng.normal(size=length)
+        planted[name] = r
+    data['target'] = target
+    return data, planted
+
+
+def brute_force(data, target, top):
+    """Reference: exact correlation of the target with every other series"""
+    names = [name for name in data if name != target]
+    correlations, _ = masked_correlations(np.array([data[target]]),
+                                          np.array([data[name] for name in names]))
+    order = np.argsort(-np.abs(correlations[0]), kind='stable')[:top]
+    return [(names[k], correlations[0][k]) for k in order]
+
+
+class TestCorrelationIndex:
+    """Test CorrelationIndex"""
+
+    def test_small_index_is_exact(self):
+        """Test indexes within EXACT_LIMIT rank every series exactly"""
+        data, _ = fleet(500)
+
+        results = CorrelationIndex(data).query('target', top=10)
+
+        assert [(r['metric'], pytest.approx(r['correlation'], abs=1e-12)) for r in results] == \
+            brute_force(data, 'target', 10)
+
+    def test_sketches_find_planted_correlations(self):
+        """Test the LSH candidates of a large index hold the strongest correlations"""
+        data, planted = fleet(EXACT_LIMIT * 5)
+        index = CorrelationIndex(data)
+
+        results = index.query('target', top=5)
+
+        assert {r['metric'] for r in results} == set(planted)
+        expected = dict(brute_force(data, 'target', 5))
+        for result in results:
+            assert result['correlation'] == pytest.approx(expected[result['metric']], abs=1e-12)
+            assert np.sign(result['correlation']) == np.sign(planted[result['metric']])
+            assert result['p_value'] < 1e-6
+
+        positive = index.query(data['target'], top=3, absolute=False)
+        assert [r['metric'] for r in positive][:1] == ['target']
+        assert all(r['correlation'] > 0 for r in positive)
+
+    def test_buckets_match_band_keys(self):
+        """Test a bucket lookup finds exactly the series sharing a band key"""
+        data, _ = fleet(3000)
+        index = CorrelationIndex(data, bits=64, band_bits=16)
+        keys = index._band_keys(np.unpackbits(index._signatures, axis=1).astype(bool))
+
+        found = index._bucketed(keys[:, 0])
+
+        assert np.array_equal(found, (keys == keys[:, :1]).any(axis=0))
+
+    def test_gaps_and_degenerate_series(self):
+        """Test gaps use pairwise complete values and constant or short series are skipped"""
+        rng = np.random.default_rng(1)
+        target = rng.normal(size=40)
+        gappy = target + rng.normal(size=40) * 0.1
+        gappy[::4] = np.nan
+        data = {
+            'target': target,
+            'gappy': gappy,
+            'constant': np.ones(40),
+            'short': target[:20],
+            'long': np.concatenate([target, rng.normal(size=20)]),
+        }
+
+        index = CorrelationIndex(data, length=40)
+        results = index.query('target')
+
+        assert sorted(index.names) == ['gappy', 'long', 'target']
+        both = ~np.isnan(gappy)
+        assert dict((r['metric'], r['correlation']) for r in results) == pytest.approx({
+            'long': 1.0, 'gappy': np.corrcoef(target[both], gappy[both])[0, 1],
+        })
+
+    def test_invalid_queries(self):
+        """Test unknown targets, short targets and invalid layouts raise ValueError"""
+        index = CorrelationIndex({'a': [1.0, 2.0, 3.0], 'b': [3.0, 1.0, 2.0]})
+
+        with pytest.raises(ValueError):
+            index.query('missing')
+        with pytest.raises(ValueError):
+            index.query([1.0, 2.0])
+        with pytest.raises(ValueError):
+            CorrelationIndex({}, bits=100, band_bits=8)
+        assert index.query([1.0, 1.0, 1.0]) == []
+        assert CorrelationIndex({}).query([1.0, 2.0]) == []
+
+
+class TestFindTopCorrelations:
+    """Test CorrelationAnalyzer.find_top_correlations"""
+
+    def test_results(self):
+        """Test results follow find_correlations() and honour the threshold"""
+        data, planted = fleet(200)
+        data = {name: list(values) for name, values in data.items()}
+        analyzer = CorrelationAnalyzer()
+
+        results = analyzer.find_top_correlations('target', data, top=20, threshold=0.7)
+
+        assert {r['metric2'] for r in results} == set(planted)
+        best = results[0]['metric2']
+        assert (results[0]['metric1'], results[0]['strength']) == ('target', 'very_strong')
+        pairs = analyzer.find_correlations({'target': data['target'], best: data[best]})
+        assert results[0]['correlation'] == pytest.approx(pairs[0]['correlation'])
+        assert results[0]['p_value'] == pytest.approx(pairs[0]['p_value'])
+
+    def test_degenerate_target(self):
+        """Test a missing target raises ValueError and a constant one finds nothing"""
+        analyzer = CorrelationAnalyzer()
+
+        with pytest.raises(ValueError):
+            analyzer.find_top_correlations('missing', {'a': [1.0, 2.0]})
+        assert analyzer.find_top_correlations('a', {'a': [1.0, 1.0], 'b': [1.0, 2.0]}) == []
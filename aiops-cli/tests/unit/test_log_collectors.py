@@ -0,0 +1,477 @@
+"""
+Unit tests for log collectors
+"""
+import bz2
+import gzip
+import json
+import lzma
+import pytest
+from datetime import datetime
+from aiops.logs.collectors import KernelLogCollector, LogCollector
+from aiops.logs.collectors import kmsg_collector
+from aiops.logs.collectors.prefilter import iter_candidate_lines
+from aiops.logs.collectors.log_files import (
+    bisect_time_offset,
+    expand_log_paths,
+    open_log_file,
+    rotation_base,
+)
+from aiops.core.exceptions import CollectionError
+
+
+def make_day(seconds=86400, step=10):
+    """Create one line every ``step`` seconds, with a stack trace every 100 lines"""
+    lines = []
+    for second in range(0, seconds, step):
+        lines.append(
+            f"2024-01-15 {second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d},000 "
+            f"INFO app.main tick {second}\n"
+        )
+        if second % (100 * step) == 0:
+            lines.append("Traceback (most recent call last):\n")
+            lines.append("  File \"app.py\", line 1, in <module>\n")
+    return "".join(lines)
+
+
+def make_lines(hour, count=3, level="INFO"):
+    """Create python logging lines within one hour"""
+    return "".join(
+        f"2024-01-15 {hour:02d}:{minute:02d}:00,000 {level} app.main message {hour}-{minute}\n"
+        for minute in range(count)
+    )
+
+
+@pytest.fixture
+def rotation_set(tmp_path):
+    """Create app.log with numbered, compressed rotations (oldest = highest index)"""
+    with bz2.open(tmp_path / "app.log.4.bz2", "wt") as f:
+        f.write(make_lines(6))
+    with lzma.open(tmp_path / "app.log.3.xz", "wt") as f:
+        f.write(make_lines(7))
+    with gzip.open(tmp_path / "app.log.2.gz", "wt") as f:
+        f.write(make_lines(8))
+    (tmp_path / "app.log.1").write_text(make_lines(9))
+    (tmp_path / "app.log").write_text(make_lines(10))
+    return tmp_path
+
+
+class TestLogFiles:
+    """Test rotation set helpers"""
+
+    def test_rotation_base(self):
+        """Test mapping rotated files to the live log"""
+        assert rotation_base("/var/log/app.log") == "/var/log/app.log"
+        assert rotation_base("/var/log/app.log.1") == "/var/log/app.log"
+        assert rotation_base("/var/log/app.log.12.gz") == "/var/log/app.log"
+        assert rotation_base("/var/log/app.log-20240115.xz") == "/var/log/app.log"
+
+    def test_expand_rotated_in_chronological_order(self, rotation_set):
+        """Test rotated siblings are ordered oldest first"""
+        groups = expand_log_paths([str(rotation_set / "app.log")], rotated=True)
+
+        assert [path.rsplit("/", 1)[1] for path in groups[0]] == [
+            "app.log.4.bz2", "app.log.3.xz", "app.log.2.gz", "app.log.1", "app.log",
+        ]
+
+    def test_expand_without_rotated(self, rotation_set):
+        """Test plain paths are not expanded unless requested"""
+        groups = expand_log_paths([str(rotation_set / "app.log")])
+        assert groups == [[str(rotation_set / "app.log")]]
+
+    def test_expand_glob(self, rotation_set):
+        """Test glob patterns are grouped into one rotation set"""
+        groups = expand_log_paths([str(rotation_set / "app.log*")])
+
+        assert len(groups) == 1
+        assert groups[0][0].endswith("app.log.4.bz2")
+        assert groups[0][-1].endswith("app.log")
+
+    def test_expand_date_rotations(self, tmp_path):
+        """Test date-stamped rotations are ordered by date"""
+        for name in ["web.log", "web.log-20240116.gz", "web.log-20240114.gz"]:
+            (tmp_path / name).write_text("")
+
+        groups = expand_log_paths([str(tmp_path / "web.log")], rotated=True)
+
+        assert [path.rsplit("/", 1)[1] for path in groups[0]] == [
+            "web.log-20240114.gz", "web.log-20240116.gz", "web.log",
+        ]
+
+    def test_open_detects_compression_by_content(self, tmp_path):
+        """Test decompression does not depend on the file extension"""
+        path = tmp_path / "app.log.1"
+        with gzip.open(path, "wt") as f:
+            f.write("compressed line\n")
+
+        with open_log_file(str(path)) as f:
+            assert f.read() == "compressed line\n"
+
+
+class TestBisect:
+    """Test binary search by timestamp"""
+
+    def test_bisect_uses_few_reads(self, tmp_path):
+        """Test the start offset is found with a logarithmic number of probes"""
+        path = tmp_path / "app.log"
+        path.write_text(make_day())
+        parser = LogCollector([str(path)]).parser
+        probes = []
+
+        def get_timestamp(raw):
+            probes.append(raw)
+            return parser.extract_timestamp(raw.decode(), str(path))
+
+        with open(path, "rb") as f:
+            offset = bisect_time_offset(
+                f, path.stat().st_size, datetime(2024, 1, 15, 12, 0, 5), get_timestamp
+            )
+            f.seek(offset)
+            lines = [f.readline().decode() for _ in range(2)]
+
+        assert lines[0].startswith("2024-01-15 12:00:00,000")
+        assert lines[1].startswith("2024-01-15 12:00:10,000")
+        assert len(probes) < 100
+
+    def test_bisect_skips_unparseable_lines(self, tmp_path):
+        """Test probes landing in stack traces read ahead to a timestamp"""
+        path = tmp_path / "app.log"
+        path.write_text(
+            "2024-01-15 10:00:00,000 ERROR app.main failed\n"
+            + "  at frame\n" * 500
+            + "2024-01-15 10:05:00,000 INFO app.main recovered\n"
+        )
+        collector = LogCollector([str(path)], since=datetime(2024, 1, 15, 10, 1))
+
+        with open(path, "rb") as f:
+            f.seek(collector.find_offset(str(path), collector.since))
+            assert f.readline().startswith(b"2024-01-15 10:00:00")
+
+        collector.initialize()
+        assert [entry.message for entry in collector.collect()] == ["recovered"]
+
+    def test_since_until_matches_scan(self, tmp_path):
+        """Test bisected queries return the same entries as a full scan"""
+        path = tmp_path / "app.log"
+        path.write_text(make_day(seconds=7200))
+        since = datetime(2024, 1, 15, 0, 30, 5)
+        until = datetime(2024, 1, 15, 1, 0)
+
+        collector = LogCollector([str(path)], since=since, until=until)
+        collector.initialize()
+        entries = collector.collect()
+
+        everything = LogCollector([str(path)])
+        everything.initialize()
+        expected = [
+            entry.message for entry in everything.collect()
+            if since <= entry.timestamp <= until
+        ]
+
+        assert [entry.message for entry in entries] == expected
+        assert entries[0].message == "tick 1810"
+        assert entries[0].line_number is None
+
+    def test_until_stops_reading(self, tmp_path, monkeypatch):
+        """Test reading stops at the first entry after until"""
+        path = tmp_path / "app.log"
+        path.write_text(make_day(seconds=7200))
+        collector = LogCollector([str(path)], until=datetime(2024, 1, 15, 0, 10))
+        collector.initialize()
+
+        lines_read = []
+        original = collector._iter_group_lines
+
+        def tracking(files):
+            for item in original(files):
+                lines_read.append(item)
+                yield item
+
+        monkeypatch.setattr(collector, "_iter_group_lines", tracking)
+        entries = collector.collect()
+
+        assert entries[-1].message == "tick 600"
+        assert len(lines_read) < 70
+
+
+MIXED_LEVELS = (
+    "2024-01-15 10:00:00,000 INFO app.main starting\n"
+    "2024-01-15 10:00:01,000 ERROR app.db query failed\n"
+    "2024-01-15 10:00:02,000 INFO app.main request handled\n"
+    "2024-01-15T10:00:03Z [worker-1] connection error, retrying\n"
+    "2024-01-15 10:00:04,000 WARNING app.api slow request\n"
+    "Traceback (most recent call last):\n"
+    "  File \"app.py\", line 10, in handle\n"
+    "ValueError: unexpected exception in handler\n"
+    "2024-01-15 10:00:05,000 INFO app.main done\n"
+)
+
+
+class TestLevelPrefilter:
+    """Test byte-level pre-filtering for level queries"""
+
+    def test_candidate_lines_across_chunks(self):
+        """Test candidates are found case-insensitively with small chunks"""
+        data = b"info one\nERROR two\ninfo three\nsome Failure four\ninfo five"
+
+        for chunk_size in (4, 16, 1024):
+            candidates = list(iter_candidate_lines(data, ["err", "fail"], chunk_size=chunk_size))
+            assert [(data[start:end], index) for start, end, index in candidates] == [
+                (b"ERROR two\n", 1), (b"some Failure four\n", 3),
+            ]
+
+    @pytest.mark.parametrize("level", ["ERROR", "WARNING", "INFO"])
+    def test_prefilter_matches_full_scan(self, tmp_path, level):
+        """Test pre-filtered queries return exactly the entries of a full scan"""
+        path = tmp_path / "app.log"
+        path.write_text(MIXED_LEVELS)
+
+        collector = LogCollector([str(path)], level_filter=level)
+        collector.initialize()
+        filtered = collector.collect()
+
+        reference = LogCollector([str(path)], level_filter=level)
+        reference._level_keywords = None
+        reference.initialize()
+
+        assert filtered == reference.collect()
+
+    def test_numeric_json_levels(self, tmp_path):
+        """Test JSON lines are never skipped, since their level may be numeric"""
+        path = tmp_path / "app.jsonl"
+        path.write_text(
+            '{"time": "2024-01-15T10:00:00Z", "level": 30, "msg": "started"}\n'
+            '{"time": "2024-01-15T10:00:01Z", "level": 50, "msg": "disk full"}\n'
+            "2024-01-15 10:00:02,000 ERROR app.db query failed\n"
+        )
+
+        collector = LogCollector([str(path)], level_filter="error")
+        collector.initialize()
+
+        assert [entry.message for entry in collector.collect()] == ["disk full", "query failed"]
+
+    def test_inferred_level_inherits_timestamp(self, tmp_path):
+        """Test keyword-inferred lines keep the timestamp of their entry"""
+        path = tmp_path / "app.log"
+        path.write_text(MIXED_LEVELS)
+
+        collector = LogCollector([str(path)], level_filter="error", multiline=False)
+        collector.initialize()
+        entries = collector.collect()
+
+        assert [(entry.line_number, entry.timestamp.second) for entry in entries] == [
+            (2, 1), (4, 3), (8, 4),
+        ]
+
+    def test_prefilter_keeps_stack_traces(self, tmp_path):
+        """Test continuation lines are not matched on their own but follow their head"""
+        path = tmp_path / "app.log"
+        path.write_text(MIXED_LEVELS)
+
+        collector = LogCollector([str(path)], level_filter="warning")
+        collector.initialize()
+        entries = collector.collect()
+
+        assert [entry.line_number for entry in entries] == [5]
+        assert entries[0].message.splitlines()[-1] == "ValueError: unexpected exception in handler"
+
+
+class TestLogCollector:
+    """Test LogCollector"""
+
+    def test_collect_rotation_set(self, rotation_set):
+        """Test reading a rotation set across all compression formats"""
+        collector = LogCollector([str(rotation_set / "app.log")], rotated=True)
+        collector.initialize()
+
+        entries = collector.collect()
+
+        assert len(entries) == 15
+        assert [entry.timestamp.hour for entry in entries[::3]] == [6, 7, 8, 9, 10]
+        assert entries == sorted(entries, key=lambda entry: entry.timestamp)
+
+        collector.cleanup()
+
+    def test_time_range_skips_files(self, rotation_set, monkeypatch):
+        """Test files outside the time range are never opened for reading"""
+        collector = LogCollector(
+            [str(rotation_set / "app.log")],
+            rotated=True,
+            since=datetime(2024, 1, 15, 8, 1),
+            until=datetime(2024, 1, 15, 9, 0),
+        )
+        collector.initialize()
+
+        read_files = []
+        original = collector._iter_group_lines
+
+        def tracking(files):
+            for log_path, line_number, line in original(files):
+                if log_path not in read_files:
+                    read_files.append(log_path)
+                yield log_path, line_number, line
+
+        monkeypatch.setattr(collector, "_iter_group_lines", tracking)
+        entries = collector.collect()
+
+        assert [path.rsplit("/", 1)[1] for path in read_files] == ["app.log.2.gz", "app.log.1"]
+        assert [entry.message for entry in entries] == [
+            "message 8-1", "message 8-2", "message 9-0",
+        ]
+
+    def test_tail_across_rotation_set(self, rotation_set):
+        """Test tail applies to the end of the rotation set"""
+        collector = LogCollector([str(rotation_set / "app.log")], rotated=True, tail=4)
+        collector.initialize()
+
+        entries = collector.collect()
+
+        assert [entry.message for entry in entries] == [
+            "message 9-2", "message 10-0", "message 10-1", "message 10-2",
+        ]
+
+    def test_level_filter(self, tmp_path):
+        """Test level filtering"""
+        path = tmp_path / "app.log"
+        path.write_text(make_lines(10, level="INFO") + make_lines(11, count=2, level="ERROR"))
+
+        collector = LogCollector([str(path)], level_filter="error")
+        collector.initialize()
+
+        assert [entry.level for entry in collector.collect()] == ["ERROR", "ERROR"]
+
+    def test_multiline_records(self, tmp_path):
+        """Test stack traces are merged into the entry they follow, also with tail"""
+        path = tmp_path / "app.log"
+        path.write_text(make_day(seconds=3000))
+
+        collector = LogCollector([str(path)], contains="tick 1000", tail=250)
+        collector.initialize()
+        entries = collector.collect()
+
+        assert [len(entry.raw_line.splitlines()) for entry in entries] == [3]
+        assert entries[0].message.startswith("tick 1000\nTraceback")
+
+        collector = LogCollector([str(path)], multiline=False, contains="tick 1000")
+        collector.initialize()
+        assert [entry.message for entry in collector.collect()] == ["tick 1000"]
+
+    def test_missing_file(self, tmp_path):
+        """Test missing files raise CollectionError"""
+        collector = LogCollector([str(tmp_path / "missing.log")])
+        with pytest.raises(CollectionError):
+            collector.initialize()
+
+    def test_unmatched_glob(self, tmp_path):
+        """Test glob patterns without matches raise CollectionError"""
+        collector = LogCollector([str(tmp_path / "*.log")])
+        with pytest.raises(CollectionError):
+            collector.initialize()
+
+    def test_collect_requires_initialize(self, tmp_path):
+        """Test collecting before initialize fails"""
+        collector = LogCollector([str(tmp_path / "app.log")])
+        with pytest.raises(CollectionError):
+            collector.collect()
+
+    def test_first_and_last_timestamp(self, rotation_set):
+        """Test probing file time bounds"""
+        collector = LogCollector([str(rotation_set / "app.log")])
+
+        assert collector.get_first_timestamp(str(rotation_set / "app.log.2.gz")) == \
+            datetime(2024, 1, 15, 8, 0)
+        assert collector.get_last_timestamp(str(rotation_set / "app.log.1")) == \
+            datetime(2024, 1, 15, 9, 2)
+        assert collector.get_last_timestamp(str(rotation_set / "app.log.2.gz")) is None
+
+
+DMESG = [
+    "[    0.000000] Linux version 6.1.0\n",
+    "[    1.500000] EXT4-fs (sda1): mounted filesystem\n",
+    "<3>[   12.250000] Out of memory: Killed process 42 (java)\n",
+]
+
+
+class TestKernelLogCollector:
+    """Test KernelLogCollector"""
+
+    def test_dmesg_file(self, tmp_path):
+        """Test dmesg text output is parsed with line numbers as sequence numbers"""
+        path = tmp_path / "dmesg.txt"
+        path.write_text("".join(DMESG))
+
+        collector = KernelLogCollector(str(path), boot_time=datetime(2024, 1, 15, 8, 0))
+        collector.initialize()
+        entries = collector.collect()
+
+        assert [entry.parameters['sequence'] for entry in entries] == [1, 2, 3]
+        assert entries[2].level == "ERROR"
+        assert entries[2].timestamp == datetime(2024, 1, 15, 8, 0, 12, 250000)
+
+    def test_resume_from_state_file(self, tmp_path):
+        """Test messages read by a previous run are skipped"""
+        path = tmp_path / "dmesg.txt"
+        state_file = tmp_path / "state" / "kmsg.json"
+        path.write_text("".join(DMESG[:2]))
+
+        collector = KernelLogCollector(str(path), state_file=str(state_file))
+        collector.initialize()
+        assert len(collector.collect()) == 2
+
+        with open(path, "a") as f:
+            f.write(DMESG[2])
+
+        collector = KernelLogCollector(str(path), state_file=str(state_file))
+        collector.initialize()
+        entries = collector.collect()
+
+        assert [entry.parameters['sequence'] for entry in entries] == [3]
+        assert json.loads(state_file.read_text())[str(path)]['sequence'] == 3
+
+    def test_state_of_another_boot_is_ignored(self, tmp_path):
+        """Test a position saved in another boot is not resumed"""
+        path = tmp_path / "dmesg.txt"
+        state_file = tmp_path / "kmsg.json"
+        path.write_text("".join(DMESG))
+        state_file.write_text(json.dumps({str(path): {'sequence': 2, 'boot_id': 'old-boot'}}))
+
+        collector = KernelLogCollector(str(path), state_file=str(state_file))
+        collector.initialize()
+
+        assert len(collector.collect()) == 3
+
+    def test_device_reads_until_empty(self, tmp_path, monkeypatch):
+        """Test /dev/kmsg records are read one per read until none is ready"""
+        reads = [
+            b"6,10,1000,-;first\n",
+            BrokenPipeError(),
+            b"6,14,2000,-;after overwrite\n",
+            b"6,14,2000,-;after overwrite\n",
+            BlockingIOError(),
+        ]
+
+        def fake_read(fd, size):
+            result = reads.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        path = tmp_path / "kmsg"
+        path.write_text("")
+        collector = KernelLogCollector(str(path), boot_time=datetime(2024, 1, 15))
+        collector.initialize()
+        collector.is_device = True
+        collector.last_sequence = 8
+        monkeypatch.setattr(kmsg_collector.os, "read", fake_read)
+
+        entries = collector.collect()
+
+        assert [entry.message for entry in entries] == ["first", "after overwrite"]
+        assert collector.lost == 4
+        assert collector.last_sequence == 14
+
+    def test_missing_source(self, tmp_path):
+        """Test a missing source raises CollectionError"""
+        collector = KernelLogCollector(str(tmp_path / "missing"))
+        with pytest.raises(CollectionError):
+            collector.initialize()
+
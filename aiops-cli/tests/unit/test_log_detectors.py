@@ -2,9 +2,32 @@
 Unit tests for log detectors
 """
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from aiops.logs.models import LogEntry
-from aiops.logs.detectors import LogLevelAnomalyDetector, LogVolumeAnomalyDetector
+from aiops.logs.detectors import (
+    KernelEventDetector,
+    LogLevelAnomalyDetector,
+    LogVolumeAnomalyDetector,
+    WindowBaseline,
+)
+from aiops.logs.parsers import KmsgParser
+from aiops.core.exceptions import DetectionError
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+
+def make_windows(counts, level="INFO", window_seconds=60):
+    """Generate entries with the given count per window, spread within each window"""
+    for window, count in enumerate(counts):
+        window_start = START + timedelta(seconds=window * window_seconds)
+        for i in range(count):
+            yield LogEntry(
+                timestamp=window_start + timedelta(seconds=i * window_seconds / count),
+                level=level,
+                message=f"Log {window}-{i}",
+                source="/var/log/app.log"
+            )
 
 
 class TestLogLevelAnomalyDetector:
@@ -131,3 +154,251 @@ class TestLogVolumeAnomalyDetector:
         assert len(events) == 0
 
         detector.cleanup()
+
+    def test_event_uses_log_time(self):
+        """Test events cover the log-time window, not the detection time"""
+        detector = LogVolumeAnomalyDetector(volume_threshold=100)
+        detector.initialize()
+
+        events = detector.detect(make_windows([50, 150, 20]))
+
+        assert len(events) == 1
+        assert events[0].timestamp == START + timedelta(minutes=1)
+        assert events[0].end_time == START + timedelta(minutes=2)
+        assert events[0].metadata['baseline_method'] == 'static'
+
+    def test_rolling_baseline(self):
+        """Test a busy but steady service is learned and a spike is detected"""
+        detector = LogVolumeAnomalyDetector(volume_threshold=None, min_history=10)
+        detector.initialize()
+        counts = [2000 + (i % 5) * 20 for i in range(30)] + [2300, 2040]
+
+        events = detector.detect(make_windows(counts))
+
+        assert [event.timestamp for event in events] == [START + timedelta(minutes=30)]
+        assert events[0].metadata['baseline_method'] == 'rolling'
+        assert events[0].metrics['baseline_mean'] == pytest.approx(2040)
+        assert events[0].metrics['z_score'] > 3
+
+    def test_static_threshold_only_until_baseline(self):
+        """Test a service always above the static threshold stops alerting once learned"""
+        detector = LogVolumeAnomalyDetector(volume_threshold=100, min_history=5)
+        detector.initialize()
+
+        events = detector.detect(make_windows([300] * 20))
+
+        assert len(events) == 5
+        assert {event.metadata['baseline_method'] for event in events} == {'static'}
+
+    def test_seasonal_baseline(self):
+        """Test a recurring peak is expected only at its own time of the period"""
+        detector = LogVolumeAnomalyDetector(
+            volume_threshold=None, seasonality_seconds=600, history=3, min_history=2
+        )
+        detector.initialize()
+        period = [10, 10, 10, 10, 10, 200, 10, 10, 10, 10]
+        shifted = [10, 10, 10, 200, 10, 200, 10, 10, 10, 10]
+
+        events = detector.detect(make_windows(period * 3 + shifted))
+
+        assert [event.timestamp for event in events] == [START + timedelta(minutes=33)]
+        assert events[0].metadata['baseline_method'] == 'seasonal'
+
+    def test_streaming_updates_and_gaps(self):
+        """Test feed() emits closed windows only and empty windows count as zero"""
+        detector = LogVolumeAnomalyDetector(volume_threshold=None, min_history=5)
+        detector.initialize()
+
+        assert detector.feed(make_windows([10] * 5)) == []
+        # Five silent minutes lower the baseline, then a burst follows
+        burst = [LogEntry(timestamp=START + timedelta(minutes=10), level="INFO",
+                          message=f"Log {i}", source="/var/log/app.log") for i in range(40)]
+        assert detector.feed(burst) == []
+
+        events = detector.flush()
+        assert len(events) == 1
+        assert events[0].metrics['baseline_mean'] == pytest.approx(5.0)
+        assert events[0].metrics['baseline_std'] == pytest.approx(5.0)
+        assert detector.flush() == []
+
+    def test_invalid_settings(self):
+        """Test invalid window settings are rejected"""
+        with pytest.raises(DetectionError):
+            LogVolumeAnomalyDetector(window_seconds=0)
+        with pytest.raises(DetectionError):
+            LogVolumeAnomalyDetector(window_seconds=60, seasonality_seconds=90)
+
+
+class TestWindowedLevelDetection:
+    """Test windowed LogLevelAnomalyDetector"""
+
+    def test_error_burst_against_baseline(self):
+        """Test an error burst is detected relative to the usual error count"""
+        detector = LogLevelAnomalyDetector(error_threshold=None, warning_threshold=None,
+                                           min_history=5)
+        detector.initialize()
+        entries = sorted(
+            list(make_windows([20] * 10 + [80], level="ERROR")) + list(make_windows([100] * 11)),
+            key=lambda entry: entry.timestamp
+        )
+
+        events = detector.detect(entries)
+
+        assert [event.type for event in events] == ['high_error_rate']
+        assert events[0].timestamp == START + timedelta(minutes=10)
+        assert events[0].metrics['error_count'] == 80
+        assert events[0].metrics['level_distribution'] == {'ERROR': 80, 'INFO': 100}
+
+    def test_timezone_aware_timestamps(self):
+        """Test entries with a UTC offset share windows with naive ones"""
+        detector = LogLevelAnomalyDetector(error_threshold=5)
+        detector.initialize()
+        aware = START.astimezone(timezone(timedelta(hours=2)))
+        logs = [
+            LogEntry(timestamp=aware + timedelta(seconds=i), level="ERROR", message="boom",
+                     source="/var/log/app.log")
+            for i in range(5)
+        ] + [
+            LogEntry(timestamp=START + timedelta(seconds=10 + i), level="ERROR",
+                     message="boom", source="/var/log/app.log")
+            for i in range(5)
+        ]
+
+        events = detector.detect(logs)
+
+        assert [event.metrics['error_count'] for event in events] == [10]
+        assert events[0].timestamp.tzinfo is None
+
+
+class TestWindowBaseline:
+    """Test WindowBaseline"""
+
+    def test_rolling_stats(self):
+        """Test the baseline keeps only the last values of each slot"""
+        baseline = WindowBaseline(history=3, slots=2, min_history=2)
+        for index, value in enumerate([1, 100, 3, 100, 5, 100, 7]):
+            baseline.add(index, value)
+
+        assert baseline.stats(8) == pytest.approx((5.0, (8 / 3) ** 0.5))
+        assert baseline.stats(9) == (100.0, 0.0)
+        assert WindowBaseline(history=3).stats(0) is None
+
+
+OOM_MESSAGES = [
+    "6,100,5000000000,-;java invoked oom-killer: gfp_mask=0xcc0(GFP_KERNEL), order=0, "
+    "oom_score_adj=0",
+    "6,101,5000000100,-;CPU: 1 PID: 4321 Comm: java Not tainted 6.1.0 #1",
+    "6,102,5000000200,-;memory: usage 1048576kB, limit 1048576kB, failcnt 42",
+    "6,103,5000000300,-;oom-kill:constraint=CONSTRAINT_MEMCG,nodemask=(null),cpuset=pod1,"
+    "mems_allowed=0,oom_memcg=/kubepods/pod1,task_memcg=/kubepods/pod1/app,task=java,"
+    "pid=4321,uid=1000",
+    "3,104,5000000400,-;Memory cgroup out of memory: Killed process 4321 (java) "
+    "total-vm:4000000kB, anon-rss:1040000kB, file-rss:8000kB, shmem-rss:0kB, UID:1000 "
+    "pgtables:2440kB oom_score_adj:0",
+    "6,105,5000100000,-;oom_reaper: reaped process 4321 (java), now anon-rss:0kB, "
+    "file-rss:0kB, shmem-rss:0kB",
+]
+
+
+def kernel_entries(records):
+    """Parse /dev/kmsg records booted at START"""
+    parser = KmsgParser(boot_time=START)
+    return [parser.parse_record(record) for record in records]
+
+
+class TestKernelEventDetector:
+    """Test KernelEventDetector"""
+
+    def test_oom_kill_record(self):
+        """Test the messages of one OOM kill are assembled into one event"""
+        detector = KernelEventDetector()
+        detector.initialize()
+
+        event, = detector.detect(kernel_entries(OOM_MESSAGES))
+
+        assert event.type == "oom_kill"
+        assert event.severity == "critical"
+        assert event.timestamp == START + timedelta(seconds=5000, microseconds=400)
+        assert event.metrics == {
+            'pid': 4321,
+            'rss_kb': 1048000,
+            'anon_rss_kb': 1040000,
+            'total_vm_kb': 4000000,
+            'memcg_usage_kb': 1048576,
+            'memcg_limit_kb': 1048576,
+        }
+        oom = event.metadata['oom_kill']
+        assert oom['process_name'] == "java"
+        assert oom['trigger_process'] == "java"
+        assert oom['cgroup'] == "/kubepods/pod1/app"
+        assert oom['oom_memcg'] == "/kubepods/pod1"
+        assert oom['constraint'] == "CONSTRAINT_MEMCG"
+        assert oom['uid'] == 1000
+        assert event.metadata['sequence'] == 104
+
+    def test_legacy_killed_process(self):
+        """Test a Killed process line alone is an OOM kill"""
+        detector = KernelEventDetector()
+        detector.initialize()
+
+        event, = detector.detect(kernel_entries([
+            "3,7,1000,-;Out of memory: Kill process 99 (mysqld) score 900 or sacrifice child",
+            "3,8,1001,-;Killed process 99 (mysqld) total-vm:2000kB, anon-rss:1500kB, "
+            "file-rss:10kB",
+        ]))
+
+        assert event.metrics == {'pid': 99, 'rss_kb': 1510, 'anon_rss_kb': 1500,
+                                 'total_vm_kb': 2000}
+
+    def test_unnamed_and_invalid_kills(self):
+        """Test a kill without a process name is reported and invalid records are skipped"""
+        detector = KernelEventDetector()
+        detector.initialize()
+
+        events = detector.detect(kernel_entries([
+            "3,8,1001,-;Killed process 99 () total-vm:2000kB, anon-rss:1500kB, file-rss:10kB",
+            "3,9,1002,-;Killed process 100 (mysqld) total-vm:2000kB",
+        ]))
+
+        assert [event.metadata['oom_kill']['process_name'] for event in events] == [
+            "unknown", "mysqld",
+        ]
+        assert detector._oom_event({'timestamp': START, 'pid': -1, 'process_name': ''}) is None
+
+    def test_summary_without_killed_line(self):
+        """Test a kill whose Killed process message is missing is reported on flush"""
+        detector = KernelEventDetector()
+        detector.initialize()
+
+        event, = detector.detect(kernel_entries(OOM_MESSAGES[:4]))
+
+        assert event.metrics['pid'] == 4321
+        assert event.metadata['oom_kill']['rss_kb'] is None
+
+    def test_hung_task_and_io_errors_cool_down(self):
+        """Test repeated hung task and I/O error messages are reported once per cooldown"""
+        detector = KernelEventDetector(cooldown_seconds=60)
+        detector.initialize()
+
+        events = detector.detect(kernel_entries([
+            "3,1,1000000,-;INFO: task kworker/0:1:123 blocked for more than 120 seconds.",
+            "3,2,2000000,-;blk_update_request: I/O error, dev sda, sector 2048 op 0x0:(READ)",
+            "3,3,3000000,-;Buffer I/O error on dev sda1, logical block 0, async page read",
+            "3,4,4000000,-;I/O error, dev sda, sector 4096 op 0x1:(WRITE)",
+            "3,5,90000000,-;INFO: task kworker/0:1:123 blocked for more than 240 seconds.",
+        ]))
+
+        assert [(event.type, event.metadata.get('task') or event.metadata.get('device'))
+                for event in events] == [
+            ("hung_task", "kworker/0:1"),
+            ("disk_io_error", "sda"),
+            ("disk_io_error", "sda1"),
+            ("hung_task", "kworker/0:1"),
+        ]
+        assert events[-1].metrics == {'pid': 123, 'blocked_seconds': 240}
+
+    def test_requires_initialize(self):
+        """Test detecting before initialize fails"""
+        with pytest.raises(DetectionError):
+            KernelEventDetector().detect([])
+
@@ -0,0 +1,187 @@
+"""
+Unit tests for the log token index
+"""
+import os
+import pytest
+from datetime import datetime
+from aiops.logs.collectors import LogCollector
+from aiops.logs.index import LogIndex
+from aiops.logs.index import log_index as log_index_module
+from aiops.logs.parsers import TemplateExtractor
+
+
+LINES = [
+    "2024-01-15 10:00:00,000 INFO app.db connection opened to db-1\n",
+    "2024-01-15 10:01:00,000 ERROR app.db connection timeout after 30s\n",
+    "2024-01-15 10:02:00,000 WARNING app.api slow request 1200ms\n",
+    "2024-01-15 10:03:00,000 ERROR app.api request failed with status 502\n",
+    "2024-01-15 10:04:00,000 INFO app.db connection closed\n",
+]
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    """Create a small application log"""
+    path = tmp_path / "app.log"
+    path.write_text("".join(LINES))
+    return path
+
+
+@pytest.fixture
+def index(log_file, tmp_path):
+    """Create an index stored under the test directory"""
+    with LogIndex(str(log_file), str(tmp_path / "index")) as log_index:
+        yield log_index
+
+
+class TestTemplateExtractor:
+    """Test TemplateExtractor"""
+
+    def test_variable_tokens_masked(self):
+        """Test tokens containing digits become placeholders"""
+        extractor = TemplateExtractor()
+
+        template, template_id = extractor.extract("request 42 took 120ms on host-7")
+        other_template, other_id = extractor.extract("request 43 took 98ms on host-2")
+
+        assert template == "request <*> took <*> on <*>"
+        assert other_template == template
+        assert other_id == template_id
+
+    def test_tokenize(self):
+        """Test word tokens are lowercased, unique and skip pure numbers"""
+        extractor = TemplateExtractor()
+        assert extractor.tokenize("Timeout after 30 s, TIMEOUT again") == [
+            "timeout", "after", "s", "again",
+        ]
+
+
+class TestLogIndex:
+    """Test LogIndex"""
+
+    def test_update_and_search(self, index):
+        """Test searching by level and words"""
+        assert index.update() == 5
+
+        assert [line for _, line in index.search(level="ERROR")] == [2, 4]
+        assert [line for _, line in index.search(contains="connection")] == [1, 2, 5]
+        assert [line for _, line in index.search(level="ERROR", contains="connection")] == [2]
+        assert index.search(contains="nonexistent") == []
+
+    def test_search_by_template(self, index):
+        """Test searching by template id"""
+        index.update()
+        _, template_id = TemplateExtractor().extract("request failed with status 502")
+
+        assert [line for _, line in index.search(template_id=template_id)] == [4]
+
+    def test_read_entries(self, index):
+        """Test matches are read back with their line numbers"""
+        index.update()
+
+        entries = list(index.read_entries(index.search(level="ERROR")))
+
+        assert [entry.line_number for entry in entries] == [2, 4]
+        assert entries[0].message == "connection timeout after 30s"
+
+    def test_incremental_update(self, index, log_file):
+        """Test only appended lines are indexed"""
+        index.update()
+        assert index.update() == 0
+
+        with open(log_file, "a") as f:
+            f.write("2024-01-15 10:05:00,000 ERROR app.db connection reset\n")
+            f.write("2024-01-15 10:06:00,000 ERROR app.db partial")
+
+        assert index.update() == 1
+        assert [line for _, line in index.search(level="ERROR")] == [2, 4, 6]
+        assert index.stats()["indexed_lines"] == 6
+
+    def test_truncation_rebuilds(self, index, log_file):
+        """Test a truncated or rewritten file is reindexed from scratch"""
+        index.update()
+
+        log_file.write_text(LINES[1])
+
+        assert index.update() == 1
+        assert [line for _, line in index.search(level="ERROR")] == [1]
+        assert index.search(level="INFO") == []
+
+    def test_rotation_rebuilds(self, index, log_file):
+        """Test a file replaced by rotation is reindexed from scratch"""
+        index.update()
+
+        rotated = log_file.with_name("app.log.1")
+        os.rename(log_file, rotated)
+        log_file.write_text("".join(LINES) + LINES[0])
+
+        assert index.update() == 6
+        assert [line for _, line in index.search(level="INFO")] == [1, 5, 6]
+
+    def test_time_range_selects_blocks(self, log_file, tmp_path, monkeypatch):
+        """Test blocks outside the time range are not searched"""
+        monkeypatch.setattr(log_index_module, "BLOCK_SIZE", 1)
+
+        with LogIndex(str(log_file), str(tmp_path / "index")) as index:
+            index.update()
+            assert index.stats()["blocks"] == 5
+
+            matches = index.search(
+                since=datetime(2024, 1, 15, 10, 1),
+                until=datetime(2024, 1, 15, 10, 3),
+            )
+
+        assert [line for _, line in matches] == [2, 3, 4]
+
+
+class TestIndexedCollector:
+    """Test LogCollector with use_index"""
+
+    def test_indexed_query_matches_scan(self, log_file, tmp_path):
+        """Test indexed and scanned queries return the same entries"""
+        with open(log_file, "a") as f:
+            f.write("2024-01-15 10:05:00,000 ERROR app.db connection reset")
+
+        results = []
+        for use_index in (False, True):
+            collector = LogCollector(
+                [str(log_file)],
+                level_filter="error",
+                contains="Connection",
+                use_index=use_index,
+                index_dir=str(tmp_path / "index"),
+            )
+            collector.initialize()
+            results.append([(entry.line_number, entry.message) for entry in collector.collect()])
+
+        assert results[0] == results[1] == [
+            (2, "connection timeout after 30s"),
+            (6, "connection reset"),
+        ]
+
+    @pytest.mark.parametrize("query", [
+        {"level_filter": "error"},
+        {"contains": "handle"},
+        {"since": datetime(2024, 1, 15, 10, 2, 30), "until": datetime(2024, 1, 15, 10, 3, 30)},
+    ])
+    def test_multiline_and_inherited_timestamps(self, log_file, tmp_path, query):
+        """Test indexed queries assemble records and inherit timestamps like a scan"""
+        lines = list(LINES)
+        lines[2:2] = [
+            "Traceback (most recent call last):\n",
+            '  File "app.py", line 7, in handle\n',
+            "OverflowError: request error\n",
+        ]
+        lines.insert(6, "retry scheduled after error\n")
+        log_file.write_text("".join(lines))
+
+        results = []
+        for use_index in (False, True):
+            collector = LogCollector([str(log_file)], use_index=use_index,
+                                     index_dir=str(tmp_path / "index"), **query)
+            collector.initialize()
+            results.append([(entry.timestamp, entry.level, entry.message)
+                            for entry in collector.collect()])
+
+        assert results[0] == results[1]
+        assert results[0]
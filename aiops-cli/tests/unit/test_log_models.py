@@ -3,7 +3,7 @@ Unit tests for log models
 """
 import pytest
 from datetime import datetime
-from aiops.logs.models import LogEntry, LogLevel, LogPattern
+from aiops.logs.models import LogEntry, LogLevel, LogMetric, LogPattern, OOMKill
 
 
 class TestLogEntry:
@@ -276,3 +276,68 @@ class TestLogPattern:
         assert result['count'] == 100
         assert result['example_messages'] == ["User alice logged in", "User bob logged in"]
         assert result['parameters'] == ["username"]
+
+
+class TestLogMetric:
+    """Test LogMetric model"""
+
+    def test_to_dict_flattens_series(self):
+        """Test counts are flattened into named series"""
+        metric = LogMetric(
+            timestamp=datetime(2024, 1, 15, 10, 0),
+            interval_seconds=5.0,
+            total=3,
+            levels={"ERROR": 2, "INFO": 1},
+            templates={"abc123": 3},
+            processes={"app.db": 3},
+        )
+
+        assert metric.to_dict() == {
+            'timestamp': '2024-01-15T10:00:00',
+            'interval_seconds': 5.0,
+            'total': 3,
+            'level.ERROR': 2,
+            'level.INFO': 1,
+            'template.abc123': 3,
+            'process.app.db': 3,
+        }
+
+    def test_invalid_interval(self):
+        """Test that a non-positive interval raises ValueError"""
+        with pytest.raises(ValueError, match="interval_seconds must be positive"):
+            LogMetric(timestamp=datetime.now(), interval_seconds=0)
+
+
+class TestOOMKill:
+    """Test OOMKill model"""
+
+    def test_rss_and_to_dict(self):
+        """Test resident memory sums the RSS parts"""
+        kill = OOMKill(
+            timestamp=datetime(2024, 1, 15, 10, 0),
+            pid=4321,
+            process_name="java",
+            anon_rss_kb=1000,
+            file_rss_kb=24,
+            constraint="CONSTRAINT_MEMCG",
+        )
+
+        assert kill.rss_kb == 1024
+        assert kill.is_cgroup_limit
+        data = kill.to_dict()
+        assert data['timestamp'] == '2024-01-15T10:00:00'
+        assert data['rss_kb'] == 1024
+        assert data['shmem_rss_kb'] is None
+
+    def test_unknown_rss(self):
+        """Test resident memory is unknown without RSS values"""
+        kill = OOMKill(timestamp=datetime.now(), pid=1, process_name="init")
+
+        assert kill.rss_kb is None
+        assert not kill.is_cgroup_limit
+
+    def test_empty_process_name(self):
+        """Test that an empty process name raises ValueError"""
+        with pytest.raises(ValueError, match="process_name cannot be empty"):
+            OOMKill(timestamp=datetime.now(), pid=1, process_name="")
+
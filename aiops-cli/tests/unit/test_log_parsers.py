@@ -0,0 +1,498 @@
+"""
+Unit tests for log parsers
+"""
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from aiops.logs.parsers import KmsgParser, LogParser, MultilineAssembler, TimestampParser
+
+
+PYTHON_LINE = "2024-01-15 10:30:45,123 INFO app.server Request handled in 12ms"
+SYSLOG_LINE = "Jan 15 10:30:45 web01 sshd[1234]: Accepted publickey for deploy"
+
+
+class TestLogParserSniffing:
+    """Test per-source format sniffing"""
+
+    def test_locks_format_after_sniff_lines(self):
+        """Test that the dominant format is locked after sniffing"""
+        parser = LogParser(sniff_lines=5)
+
+        for i in range(4):
+            parser.parse(SYSLOG_LINE, "/var/log/syslog", i + 1)
+        assert parser.get_format("/var/log/syslog") is None
+
+        parser.parse(SYSLOG_LINE, "/var/log/syslog", 5)
+        assert parser.get_format("/var/log/syslog") == 'syslog'
+
+    def test_sources_sniffed_independently(self):
+        """Test that each source keeps its own format"""
+        parser = LogParser(sniff_lines=3)
+
+        for i in range(3):
+            parser.parse(SYSLOG_LINE, "/var/log/syslog", i + 1)
+            parser.parse(PYTHON_LINE, "/var/log/app.log", i + 1)
+
+        assert parser.get_format("/var/log/syslog") == 'syslog'
+        assert parser.get_format("/var/log/app.log") == 'python'
+
+    def test_locked_format_miss_still_parses(self):
+        """Test that lines not matching the locked format use the other patterns"""
+        parser = LogParser(sniff_lines=3, resniff_misses=10)
+
+        for i in range(3):
+            parser.parse(PYTHON_LINE, "/var/log/app.log", i + 1)
+
+        entry = parser.parse(SYSLOG_LINE, "/var/log/app.log", 4)
+
+        assert entry.hostname == 'web01'
+        assert entry.process == 'sshd'
+        assert entry.pid == 1234
+        assert parser.get_format("/var/log/app.log") == 'python'
+
+    def test_specific_format_wins_over_locked_generic(self):
+        """Test python lines parse the same whether or not the source locked to generic"""
+        generic_line = "2024-01-15 10:30:44 ERROR [worker] job failed"
+        fresh = LogParser().parse(PYTHON_LINE, "/var/log/app.log", 4)
+        parser = LogParser(sniff_lines=3)
+        for i in range(3):
+            parser.parse(generic_line, "/var/log/app.log", i + 1)
+        assert parser.get_format("/var/log/app.log") == 'generic'
+
+        entry = parser.parse(PYTHON_LINE, "/var/log/app.log", 4)
+
+        assert (entry.process, entry.message) == ('app.server', 'Request handled in 12ms')
+        assert entry.to_dict() == fresh.to_dict()
+        assert parser.parse(generic_line, "/var/log/app.log", 5).process == 'worker'
+        assert parser.get_format("/var/log/app.log") == 'generic'
+
+    def test_resniff_after_repeated_misses(self):
+        """Test that repeated misses drop the lock and re-sniff"""
+        parser = LogParser(sniff_lines=3, resniff_misses=2)
+
+        for i in range(3):
+            parser.parse(PYTHON_LINE, "/var/log/app.log", i + 1)
+        assert parser.get_format("/var/log/app.log") == 'python'
+
+        for i in range(2):
+            parser.parse(SYSLOG_LINE, "/var/log/app.log")
+        assert parser.get_format("/var/log/app.log") is None
+
+        for i in range(3):
+            parser.parse(SYSLOG_LINE, "/var/log/app.log")
+        assert parser.get_format("/var/log/app.log") == 'syslog'
+
+    def test_unmatched_source_stays_unlocked(self):
+        """Test that a source with no matching format is never locked"""
+        parser = LogParser(sniff_lines=2)
+
+        for i in range(5):
+            entry = parser.parse("plain text without structure", "/tmp/plain.log")
+            assert entry.message == "plain text without structure"
+
+        assert parser.get_format("/tmp/plain.log") is None
+
+    def test_reset(self):
+        """Test forgetting sniffed formats"""
+        parser = LogParser(sniff_lines=1)
+        parser.parse(PYTHON_LINE, "/var/log/app.log")
+        parser.parse(SYSLOG_LINE, "/var/log/syslog")
+
+        parser.reset("/var/log/app.log")
+        assert parser.get_format("/var/log/app.log") is None
+        assert parser.get_format("/var/log/syslog") == 'syslog'
+
+        parser.reset()
+        assert parser.get_format("/var/log/syslog") is None
+
+    def test_invalid_settings(self):
+        """Test parameter validation"""
+        with pytest.raises(ValueError):
+            LogParser(sniff_lines=0)
+        with pytest.raises(ValueError):
+            LogParser(resniff_misses=0)
+
+
+class TestLogLevelDetection:
+    """Test level detection from message keywords"""
+
+    @pytest.mark.parametrize("message,expected", [
+        ("user logged in", "INFO"),
+        ("kernel panic - not syncing", "FATAL"),
+        ("CRITICAL disk failure on sda", "CRITICAL"),
+        ("connection failed, warning issued", "ERROR"),
+        ("NullPointerException at line 10", "ERROR"),
+        ("Disk usage warning", "WARNING"),
+        ("debug: cache hit", "DEBUG"),
+        ("stack tracerr", "ERROR"),
+    ])
+    def test_detect_level_from_message(self, message, expected):
+        """Test that the most severe keyword wins"""
+        parser = LogParser()
+        assert parser._detect_level_from_message(message) == expected
+
+    def test_fallback_entry_level(self):
+        """Test level detection on unstructured lines"""
+        parser = LogParser()
+        entry = parser.parse("something FAILED badly", "/tmp/plain.log")
+        assert entry.level == "ERROR"
+
+    def test_level_keywords(self):
+        """Test pre-filter keywords cover explicit and inferred levels"""
+        parser = LogParser()
+
+        assert parser.level_keywords("error") == ["err", "exception", "failed", "failure"]
+        assert parser.level_keywords("WARNING") == ["warn"]
+        assert parser.level_keywords("FATAL") == ["fatal", "panic"]
+        assert parser.level_keywords("INFO") is None
+
+
+class TestJsonLines:
+    """Test JSON-lines parsing"""
+
+    def test_default_fields(self):
+        """Test common JSON keys map to entry fields and the rest are kept"""
+        parser = LogParser()
+        line = ('{"timestamp": "2024-01-15T10:30:45.123Z", "level": "warn", '
+                '"message": "slow query", "pid": 42, "host": "db01", "logger": "app.db", '
+                '"duration_ms": 1200}')
+
+        entry = parser.parse(line, "/var/log/app.jsonl", 7)
+
+        assert entry.timestamp == datetime(2024, 1, 15, 10, 30, 45, 123000)
+        assert entry.level == "WARNING"
+        assert entry.message == "slow query"
+        assert entry.pid == 42
+        assert entry.hostname == "db01"
+        assert entry.process == "app.db"
+        assert entry.line_number == 7
+        assert entry.parameters == {"duration_ms": 1200}
+
+    def test_custom_field_mapping(self):
+        """Test configured keys, including short field names, take precedence"""
+        parser = LogParser(json_fields={"ts": "when", "msg": ["text", "body"], "level": "sev"})
+        line = ('{"when": "2024-01-15 10:30:45", "sev": "ERROR", "body": "disk full", '
+                '"message": "x"}')
+
+        entry = parser.parse(line, "/var/log/app.jsonl")
+
+        assert entry.timestamp == datetime(2024, 1, 15, 10, 30, 45)
+        assert entry.level == "ERROR"
+        assert entry.message == "disk full"
+        assert entry.parameters == {"message": "x"}
+
+    def test_unknown_field_rejected(self):
+        """Test mapping an unknown entry field fails"""
+        with pytest.raises(ValueError):
+            LogParser(json_fields={"color": "c"})
+
+    @pytest.mark.parametrize("level,expected", [
+        (50, "ERROR"), (60, "FATAL"), (30, "INFO"), ("Warning", "WARNING"), ("crit", "CRITICAL"),
+        (["x"], "UNKNOWN"), ({"name": "error"}, "UNKNOWN"), (True, "UNKNOWN"),
+    ])
+    def test_level_values(self, level, expected):
+        """Test string and bunyan/pino numeric levels, and levels that are neither"""
+        parser = LogParser()
+        entry = parser.parse(json.dumps({"level": level, "msg": "m"}), "/tmp/a.jsonl")
+        assert entry.level == expected
+
+    def test_level_inferred_from_message(self):
+        """Test lines without a level field fall back to keyword detection"""
+        parser = LogParser()
+        entry = parser.parse('{"msg": "upload failed"}', "/tmp/a.jsonl")
+        assert entry.level == "ERROR"
+
+    def test_epoch_timestamps(self):
+        """Test epoch seconds and milliseconds are read as UTC"""
+        parser = LogParser()
+
+        seconds = parser.parse('{"time": 1705314645.5, "msg": "a"}', "/tmp/a.jsonl")
+        millis = parser.parse('{"time": 1705314645500, "msg": "b"}', "/tmp/a.jsonl")
+
+        assert seconds.timestamp == datetime(2024, 1, 15, 10, 30, 45, 500000)
+        assert millis.timestamp == seconds.timestamp
+
+    def test_missing_timestamp_inherits(self):
+        """Test JSON lines without a timestamp inherit the previous one"""
+        parser = LogParser()
+        parser.parse('{"ts": "2024-01-15T10:30:45Z", "msg": "first"}', "/tmp/a.jsonl")
+
+        entry = parser.parse('{"msg": "second"}', "/tmp/a.jsonl")
+
+        assert entry.timestamp == datetime(2024, 1, 15, 10, 30, 45)
+
+    def test_invalid_json_uses_text_patterns(self):
+        """Test lines that only look like JSON are parsed as text"""
+        parser = LogParser()
+        entry = parser.parse('{not json} ERROR something broke', "/tmp/a.log")
+
+        assert entry.message == '{not json} ERROR something broke'
+        assert entry.level == "ERROR"
+        assert entry.parameters is None
+
+    def test_extract_timestamp(self):
+        """Test timestamp extraction from JSON lines"""
+        parser = LogParser()
+        assert parser.extract_timestamp('{"ts": "2024-01-15T10:30:45Z", "msg": "m"}') == \
+            datetime(2024, 1, 15, 10, 30, 45)
+        assert parser.extract_timestamp('{"msg": "m"}') is None
+
+
+PYTHON_TRACE = [
+    "2024-01-15 10:30:45,123 ERROR app.worker job failed",
+    "Traceback (most recent call last):",
+    "  File \"worker.py\", line 12, in run",
+    "    handle(job)",
+    "KeyError: 'id'",
+    "",
+    "During handling of the above exception, another exception occurred:",
+    "",
+    "Traceback (most recent call last):",
+    "  File \"worker.py\", line 14, in run",
+    "RuntimeError: job 7 failed",
+    "2024-01-15 10:30:46,000 INFO app.worker next job",
+]
+
+JAVA_TRACE = [
+    "2024-01-15 10:30:45.123 ERROR 1 --- [main] o.s.boot.SpringApplication : "
+    "Application run failed",
+    "java.lang.IllegalStateException: Failed to execute CommandLineRunner",
+    "\tat org.springframework.boot.SpringApplication.run(SpringApplication.java:771)",
+    "Caused by: java.net.ConnectException: Connection refused",
+    "\tat java.base/sun.nio.ch.Net.connect0(Native Method)",
+    "\t... 12 more",
+    "2024-01-15 10:30:46.000 INFO 1 --- [main] o.s.boot.SpringApplication : Started",
+]
+
+
+def numbered(lines, source="/var/log/app.log"):
+    """Attach source and line numbers to raw lines"""
+    return [(source, number, line) for number, line in enumerate(lines, 1)]
+
+
+class TestMultilineAssembler:
+    """Test multiline record assembly"""
+
+    @pytest.mark.parametrize("lines", [PYTHON_TRACE, JAVA_TRACE])
+    def test_stack_trace_is_one_record(self, lines):
+        """Test chained Python and Java traces stay with their log line"""
+        records = list(MultilineAssembler().assemble(numbered(lines)))
+
+        assert [(line_number, len(record)) for _, line_number, record in records] == [
+            (1, len(lines) - 1), (len(lines), 1),
+        ]
+
+    def test_records_never_span_sources(self):
+        """Test a continuation line in another file starts a new record"""
+        lines = numbered(PYTHON_TRACE[:2]) + numbered(["  indented first line"], "/var/log/b.log")
+
+        records = list(MultilineAssembler().assemble(lines))
+
+        assert [(source, record) for source, _, record in records] == [
+            ("/var/log/app.log", PYTHON_TRACE[:2]),
+            ("/var/log/b.log", ["  indented first line"]),
+        ]
+
+    def test_start_pattern_per_source(self):
+        """Test a start pattern replaces the default rule for matching sources"""
+        assembler = MultilineAssembler({"*/audit.log": r"\[\d{4}-"})
+
+        assert assembler.is_continuation("user=root cmd=reboot", "/var/log/audit.log")
+        assert not assembler.is_continuation("[2024-01-15] login", "/var/log/audit.log")
+        assert not assembler.is_continuation("user=root cmd=reboot", "/var/log/app.log")
+
+    def test_invalid_settings(self):
+        """Test invalid patterns and limits are rejected"""
+        with pytest.raises(ValueError):
+            MultilineAssembler({"*": "("})
+        with pytest.raises(ValueError):
+            MultilineAssembler(max_lines=0)
+
+    def test_max_lines_marker(self):
+        """Test oversized records are truncated with a marker line"""
+        lines = ["2024-01-15 10:30:45 ERROR boom"] + [f"  frame {i}" for i in range(10)]
+
+        (_, _, record), = MultilineAssembler(max_lines=4).assemble(numbered(lines))
+
+        assert record == lines[:4] + ["... 7 more lines"]
+
+    def test_feed_and_flush_expired(self):
+        """Test follow mode emits a record on the next head or after the timeout"""
+        assembler = MultilineAssembler(flush_timeout=2.0)
+
+        assert assembler.feed("/a.log", None, PYTHON_TRACE[0], now=0.0) is None
+        assert assembler.feed("/a.log", None, PYTHON_TRACE[1], now=1.0) is None
+        assert assembler.flush_expired(now=2.5) == []
+
+        record = assembler.feed("/a.log", None, PYTHON_TRACE[-1], now=3.0)
+        assert record == ("/a.log", None, PYTHON_TRACE[:2])
+
+        assert assembler.flush_expired(now=5.0) == [("/a.log", None, PYTHON_TRACE[-1:])]
+        assert assembler.flush() == []
+
+    def test_parse_record(self):
+        """Test the head line gives the fields and the message keeps the trace"""
+        parser = LogParser()
+
+        entry = parser.parse_record(PYTHON_TRACE[:5], "/var/log/app.log", 3)
+
+        assert entry.level == "ERROR"
+        assert entry.line_number == 3
+        assert entry.timestamp == datetime(2024, 1, 15, 10, 30, 45, 123000)
+        assert entry.message.splitlines() == ["job failed"] + PYTHON_TRACE[1:5]
+        assert entry.raw_line.splitlines() == PYTHON_TRACE[:5]
+
+
+class TestTimestampParser:
+    """Test TimestampParser"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("2024-01-15 10:30:45,123", datetime(2024, 1, 15, 10, 30, 45, 123000)),
+        ("2024-01-15 10:30:45.5", datetime(2024, 1, 15, 10, 30, 45, 500000)),
+        ("2024-01-15 10:30:45", datetime(2024, 1, 15, 10, 30, 45)),
+        ("2024-01-15T10:30:45.123456Z", datetime(2024, 1, 15, 10, 30, 45, 123456)),
+        ("2024-01-15T10:30:45.123Z", datetime(2024, 1, 15, 10, 30, 45, 123000)),
+        ("2024-01-15T10:30:45.123456789", datetime(2024, 1, 15, 10, 30, 45, 123456)),
+        ("2024-01-15T10:30:45", datetime(2024, 1, 15, 10, 30, 45)),
+    ])
+    def test_parse_iso_naive(self, text, expected):
+        """Test ISO and python logging layouts"""
+        parser = TimestampParser()
+        assert parser.parse(text) == expected
+
+    def test_parse_iso_offset(self):
+        """Test ISO timestamps with a numeric offset are timezone-aware"""
+        parser = TimestampParser()
+        tz = timezone(timedelta(hours=8))
+
+        assert parser.parse("2024-01-15T10:30:45+08:00") == \
+            datetime(2024, 1, 15, 10, 30, 45, tzinfo=tz)
+        assert parser.parse("2024-01-15T10:30:45.250+0800") == \
+            datetime(2024, 1, 15, 10, 30, 45, 250000, tzinfo=tz)
+        assert parser.parse("2024-01-15T10:30:45-05:30").utcoffset() == \
+            -timedelta(hours=5, minutes=30)
+
+    def test_parse_apache(self):
+        """Test apache access log layout"""
+        parser = TimestampParser()
+        expected = datetime.strptime("15/Jan/2024:10:30:45 +0000", "%d/%b/%Y:%H:%M:%S %z")
+
+        assert parser.parse("15/Jan/2024:10:30:45 +0000") == expected
+        assert parser.parse("15/Jan/2024:10:30:45 +0000").tzinfo is not None
+
+    def test_parse_syslog_uses_current_year(self):
+        """Test syslog layout gets the current year"""
+        parser = TimestampParser()
+        year = datetime.now().year
+
+        assert parser.parse("Jan 15 10:30:45") == datetime(year, 1, 15, 10, 30, 45)
+        assert parser.parse("Feb  3 01:02:03") == datetime(year, 2, 3, 1, 2, 3)
+
+    def test_extra_formats(self):
+        """Test strptime fallback formats"""
+        parser = TimestampParser(extra_formats=['%d.%m.%Y %H:%M'])
+        assert parser.parse("15.01.2024 10:30") == datetime(2024, 1, 15, 10, 30)
+        assert parser.get_format("app") is None
+        parser.parse("15.01.2024 10:30", "app")
+        assert parser.get_format("app") == '%d.%m.%Y %H:%M'
+
+    @pytest.mark.parametrize("text", [
+        "", "not a timestamp", "2024-13-15 10:30:45", "2024-01-15 10:30:45 junk",
+        "2024-01-15 1a:30:45", "Foo 15 10:30:45", "15/Jan/2024:10:30:45 +99",
+    ])
+    def test_unparseable(self, text):
+        """Test invalid timestamps return None"""
+        assert TimestampParser().parse(text) is None
+
+    def test_remembers_format_per_source(self):
+        """Test the winning format is remembered per source"""
+        parser = TimestampParser()
+        parser.parse("Jan 15 10:30:45", "/var/log/syslog")
+        parser.parse("2024-01-15 10:30:45", "/var/log/app.log")
+
+        assert parser.get_format("/var/log/syslog") == 'syslog'
+        assert parser.get_format("/var/log/app.log") == 'iso'
+
+    def test_cached_prefix_keeps_fraction(self):
+        """Test lines in the same second reuse the cache but keep sub-second precision"""
+        parser = TimestampParser(cache_size=1)
+        first = parser.parse("2024-01-15 10:30:45,100")
+        second = parser.parse("2024-01-15 10:30:45,200")
+        third = parser.parse("2024-01-15 10:30:46,000")
+
+        assert second - first == timedelta(milliseconds=100)
+        assert third - second == timedelta(milliseconds=800)
+
+    def test_log_parser_inherits_last_timestamp(self):
+        """Test lines without timestamp reuse the previous timestamp of the source"""
+        parser = LogParser()
+        first = parser.parse(PYTHON_LINE, "/var/log/app.log")
+        continuation = parser.parse("    at com.example.Main.run(Main.java:42)", "/var/log/app.log")
+
+        assert continuation.timestamp == first.timestamp
+
+
+BOOT = datetime(2024, 1, 15, 8, 0)
+
+
+class TestKmsgParser:
+    """Test kernel message parsing"""
+
+    def test_kmsg_record(self):
+        """Test priority, sequence, monotonic time and device properties"""
+        record = "3,1234,5678901,-;EXT4-fs (sda1): error\\x20here\n SUBSYSTEM=block\n DEVICE=b8:1\n"
+
+        entry = KmsgParser(boot_time=BOOT).parse_record(record)
+
+        assert entry.level == "ERROR"
+        assert entry.process == "kernel"
+        assert entry.message == "EXT4-fs (sda1): error here"
+        assert entry.timestamp == BOOT + timedelta(seconds=5, microseconds=678901)
+        assert entry.parameters == {
+            'sequence': 1234,
+            'monotonic_us': 5678901,
+            'priority': 3,
+            'facility': 0,
+            'subsystem': 'EXT4-fs',
+            'properties': {'SUBSYSTEM': 'block', 'DEVICE': 'b8:1'},
+        }
+
+    @pytest.mark.parametrize("priority,level", [
+        (0, "FATAL"), (2, "CRITICAL"), (3, "ERROR"), (4, "WARNING"), (6, "INFO"), (7, "DEBUG"),
+    ])
+    def test_priority_levels(self, priority, level):
+        """Test syslog priorities map to log levels"""
+        entry = KmsgParser().parse_record(f"{priority},1,0,-;message")
+
+        assert entry.level == level
+
+    def test_user_space_record(self):
+        """Test records written by user space are not attributed to the kernel"""
+        entry = KmsgParser().parse_record("14,7,100,-;systemd[1]: Started session")
+
+        assert entry.parameters['facility'] == 1
+        assert entry.process is None
+
+    def test_dmesg_lines(self):
+        """Test dmesg output with and without raw priority prefixes"""
+        lines = [
+            "[    0.000000] Linux version 6.1.0\n",
+            "<4>[ 5432.100000] Out of memory: Killed process 42 (java)\n",
+            "not a kernel line\n",
+        ]
+
+        entries = KmsgParser(boot_time=BOOT).parse_lines(lines, "dmesg.txt")
+
+        assert [(entry.level, entry.line_number) for entry in entries] == [
+            ("INFO", 1), ("WARNING", 2),
+        ]
+        assert entries[1].timestamp == BOOT + timedelta(seconds=5432.1)
+        assert entries[1].parameters['sequence'] == 2
+
+    def test_malformed(self):
+        """Test malformed records and empty messages are skipped"""
+        parser = KmsgParser()
+
+        assert parser.parse_record("garbage") is None
+        assert parser.parse_record("6,1,0,-;") is None
+
@@ -0,0 +1,265 @@
+"""
+Unit tests for streaming log statistics
+"""
+import random
+import pytest
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from aiops.logs.models import LogEntry
+from aiops.logs.stats import (
+    HyperLogLog, LogMetricDeriver, LogStatistics, MinuteHistogram, SpaceSaving
+)
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+
+def make_entries(count, sources=3, processes=20):
+    """Generate entries spread over one hour, one level in ten being ERROR"""
+    for i in range(count):
+        yield LogEntry(
+            timestamp=START + timedelta(seconds=i * 3600 // count),
+            level="ERROR" if i % 10 == 0 else "INFO",
+            message=f"message {i}",
+            source=f"/var/log/app-{i % sources}.log",
+            process=f"worker-{i % processes}" if i % 4 else None,
+        )
+
+
+class TestSpaceSaving:
+    """Test the heavy hitters sketch"""
+
+    def test_exact_below_capacity(self):
+        """Test counts are exact while all items fit"""
+        sketch = SpaceSaving(capacity=10)
+        items = ["a"] * 5 + ["b"] * 3 + ["c"]
+        for item in items:
+            sketch.add(item)
+
+        assert sketch.top(2) == [("a", 5), ("b", 3)]
+        assert sketch.error("a") == 0
+
+    def test_heavy_hitters_survive_long_tail(self):
+        """Test frequent items are kept and bounded above by count plus error"""
+        rng = random.Random(7)
+        stream = ["hot-1"] * 3000 + ["hot-2"] * 2000
+        stream += [f"rare-{rng.randrange(100000)}" for _ in range(20000)]
+        rng.shuffle(stream)
+
+        sketch = SpaceSaving(capacity=50)
+        for item in stream:
+            sketch.add(item)
+
+        top = dict(sketch.top(2))
+        assert list(top) == ["hot-1", "hot-2"]
+        for item, count in top.items():
+            assert count - sketch.error(item) <= Counter(stream)[item] <= count
+        assert len(sketch._counts) == 50
+
+    def test_invalid_capacity(self):
+        """Test non-positive capacities are rejected"""
+        with pytest.raises(ValueError):
+            SpaceSaving(capacity=0)
+
+
+class TestHyperLogLog:
+    """Test the distinct count estimator"""
+
+    @pytest.mark.parametrize("cardinality", [10, 1000, 50000])
+    def test_estimate_within_error(self, cardinality):
+        """Test estimates stay within a few standard errors"""
+        hll = HyperLogLog()
+        for i in range(cardinality):
+            hll.add(f"process-{i}")
+            hll.add(i)
+
+        assert abs(hll.count() - 2 * cardinality) <= max(1, 0.05 * 2 * cardinality)
+
+    def test_duplicates_not_counted(self):
+        """Test repeated items do not change the estimate"""
+        hll = HyperLogLog()
+        for _ in range(100):
+            for item in ("a", "b", "c"):
+                hll.add(item)
+
+        assert hll.count() == 3
+
+
+class TestMinuteHistogram:
+    """Test the fixed-size rate histogram"""
+
+    def test_minute_buckets(self):
+        """Test counts per minute, including out-of-order times"""
+        histogram = MinuteHistogram(buckets=10)
+        for minute in (3, 1, 1, 2, 0):
+            histogram.add(START + timedelta(minutes=minute, seconds=30))
+
+        assert histogram.series() == [
+            (START + timedelta(minutes=minute), count)
+            for minute, count in [(0, 1), (1, 2), (2, 1), (3, 1)]
+        ]
+
+    def test_timezone_aware_times(self):
+        """Test times with a UTC offset count in the local minute beside naive ones"""
+        histogram = MinuteHistogram(buckets=10)
+        histogram.add(START)
+        histogram.add((START + timedelta(minutes=1)).astimezone(timezone(timedelta(hours=2))))
+
+        assert histogram.series() == [(START, 1), (START + timedelta(minutes=1), 1)]
+
+    def test_coarsens_long_spans(self):
+        """Test buckets widen instead of growing when the span exceeds the array"""
+        histogram = MinuteHistogram(buckets=16)
+        for minute in range(100):
+            histogram.add(START + timedelta(minutes=minute))
+
+        series = histogram.series()
+        assert histogram.width == 8
+        assert len(histogram._counts) == 16
+        assert sum(count for _, count in series) == 100
+        assert series[0][0] <= START and series[-1][0] <= START + timedelta(minutes=99)
+
+
+class TestLogStatistics:
+    """Test LogStatistics"""
+
+    def test_matches_exact_statistics(self):
+        """Test the summary agrees with exact counting on small inputs"""
+        entries = list(make_entries(2000))
+
+        summary = LogStatistics().update(iter(entries)).to_dict()
+
+        assert summary['total_entries'] == 2000
+        assert summary['level_distribution'] == dict(Counter(entry.level for entry in entries))
+        assert summary['error_rate'] == 10.0
+        assert summary['top_sources'] == dict(Counter(entry.source for entry in entries))
+        assert summary['distinct_sources'] == 3
+        assert summary['distinct_processes'] == len({entry.process for entry in entries} - {None})
+        assert summary['time_range'] == {
+            'start': START.isoformat(),
+            'end': max(entry.timestamp for entry in entries).isoformat(),
+        }
+        assert summary['rate_per_minute']['resolution_minutes'] == 1
+        assert summary['rate_per_minute']['peak'] == pytest.approx(2000 / 60, abs=1)
+
+    def test_memory_bounded(self):
+        """Test sketch sizes do not grow with distinct values"""
+        statistics = LogStatistics(top_capacity=20, rate_buckets=60)
+        statistics.update(make_entries(20000, sources=5000, processes=5000))
+
+        assert len(statistics.sources._counts) == 20
+        assert len(statistics.processes._counts) == 20
+        assert len(statistics.rates._counts) == 60
+        assert abs(statistics.to_dict()['distinct_sources'] - 5000) < 250
+
+    def test_mixed_timezone_sources(self):
+        """Test entries with and without a UTC offset share one local time range"""
+        aware = (START + timedelta(minutes=5)).astimezone(timezone(timedelta(hours=-3)))
+        entries = [
+            LogEntry(timestamp=START, level="INFO", message="app", source="app.log"),
+            LogEntry(timestamp=aware, level="INFO", message="GET /", source="access.log"),
+            LogEntry(timestamp=START - timedelta(minutes=1), level="ERROR", message="app",
+                     source="app.log"),
+        ]
+
+        summary = LogStatistics().update(entries).to_dict()
+
+        assert summary['time_range'] == {
+            'start': (START - timedelta(minutes=1)).isoformat(),
+            'end': (START + timedelta(minutes=5)).isoformat(),
+        }
+
+    def test_empty(self):
+        """Test an empty stream"""
+        summary = LogStatistics().update([]).to_dict()
+
+        assert summary['total_entries'] == 0
+        assert summary['time_range'] == {'start': None, 'end': None}
+        assert summary['rate_per_minute']['peak_time'] is None
+
+
+class TestLogMetricDeriver:
+    """Test LogMetricDeriver"""
+
+    def make_entry(self, seconds, level="INFO", message="request 1 done", process="app.api"):
+        """Create an entry some seconds after START"""
+        return LogEntry(timestamp=START + timedelta(seconds=seconds), level=level,
+                        message=message, source="/var/log/app.log", process=process)
+
+    def test_intervals_on_grid(self):
+        """Test entries are counted per grid interval, with empty intervals filled"""
+        deriver = LogMetricDeriver(interval_seconds=5, grid_start=START + timedelta(seconds=1))
+        entries = [self.make_entry(2), self.make_entry(4, "ERROR"), self.make_entry(6),
+                   self.make_entry(17, "ERROR")]
+
+        metrics = list(deriver.feed(entries))
+
+        assert [(metric.timestamp, metric.total, metric.levels) for metric in metrics] == [
+            (START + timedelta(seconds=1), 2, {"INFO": 1, "ERROR": 1}),
+            (START + timedelta(seconds=6), 1, {"INFO": 1}),
+            (START + timedelta(seconds=11), 0, {}),
+            (START + timedelta(seconds=16), 1, {"ERROR": 1}),
+        ]
+
+    def test_timezone_aware_entries(self):
+        """Test entries with a UTC offset are binned in local time beside naive ones"""
+        deriver = LogMetricDeriver(interval_seconds=5, grid_start=START)
+        aware = self.make_entry(3)
+        aware.timestamp = aware.timestamp.astimezone(timezone(timedelta(hours=2)))
+
+        metrics = list(deriver.feed([self.make_entry(1), aware, self.make_entry(7)]))
+
+        assert [(metric.timestamp, metric.total) for metric in metrics] == [
+            (START, 2), (START + timedelta(seconds=5), 1),
+        ]
+
+    def test_streaming_add(self):
+        """Test add() returns only closed intervals"""
+        deriver = LogMetricDeriver(interval_seconds=1)
+
+        assert deriver.add(self.make_entry(0.1)) == []
+        assert deriver.add(self.make_entry(0.9)) == []
+        closed = deriver.add(self.make_entry(1.5))
+
+        assert [metric.total for metric in closed] == [2]
+        assert [metric.total for metric in deriver.flush()] == [1]
+        assert deriver.flush() == []
+
+    def test_long_gap_capped(self):
+        """Test a stray entry far ahead emits empty intervals lazily and at most max_gap"""
+        deriver = LogMetricDeriver(interval_seconds=1, max_gap=3)
+        entries = [self.make_entry(0), self.make_entry(365 * 86400)]
+
+        metrics = deriver.feed(entries)
+        assert next(metrics).total == 1
+        assert [metric.total for metric in metrics] == [0, 0, 0, 1]
+
+        huge = LogMetricDeriver(interval_seconds=1, max_gap=10 ** 9)
+        huge.add(self.make_entry(0))
+        closed = huge._add(self.make_entry(365 * 86400))
+        assert [next(closed).total for _ in range(3)] == [1, 0, 0]
+        with pytest.raises(ValueError):
+            LogMetricDeriver(max_gap=-1)
+
+    def test_template_and_process_series_capped(self):
+        """Test series beyond the limit are counted as other"""
+        deriver = LogMetricDeriver(interval_seconds=60, max_series=2)
+        entries = [
+            self.make_entry(0, message="user 1 logged in", process="auth"),
+            self.make_entry(1, message="user 2 logged in\n  at login()", process="auth"),
+            self.make_entry(2, message="disk full", process="db"),
+            self.make_entry(3, message="cache miss for 7", process="cache"),
+        ]
+
+        metric, = deriver.feed(entries)
+
+        assert sorted(deriver.templates.values()) == ["disk full", "user <*> logged in"]
+        assert sorted(metric.templates.values()) == [1, 1, 2]
+        assert metric.templates["other"] == 1
+        assert metric.processes == {"auth": 2, "db": 1, "other": 1}
+
+    def test_templates_disabled(self):
+        """Test template series can be turned off"""
+        metric, = LogMetricDeriver(templates=False).feed([self.make_entry(0)])
+
+        assert metric.templates == {}
@@ -0,0 +1,75 @@
+"""
+Unit tests for loading anomaly events
+"""
+import json
+from datetime import datetime
+import pytest
+from aiops.correlation import CorrelationMonitor
+from aiops.cpu.models.anomaly_event import AnomalyEvent
+from aiops.rca import load_events
+
+
+START = datetime(2024, 1, 15, 10, 0)
+
+
+def make_event(**fields):
+    """Create an event dictionary as written by to_dict()"""
+    event = AnomalyEvent(
+        id="evt-1", timestamp=START, end_time=None, severity="critical", type="high_cpu",
+        confidence=0.9, metrics={'cpu_percent': 97.0}, baseline=40.0,
+        top_processes=[{'pid': 1, 'name': 'java', 'cpu_percent': 80.0, 'user': 'app'}],
+        algorithm="static_threshold", metadata={'host': 'web-1'},
+    )
+    data = event.to_dict()
+    data.update(fields)
+    return data
+
+
+class TestFromDict:
+    """Test AnomalyEvent.from_dict"""
+
+    def test_round_trip(self):
+        """Test to_dict() output converts back to an equal event"""
+        data = make_event(end_time=START.replace(minute=5).isoformat())
+
+        event = AnomalyEvent.from_dict(data)
+
+        assert event.to_dict() == data
+        assert event.duration_seconds == 300
+
+    def test_defaults(self):
+        """Test hand-written events get defaults and invalid ones raise ValueError"""
+        event = AnomalyEvent.from_dict({'type': 'network_spike'})
+
+        assert (event.severity, event.confidence, event.metrics) == ('warning', 0.5, {})
+        assert event.id and event.end_time is None
+        with pytest.raises(ValueError):
+            AnomalyEvent.from_dict({'severity': 'info'})
+
+
+class TestLoadEvents:
+    """Test load_events"""
+
+    def test_formats(self, tmp_path):
+        """Test JSON arrays, reports listing anomalies and NDJSON load alike"""
+        events = [make_event(), make_event(id="evt-2", type="memory_leak")]
+        (tmp_path / "events.json").write_text(json.dumps(events, indent=2))
+        report = {'summary': {'anomalies_detected': 2}, 'anomalies': events, 'other': [1]}
+        (tmp_path / "report.json").write_text(json.dumps(report))
+        (tmp_path / "events.ndjson").write_text(
+            '\n'.join(json.dumps(event) for event in events) + '\n\n'
+        )
+
+        for name in ["events.json", "report.json", "events.ndjson"]:
+            loaded = load_events(str(tmp_path / name))
+            assert [event.to_dict() for event in loaded] == events
+
+    def test_monitor_events(self, tmp_path):
+        """Test correlation break events written by the collector load back"""
+        monitor = CorrelationMonitor([('a', 'b')], window=5)
+        event = monitor._create_event(('a', 'b'), 0.1, 0.9, 4.0, START, 1.0, 2.0)
+        (tmp_path / "out.json").write_text(json.dumps({'anomalies': [event.to_dict()]}))
+
+        loaded, = load_events(str(tmp_path / "out.json"))
+
+        assert loaded == event